@@ -10,6 +10,7 @@ from threading import Event
 import uptime
 from gevent import sleep
 from cleep.libs.internals.task import Task
+from cleep.libs.internals.startupprofiler import get_startup_profiler
 from cleep.common import MessageResponse, MessageRequest
 from cleep.exception import (NoMessageAvailable, InvalidParameter, BusError, NoResponse, CommandError, CommandInfo,
                              InvalidModule, NotReady)
@@ -770,10 +771,14 @@ class BusClient(threading.Thread):
 
         """
         self.logger.trace('BusClient %s started', self.__module_name)
+        profiler = get_startup_profiler()
+        # wrap on_start before joining to make sure startup profiling waits for it
+        on_start = profiler.wrap(self._on_start, 'apps', self.__module_name, 'start')
 
         # configuration
         try:
-            self._configure()
+            with profiler.phase('apps', self.__module_name, 'configure'):
+                self._configure()
         except Exception:
             self.__continue = False
             self.logger.exception('Exception during module "%s" configuration:', self.__module_name)
@@ -791,7 +796,7 @@ class BusClient(threading.Thread):
 
         # run on_start function asynchronously to avoid dead locks if
         # bus message is mutually used between 2 modules
-        start_task = self.__task_factory.create_task(None, self._on_start, end_callback=self.__started_callback)
+        start_task = self.__task_factory.create_task(None, on_start, end_callback=self.__started_callback, long_running=True)
         start_task.start()
 
         # now run infinite loop on message bus
@@ -9,8 +9,9 @@ import logging
 import os
 from gevent import sleep
 import copy
+import time
 import uuid
-from threading import Lock
+from threading import Lock, RLock, Timer
 from unittest.mock import Mock
 from cleep.bus import BusClient
 from cleep.exception import InvalidParameter, MissingParameter
@@ -18,6 +19,8 @@ from cleep.common import ExecutionStep, CORE_MODULES, MessageResponse
 from cleep.libs.internals.crashreport import CrashReport
 from cleep.libs.drivers.driver import Driver
 from cleep.libs.internals.cleepdoc import CleepDoc
+from cleep.libs.internals.frozendict import freeze
+from cleep.libs.internals.deviceregistry import DeviceRegistry
 
 
 __all__ = ['Cleep', 'CleepRpcWrapper', 'CleepModule', 'CleepResources', 'CleepRenderer']
@@ -34,8 +37,17 @@ class Cleep(BusClient):
         * logger with log level configured
         * custom crash report
         * driver registration
+
+    Config file is written synchronously on each update. Set CONFIG_WRITE_BEHIND_DELAY (in seconds) to
+    enable write-behind mode: updates are applied in memory immediately and config file is written once
+    after specified delay, merging all updates received meanwhile. Pending updates are written when module
+    is stopped.
+
+    Config is held as a read-only snapshot (see frozendict lib) shared by all readers. Each update publishes a
+    new snapshot that reuses unchanged values of the previous one.
     """
     CONFIG_DIR = '/etc/cleep/'
+    CONFIG_WRITE_BEHIND_DELAY = None
     MODULE_DEPS = []
 
     def __init__(self, bootstrap, debug_enabled):
@@ -65,7 +77,19 @@ class Cleep(BusClient):
 
         # load and check configuration
         self.__config_lock = Lock()
-        self.__config = self.__load_config()
+        self.__config_flush_lock = Lock()
+        self.__config_flush_timer = None
+        self.__config_dirty = False
+        self.__config_write_behind = bool(self.CONFIG_WRITE_BEHIND_DELAY)
+        self.__config_metrics = {
+            'updates': 0,
+            'writes': 0,
+            'failures': 0,
+            'coalesced': 0,
+            'last_write_duration': 0.0,
+            'max_write_duration': 0.0,
+        }
+        self.__config = freeze(self.__load_config())
         if getattr(self, 'DEFAULT_CONFIG', None) is not None:
             self.__check_config(self.DEFAULT_CONFIG)
 
@@ -162,6 +186,32 @@ class Cleep(BusClient):
 
         return out
 
+    def __write_config(self, config):
+        """
+        Write config file atomically and update write metrics
+
+        Args:
+            config (dict): config to write
+
+        Returns:
+            bool: False if error occured, True otherwise
+        """
+        path = os.path.join(self.CONFIG_DIR, self.MODULE_CONFIG_FILE)
+        start = time.perf_counter()
+        try:
+            written = self.cleep_filesystem.write_json(path, config, atomic=True) is not False
+        except:
+            self.logger.exception('Unable to write config file %s:', path)
+            written = False
+        duration = time.perf_counter() - start
+
+        self.__config_metrics['writes'] += 1
+        self.__config_metrics['failures'] += 0 if written else 1
+        self.__config_metrics['last_write_duration'] = duration
+        self.__config_metrics['max_write_duration'] = max(self.__config_metrics['max_write_duration'], duration)
+
+        return written
+
     def __save_config(self, config):
         """
         Save config file.
@@ -172,29 +222,97 @@ class Cleep(BusClient):
         Returns:
             bool: False if error occured, True otherwise
         """
-        out = False
-
         # get lock
         self.__config_lock.acquire(True)
 
-        try:
-            path = os.path.join(self.CONFIG_DIR, self.MODULE_CONFIG_FILE)
-            self.cleep_filesystem.write_json(path, config)
+        config = freeze(config)
+        out = self.__write_config(config)
+        if out:
             self.__config = config
-            out = True
-
-        except:
-            self.logger.exception('Unable to write config file %s:', path)
+            self.__config_dirty = False
 
         # release lock
         self.__config_lock.release()
 
         return out
 
+    def __schedule_config_flush(self):
+        """
+        Schedule config flush if not already scheduled. Must be called with config lock acquired.
+        """
+        if self.__config_flush_timer is not None:
+            self.__config_metrics['coalesced'] += 1
+            return
+
+        self.__config_flush_timer = Timer(self.CONFIG_WRITE_BEHIND_DELAY, self._flush_config)
+        self.__config_flush_timer.daemon = True
+        self.__config_flush_timer.start()
+
+    def _flush_config(self):
+        """
+        Write pending config updates (write-behind mode) to config file
+
+        Returns:
+            bool: False if write failed, True otherwise (also if nothing had to be written)
+        """
+        with self.__config_flush_lock:
+            self.__config_lock.acquire(True)
+            if self.__config_flush_timer is not None:
+                self.__config_flush_timer.cancel()
+                self.__config_flush_timer = None
+            if not self.__config_dirty:
+                self.__config_lock.release()
+                return True
+            config = self.__config
+            self.__config_dirty = False
+            self.__config_lock.release()
+
+            if self.__write_config(config):
+                self.logger.debug(
+                    'Config flushed in %.3f seconds',
+                    self.__config_metrics['last_write_duration'],
+                )
+                return True
+
+            # keep updates pending and retry later
+            self.__config_lock.acquire(True)
+            self.__config_dirty = True
+            if self.__config_write_behind:
+                self.__schedule_config_flush()
+            self.__config_lock.release()
+            return False
+
+    def _get_config_metrics(self):
+        """
+        Return config persistence metrics
+
+        Returns:
+            dict: metrics::
+
+                {
+                    updates (int): number of config updates
+                    writes (int): number of config file writes
+                    failures (int): number of failed writes
+                    coalesced (int): number of updates merged in an already scheduled write
+                    last_write_duration (float): last write duration (seconds)
+                    max_write_duration (float): longest write duration (seconds)
+                    pending (bool): True if some updates are not written yet
+                }
+
+        """
+        self.__config_lock.acquire(True)
+        metrics = dict(self.__config_metrics)
+        metrics['pending'] = self.__config_dirty
+        self.__config_lock.release()
+
+        return metrics
+
     def _update_config(self, config):
         """
         Secured config update: update specified fields, do not completely overwrite content
 
+        In write-behind mode (see CONFIG_WRITE_BEHIND_DELAY), config is updated in memory and written later.
+
         Args:
             config (dict): new config to update
 
@@ -212,26 +330,30 @@ class Cleep(BusClient):
 
         # get lock
         self.__config_lock.acquire(True)
+        self.__config_metrics['updates'] += 1
+
+        # build new snapshot, unchanged values are shared with current one
+        new_config = dict(self.__config)
+        new_config.update(config)
+        new_config = freeze(new_config)
 
-        # keep copy of old config
-        old_config = copy.deepcopy(self.__config)
+        if self.__config_write_behind:
+            self.__config = new_config
+            self.__config_dirty = True
+            self.__schedule_config_flush()
+            self.__config_lock.release()
+            return True
 
-        # update config
-        self.__config.update(config)
+        # publish new snapshot only if written
+        written = self.__write_config(new_config)
+        if written:
+            self.__config = new_config
+            self.__config_dirty = False
 
         # release lock
         self.__config_lock.release()
 
-        # save new config
-        if not self.__save_config(self.__config):
-            # revert changes
-            self.__config_lock.acquire(True)
-            self.__config = old_config
-            self.__config_lock.release()
-
-            return False
-
-        return True
+        return written
 
     def _get_config(self):
         """
@@ -245,16 +367,23 @@ class Cleep(BusClient):
             self.logger.debug('Module "%s" has no configuration file configured', self.__class__.__name__)
             return {}
 
-        # get lock
-        self.__config_lock.acquire(True)
-
         # make deep copy of structure
-        copy_ = copy.deepcopy(self.__config)
+        return copy.deepcopy(self.__config)
 
-        # release lock
-        self.__config_lock.release()
+    def _get_config_snapshot(self):
+        """
+        Return current config snapshot without copying it.
+
+        Snapshot is read-only (any modification raises TypeError) and is never modified: further config
+        updates publish a new snapshot. Use _get_config to get a modifiable copy.
+
+        Returns:
+            dict: read-only config content
+        """
+        if not self._has_config_file():
+            return freeze({})
 
-        return copy_
+        return self.__config
 
     def _get_config_field(self, field, default=None):
         """
@@ -432,9 +561,9 @@ class Cleep(BusClient):
         Returns module configuration.
 
         Returns:
-            dict: all config content except 'devices' entry.
+            dict: all config content except 'devices' entry. Nested values are read-only.
         """
-        return self._get_config()
+        return dict(self._get_config_snapshot())
 
     def get_module_commands(self):
         """
@@ -481,6 +610,10 @@ class Cleep(BusClient):
         """
         Stop process.
         """
+        if self._has_config_file():
+            # write pending config updates and write next ones synchronously
+            self.__config_write_behind = False
+            self._flush_config()
         BusClient.stop(self)
 
     def is_module_loaded(self, module):
@@ -690,7 +823,13 @@ class Cleep(BusClient):
 class CleepRpcWrapper(Cleep):
     """
     Base Cleep class for RPC request wrapping
+
+    Wrapper declares route prefixes it handles in RPC_WRAPPER_ROUTES member (ie ["alexa", "webhook/ifttt"]).
+    Wrapper without declared routes receives all routes not handled by other wrappers.
     """
+
+    RPC_WRAPPER_ROUTES = []
+
     def __init__(self, bootstrap, debug_enabled):
         """
         Constructor
@@ -712,6 +851,7 @@ class CleepRpcWrapper(Cleep):
             Must be implemented
 
         Args:
+            route (str): requested route (without leading slash)
             request (bottle.request): web server bottle request content. See
                                       doc https://bottlepy.org/docs/dev/tutorial.html#request-data
 
@@ -722,6 +862,19 @@ class CleepRpcWrapper(Cleep):
             'wrap_request function must be implemented in "%s"' % self.__class__.__name__
         )
 
+    def _get_rpc_wrapper_routes(self):
+        """
+        Return route prefixes handled by wrapper
+
+        Returns:
+            list: list of route prefixes. Empty prefix means all routes
+        """
+        routes = self.RPC_WRAPPER_ROUTES or []
+        if not isinstance(routes, list):
+            self.logger.warning('RPC_WRAPPER_ROUTES must be a list, all routes will be handled')
+            return [""]
+        return routes if len(routes) > 0 else [""]
+
 
 
 
@@ -735,8 +888,13 @@ class CleepModule(Cleep):
         * device helpers
         * default directories (storage, tmp, asset, bin)
 
+    Devices are indexed by uuid. Fields listed in DEVICE_INDEXES (like "name" or "type") are indexed too,
+    so device searches on them do not scan all devices.
     """
 
+    # Device fields to index (to speed up _search_device and _search_devices)
+    DEVICE_INDEXES = []
+
     # Storage path to save app files (database, music, ...)
     APP_STORAGE_PATH = None
     # Temporary path to save temp data
@@ -759,6 +917,8 @@ class CleepModule(Cleep):
 
         # members
         self.__app_doc = None
+        self.__devices_lock = RLock()
+        self.__devices_registry = DeviceRegistry(self.DEVICE_INDEXES)
 
         # define app paths
         class_name = self.__class__.__name__.lower()
@@ -816,6 +976,46 @@ class CleepModule(Cleep):
             'APP_BIN_PATH': self.APP_BIN_PATH,
         }
 
+    def __get_devices_registry(self):
+        """
+        Return devices registry synchronized with current config snapshot.
+        Registry is reloaded if devices were changed without using device helpers.
+
+        Returns:
+            DeviceRegistry: devices registry
+        """
+        devices = self._get_config_snapshot().get('devices', {})
+        if self.__devices_registry.source is not devices:
+            self.logger.trace('Reload devices registry')
+            self.__devices_registry.load(devices, devices)
+
+        return self.__devices_registry
+
+    def __save_devices(self, devices, changed_uuid, deleted=False):
+        """
+        Save devices and update devices registry with changed device only
+
+        Args:
+            devices (dict): new devices (unchanged devices are shared with current snapshot)
+            changed_uuid (string): uuid of added, updated or deleted device
+            deleted (bool): True if device was deleted
+
+        Returns:
+            bool: True if devices saved
+        """
+        registry = self.__get_devices_registry()
+        if not self._update_config({'devices': devices}):
+            return False
+
+        new_devices = self._get_config_snapshot()['devices']
+        if deleted:
+            registry.delete(changed_uuid)
+        else:
+            registry.set(new_devices[changed_uuid])
+        registry.source = new_devices
+
+        return True
+
     def _add_device(self, data):
         """
         Helper function to add device in module configuration file.
@@ -833,23 +1033,21 @@ class CleepModule(Cleep):
         if not isinstance(data, dict):
             raise InvalidParameter('Parameter "data" must be a dict')
 
-        # prepare config file
-        devices = {}
-        if self._has_config_field('devices'):
-            devices = self._get_config_field('devices')
-
         # prepare data
         device_uuid = self._get_unique_id()
         data['uuid'] = device_uuid
         if 'name' not in data:
             data['name'] = 'noname'
-        devices[device_uuid] = data
-        self.logger.trace('devices: %s' % devices)
 
-        # save data
-        if not self._update_config({'devices': devices}):
-            # error occured
-            return None
+        with self.__devices_lock:
+            devices = dict(self._get_config_snapshot().get('devices', {}))
+            devices[device_uuid] = copy.deepcopy(data)
+            self.logger.trace('Add device: %s' % data)
+
+            # save data
+            if not self.__save_devices(devices, device_uuid):
+                # error occured
+                return None
 
         return data
 
@@ -863,17 +1061,18 @@ class CleepModule(Cleep):
         Returns:
             bool: True if device was deleted, False otherwise.
         """
-        # check values
-        devices = self._get_config_field('devices')
-        if device_uuid not in devices:
-            self.logger.error('Trying to delete unknown device')
-            return False
+        with self.__devices_lock:
+            # check values
+            devices = dict(self._get_config_snapshot().get('devices', {}))
+            if device_uuid not in devices:
+                self.logger.error('Trying to delete unknown device')
+                return False
 
-        # delete device entry
-        del devices[device_uuid]
+            # delete device entry
+            del devices[device_uuid]
 
-        # save config
-        conf_result = self._set_config_field('devices', devices)
+            # save config
+            conf_result = self.__save_devices(devices, device_uuid, deleted=True)
 
         # send device deleted event
         if conf_result and self.deleted_device_event:
@@ -899,25 +1098,29 @@ class CleepModule(Cleep):
 
         data_ = copy.deepcopy(data)
 
-        # check values
-        devices = self._get_config_field('devices')
-        if device_uuid not in devices:
-            self.logger.warning('Trying to update unknown device "%s"', device_uuid)
-            return False
+        with self.__devices_lock:
+            # check values
+            devices = dict(self._get_config_snapshot().get('devices', {}))
+            if device_uuid not in devices:
+                self.logger.warning('Trying to update unknown device "%s"', device_uuid)
+                return False
 
-        # always force uuid to make sure data is always valid
-        data_['uuid'] = device_uuid
+            # always force uuid to make sure data is always valid
+            data_['uuid'] = device_uuid
 
-        # update data
-        devices[device_uuid].update({k: v for k, v in data_.items() if k in devices[device_uuid].keys()})
+            # update data
+            device = dict(devices[device_uuid])
+            device.update({k: v for k, v in data_.items() if k in device})
+            devices[device_uuid] = device
 
-        # save data
-        return self._set_config_field('devices', devices)
+            # save data
+            return self.__save_devices(devices, device_uuid)
 
     def _search_device(self, key, value):
         """
         Helper function to search a device based on the property value.
         Useful to search a device of course, but can be used to check if a name is not already assigned to a device.
+        Search on fields declared in DEVICE_INDEXES does not scan all devices.
 
         Args:
             key (string): device property to search on.
@@ -926,23 +1129,15 @@ class CleepModule(Cleep):
         Returns
             dict: the device data if key-value found, or None otherwise.
         """
-        devices = self._get_config_field('devices')
-        if len(devices) == 0:
-            # no device in dict, return no match
-            return None
+        devices = self.__get_devices_registry().search(key, value)
 
-        # search
-        for device_uuid in devices:
-            if key in devices[device_uuid] and devices[device_uuid][key] == value:
-                # device found
-                return devices[device_uuid]
-
-        return None
+        return copy.deepcopy(devices[0]) if devices else None
 
     def _search_devices(self, key, value):
         """
         Helper function to search a device based on the property value.
         Useful to search a device of course, but can be used to check if a name is not already assigned to a device.
+        Search on fields declared in DEVICE_INDEXES does not scan all devices.
 
         Args:
             key (string): device property to search on.
@@ -951,21 +1146,7 @@ class CleepModule(Cleep):
         Returns
             list: list of devices which key-value matches, empty list if nothing found
         """
-        output = []
-
-        # check values
-        devices = self._get_config_field('devices')
-        if len(devices) == 0:
-            # no device in dict, return no match
-            return output
-
-        # search
-        for device_uuid in devices:
-            if key in devices[device_uuid] and devices[device_uuid][key] == value:
-                # device found
-                output.append(devices[device_uuid])
-
-        return output
+        return [copy.deepcopy(device) for device in self.__get_devices_registry().search(key, value)]
 
     def _get_device(self, device_uuid):
         """
@@ -977,8 +1158,8 @@ class CleepModule(Cleep):
         Returns:
             dict: None if device not found, device data otherwise.
         """
-        devices = self._get_config_field('devices')
-        return devices[device_uuid] if device_uuid in devices else None
+        device = self.__get_devices_registry().get(device_uuid)
+        return copy.deepcopy(device) if device is not None else None
 
     def get_module_devices(self):
         """
@@ -993,7 +1174,20 @@ class CleepModule(Cleep):
                 }
 
         """
-        return self._get_config()['devices'] if self._has_config_file() else {}
+        return copy.deepcopy(self._get_config_snapshot().get('devices', {}))
+
+    def _get_module_devices_snapshot(self):
+        """
+        Returns module devices from current config snapshot without copy, so they are read-only.
+        If application overwrites get_module_devices, its result is returned instead.
+
+        Returns:
+            dict: module devices (see get_module_devices)
+        """
+        if getattr(self.get_module_devices, '__func__', None) is not CleepModule.get_module_devices:
+            return self.get_module_devices()
+
+        return self._get_config_snapshot().get('devices', {})
 
     def _get_devices(self):
         """
@@ -1017,7 +1211,7 @@ class CleepModule(Cleep):
         Returns:
             int: number of saved devices.
         """
-        return len(self._get_config_field('devices')) if self._has_config_file() else 0
+        return len(self._get_config_snapshot().get('devices', {}))
 
     def get_module_config(self):
         """
@@ -1026,13 +1220,8 @@ class CleepModule(Cleep):
         Returns:
             dict: all config content except 'devices' entry.
         """
-        config = self._get_config()
-
         # remove devices from config
-        if 'devices' in config:
-            del config['devices']
-
-        return config
+        return {key: copy.deepcopy(value) for key, value in self._get_config_snapshot().items() if key != 'devices'}
 
     def get_module_commands(self):
         """
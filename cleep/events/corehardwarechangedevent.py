@@ -0,0 +1,23 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from cleep.libs.internals.event import Event
+
+class CoreHardwareChangedEvent(Event):
+    """
+    Core.hardware.changed event
+    """
+
+    EVENT_NAME = 'core.hardware.changed'
+    EVENT_PROPAGATE = False
+    EVENT_PARAMS = ['subsystem', 'devtype', 'devname', 'devpath', 'properties']
+
+    def __init__(self, params):
+        """
+        Constructor
+
+        Args:
+            params (dict): event parameters
+        """
+        Event.__init__(self, params)
+
@@ -0,0 +1,23 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from cleep.libs.internals.event import Event
+
+class CoreHardwareRemovedEvent(Event):
+    """
+    Core.hardware.removed event
+    """
+
+    EVENT_NAME = 'core.hardware.removed'
+    EVENT_PROPAGATE = False
+    EVENT_PARAMS = ['subsystem', 'devtype', 'devname', 'devpath', 'properties']
+
+    def __init__(self, params):
+        """
+        Constructor
+
+        Args:
+            params (dict): event parameters
+        """
+        Event.__init__(self, params)
+
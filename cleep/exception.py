@@ -109,6 +109,17 @@ class InvalidModule(Exception):
     def __str__(self):
         return self.message
 
+class RouteNotFound(Exception):
+    """
+    RouteNotFound is raised when no application handles requested route
+    """
+    def __init__(self, route):
+        Exception.__init__(self)
+        self.route = route
+        self.message = 'No application handles route "%s"' % self.route
+    def __str__(self):
+        return self.message
+
 class Unauthorized(Exception):
     """
     Generic Unauthorized exception is raised when there is a problem with credentials.
@@ -6,17 +6,21 @@ import logging
 import importlib
 import inspect
 import copy
-from threading import Event, Timer
+import time
+from threading import Event, Timer, Condition
 import sys
 from types import ModuleType, FunctionType
 from gc import get_referents
 from cleep.core import Cleep, CleepModule, CleepRenderer, CleepRpcWrapper
 from cleep.libs.configs.appssources import AppsSources
-from cleep.exception import CommandError, MissingParameter, InvalidParameter
+from cleep.exception import CommandError, MissingParameter, InvalidParameter, RouteNotFound
 from cleep.libs.internals.install import Install
 import cleep.libs.internals.tools as Tools
 from cleep.common import CORE_MODULES, ExecutionStep
 from cleep.libs.internals.task import Task
+from cleep.libs.internals.routetrie import RouteTrie
+from cleep.libs.internals.taskexecutor import TaskExecutor
+from cleep.libs.internals.startupprofiler import get_startup_profiler
 from cleep import __version__ as CLEEP_VERSION
 
 __all__ = ['Inventory']
@@ -37,8 +41,9 @@ class Inventory(Cleep):
     MODULES_SYNC_TIMEOUT = 60.0
     PYTHON_CLEEP_IMPORT_PATH = 'cleep.modules.'
     PYTHON_CLEEP_MODULES_PATH = 'modules'
+    MODULES_LOADING_WORKERS = 4
 
-    def __init__(self, bootstrap, rpcserver, debug_enabled, configured_modules, debug_config):
+    def __init__(self, bootstrap, rpcserver, debug_enabled, configured_modules, debug_config, loading_workers=None):
         """
         Constructor
 
@@ -57,6 +62,8 @@ class Inventory(Cleep):
                     debug_modules (list): list of modules to enable debug
                 }
 
+            loading_workers (int): number of modules imported and instanciated concurrently, 1 to load
+                                   modules sequentially (default MODULES_LOADING_WORKERS)
         """
         # init
         Cleep.__init__(self, bootstrap, debug_enabled)
@@ -68,6 +75,7 @@ class Inventory(Cleep):
         self.__rpcserver = rpcserver
         self.configured_modules = configured_modules
         self.debug_config = debug_config
+        self.loading_workers = loading_workers or self.MODULES_LOADING_WORKERS
         self.bootstrap = bootstrap
         self.events_broker = bootstrap['events_broker']
         self.formatters_broker = bootstrap['formatters_broker']
@@ -87,8 +95,8 @@ class Inventory(Cleep):
         #       ...
         #   }
         self.__modules_in_error = {}
-        # module names that are CleepRpcWrapper instances
-        self.__rpc_wrappers = []
+        # module names that are CleepRpcWrapper instances by route prefix
+        self.__rpc_wrappers = RouteTrie()
         # modules dependencies
         self.__dependencies = {}
         # current module loading tree
@@ -129,13 +137,127 @@ class Inventory(Cleep):
             'help': help_url
         }
 
-    def __load_module(self, module_name, local_modules, is_dependency=False):
+    def __submit(self, executor, callback, name):
         """
-        Load specified module
+        Run callback on executor, or immediately if there is no executor
+
+        Args:
+            executor (TaskExecutor): executor or None
+            callback (function): function to run
+            name (string): call name
+
+        Raises:
+            Exception: if executor rejected the call
+        """
+        if executor is None:
+            callback()
+        elif executor.submit(callback, name=name) is None:
+            raise Exception('Unable to run "%s": executor rejected it' % name)
+
+    def __import_module(self, module_name, local_modules):
+        """
+        Import specified module and return its class
+
+        Args:
+            module_name (string): module name
+            local_modules (list): list of locally installed modules
+
+        Returns:
+            class: module class
+
+        Raises:
+            Exception: if module does not exist or import failed
+        """
+        if module_name not in self.modules and module_name not in local_modules:
+            raise Exception('Application "%s" doesn\'t exist. Parent app and app dependencies won\'t be loaded.' % module_name)
+
+        # import module file and get module class
+        with get_startup_profiler().phase('apps', module_name, 'import'):
+            module_path = '%s%s' % (self.PYTHON_CLEEP_IMPORT_PATH, module_name)
+            module_ = importlib.import_module(module_path)
+            app_filename = getattr(module_, 'APP_FILENAME', module_name)
+            del module_
+            class_path = '%s%s.%s' % (self.PYTHON_CLEEP_IMPORT_PATH, module_name, app_filename)
+            self.logger.trace('Importing application "%s"' % class_path)
+            module_ = importlib.import_module(class_path)
+            module_class_ = getattr(module_, app_filename.capitalize())
+        setattr(module_class_, 'MODULE_NAME', module_name)
+
+        return module_class_
+
+    def __import_modules(self, module_names, local_modules, executor):
+        """
+        Import specified modules and their dependencies. Modules are imported concurrently on executor,
+        dependencies being imported as soon as they are known
+
+        Args:
+            module_names (list): list of module names
+            local_modules (list): list of locally installed modules
+            executor (TaskExecutor): executor or None to import modules sequentially
+
+        Returns:
+            dict: module class or import exception by module name
+        """
+        imported = {}
+        pending = []
+        condition = Condition()
+
+        def schedule(names):
+            scheduled = []
+            with condition:
+                for name in names:
+                    if name not in imported and name not in pending:
+                        pending.append(name)
+                        scheduled.append(name)
+            for name in scheduled:
+                try:
+                    self.__submit(executor, lambda name=name: import_module(name), 'import %s' % name)
+                except Exception as error:
+                    with condition:
+                        imported[name] = error
+                        pending.remove(name)
+                        condition.notify_all()
+
+        def import_module(name):
+            try:
+                result = self.__import_module(name, local_modules)
+            except Exception as error:
+                result = error
+            with condition:
+                imported[name] = result
+            if not isinstance(result, Exception):
+                schedule(result.MODULE_DEPS or [])
+            with condition:
+                pending.remove(name)
+                condition.notify_all()
+
+        schedule(module_names)
+        with condition:
+            while pending:
+                condition.wait()
+
+        return imported
+
+    def __plan_module(self, module_name, local_modules, imported, plan, is_dependency=False):
+        """
+        Plan loading of specified module after its dependencies
 
         Args:
             module_name (string): module name
             local_modules (list): list of locally installed modules
+            imported (dict): imported modules classes (see __import_modules)
+            plan (list): ordered list of modules to instantiate. Module is appended after its dependencies::
+
+                [
+                    {
+                        name (string): module name
+                        class_ (class): module class
+                        debug (bool): module debug flag
+                        deps (list): names of planned modules to instantiate before this one
+                    },
+                    ...
+                ]
+
             is_dependency (bool): True if module to load is a dependency (default: False)
         """
         if is_dependency:
@@ -161,17 +283,13 @@ class Inventory(Cleep):
             raise Exception('Application "%s" doesn\'t exist. Parent app and app dependencies won\'t be loaded.' % module_name)
         self.modules[module_name]['installed'] = True
 
-        # import module file and get module class
-        module_path = '%s%s' % (self.PYTHON_CLEEP_IMPORT_PATH, module_name)
-        module_ = importlib.import_module(module_path)
-        app_filename = getattr(module_, 'APP_FILENAME', module_name)
-        del module_
-        class_path = '%s%s.%s' % (self.PYTHON_CLEEP_IMPORT_PATH, module_name, app_filename)
-        self.logger.trace('Importing application "%s"' % class_path)
-        module_ = importlib.import_module(class_path)
-        module_class_ = getattr(module_, app_filename.capitalize())
-        setattr(module_class_, 'MODULE_NAME', module_name)
-                    
+        # get imported module class
+        module_class_ = imported.get(module_name)
+        if module_class_ is None:
+            module_class_ = self.__import_module(module_name, local_modules)
+        if isinstance(module_class_, Exception):
+            raise module_class_
+
         # enable or not debug
         debug = False
         if self.debug_config['trace_enabled'] or module_name in self.debug_config['debug_modules']:
@@ -179,6 +297,7 @@ class Inventory(Cleep):
             debug = True
 
         # load module dependencies
+        planned = [step['name'] for step in plan]
         self.logger.trace('Application "%s" dependencies: %s' % (module_name, module_class_.MODULE_DEPS))
         if module_class_.MODULE_DEPS:
             for dependency in module_class_.MODULE_DEPS:
@@ -189,11 +308,12 @@ class Inventory(Cleep):
                 self.__dependencies[dependency].append(module_name)
                 self.logger.trace('Dependencies list: %s' % self.__dependencies)
                 
-                if dependency not in self.__modules_instances:
+                if dependency not in planned:
                     # load dependency
                     self.logger.trace('Load dependency "%s"' % dependency)
-                    self.__load_module(dependency, local_modules, is_dependency=True)
+                    self.__plan_module(dependency, local_modules, imported, plan, is_dependency=True)
                     self.__module_loading_tree.pop()
+                    planned = [step['name'] for step in plan]
 
                     # flag module is loaded as dependency and not module
                     self.__modules_loaded_as_dependency[dependency] = True
@@ -202,14 +322,118 @@ class Inventory(Cleep):
                     # dependency is already loaded, nothing else to do
                     self.logger.trace('Dependency "%s" already loaded' % dependency)
 
-        # is module external bus implementation
+        # is module external bus implementation. It is set before any instanciation to be known by all modules
         if 'CleepExternalBus' in [c.__name__ for c in module_class_.__bases__]:
             self.bootstrap['external_bus'] = module_name
 
-        # instanciate module
-        self.logger.trace('Instanciating application "%s"' % module_name)
-        bootstrap = self.__get_bootstrap()
-        self.__modules_instances[module_name] = module_class_(bootstrap, debug)
+        # instanciate module after its dependencies (circular dependency is instanciated first)
+        plan.append({
+            'name': module_name,
+            'class_': module_class_,
+            'debug': debug,
+            'deps': [dependency for dependency in (module_class_.MODULE_DEPS or []) if dependency in planned],
+        })
+
+        # flag module is loaded as module and not dependency
+        self.__modules_loaded_as_dependency[module_name] = False
+
+    def __instanciate_modules(self, plan, executor):
+        """
+        Instanciate planned modules. Modules are instanciated concurrently on executor, each module once
+        all its dependencies are instanciated. Module is not instanciated if one of its dependencies failed.
+        Modules still instanciating when no module was instanciated during MODULES_SYNC_TIMEOUT are failed
+
+        Args:
+            plan (list): ordered list of modules to instanciate (see __plan_module)
+            executor (TaskExecutor): executor or None to instanciate modules sequentially
+
+        Returns:
+            dict: result by module name::
+
+                {
+                    module name (string): {
+                        instance (CleepModule): module instance (if succeed)
+                        bootstrap (dict): module bootstrap (if succeed)
+                        error (Exception): instanciation error (if failed)
+                    },
+                    ...
+                }
+
+        """
+        steps = {step['name']: step for step in plan}
+        dependents = {step['name']: [] for step in plan}
+        waiting = {}
+        for step in plan:
+            waiting[step['name']] = len(step['deps'])
+            for dependency in step['deps']:
+                dependents[dependency].append(step['name'])
+        results = {}
+        condition = Condition()
+
+        def finish(name, result):
+            ready = []
+            with condition:
+                if name in results:
+                    return
+                results[name] = result
+                for dependent in dependents[name]:
+                    waiting[dependent] -= 1
+                    if waiting[dependent] == 0:
+                        ready.append(dependent)
+                condition.notify_all()
+            for dependent in ready:
+                start(steps[dependent])
+
+        def instanciate(step):
+            self.logger.trace('Instanciating application "%s"' % step['name'])
+            try:
+                bootstrap = self.__get_bootstrap()
+                with get_startup_profiler().phase('apps', step['name'], 'init'):
+                    instance = step['class_'](bootstrap, step['debug'])
+                result = {'instance': instance, 'bootstrap': bootstrap}
+            except Exception as error:
+                result = {'error': error}
+            finish(step['name'], result)
+
+        def start(step):
+            failed = [dependency for dependency in step['deps'] if 'error' in results[dependency]]
+            if failed:
+                error = Exception('Application dependency "%s" failed to load' % failed[0])
+                finish(step['name'], {'error': error})
+                return
+            try:
+                self.__submit(executor, lambda: instanciate(step), 'instanciate %s' % step['name'])
+            except Exception as error:
+                finish(step['name'], {'error': error})
+
+        for step in plan:
+            if waiting[step['name']] == 0:
+                start(step)
+        with condition:
+            deadline = time.monotonic() + self.MODULES_SYNC_TIMEOUT
+            while len(results) < len(plan) and time.monotonic() < deadline:
+                instanciated = len(results)
+                condition.wait(deadline - time.monotonic())
+                if len(results) > instanciated:
+                    deadline = time.monotonic() + self.MODULES_SYNC_TIMEOUT
+
+            # late results are ignored
+            return {
+                step['name']: results.get(step['name'], {'error': Exception('Application instanciation timed out')})
+                for step in plan
+            }
+
+    def __register_module(self, module_name, module_class_, instance, bootstrap):
+        """
+        Register instanciated module
+
+        Args:
+            module_name (string): module name
+            module_class_ (class): module class
+            instance (CleepModule): module instance
+            bootstrap (dict): module bootstrap
+        """
+        self.__modules_instances[module_name] = instance
 
         # append module join event to make sure all modules are loaded
         self.__module_join_events.append(bootstrap['module_join_event'])
@@ -238,8 +462,28 @@ class Inventory(Cleep):
             'version': getattr(module_class_, 'MODULE_VERSION', '0.0.0'),
         })
 
-        # flag module is loaded as module and not dependency
-        self.__modules_loaded_as_dependency[module_name] = False
+    def __set_module_in_error(self, module_name, error):
+        """
+        Flag module in error
+
+        Args:
+            module_name (string): module name
+            error (Exception): module error
+        """
+        self.__modules_in_error[module_name] = str(error)
+        if module_name not in CORE_MODULES:
+            self.logger.error('Unable to load application "%s" or one of its dependencies:' % module_name, exc_info=error)
+            # TODO report error if not locally installed module
+            return
+
+        # failed to load mandatory module
+        if self.CLEEP_ENV != 'ci':
+            self.logger.error('Core application "%s" exception:' % module_name, exc_info=error)
+            self.logger.error('Unable to load core application "%s". System will be instable' % module_name)
+            self.crash_report.report_exception({
+                'message': 'Unable to load core application "%s". System will be instable' % module_name,
+                'module_name': module_name
+            })
 
     def _get_market(self):
         """
@@ -300,7 +544,8 @@ class Inventory(Cleep):
         local_modules = []
                 
         # get list of all available modules (from remote list)
-        modules_json_content = self._get_market()
+        with get_startup_profiler().phase('market'):
+            modules_json_content = self._get_market()
         self.modules = modules_json_content['list']
         self.logger.trace('Modules.json: %s' % self.modules)
 
@@ -341,53 +586,52 @@ class Inventory(Cleep):
         # execution step: BOOT->INIT
         self.bootstrap['execution_step'].step = ExecutionStep.INIT
 
-        # load core modules
-        self.logger.trace('CORE_MODULES: %s' % CORE_MODULES)
-        for module_name in CORE_MODULES:
-            try:
-                # load module
-                self.__load_module(module_name, local_modules)
-
-            except Exception as error:
-                # failed to load mandatory module
-                self.__modules_in_error[module_name] = str(error)
-                if self.CLEEP_ENV != 'ci':
-                    self.logger.exception('Core application "%s" exception:' % module_name)
-                    self.logger.error('Unable to load core application "%s". System will be instable' % module_name)
-                    self.crash_report.report_exception({
-                        'message': 'Unable to load core application "%s". System will be instable' % module_name,
-                        'module_name': module_name
-                    })
-
-            finally:
-                # clear module loading tree (replace it with clear() available in python3)
-                del self.__module_loading_tree[:]
-
-        # load installed modules
+        # import core and installed modules with their dependencies
+        executor = None
+        if self.loading_workers > 1:
+            executor = TaskExecutor(name='inventory', max_workers=self.loading_workers, max_queue=0)
+        try:
+            imported = self.__import_modules(list(CORE_MODULES) + list(self.configured_modules), local_modules, executor)
+
+            # plan core modules then installed modules loading
+            self.logger.trace('CORE_MODULES: %s' % CORE_MODULES)
+            plan = []
+            for module_name in list(CORE_MODULES) + list(self.configured_modules):
+                try:
+                    self.__plan_module(module_name, local_modules, imported, plan)
+                except Exception as error:
+                    self.__set_module_in_error(module_name, error)
+                finally:
+                    # clear module loading tree (replace it with clear() available in python3)
+                    del self.__module_loading_tree[:]
+
+            # instanciate modules
+            results = self.__instanciate_modules(plan, executor)
+        finally:
+            if executor:
+                executor.stop()
+
+        # register modules in planned order to start them in deterministic order
+        for step in plan:
+            result = results[step['name']]
+            if 'error' in result:
+                self.__set_module_in_error(step['name'], result['error'])
+            else:
+                self.__register_module(step['name'], step['class_'], result['instance'], result['bootstrap'])
+
+        # register renderers and rpc wrappers of installed modules
         for module_name in self.configured_modules:
-            try:
-                # load module
-                self.__load_module(module_name, local_modules)
-
-                # register renderers
-                if module_name in self.__modules_instances and isinstance(self.__modules_instances[module_name], CleepRenderer):
-                    config = self.__modules_instances[module_name]._get_renderer_config()
-                    self.formatters_broker.register_renderer(module_name, config['profiles'])
-
-                # store rpc wrappers
-                if module_name in self.__modules_instances and isinstance(self.__modules_instances[module_name], CleepRpcWrapper):
-                    self.logger.debug('Store RpcWrapper instance "%s"' % module_name)
-                    self.__rpc_wrappers.append(module_name)
-
-            except Exception as e:
-                # flag modules has in error
-                self.__modules_in_error[module_name] = str(e)
-                self.logger.exception('Unable to load application "%s" or one of its dependencies:' % module_name)
-                # TODO report error if not locally installed module
-
-            finally:
-                # clear module loading tree (replace it with clear() available in python3)
-                del self.__module_loading_tree[:]
+            # register renderers
+            if module_name in self.__modules_instances and isinstance(self.__modules_instances[module_name], CleepRenderer):
+                config = self.__modules_instances[module_name]._get_renderer_config()
+                self.formatters_broker.register_renderer(module_name, config['profiles'])
+
+            # store rpc wrappers
+            if module_name in self.__modules_instances and isinstance(self.__modules_instances[module_name], CleepRpcWrapper):
+                routes = self.__modules_instances[module_name]._get_rpc_wrapper_routes()
+                self.logger.debug('Store RpcWrapper instance "%s" for routes %s' % (module_name, routes))
+                for route in routes:
+                    self.__rpc_wrappers.add(route, module_name)
 
         # compute compat string
         modules_versions = {module_name: module['version'] for module_name, module in self.modules.items()}
@@ -458,6 +702,7 @@ class Inventory(Cleep):
         # stop all running modules and unimport them
         for module_name in self.__modules_instances:
             self.__modules_instances[module_name].stop()
+            self.__rpc_wrappers.remove(module_name)
 
         # clear collection
         self.__modules_instances.clear()
@@ -527,7 +772,7 @@ class Inventory(Cleep):
         for module_name in self.__modules_instances:
             try:
                 if isinstance(self.__modules_instances[module_name], CleepModule):
-                    devices[module_name] = self.__modules_instances[module_name].get_module_devices()
+                    devices[module_name] = self.__modules_instances[module_name]._get_module_devices_snapshot()
             except Exception:
                 self.logger.exception('Unable to get devices of application "%s"' % module_name)
 
@@ -873,15 +1118,35 @@ class Inventory(Cleep):
     def rpc_wrapper(self, route, request):
         """
         Rpc wrapper is called by rpc server when default / POST route is called.
-        Inventory get all loaded CleepRpcWrapperModule modules and push the bottle request object.
+        Inventory pushes the bottle request object to CleepRpcWrapper modules that handle the longest
+        route prefix matching requested route.
         See bottle documentation for request object description https://bottlepy.org/docs/dev/tutorial.html#request-data
+
+        Args:
+            route (str): requested route
+            request (bottle.request): bottle request
+
+        Returns:
+            any: first wrapper response that is not None
+
+        Raises:
+            RouteNotFound: if no wrapper handles specified route
         """
-        for module_name in self.__rpc_wrappers:
+        module_names = self.__rpc_wrappers.match(route)
+        if not module_names:
+            raise RouteNotFound(route)
+
+        response = None
+        for module_name in module_names:
             try:
-                self.__modules_instances[module_name]._wrap_request(route, request)
+                module_response = self.__modules_instances[module_name]._wrap_request(route, request)
+                if response is None:
+                    response = module_response
             except:
                 self.logger.exception('RpcWrapper wrap_request function failed:')
 
+        return response
+
     def get_drivers(self):
         """
         Return drivers
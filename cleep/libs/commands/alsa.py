@@ -6,11 +6,16 @@ import re
 import os
 import uuid
 from cleep.libs.internals.console import AdvancedConsole
+from cleep.libs.internals.commandcache import get_command_cache
+from cleep.libs.internals.asound import Asound
 from cleep.exception import CommandError, MissingParameter, InvalidParameter
 
 class Alsa(AdvancedConsole):
     """
     Alsa commands helper (aplay, arecord, amixer).
+
+    Devices are read from procfs when available. Devices, controls and volumes are cached until
+    a sound card or control change is detected.
     """
 
     FORMAT_S16LE = 'S16_LE'
@@ -30,12 +35,16 @@ class Alsa(AdvancedConsole):
     CGET = 'cget'
     CSET = 'cset'
 
-    def __init__(self, cleep_filesystem):
+    CACHE_DURATION = 60.0
+
+    def __init__(self, cleep_filesystem, use_procfs=True):
         """
         Constructor
 
         Args:
             cleep_filesystem (CleepFilesystem): cleep filesystem instance
+            use_procfs (bool): read devices from procfs instead of running aplay and arecord commands.
+                               Commands are still used if procfs is not available
         """
         AdvancedConsole.__init__(self)
 
@@ -43,6 +52,43 @@ class Alsa(AdvancedConsole):
         self.logger = logging.getLogger(self.__class__.__name__)
         # self.logger.setLevel(logging.DEBUG)
         self.cleep_filesystem = cleep_filesystem
+        self.cache = get_command_cache()
+        self.use_procfs = use_procfs
+        self.asound = Asound()
+
+    def __get_cached(self, key, loader):
+        """
+        Get result from cache. Cached results are dropped if sound cards or controls changed
+
+        Args:
+            key (tuple): result key
+            loader (function): function returning result
+
+        Returns:
+            any: result
+        """
+        if self.asound.has_changed():
+            self.cache.invalidate('alsa')
+        return self.cache.get(('alsa',) + key, self.CACHE_DURATION, loader)
+
+    def __get_devices(self, stream, command):
+        """
+        Return devices of specified stream from procfs, or from specified command if procfs is not available
+
+        Args:
+            stream (string): Asound.STREAM_PLAYBACK or Asound.STREAM_CAPTURE
+            command (string): command to execute if procfs is not available
+
+        Returns:
+            dict: dict of outputs (see __devices_command)
+        """
+        if self.use_procfs and self.asound.is_available():
+            try:
+                return self.asound.get_devices(stream)
+            except Exception:
+                self.logger.exception('Unable to read devices from procfs, command is used')
+
+        return self.__devices_command(command)
 
     def __devices_command(self, command):
         """
@@ -139,6 +185,24 @@ class Alsa(AdvancedConsole):
 
         """
         # get selected device name
+        default_card = self.__get_cached(('selected',), self.__get_default_card)
+        if default_card is None:
+            return None # pragma: no cover
+
+        try:
+            return self.get_device_infos(default_card[0], default_card[1])
+        except Exception:
+            self.logger.exception('Error getting selected device infos:')
+
+        return None
+
+    def __get_default_card(self):
+        """
+        Return default card name and description
+
+        Returns:
+            tuple: default card (name, description) or None if error occured
+        """
         cmd = '/usr/bin/amixer info | grep "Card default"'
         resp = self.command(cmd)
         if resp['error'] or resp['killed']:
@@ -147,7 +211,7 @@ class Alsa(AdvancedConsole):
             stdout = resp['stdout'][0].replace('Card default ', '')
             parts = stdout.split('/')
             self.logger.debug('amixer info output and splits: %s - %s', resp['stdout'], parts)
-            return self.get_device_infos(parts[0].replace('\'', ''), parts[1].replace('\'', ''))
+            return (parts[0].replace('\'', ''), parts[1].replace('\'', ''))
 
         except Exception: # pragma: no cover
             self.logger.exception('Error parsing amixer command result:')
@@ -205,6 +269,15 @@ class Alsa(AdvancedConsole):
         """
         Get device controls (simple controls)
 
+        Returns:
+            list: list of controls
+        """
+        return self.__get_cached(('scontrols',), self.__get_simple_controls)
+
+    def __get_simple_controls(self):
+        """
+        Get device controls (simple controls) from amixer command
+
         Returns:
             list: list of controls
         """
@@ -233,6 +306,15 @@ class Alsa(AdvancedConsole):
                 ]
 
         """
+        return self.__get_cached(('controls',), self.__get_controls)
+
+    def __get_controls(self):
+        """
+        Get device controls from amixer command
+
+        Returns:
+            list: list of controls (see get_controls)
+        """
         results = self.find('/usr/bin/amixer controls', r"^numid=(\d+),iface=(.*?),name='(.*)'$")
         controls = []
         for _, groups in results:
@@ -272,7 +354,10 @@ class Alsa(AdvancedConsole):
                 }
 
         """
-        return self.__devices_command('/usr/bin/aplay --list-devices')
+        return self.__get_cached(
+            ('playback',),
+            lambda: self.__get_devices(Asound.STREAM_PLAYBACK, '/usr/bin/aplay --list-devices')
+        )
 
     def get_capture_devices(self):
         """
@@ -299,7 +384,10 @@ class Alsa(AdvancedConsole):
                 }
 
         """
-        return self.__devices_command('/usr/bin/arecord --list-devices')
+        return self.__get_cached(
+            ('capture',),
+            lambda: self.__get_devices(Asound.STREAM_CAPTURE, '/usr/bin/arecord --list-devices')
+        )
 
     def __amixer_command(self, command):
         """
@@ -395,7 +483,13 @@ class Alsa(AdvancedConsole):
         cmd = '/usr/bin/amixer %s numid=%s %s' % (command, numid, value if value is not None else '')
         self.logger.trace('amixer command: "%s"' % cmd)
 
-        return self.__amixer_control_command(cmd)
+        if command == self.CGET:
+            return self.__get_cached(('cget', numid), lambda: self.__amixer_control_command(cmd))
+
+        try:
+            return self.__amixer_control_command(cmd)
+        finally:
+            self.cache.invalidate('alsa')
 
     def __get_or_set_volume(self, control, pattern, volume=None):
         """
@@ -418,9 +512,15 @@ class Alsa(AdvancedConsole):
 
         # execute command
         if volume is None:
-            results = self.__amixer_command('/usr/bin/amixer get "%s"' % control)
+            results = self.__get_cached(
+                ('volume', control),
+                lambda: self.__amixer_command('/usr/bin/amixer get "%s"' % control)
+            )
         else:
-            results = self.__amixer_command('/usr/bin/amixer set "%s" %s%%' % (control, volume))
+            try:
+                results = self.__amixer_command('/usr/bin/amixer set "%s" %s%%' % (control, volume))
+            finally:
+                self.cache.invalidate('alsa')
         self.logger.trace('Amixer command results: %s' % results)
         if len(results) == 0 or control not in results.keys():
             self.logger.warning('Unable to get volume: no control "%s" found in results, maybe device is not the default card' % control)
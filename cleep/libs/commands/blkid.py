@@ -2,36 +2,60 @@
 # -*- coding: utf-8 -*-
 
 import re
-import time
 from cleep.libs.internals.console import Console
+from cleep.libs.internals.commandcache import get_command_cache
+from cleep.libs.internals.blockdevices import BlockDevices
 
 
 class Blkid(Console):
 
     CACHE_DURATION = 5.0
 
-    def __init__(self):
+    def __init__(self, use_sysfs=True):
         """
         Constructor
+
+        Args:
+            use_sysfs (bool): read devices from sysfs and udev database instead of running blkid
+                              command. Command is still used if they are not available
         """
         Console.__init__(self)
 
         # set members
-        self.timestamp = None
+        self.cache = get_command_cache()
+        self.use_sysfs = use_sysfs
+        self.blockdevices = BlockDevices()
         self.devices = {}
 
     def __refresh(self):
         """
         Refresh data
         """
-        # check if refresh is needed
-        if (
-            self.timestamp is not None
-            and time.time() - self.timestamp <= self.CACHE_DURATION
-        ):
-            self.logger.trace("Use cached data")
-            return
+        self.devices = self.cache.get(("blkid", self.use_sysfs), self.CACHE_DURATION, self.__load)
+
+    def __load(self):
+        """
+        Load devices from sysfs and udev database, or from blkid command if they are not available
+
+        Returns:
+            dict: devices by device path
+        """
+        if self.use_sysfs and self.blockdevices.is_available() and self.blockdevices.is_udev_available():
+            try:
+                return self.blockdevices.get_filesystems()
+            except Exception:
+                self.logger.exception("Unable to read devices from sysfs, blkid command is used")
+
+        return self.__load_from_command()
+
+    def __load_from_command(self):
+        """
+        Load devices from blkid command
 
+        Returns:
+            dict: devices by device path
+        """
+        devices = {}
         res = self.command("/sbin/blkid")
         self.logger.trace("res=%s", res)
         if not res["error"] and not res["killed"]:
@@ -55,9 +79,9 @@ class Blkid(Console):
                         "type": groups[2],
                         "partuuid": groups[3],
                     }
-                    self.devices[data["device"]] = data
+                    devices[data["device"]] = data
 
-        self.timestamp = time.time()
+        return devices
 
     def get_devices(self):
         """
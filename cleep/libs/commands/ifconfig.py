@@ -3,7 +3,7 @@
     
 import logging
 import netifaces
-import time
+from cleep.libs.internals.commandcache import get_command_cache
 
 
 class Ifconfig():
@@ -22,20 +22,25 @@ class Ifconfig():
         """
         #members
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.timestamp = None
+        self.cache = get_command_cache()
         self.interfaces = {}
 
     def __refresh(self):
         """
         Refresh all data
         """
-        #check if refresh is needed
-        if self.timestamp is not None and time.time()-self.timestamp<=self.CACHE_DURATION: # pragma: no cover
-            self.logger.trace('Use cached data')
-            return
+        self.interfaces = self.cache.get(('ifconfig',), self.CACHE_DURATION, self.__load)
 
+    def __load(self):
+        """
+        Load interfaces configurations
+
+        Returns:
+            dict: interfaces configurations
+        """
         entries = {}
         interfaces = netifaces.interfaces()
+        gateways = netifaces.gateways()
         for interface in interfaces:
             #drop some interfaces
             if interface=='lo':
@@ -43,7 +48,6 @@ class Ifconfig():
 
             #get raw data
             ifaddresses = netifaces.ifaddresses(interface)
-            gateways = netifaces.gateways()
 
             #get mac address
             mac = None
@@ -83,11 +87,7 @@ class Ifconfig():
                 u'netmask_ipv6': netmask_ipv6
             }
 
-        #save interfaces
-        self.interfaces = entries
-
-        #update timestamp
-        self.timestamp = time.time()
+        return entries
 
     def get_configurations(self):
         """
@@ -4,6 +4,7 @@
 import logging
 from gevent import sleep
 from cleep.libs.internals.console import Console
+from cleep.libs.internals.commandcache import get_command_cache
 
 class Ifupdown(Console):
     """
@@ -23,6 +24,12 @@ class Ifupdown(Console):
         self.ifup = u'/sbin/ifup'
         self.ifdown = u'/sbin/ifdown'
 
+    def __invalidate_cache(self):
+        """
+        Drop cached network commands results after interface configuration changed
+        """
+        get_command_cache().invalidate(u'ifconfig', u'iw', u'iwconfig', u'iwgetid', u'iwlist')
+
     def stop_interface(self, interface):
         """
         Stop specified interface
@@ -34,6 +41,7 @@ class Ifupdown(Console):
             bool: True if command succeed (but maybe not connected!)
         """
         res = self.command(u'%s %s' % (self.ifdown, interface), timeout=60.0)
+        self.__invalidate_cache()
         if self.get_last_return_code()!=0:
             self.logger.error(u'Unable to ifdown interface %s: %s' % (interface, res))
             return False
@@ -51,6 +59,7 @@ class Ifupdown(Console):
             bool: True if command succeed (but maybe not connected!)
         """
         res = self.command(u'%s %s' % (self.ifup, interface), timeout=60.0)
+        self.__invalidate_cache()
         if self.get_last_return_code()!=0:
             self.logger.error(u'Unable to ifup interface %s: %s' % (interface, res))
             return False
@@ -5,10 +5,13 @@ import logging
 try:
     from cleep.libs.internals.console import AdvancedConsole, Console
     from cleep.libs.internals import tools as Tools
+    from cleep.libs.internals.commandcache import get_command_cache
 except: # pragma no cover
     from console import AdvancedConsole, Console
 import os
 import re
+import ipaddress
+import netifaces
 from gevent import sleep
 
 class Ip(AdvancedConsole):
@@ -18,14 +21,19 @@ class Ip(AdvancedConsole):
 
     CACHE_DURATION = 5.0
 
-    def __init__(self):
+    def __init__(self, use_netlink=True):
         """
         Constructor
+
+        Args:
+            use_netlink (bool): read network status in-process (netifaces library, that queries
+                                kernel using netlink) instead of running ip command
         """
         AdvancedConsole.__init__(self)
 
         #members
         self._command = '/sbin/ip'
+        self.use_netlink = use_netlink
         self.logger = logging.getLogger(self.__class__.__name__)
         #self.logger.setLevel(logging.DEBUG)
 
@@ -57,6 +65,84 @@ class Ip(AdvancedConsole):
             }
 
         """
+        if self.use_netlink:
+            try:
+                return self.__get_status_from_netifaces()
+            except Exception:
+                self.logger.exception('Unable to get network status from netifaces, ip command is used')
+
+        return self.__get_status_from_command()
+
+    def __get_status_from_netifaces(self):
+        """
+        Get network status from netifaces library
+
+        Returns:
+            dict: network status by interfaces (see get_status)
+        """
+        entries = {}
+        for interface in netifaces.interfaces():
+            # drop lo interface
+            if interface == 'lo':
+                continue
+
+            ifaddresses = netifaces.ifaddresses(interface)
+            entry = {
+                'interface': interface,
+                'ipv4': None,
+                'netmask': None,
+                'ipv6': None,
+                'prefixlen': None,
+                'mac': None,
+            }
+
+            # mac address is reported as AF_PACKET by some netifaces versions
+            links = ifaddresses.get(netifaces.AF_LINK) or ifaddresses.get(getattr(netifaces, 'AF_PACKET', None)) or []
+            links = [address for address in links if address.get('addr')]
+            if links:
+                entry['mac'] = links[0]['addr']
+
+            ipv4s = [address for address in ifaddresses.get(netifaces.AF_INET, []) if address.get('addr')]
+            if ipv4s:
+                entry.update({
+                    'ipv4': ipv4s[0]['addr'],
+                    'netmask': ipv4s[0].get('mask'),
+                })
+
+            # link-local address is preferred, as reported by ip command parsing
+            ipv6s = [address for address in ifaddresses.get(netifaces.AF_INET6, []) if address.get('addr')]
+            ipv6s.sort(key=lambda address: not address['addr'].startswith('fe80:'))
+            if ipv6s:
+                entry.update({
+                    'ipv6': ipv6s[0]['addr'].split('%')[0],
+                    'prefixlen': self.__get_prefixlen(ipv6s[0].get('mask')),
+                })
+
+            entries[interface] = entry
+
+        return entries
+
+    def __get_prefixlen(self, netmask):
+        """
+        Convert ipv6 netmask returned by netifaces (ffff:ffff:ffff:ffff:: or ffff:ffff:ffff:ffff::/64)
+        to prefix length
+
+        Returns:
+            int: prefix length
+        """
+        if not netmask:
+            return 0
+        if '/' in netmask:
+            return int(netmask.split('/')[1])
+        return bin(int(ipaddress.IPv6Address(netmask))).count('1')
+
+    def __get_status_from_command(self):
+        """
+        Get network status from ip command
+
+        Returns:
+            dict: network status by interfaces (see get_status)
+        """
         results = self.find(
             '%s addr' % self._command,
             r'\d:\s+(\w+):.*|inet\s+(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})\/(\d+).*|inet6\s+(\w{1,4}::\w{1,4}:\w{1,4}:\w{1,4}:\w{1,4})\/(\d+).*|link\/ether\s+(\w{2}:\w{2}:\w{2}:\w{2}:\w{2}:\w{2})'
@@ -151,5 +237,8 @@ class Ip(AdvancedConsole):
             'interface': interface_name,
         })
 
+        # interface configuration changed, drop cached network commands results
+        get_command_cache().invalidate('ifconfig', 'iw', 'iwconfig', 'iwgetid', 'iwlist')
+
         return True if resp_down['returncode'] == 0 and resp_up['returncode'] == 0 else False
 
@@ -7,7 +7,8 @@ try:
     from cleep.libs.internals.console import AdvancedConsole
 except:  # pragma no cover
     from console import AdvancedConsole
-import time
+from cleep.libs.internals.commandcache import get_command_cache
+from cleep.libs.internals.nl80211 import Nl80211
 import os
 
 
@@ -19,9 +20,12 @@ class Iw(AdvancedConsole):
 
     CACHE_DURATION = 5.0
 
-    def __init__(self):
+    def __init__(self, use_netlink=True):
         """
         Constructor
+
+        Args:
+            use_netlink (bool): get wireless interfaces from nl80211 instead of running iw command
         """
         AdvancedConsole.__init__(self)
 
@@ -29,7 +33,9 @@ class Iw(AdvancedConsole):
         self._command = "/sbin/iw dev"
         self.logger = logging.getLogger(self.__class__.__name__)
         self.adapters = {}
-        self.timestamp = None
+        self.cache = get_command_cache()
+        self.use_netlink = use_netlink
+        self.nl80211 = Nl80211()
 
     def is_installed(self):
         """
@@ -44,19 +50,37 @@ class Iw(AdvancedConsole):
         """
         Refresh all data
         """
-        # check if refresh is needed
-        if (
-            self.timestamp is not None
-            and time.time() - self.timestamp <= self.CACHE_DURATION
-        ):  # pragma no cover
-            self.logger.trace("Use cached data")
-            return
+        self.adapters = self.cache.get(("iw", self.use_netlink), self.CACHE_DURATION, self.__load)
+
+    def __load(self):
+        """
+        Load wireless adapters from nl80211, or from iw command if netlink failed
+
+        Returns:
+            dict: adapters
+        """
+        if self.use_netlink:
+            try:
+                return {
+                    name: {"interface": name, "network": interface["network"]}
+                    for name, interface in self.nl80211.get_interfaces().items()
+                }
+            except Exception:
+                self.logger.exception("Unable to get wireless interfaces from nl80211, iw command is used")
 
+        return self.__load_from_command()
+
+    def __load_from_command(self):
+        """
+        Load wireless adapters from iw command
+
+        Returns:
+            dict: adapters
+        """
         results = self.find(self._command, r"Interface\s(.*?)\s|ssid\s(.*?)\s")
         self.logger.trace("results=%s", results)
         if len(results) == 0:  # pragma no cover: unable to test if no interface
-            self.adapters = {}
-            return
+            return {}
 
         entries = {}
         current_entry = None
@@ -76,11 +100,7 @@ class Iw(AdvancedConsole):
                 # pylint: disable=E1137
                 current_entry["network"] = groups[0]
 
-        # save adapters
-        self.adapters = entries
-
-        # update timestamp
-        self.timestamp = time.time()
+        return entries
 
     def get_adapters(self):
         """
@@ -2,8 +2,9 @@
 # -*- coding: utf-8 -*-
 
 import logging
-import time
 from cleep.libs.internals.console import AdvancedConsole
+from cleep.libs.internals.commandcache import get_command_cache
+from cleep.libs.internals.nl80211 import Nl80211
 
 class Iwconfig(AdvancedConsole):
     """
@@ -15,15 +16,20 @@ class Iwconfig(AdvancedConsole):
     UNASSOCIATED = 'unassociated'
     INVALID_INTERFACE = 'no wireless extensions'
 
-    def __init__(self):
+    def __init__(self, use_netlink=True):
         """
         Constructor
+
+        Args:
+            use_netlink (bool): get wireless interfaces from nl80211 instead of running iwconfig command
         """
         AdvancedConsole.__init__(self)
 
         # members
         self._command = '/sbin/iwconfig'
-        self.timestamp = None
+        self.cache = get_command_cache()
+        self.use_netlink = use_netlink
+        self.nl80211 = Nl80211()
         self.logger = logging.getLogger(self.__class__.__name__)
         # self.logger.setLevel(logging.DEBUG)
         self.interfaces = {}
@@ -32,11 +38,33 @@ class Iwconfig(AdvancedConsole):
         """
         Refresh all data
         """
-        # check if refresh is needed
-        if self.timestamp is not None and time.time()-self.timestamp <= self.CACHE_DURATION:
-            self.logger.trace('Use cached data')
-            return
+        self.interfaces = self.cache.get(('iwconfig', self.use_netlink), self.CACHE_DURATION, self.__load)
+
+    def __load(self):
+        """
+        Load wireless interfaces from nl80211, or from iwconfig command if netlink failed
 
+        Returns:
+            dict: wireless interfaces
+        """
+        if self.use_netlink:
+            try:
+                return {
+                    name: {'network': interface['network']}
+                    for name, interface in self.nl80211.get_interfaces().items()
+                }
+            except Exception:
+                self.logger.exception('Unable to get wireless interfaces from nl80211, iwconfig command is used')
+
+        return self.__load_from_command()
+
+    def __load_from_command(self):
+        """
+        Load wireless interfaces from iwconfig command
+
+        Returns:
+            dict: wireless interfaces
+        """
         pattern = r'^(?:(\w+)\s+(?:IEEE 802\.11)\s+(?:ESSID:(?:(off/any)|\"(\w+)\"))).*|(?:(\w+)\s+(no wireless extensions).*)|(?:(\w+)\s+(unassociated).*)$'
         results = self.find('%s 2>&1' % self._command, pattern, timeout=5.0)
         self.logger.trace('Results: %s' % results)
@@ -70,12 +98,9 @@ class Iwconfig(AdvancedConsole):
                 'network': network
             }
 
-        # save data
-        self.interfaces = entries
         self.logger.debug('Interfaces: %s' % entries)
 
-        # update timestamp
-        self.timestamp = time.time()
+        return entries
 
     def get_interfaces(self):
         """
@@ -2,8 +2,9 @@
 # -*- coding: utf-8 -*-
     
 import logging
-import time
 from cleep.libs.internals.console import AdvancedConsole, Console
+from cleep.libs.internals.commandcache import get_command_cache
+from cleep.libs.internals.nl80211 import Nl80211
 
 class Iwgetid(AdvancedConsole):
     """
@@ -12,15 +13,20 @@ class Iwgetid(AdvancedConsole):
 
     CACHE_DURATION = 2.0
 
-    def __init__(self):
+    def __init__(self, use_netlink=True):
         """
         Constructor
+
+        Args:
+            use_netlink (bool): get wifi connections from nl80211 instead of running iwgetid command
         """
         AdvancedConsole.__init__(self)
 
         #members
         self._command = u'/sbin/iwgetid'
-        self.timestamp = None
+        self.cache = get_command_cache()
+        self.use_netlink = use_netlink
+        self.nl80211 = Nl80211()
         self.logger = logging.getLogger(self.__class__.__name__)
         #self.logger.setLevel(logging.DEBUG)
         self.connections = {}
@@ -29,11 +35,34 @@ class Iwgetid(AdvancedConsole):
         """
         Refresh all data
         """
-        #check if refresh is needed
-        if self.timestamp is not None and time.time()-self.timestamp<=self.CACHE_DURATION: # pragma no cover
-            self.logger.debug('Don\'t refresh')
-            return
+        self.connections = self.cache.get(('iwgetid', self.use_netlink), self.CACHE_DURATION, self.__load)
+
+    def __load(self):
+        """
+        Load wifi connections from nl80211, or from iwgetid command if netlink failed
+
+        Returns:
+            dict: wifi connections by interface
+        """
+        if self.use_netlink:
+            try:
+                return {
+                    name: {u'network': interface[u'network']}
+                    for name, interface in self.nl80211.get_interfaces().items()
+                    if interface[u'network'] is not None
+                }
+            except Exception:
+                self.logger.exception(u'Unable to get wifi connections from nl80211, iwgetid command is used')
 
+        return self.__load_from_command()
+
+    def __load_from_command(self):
+        """
+        Load wifi connections from iwgetid command
+
+        Returns:
+            dict: wifi connections by interface
+        """
         results = self.find(u'%s' % self._command, r'^(.*?)\s+ESSID:\"(.*)\"$')
         self.logger.debug(results)
 
@@ -51,11 +80,7 @@ class Iwgetid(AdvancedConsole):
                 u'network': network
             }
 
-        #save data
-        self.connections = entries
-
-        #update timestamp
-        self.timestamp = time.time()
+        return entries
 
     def get_connections(self):
         """
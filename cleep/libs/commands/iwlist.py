@@ -2,8 +2,8 @@
 # -*- coding: utf-8 -*-
 
 import logging
-import time
 from cleep.libs.internals.console import AdvancedConsole
+from cleep.libs.internals.commandcache import get_command_cache
 from cleep.libs.configs.wpasupplicantconf import WpaSupplicantConf
 import cleep.libs.internals.tools as Tools
 
@@ -25,7 +25,7 @@ class Iwlist(AdvancedConsole):
 
         # members
         self._command = '/sbin/iwlist %s scan'
-        self.timestamp = None
+        self.cache = get_command_cache()
         self.logger = logging.getLogger(self.__class__.__name__)
         # self.logger.setLevel(logging.DEBUG)
         self.networks = {}
@@ -39,12 +39,27 @@ class Iwlist(AdvancedConsole):
         Args:
             interface (string): interface to scan
         """
-        # check if refresh is needed
-        if self.timestamp is not None and time.time()-self.timestamp <= self.CACHE_DURATION:
-            self.logger.trace('Don\'t refresh')
-            return
-
         self.__last_scanned_interface = interface
+        scan = self.cache.get(('iwlist', interface), self.CACHE_DURATION, lambda: self.__load(interface))
+        self.networks = scan['networks']
+        self.error = scan['error']
+
+    def __load(self, interface):
+        """
+        Scan wifi networks
+
+        Args:
+            interface (string): interface to scan
+
+        Returns:
+            dict: scan result::
+
+                {
+                    networks (dict): found networks
+                    error (bool): True if interface cannot be scanned
+                }
+
+        """
         results = self.find(
             self._command % interface,
             r'Cell \d+|ESSID:\"(.*?)\"|IE:\s*(.*)|Encryption key:(.*)|Signal level=(\d{1,3})/100|Signal level=(-\d+) dBm|Frequency:(\d+\.\d+) GHz',
@@ -54,9 +69,10 @@ class Iwlist(AdvancedConsole):
 
         # handle invalid interface for wifi scanning
         if len(results) == 0 and self.get_last_return_code() != 0:
-            self.networks = {}
-            self.error = True
-            return
+            return {
+                'networks': {},
+                'error': True,
+            }
 
         current_entry = {}
         entries = {}
@@ -140,12 +156,10 @@ class Iwlist(AdvancedConsole):
             del entries[network]['wpa']
             del entries[network]['encryption_key']
 
-        # save networks and error
-        self.networks = entries
-        self.error = False
-
-        # update timestamp
-        self.timestamp = time.time()
+        return {
+            'networks': entries,
+            'error': False,
+        }
 
     def has_error(self):
         """
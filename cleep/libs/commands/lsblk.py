@@ -2,8 +2,9 @@
 # -*- coding: utf-8 -*-
 
 from cleep.libs.internals.console import Console
+from cleep.libs.internals.commandcache import get_command_cache
+from cleep.libs.internals.blockdevices import BlockDevices
 import re
-import time
 import logging
 
 class Lsblk(Console):
@@ -12,24 +13,53 @@ class Lsblk(Console):
 
     CACHE_DURATION = 2.0
 
-    def __init__(self):
+    def __init__(self, use_sysfs=True):
         """
         Constructor
+
+        Args:
+            use_sysfs (bool): read devices from sysfs instead of running lsblk command. Command
+                              is still used if sysfs is not available
         """
         Console.__init__(self)
 
         #members
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.timestamp = None
+        self.cache = get_command_cache()
+        self.use_sysfs = use_sysfs
+        self.blockdevices = BlockDevices()
         self.devices = {}
         self.partitions = []
 
     def __refresh(self):
         """
         Refresh all data
+        """
+        self.devices, self.partitions = self.cache.get(('lsblk', self.use_sysfs), self.CACHE_DURATION, self.__load)
+
+    def __load(self):
+        """
+        Load devices from sysfs, or from lsblk command if sysfs is not available
 
         Returns:
-            dict: partitions infos::
+            tuple: devices infos by drive and list of partition names (see __load_from_command)
+        """
+        if self.use_sysfs and self.blockdevices.is_available():
+            try:
+                devices = self.blockdevices.get_devices()
+                partitions = [name for drive in devices.values() for name, device in drive.items() if device['partition']]
+                return devices, partitions
+            except Exception:
+                self.logger.exception(u'Unable to read devices from sysfs, lsblk command is used')
+
+        return self.__load_from_command()
+
+    def __load_from_command(self):
+        """
+        Load devices from lsblk command
+
+        Returns:
+            tuple: devices infos by drive and list of partition names. Devices infos::
 
                 {
                     drive partition name (string): {
@@ -51,15 +81,10 @@ class Lsblk(Console):
                 }
 
         """
-        #check if refresh is needed
-        if self.timestamp is not None and time.time()-self.timestamp<=self.CACHE_DURATION:
-            self.logger.trace('Use cached data')
-            return
-
         res = self.command(u'/bin/lsblk --list --bytes --output NAME,MAJ:MIN,TYPE,RM,SIZE,RO,MOUNTPOINT,RA,MODEL')
         devices = {}
+        partitions = []
         if not res[u'error'] and not res[u'killed']:
-            self.partitions = []
 
             #parse data
             matches = re.finditer(r'^(.*?)\s+(\d+):(\d+)\s+(.*?)\s+(\d)\s+(.*?)\s+(\d)\s+(.*?)\s+(\d+)(\s|.*?)$', u'\n'.join(res[u'stdout']), re.UNICODE | re.MULTILINE)
@@ -126,13 +151,9 @@ class Lsblk(Console):
 
                     #partition
                     if partition:
-                        self.partitions.append(name)
-
-        #save devices
-        self.devices = devices
+                        partitions.append(name)
 
-        #update timestamp
-        self.timestamp = time.time()
+        return devices, partitions
 
     def get_devices_infos(self):
         """
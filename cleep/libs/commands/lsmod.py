@@ -2,8 +2,7 @@
 # -*- coding: utf-8 -*-
 
 from cleep.libs.internals.console import Console
-import re
-import time
+from cleep.libs.internals.commandcache import get_command_cache
 import logging
 
 class Lsmod(Console):
@@ -21,29 +20,29 @@ class Lsmod(Console):
 
         #members
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.timestamp = None
+        self.cache = get_command_cache()
         self.modules = []
 
     def __refresh(self):
         """
         Refresh all data
         """
-        #check if refresh is needed
-        if self.timestamp is not None and time.time()-self.timestamp<=self.CACHE_DURATION:
-            self.logger.trace('Use cached data')
-            return
+        self.modules = self.cache.get(('lsmod',), self.CACHE_DURATION, self.__load)
 
+    def __load(self):
+        """
+        Load loaded modules
+
+        Returns:
+            list: list of modules
+        """
         res = self.command(u'/bin/lsmod | /usr/bin/awk \'NR>1 { print $1}\'')
         modules = []
         if not res[u'error'] and not res[u'killed']:
             for module in res[u'stdout']:
                 modules.append(module)
 
-        #save devices
-        self.modules = modules
-
-        #update timestamp
-        self.timestamp = time.time()
+        return modules
 
     def get_loaded_modules(self):
         """
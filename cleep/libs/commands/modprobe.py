@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 
 from cleep.libs.internals.console import Console
+from cleep.libs.internals.commandcache import get_command_cache
 import re
 import time
 import logging
@@ -34,6 +35,7 @@ class Modprobe(Console):
         self.logger.trace('Cmd: %s' % cmd)
         resp = self.command(cmd)
         self.logger.trace('Cmd "%s" resp: %s' % (cmd, resp))
+        get_command_cache().invalidate(u'lsmod')
 
         return True if self.get_last_return_code()==0 else False
 
@@ -50,6 +52,7 @@ class Modprobe(Console):
         cmd = u'/sbin/modprobe --remove "%s"' % module.replace(u'-', u'_')
         resp = self.command(cmd)
         self.logger.trace('Cmd "%s" resp: %s' % (cmd, resp))
+        get_command_cache().invalidate(u'lsmod')
 
         return True if self.get_last_return_code()==0 else False
 
@@ -2,9 +2,10 @@
 # -*- coding: utf-8 -*-
 
 import re
-import time
 import logging
 from cleep.libs.internals.console import Console
+from cleep.libs.internals.commandcache import get_command_cache
+from cleep.libs.internals.blockdevices import BlockDevices
 
 
 class Udevadm(Console):
@@ -21,14 +22,20 @@ class Udevadm(Console):
     TYPE_SDCARD = 3
     TYPE_MMC = 4
 
-    def __init__(self):
+    def __init__(self, use_sysfs=True):
         """
         Constructor
+
+        Args:
+            use_sysfs (bool): read device properties from udev database instead of running udevadm
+                              command. Command is still used if device is not found in database
         """
         Console.__init__(self)
 
         # members
-        self.timestamps = {}
+        self.cache = get_command_cache()
+        self.use_sysfs = use_sysfs
+        self.blockdevices = BlockDevices()
         self.devices = {}
         self.logger = logging.getLogger(self.__class__.__name__)
 
@@ -39,65 +46,86 @@ class Udevadm(Console):
         Args:
             device (string): device name
         """
-        # check if refresh is needed
-        if (
-            device in self.timestamps
-            and time.time() - self.timestamps[device] <= self.CACHE_DURATION
-        ):
-            self.logger.trace("Use cached data")
-            return
-
-        # add new device entry if necessary
-        if device not in self.devices:
-            self.devices[device] = self.TYPE_UNKNOWN
+        self.devices[device] = self.cache.get(
+            ("udevadm", self.use_sysfs, device), self.CACHE_DURATION, lambda: self.__load(device)
+        )
+
+    def __load(self, device):
+        """
+        Load device type from udev database, or from udevadm command if device is not found in database
+
+        Args:
+            device (string): device name
+
+        Returns:
+            int: device type
+        """
+        if self.use_sysfs:
+            try:
+                properties = self.blockdevices.get_udev_properties(device)
+                if properties is not None:
+                    return self.__get_type(properties.items())
+            except Exception:
+                self.logger.exception("Unable to read device properties from udev database, udevadm command is used")
+
+        return self.__load_from_command(device)
+
+    def __load_from_command(self, device):
+        """
+        Load device type from udevadm command
+
+        Args:
+            device (string): device name
 
+        Returns:
+            int: device type
+        """
         res = self.command(f'/bin/udevadm info --query=property --name="{device}"')
         self.logger.debug('udevadm res=%s', res)
-        if not res["error"] and not res["killed"]:
-            # parse data
-            matches = re.finditer(
-                r"^(?:(ID_DRIVE_FLASH_SD)=(\d)|(ID_DRIVE_MEDIA_FLASH_SD)=(\d)|(ID_BUS)=(.*?)|(ID_USB_DRIVER)=(.*?)|(ID_ATA)=(\d)|(ID_PATH_TAG)=(.*?))$",
-                "\n".join(res["stdout"]),
-                re.UNICODE | re.MULTILINE,
-            )
-            id_path_tag_with_mmc = False
-            for _, match in enumerate(matches):
-                # get values and filter None values
-                groups = match.groups()
-                groups = list(filter(None, groups))
-
-                if len(groups) == 2:
-                    if groups[0] == "ID_BUS" and groups[1] == "usb":
-                        # usb stuff (usb stick, usb card reader...)
-                        self.devices[device] = self.TYPE_USB
-                        break
-                    if groups[0] == "ID_DRIVE_FLASH_SD" and groups[1] == "1":
-                        # sdcard
-                        self.devices[device] = self.TYPE_SDCARD
-                        break
-                    if groups[0] == "ID_DRIVE_MEDIA_FLASH_SD" and groups[1] == "1":
-                        # sdcard
-                        self.devices[device] = self.TYPE_SDCARD
-                        break
-                    if groups[0] == "ID_BUS" and groups[1] == "ata":
-                        # ata device (SATA, PATA)
-                        self.devices[device] = self.TYPE_ATA
-                        break
-                    if groups[0] == "ID_ATA":
-                        # ata device (SATA, PATA)
-                        self.devices[device] = self.TYPE_ATA
-                        break
-                    if groups[0] == "ID_PATH_TAG" and groups[1].find("mmc") != -1:
-                        # mmc device
-                        id_path_tag_with_mmc = True
-
-                    # unknown device type
-                    self.devices[device] = self.TYPE_UNKNOWN
-
-            if id_path_tag_with_mmc and self.devices[device] == self.TYPE_UNKNOWN:
-                self.devices[device] = self.TYPE_MMC
-
-        self.timestamps[device] = time.time()
+        if res["error"] or res["killed"]:
+            return self.TYPE_UNKNOWN
+
+        # parse data
+        matches = re.finditer(
+            r"^(?:(ID_DRIVE_FLASH_SD)=(\d)|(ID_DRIVE_MEDIA_FLASH_SD)=(\d)|(ID_BUS)=(.*?)|(ID_USB_DRIVER)=(.*?)|(ID_ATA)=(\d)|(ID_PATH_TAG)=(.*?))$",
+            "\n".join(res["stdout"]),
+            re.UNICODE | re.MULTILINE,
+        )
+        properties = []
+        for _, match in enumerate(matches):
+            # get values and filter None values
+            groups = list(filter(None, match.groups()))
+            if len(groups) == 2:
+                properties.append((groups[0], groups[1]))
+
+        return self.__get_type(properties)
+
+    def __get_type(self, properties):
+        """
+        Return device type according to its udev properties
+
+        Args:
+            properties (list): list of udev properties as (key, value) tuples
+
+        Returns:
+            int: device type
+        """
+        id_path_tag_with_mmc = False
+        for key, value in properties:
+            if key == "ID_BUS" and value == "usb":
+                # usb stuff (usb stick, usb card reader...)
+                return self.TYPE_USB
+            if key in ("ID_DRIVE_FLASH_SD", "ID_DRIVE_MEDIA_FLASH_SD") and value == "1":
+                # sdcard
+                return self.TYPE_SDCARD
+            if (key == "ID_BUS" and value == "ata") or key == "ID_ATA":
+                # ata device (SATA, PATA)
+                return self.TYPE_ATA
+            if key == "ID_PATH_TAG" and value.find("mmc") != -1:
+                # mmc device
+                id_path_tag_with_mmc = True
+
+        return self.TYPE_MMC if id_path_tag_with_mmc else self.TYPE_UNKNOWN
 
     def get_device_type(self, device):
         """
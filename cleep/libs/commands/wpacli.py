@@ -1,9 +1,17 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import os
+import errno
 import logging
+import shlex
+import re
+from threading import Lock
 from gevent import sleep
 from cleep.libs.internals.console import AdvancedConsole
+from cleep.libs.internals.commandcache import get_command_cache
+from cleep.libs.internals.taskexecutor import get_executor
+from cleep.libs.internals.wpactrl import WpaCtrl
 from cleep.libs.configs.wpasupplicantconf import WpaSupplicantConf
 import cleep.libs.internals.tools as Tools
 from cleep.exception import MissingParameter, InvalidParameter
@@ -13,10 +21,17 @@ class Wpacli(AdvancedConsole):
     """
     Command /sbin/wpa_cli helper
 
+    Requests are sent to wpa_supplicant control interface using a persistent connection per
+    interface. Command wpa_cli is used if control interface is not available.
+
     Note:
         Man page https://www.freebsd.org/cgi/man.cgi?wpa_cli
     """
 
+    EVENT_SCAN_RESULTS = "scan_results"
+    EVENT_CONNECTED = "connected"
+    EVENT_DISCONNECTED = "disconnected"
+
     STATUS_CURRENT = 2
     STATUS_DISABLED = 0
     STATUS_ENABLED = 1
@@ -46,25 +61,221 @@ class Wpacli(AdvancedConsole):
         STATE_COMPLETED,
     ]
 
-    def __init__(self):
+    def __init__(self, use_ctrl_interface=True, event_callback=None):
         """
         Constructor
+
+        Args:
+            use_ctrl_interface (bool): use wpa_supplicant control interface instead of running wpa_cli
+            event_callback (function): function called with (event (string), params (dict)) when
+                                       wpa_supplicant notifies new scan results (EVENT_SCAN_RESULTS with
+                                       interface and networks params) or connection changes (EVENT_CONNECTED
+                                       and EVENT_DISCONNECTED with interface and bssid params). It should not
+                                       block (forward it to a bus event)
         """
         AdvancedConsole.__init__(self)
 
         # members
         self.logger = logging.getLogger(self.__class__.__name__)
         self.wpacli = "/sbin/wpa_cli"
+        self.ctrl_dir = WpaCtrl.CTRL_DIR
+        self.use_ctrl_interface = use_ctrl_interface
+        self.event_callback = event_callback
         self.configured_networks = {}
         self.scanned_networks = {}
         self.__update_configured_networks = True
+        self.__clients = {}
+        self.__clients_lock = Lock()
+
+    def close(self):
+        """
+        Close connections to wpa_supplicant control interface
+        """
+        with self.__clients_lock:
+            clients, self.__clients = list(self.__clients.values()), {}
+        for client in clients:
+            client.close()
+
+    def __get_client(self, interface):
+        """
+        Return connected control interface client of specified interface
+
+        Args:
+            interface (string): interface name. Default wpa_cli interface if None
+
+        Returns:
+            WpaCtrl: client or None if control interface is not available
+        """
+        if not self.use_ctrl_interface:
+            return None
+        interface = interface or self.__get_default_interface()
+        if not interface or not os.path.exists(os.path.join(self.ctrl_dir, interface)):
+            return None
+
+        with self.__clients_lock:
+            client = self.__clients.get(interface)
+            if client is None:
+                client = WpaCtrl(interface, self.ctrl_dir, self.__on_event)
+                self.__clients[interface] = client
+        try:
+            client.connect()
+            return client
+        except OSError as error:
+            self.logger.warning("Unable to connect to wpa_supplicant on %s, wpa_cli is used: %s", interface, error)
+            return None
+
+    def __get_default_interface(self):
+        """
+        Return interface used by wpa_cli when no interface is specified (first non p2p interface)
+
+        Returns:
+            string: interface name or None if no interface is available
+        """
+        try:
+            interfaces = sorted(os.listdir(self.ctrl_dir))
+        except OSError:
+            return None
+        interfaces.sort(key=lambda interface: interface.startswith("p2p-dev-"))
+        return interfaces[0] if interfaces else None
+
+    def __on_event(self, interface, event, message):
+        """
+        Handle wpa_supplicant events (called from client reader thread)
+        """
+        if event == WpaCtrl.EVENT_SCAN_RESULTS:
+            # scan results can't be requested from reader thread
+            get_executor().submit(lambda: self.__refresh_scanned_networks(interface), name="wpacli-scan-results")
+        elif event in (WpaCtrl.EVENT_CONNECTED, WpaCtrl.EVENT_DISCONNECTED):
+            get_command_cache().invalidate("iw", "iwconfig", "iwgetid")
+            bssid = re.search(r"(?:bssid=)?((?:[0-9a-fA-F]{2}:){5}[0-9a-fA-F]{2})", message)
+            self.__send_event(
+                self.EVENT_CONNECTED if event == WpaCtrl.EVENT_CONNECTED else self.EVENT_DISCONNECTED,
+                {"interface": interface, "bssid": bssid.group(1) if bssid else None},
+            )
+
+    def __refresh_scanned_networks(self, interface):
+        """
+        Update scanned networks cache with last scan results of specified interface
+        """
+        client = self.__get_client(interface)
+        if client is None:
+            return
+        try:
+            networks = self.__get_scan_results(client)
+        except OSError as error:
+            self.logger.warning("Unable to get scan results of %s: %s", interface, error)
+            return
+        self.scanned_networks[interface] = networks
+        self.__send_event(self.EVENT_SCAN_RESULTS, {"interface": interface, "networks": networks})
+
+    def __send_event(self, event, params):
+        """
+        Send event to event callback
+        """
+        if not self.event_callback:
+            return
+        try:
+            self.event_callback(event, params)
+        except Exception:
+            self.logger.exception("Error in event callback")
+
+    def __request(self, interface, args, timeout=2.0):
+        """
+        Execute wpa_supplicant command on control interface (or using wpa_cli)
+
+        Args:
+            interface (string): interface name. Default interface if None
+            args (list): command and its arguments (ie ["set_network", "0", "ssid", '"MyWifi"'])
+            timeout (float): command timeout
+
+        Returns:
+            tuple: command result (see __command)
+        """
+        return self.__requests(interface, [args], timeout)[0]
+
+    def __requests(self, interface, commands, timeout=2.0):
+        """
+        Execute wpa_supplicant commands. Commands are pipelined on control interface, otherwise
+        wpa_cli is run for each command until one fails
+
+        Args:
+            interface (string): interface name. Default interface if None
+            commands (list): list of commands arguments
+            timeout (float): commands timeout
+
+        Returns:
+            list: list of commands results (see __command). Results of commands not run are missing
+        """
+        client = self.__get_client(interface)
+        if client:
+            try:
+                replies = client.requests([self.__get_ctrl_command(args) for args in commands], timeout)
+                return [self.__parse_reply(reply) for reply in replies]
+            except OSError as error:
+                if error.errno != errno.ENOTCONN:
+                    # requests may have been executed, do not run them again
+                    self.logger.error("Request to wpa_supplicant failed: %s", error)
+                    return [(False, "")]
+                self.logger.warning("Request to wpa_supplicant failed, wpa_cli is used: %s", error)
+
+        results = []
+        for args in commands:
+            results.append(self.__command(self.__get_cli_command(interface, args), timeout))
+            if not results[-1][0]:
+                break
+        return results
+
+    def __find(self, interface, args, pattern, timeout=2.0):
+        """
+        Find all pattern matches in wpa_supplicant command output (see AdvancedConsole.find)
+        """
+        client = self.__get_client(interface)
+        if client:
+            try:
+                reply = client.request(self.__get_ctrl_command(args), timeout)
+                return self.find_in_string(reply, pattern)
+            except OSError as error:
+                if error.errno != errno.ENOTCONN:
+                    self.logger.error("Request to wpa_supplicant failed: %s", error)
+                    return []
+                self.logger.warning("Request to wpa_supplicant failed, wpa_cli is used: %s", error)
+
+        return self.find(self.__get_cli_command(interface, args), pattern, timeout=timeout)
+
+    def __get_ctrl_command(self, args):
+        """
+        Return control interface command (command names are uppercase)
+        """
+        return " ".join([args[0].upper()] + list(args[1:]))
+
+    def __get_cli_command(self, interface, args):
+        """
+        Return wpa_cli command line
+        """
+        interface = f" -i {interface}" if interface else ""
+        return f"{self.wpacli}{interface} " + " ".join(shlex.quote(arg) for arg in args)
 
-    def __command(self, command):
+    def __parse_reply(self, reply):
+        """
+        Parse control interface reply
+
+        Returns:
+            tuple: command result (see __command)
+        """
+        if reply == "OK":
+            return (True, "")
+        if reply.startswith("FAIL"):
+            self.logger.debug("Wpa_supplicant failed: %s", reply)
+            return (False, "")
+        return (True, reply)
+
+    def __command(self, command, timeout=2.0):
         """
         Execute wpa_cli command and parse result to check if command failed or not
 
         Args:
             command (string): command to execute
+            timeout (float): command timeout
 
         Returns:
             tuple: command result::
@@ -75,7 +286,7 @@ class Wpacli(AdvancedConsole):
                 )
 
         """
-        res = self.command(command)
+        res = self.command(command, timeout)
         self.logger.debug("command result: %s" % res)
         if res["error"] or res["killed"]:
             # command failed
@@ -113,8 +324,9 @@ class Wpacli(AdvancedConsole):
                 }
 
         """
-        results = self.find(
-            f"{self.wpacli} list_networks",
+        results = self.__find(
+            None,
+            ["list_networks"],
             r"^(\d)\s+(.*?)\s+(any|.{2}:.{2}:.{2}:.{2}:.{2}:.{2})\s*(?:\[(.*?)\])?$",
         )
         entries = {}
@@ -149,11 +361,35 @@ class Wpacli(AdvancedConsole):
 
         Args:
             interface (string): interface to scan
-            duration (float): time to wait before retrieving scan results (default 3 seconds)
+            duration (float): maximum time to wait for scan results (default 3 seconds). Using control
+                              interface, results are returned as soon as scan is completed
 
         Result:
-            bool: True if command succeed (but maybe not connected!)
+            dict: scanned networks by interface::
+
+                {
+                    interface (string): {
+                        network (string): {
+                            interface (string): interface name,
+                            network (string): network name,
+                            encryption (string): network encryption (see WpaSupplicantConf.ENCRYPTION_TYPE_XXX),
+                            signallevel (int): signal level (percentage)
+                        },
+                        ...
+                    },
+                    ...
+                }
+
         """
+        client = self.__get_client(interface)
+        if client:
+            try:
+                networks = self.__scan(client, duration)
+                self.scanned_networks[client.interface] = networks
+                return {client.interface: networks}
+            except OSError as error:
+                self.logger.warning("Unable to scan networks using wpa_supplicant, wpa_cli is used: %s", error)
+
         # launch scan
         if interface:
             # scan only specified interface
@@ -176,6 +412,71 @@ class Wpacli(AdvancedConsole):
                 f"{self.wpacli} scan_results",
                 r"^(Selected interface) \'(.*?)\'|(.{2}:.{2}:.{2}:.{2}:.{2}:.{2})\s+(\d+)\s+(.*?)\s+(\[.*\])\s+(.*)$",
             )
+        entries = self.__parse_scan_results(results, interface)
+
+        self.scanned_networks = entries
+        return entries
+
+    def get_scanned_networks(self):
+        """
+        Return networks found during last scans, including scans not requested by scan_networks (they
+        are reported by wpa_supplicant control interface)
+
+        Returns:
+            dict: scanned networks by interface (see scan_networks)
+        """
+        return self.scanned_networks
+
+    def __scan(self, client, duration):
+        """
+        Scan networks using control interface
+
+        Args:
+            client (WpaCtrl): interface client
+            duration (float): maximum time to wait for scan results
+
+        Returns:
+            dict: scanned networks of client interface
+        """
+        # expect event before requesting scan to not miss it
+        waiter = client.expect_event(WpaCtrl.EVENT_SCAN_RESULTS)
+        reply = client.request("SCAN")
+        if reply.startswith("FAIL") and reply != "FAIL-BUSY":
+            # FAIL-BUSY means a scan is already running, wait for its results
+            self.logger.warning("Unable to scan networks on %s: %s", client.interface, reply)
+            client.wait_event(waiter, 0)
+        elif client.wait_event(waiter, duration) is None:
+            self.logger.debug("Scan on %s not completed after %s seconds, last results are returned", client.interface, duration)
+
+        return self.__get_scan_results(client)
+
+    def __get_scan_results(self, client):
+        """
+        Get last scan results using control interface
+
+        Args:
+            client (WpaCtrl): interface client
+
+        Returns:
+            dict: scanned networks of client interface
+        """
+        results = self.find_in_string(
+            client.request("SCAN_RESULTS"),
+            r"^(.{2}:.{2}:.{2}:.{2}:.{2}:.{2})\s+(\d+)\s+(.*?)\s+(\[.*\])\s+(.*)$",
+        )
+        return self.__parse_scan_results(results, client.interface).get(client.interface, {})
+
+    def __parse_scan_results(self, results, interface):
+        """
+        Parse scan results
+
+        Args:
+            results (list): scan_results command matches
+            interface (string): scanned interface. None if all interfaces were scanned
+
+        Returns:
+            dict: scanned networks by interface (see scan_networks)
+        """
         entries = {}
         current_interface = interface
         for _, groups in results:
@@ -219,7 +520,6 @@ class Wpacli(AdvancedConsole):
                     "signallevel": signal_level,
                 }
 
-        self.scanned_networks = entries
         return entries
 
     def enable_network(self, network):
@@ -243,11 +543,11 @@ class Wpacli(AdvancedConsole):
 
         # enable network
         network_id = self.configured_networks[network]["id"]
-        result = self.__command(f"{self.wpacli} enable_network {network_id}")[0]
+        result = self.__request(None, ["enable_network", network_id])[0]
 
         # save config
         if result:
-            self.__command(f"{self.wpacli} save_config")
+            self.__request(None, ["save_config"])
             self.__update_configured_networks = True
 
         return result
@@ -273,11 +573,11 @@ class Wpacli(AdvancedConsole):
 
         # disable network
         network_id = self.configured_networks[network]["id"]
-        result = self.__command(f"{self.wpacli} disable_network {network_id}")[0]
+        result = self.__request(None, ["disable_network", network_id])[0]
 
         # save config
         if result:
-            self.__command(f"{self.wpacli} save_config")
+            self.__request(None, ["save_config"])
             self.__update_configured_networks = True
 
         return result
@@ -318,42 +618,34 @@ class Wpacli(AdvancedConsole):
             return False
 
         # add network entry
-        (_, network_id) = self.__command(f"{self.wpacli} add_network")
+        (_, network_id) = self.__request(None, ["add_network"])
         try:
-            network_id = int(network_id)
+            network_id = str(int(network_id))
         except Exception:
             self.logger.error('Invalid network id "%s"', network_id)
             return False
 
-        # set network name
-        if not self.__command(f"{self.wpacli} set_network {network_id} ssid '\"{network}\"'")[0]:
-            self.logger.error("Unable to set network ssid")
-            return False
-
-        # set encryption
-        command = None
+        # configure network (requests are pipelined)
+        commands = [
+            (["set_network", network_id, "ssid", f'"{network}"'], "Unable to set network ssid"),
+        ]
         if encryption in (
             WpaSupplicantConf.ENCRYPTION_TYPE_WPA2,
             WpaSupplicantConf.ENCRYPTION_TYPE_WPA,
             WpaSupplicantConf.ENCRYPTION_TYPE_WEP,
         ):
-            command = f"{self.wpacli} set_network {network_id} key_mgmt WPA-PSK WPA-EAP"
+            commands.append((["set_network", network_id, "key_mgmt", "WPA-PSK WPA-EAP"], "Unable to set network encryption"))
         else:
-            command = f"{self.wpacli} set_network {network_id} key_mgmt NONE"
-        if not self.__command(command)[0]:
-            self.logger.error("Unable to set network encryption")
-            return False
-
-        # set password
+            commands.append((["set_network", network_id, "key_mgmt", "NONE"], "Unable to set network encryption"))
         if len(password) > 0:
-            if not self.__command(f"{self.wpacli} set_network {network_id} psk '\"{password}\"'")[0]:
-                self.logger.error("Unable to set network password")
-                return False
-
-        # set hidden
+            commands.append((["set_network", network_id, "psk", f'"{password}"'], "Unable to set network password"))
         if hidden:
-            if not self.__command(f"{self.wpacli} set_network {network_id} scan_ssid 1")[0]:
-                self.logger.error("Unable to set network hidden flag")
+            commands.append((["set_network", network_id, "scan_ssid", "1"], "Unable to set network hidden flag"))
+
+        results = self.__requests(None, [args for args, _ in commands])
+        for index, (_, error) in enumerate(commands):
+            if index >= len(results) or not results[index][0]:
+                self.logger.error(error)
                 return False
 
         return True
@@ -379,11 +671,11 @@ class Wpacli(AdvancedConsole):
 
         # disable network
         network_id = self.configured_networks[network]["id"]
-        result = self.__command(f"{self.wpacli} remove_network {network_id}")[0]
+        result = self.__request(None, ["remove_network", network_id])[0]
 
         # save config
         if result:
-            self.__command(f"{self.wpacli} save_config")
+            self.__request(None, ["save_config"])
             self.__update_configured_networks = True
 
         return result
@@ -409,11 +701,11 @@ class Wpacli(AdvancedConsole):
 
         # disable network
         network_id = self.configured_networks[network]["id"]
-        result = self.__command(f"{self.wpacli} select_network {network_id}")[0]
+        result = self.__request(None, ["select_network", network_id])[0]
 
         # save config
         if result:
-            self.__command(f"{self.wpacli} save_config")
+            self.__request(None, ["save_config"])
             self.__update_configured_networks = True
 
         return result
@@ -434,8 +726,21 @@ class Wpacli(AdvancedConsole):
             raise MissingParameter("Parameter interface is missing")
 
         # reconfigure
-        res = self.command(f"{self.wpacli} -i {interface} reconfigure", timeout=10.0)
-        if res["error"] or res["killed"]:
+        client = self.__get_client(interface)
+        try:
+            result = client.request("RECONFIGURE", timeout=10.0) == "OK" if client else None
+        except OSError as error:
+            if error.errno != errno.ENOTCONN:
+                self.logger.error("Unable to reconfigure %s using wpa_supplicant: %s", interface, error)
+                result = False
+            else:
+                self.logger.warning("Unable to reconfigure %s using wpa_supplicant, wpa_cli is used: %s", interface, error)
+                result = None
+        if result is None:
+            res = self.command(f"{self.wpacli} -i {interface} reconfigure", timeout=10.0)
+            result = not res["error"] and not res["killed"]
+        get_command_cache().invalidate("iw", "iwconfig", "iwgetid")
+        if not result:
             return False
 
         # pause if requested
@@ -461,8 +766,9 @@ class Wpacli(AdvancedConsole):
             )
 
         """
-        results = self.find(
-            f"{self.wpacli} -i {interface_name} status",
+        results = self.__find(
+            interface_name,
+            ["status"],
             r"^(ssid)=(.*)|(wpa_state)=(.*)|(ip_address)=(.*)$",
         )
         network = None
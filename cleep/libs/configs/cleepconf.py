@@ -2,9 +2,12 @@
 #  -*- coding: utf-8 -*-
 
 import ast
+import copy
+import io
 import os
-from gevent import sleep
 import logging
+from contextlib import contextmanager
+from threading import RLock
 from passlib.hash import sha256_crypt
 from configparser import ConfigParser
 from cleep.common import CORE_MODULES
@@ -13,6 +16,9 @@ from cleep.common import CORE_MODULES
 class CleepConf:
     """
     Helper class to update and read values from /etc/cleep/cleep.conf file
+
+    Config file is parsed once and shared by all instances. Parsed content is reused while file inode, mtime
+    and size are unchanged, and option values are decoded only once.
     """
 
     CONF = "/etc/cleep/cleep.conf"
@@ -30,6 +36,10 @@ class CleepConf:
         "auth": {"accounts": {}, "enabled": False},
     }
 
+    # parsed config files by path, shared by all instances
+    __cache = {}
+    __cache_lock = RLock()
+
     def __init__(self, cleep_filesystem):
         """
         Constructor
@@ -41,40 +51,150 @@ class CleepConf:
         self.cleep_filesystem = cleep_filesystem
         self.logger = logging.getLogger(self.__class__.__name__)
         self.__conf = None
+        self.__batch_depth = 0
+        self.__dirty = False
+
+    def __get_file_key(self):
+        """
+        Return key identifying current config file version
+
+        Returns:
+            tuple: file inode, mtime and size, None if file does not exist
+        """
+        try:
+            stat = os.stat(self.CONF)
+            return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            return None
 
     def __open(self):
         """
-        Open config file
+        Open config file, reusing cached parsed content if file has not changed
 
         Returns:
             ConfigParser: ConfigParser instance
         """
-        self.__conf = ConfigParser()
+        self.__cache_lock.acquire()
+        self.__conf = None
 
-        if not os.path.exists(self.CONF):
+        key = self.__get_file_key()
+        if key is None:
             base_path = os.path.dirname(self.CONF)
-            self.cleep_filesystem.mkdirs(base_path)
-            fdesc = self.cleep_filesystem.open(self.CONF, "w")
-            fdesc.write("")
-            self.cleep_filesystem.close(fdesc)
-            sleep(0.10)
+            if base_path:
+                self.cleep_filesystem.mkdirs(base_path)
+            self.cleep_filesystem.write_data(self.CONF, "")
+            key = self.__get_file_key()
+
+        cached = self.__cache.get(self.CONF)
+        if cached and cached["key"] == key:
+            self.__conf = cached["conf"]
+            return self.__conf
 
         # load conf content
+        self.logger.trace('Parsing config file "%s"', self.CONF)
+        conf = ConfigParser()
         fdesc = self.cleep_filesystem.open(self.CONF, "r")
-        self.__conf.read_file(fdesc)
-        self.cleep_filesystem.close(fdesc)
+        try:
+            conf.read_file(fdesc)
+        finally:
+            self.cleep_filesystem.close(fdesc)
+        self.__cache[self.CONF] = {"key": key, "conf": conf, "values": {}}
+        self.__conf = conf
 
         return self.__conf
 
     def __close(self, write=False):
         """
-        Close everything and write new content if forced
+        Close everything and write new content if forced and content changed
+
+        Writing is delayed until the end of current batch if any (see batch function)
+
+        Args:
+            write (bool): True to write content
         """
-        if self.__conf and write:
-            # workaround for unicode writing http://bugs.python.org/msg187829
-            fdesc = self.cleep_filesystem.open(self.CONF, "w")
-            self.__conf.write(fdesc)
-            self.cleep_filesystem.close(fdesc)
+        try:
+            self.__dirty = self.__dirty or write
+            if self.__dirty and self.__conf is None:
+                # config opening failed, drop cached content that may contain unsaved changes
+                self.__dirty = False
+                self.__cache.pop(self.CONF, None)
+            if self.__batch_depth > 0 or not self.__dirty:
+                return
+
+            self.__dirty = False
+            content = io.StringIO()
+            self.__conf.write(content)
+            if self.cleep_filesystem.write_data(self.CONF, content.getvalue(), atomic=True):
+                self.__cache[self.CONF]["key"] = self.__get_file_key()
+            else:
+                # drop cached content that does not match file content
+                self.__cache.pop(self.CONF, None)
+        finally:
+            self.__cache_lock.release()
+
+    def __get(self, section, option):
+        """
+        Return decoded option value. Returned value is shared, copy it before modifying it.
+
+        Args:
+            section (str): config section
+            option (str): section option
+
+        Returns:
+            any: option value
+        """
+        values = self.__cache[self.CONF]["values"]
+        if (section, option) not in values:
+            values[(section, option)] = self.__decode(self.__conf.get(section, option))
+        return values[(section, option)]
+
+    def __set(self, section, option, value):
+        """
+        Set option value
+
+        Args:
+            section (str): config section
+            option (str): section option
+            value (any): option value
+        """
+        self.__conf.set(section, option, str(value))
+        self.__cache[self.CONF]["values"].pop((section, option), None)
+
+    def __decode(self, value):
+        """
+        Decode option value
+
+        Args:
+            value (str): raw option value
+
+        Returns:
+            any: decoded value, or raw value if it can't be evaluated
+        """
+        try:
+            return ast.literal_eval(value)
+        except Exception:
+            # unable to eval option, consider it as a string
+            return f"{value}"
+
+    @contextmanager
+    def batch(self):
+        """
+        Context manager to group multiple config updates into a single file write
+
+        Usage::
+
+            with cleep_conf.batch():
+                cleep_conf.install_module("module1")
+                cleep_conf.install_module("module2")
+
+        """
+        self.__batch_depth += 1
+        try:
+            self.__open()
+            yield self
+        finally:
+            self.__batch_depth -= 1
+            self.__close()
 
     def check(self):
         """
@@ -83,8 +203,8 @@ class CleepConf:
         Returns:
             bool: True if updated
         """
+        updated = False
         try:
-            updated = False
             config = self.__open()
 
             # merge with default config
@@ -97,7 +217,7 @@ class CleepConf:
                 # fix missing section keys
                 for (key, value) in section_keys.items():
                     if not config.has_option(section, key):
-                        config.set(section, key, str(value))
+                        self.__set(section, key, value)
                         updated = True
             return updated
         finally:
@@ -116,12 +236,8 @@ class CleepConf:
 
             for section in conf.sections():
                 config[section] = {}
-                for option, val in conf.items(section):
-                    try:
-                        config[section][option] = ast.literal_eval(val)
-                    except Exception:
-                        # unable to eval option, consider it as a string
-                        config[section][option] = f"{val}"
+                for option in conf.options(section):
+                    config[section][option] = copy.deepcopy(self.__get(section, option))
 
             return config
         finally:
@@ -137,22 +253,22 @@ class CleepConf:
         Returns:
             bool: True if module installed
         """
+        updated = False
         try:
-            conf = self.__open()
-            self.logger.trace("Conf=%s", conf)
+            self.__open()
 
             # check if module isn't already installed
-            modules = ast.literal_eval(conf.get("general", "modules"))
+            modules = self.__get("general", "modules")
             if module in modules:
                 return True
 
             # install module
-            modules.append(module)
-            conf.set("general", "modules", str(modules))
+            self.__set("general", "modules", modules + [module])
+            updated = True
 
             return True
         finally:
-            self.__close(True)
+            self.__close(updated)
 
     def uninstall_module(self, module):
         """
@@ -164,11 +280,12 @@ class CleepConf:
         Returns:
             bool: True if module uninstalled
         """
+        updated = False
         try:
-            conf = self.__open()
+            self.__open()
 
             # check if module is installed
-            modules = ast.literal_eval(conf.get("general", "modules"))
+            modules = self.__get("general", "modules")
             if module not in modules:
                 self.logger.warning(
                     'Trying to uninstall not installed module "%s"', module
@@ -176,12 +293,12 @@ class CleepConf:
                 return False
 
             # uninstall module
-            modules.remove(module)
-            conf.set("general", "modules", str(modules))
+            self.__set("general", "modules", [item for item in modules if item != module])
+            updated = True
 
             return True
         finally:
-            self.__close(True)
+            self.__close(updated)
 
     def update_module(self, module):
         """
@@ -193,11 +310,12 @@ class CleepConf:
         Returns:
             bool: True if operation succeed
         """
+        updated = False
         try:
-            conf = self.__open()
+            self.__open()
 
             # check if module installed
-            modules = ast.literal_eval(conf.get("general", "modules"))
+            modules = self.__get("general", "modules")
             if module not in modules:
                 self.logger.warning(
                     'Trying to update not installed module "%s"', module
@@ -205,29 +323,27 @@ class CleepConf:
                 return False
 
             # check if module not already updated
-            updated = ast.literal_eval(conf.get("general", "updated"))
-            if module in updated:
+            updated_modules = self.__get("general", "updated")
+            if module in updated_modules:
                 return True
 
             # update module
-            updated.append(module)
-            conf.set("general", "updated", str(updated))
+            self.__set("general", "updated", updated_modules + [module])
+            updated = True
 
             return True
         finally:
-            self.__close(True)
+            self.__close(updated)
 
     def clear_updated_modules(self):
         """
         Erase updated module list from config
         """
         try:
-            conf = self.__open()
+            self.__open()
 
             # clear list content
-            updated = ast.literal_eval(conf.get("general", "updated"))
-            updated[:] = []
-            conf.set("general", "updated", str(updated))
+            self.__set("general", "updated", [])
         finally:
             self.__close(True)
 
@@ -242,10 +358,9 @@ class CleepConf:
             bool: True if module is installed
         """
         try:
-            conf = self.__open()
-            modules = ast.literal_eval(conf.get("general", "modules"))
+            self.__open()
 
-            return module in modules
+            return module in self.__get("general", "modules")
         finally:
             self.__close()
 
@@ -260,10 +375,9 @@ class CleepConf:
             bool: True if module is installed
         """
         try:
-            conf = self.__open()
-            modules = ast.literal_eval(conf.get("general", "updated"))
+            self.__open()
 
-            return module in modules
+            return module in self.__get("general", "updated")
         finally:
             self.__close()
 
@@ -272,8 +386,8 @@ class CleepConf:
         Enable trace logging mode
         """
         try:
-            conf = self.__open()
-            conf.set("debug", "trace_enabled", str(True))
+            self.__open()
+            self.__set("debug", "trace_enabled", True)
         finally:
             self.__close(True)
 
@@ -282,8 +396,8 @@ class CleepConf:
         Disable trace logging mode
         """
         try:
-            conf = self.__open()
-            conf.set("debug", "trace_enabled", str(False))
+            self.__open()
+            self.__set("debug", "trace_enabled", False)
         finally:
             self.__close(True)
 
@@ -295,9 +409,9 @@ class CleepConf:
             bool: True if trace enabled
         """
         try:
-            conf = self.__open()
+            self.__open()
 
-            return ast.literal_eval(conf.get("debug", "trace_enabled"))
+            return self.__get("debug", "trace_enabled")
         finally:
             self.__close()
 
@@ -306,8 +420,8 @@ class CleepConf:
         Enable core debug
         """
         try:
-            conf = self.__open()
-            conf.set("debug", "debug_core", str(True))
+            self.__open()
+            self.__set("debug", "debug_core", True)
         finally:
             self.__close(True)
 
@@ -316,8 +430,8 @@ class CleepConf:
         Disable core debug
         """
         try:
-            conf = self.__open()
-            conf.set("debug", "debug_core", str(False))
+            self.__open()
+            self.__set("debug", "debug_core", False)
         finally:
             self.__close(True)
 
@@ -329,9 +443,9 @@ class CleepConf:
             bool: True if core debug enabled
         """
         try:
-            conf = self.__open()
+            self.__open()
 
-            return ast.literal_eval(conf.get("debug", "debug_core"))
+            return self.__get("debug", "debug_core")
         finally:
             self.__close()
 
@@ -345,11 +459,12 @@ class CleepConf:
         Returns:
             bool: True if module debug enabled
         """
+        updated = False
         try:
-            conf = self.__open()
+            self.__open()
 
             # check if module is installed
-            modules = ast.literal_eval(conf.get("general", "modules"))
+            modules = self.__get("general", "modules")
             if module not in modules and module not in CORE_MODULES:
                 self.logger.warning(
                     'Trying to enable debug for not installed module "%s"', module
@@ -357,18 +472,18 @@ class CleepConf:
                 return False
 
             # check if module is in debug list
-            modules = ast.literal_eval(conf.get("debug", "debug_modules"))
+            modules = self.__get("debug", "debug_modules")
             if module in modules:
                 # module already in debug list
                 return True
 
             # add module to debug list
-            modules.append(module)
-            conf.set("debug", "debug_modules", str(modules))
+            self.__set("debug", "debug_modules", modules + [module])
+            updated = True
 
             return True
         finally:
-            self.__close(True)
+            self.__close(updated)
 
     def disable_module_debug(self, module):
         """
@@ -380,22 +495,23 @@ class CleepConf:
         Returns:
             bool: True if module debug disabled
         """
+        updated = False
         try:
-            conf = self.__open()
+            self.__open()
 
             # check if module is in debug list
-            modules = ast.literal_eval(conf.get("debug", "debug_modules"))
+            modules = self.__get("debug", "debug_modules")
             if module not in modules:
                 # module not in debug list
                 return False
 
             # remove module from debug list
-            modules.remove(module)
-            conf.set("debug", "debug_modules", str(modules))
+            self.__set("debug", "debug_modules", [item for item in modules if item != module])
+            updated = True
 
             return True
         finally:
-            self.__close(True)
+            self.__close(updated)
 
     def is_module_debugged(self, module):
         """
@@ -408,10 +524,9 @@ class CleepConf:
             bool: True if module debug is enabled, False if disabled
         """
         try:
-            conf = self.__open()
-            modules = ast.literal_eval(conf.get("debug", "debug_modules"))
+            self.__open()
 
-            return module in modules
+            return module in self.__get("debug", "debug_modules")
         finally:
             self.__close()
 
@@ -427,9 +542,9 @@ class CleepConf:
             bool: True if rpc config saved
         """
         try:
-            conf = self.__open()
-            conf.set("rpc", "rpc_host", host)
-            conf.set("rpc", "rpc_port", str(port))
+            self.__open()
+            self.__set("rpc", "rpc_host", host)
+            self.__set("rpc", "rpc_port", port)
 
             return True
         finally:
@@ -449,8 +564,11 @@ class CleepConf:
 
         """
         try:
-            conf = self.__open()
-            rpc = (conf.get("rpc", "rpc_host"), conf.getint("rpc", "rpc_port"))
+            self.__open()
+            rpc = (
+                str(self.__get("rpc", "rpc_host")),
+                int(self.__get("rpc", "rpc_port")),
+            )
 
             return rpc
         finally:
@@ -468,9 +586,9 @@ class CleepConf:
             bool: True if values saved successfully
         """
         try:
-            conf = self.__open()
-            conf.set("rpc", "rpc_cert", cert)
-            conf.set("rpc", "rpc_key", key)
+            self.__open()
+            self.__set("rpc", "rpc_cert", cert)
+            self.__set("rpc", "rpc_key", key)
 
             return True
         finally:
@@ -510,9 +628,9 @@ class CleepConf:
 
         """
         try:
-            conf = self.__open()
+            self.__open()
 
-            return ast.literal_eval(conf.get("auth", "accounts"))
+            return dict(self.__get("auth", "accounts"))
         finally:
             self.__close()
 
@@ -530,9 +648,9 @@ class CleepConf:
 
         """
         try:
-            conf = self.__open()
-            accounts = ast.literal_eval(conf.get("auth", "accounts"))
-            enabled = ast.literal_eval(conf.get("auth", "enabled"))
+            self.__open()
+            accounts = self.__get("auth", "accounts")
+            enabled = self.__get("auth", "enabled")
 
             return {"enabled": enabled, "accounts": list(accounts.keys())}
         finally:
@@ -546,17 +664,19 @@ class CleepConf:
             account (str): account name
             password (str): account password
         """
+        updated = False
         try:
-            conf = self.__open()
-            accounts = ast.literal_eval(conf.get("auth", "accounts"))
+            self.__open()
+            accounts = dict(self.__get("auth", "accounts"))
 
             if account in accounts:
                 raise Exception("Account already exists")
 
             accounts[account] = sha256_crypt.hash(password)
-            conf.set("auth", "accounts", str(accounts))
+            self.__set("auth", "accounts", accounts)
+            updated = True
         finally:
-            self.__close(True)
+            self.__close(updated)
 
     def delete_auth_account(self, account):
         """
@@ -565,21 +685,23 @@ class CleepConf:
         Args:
             account (str): account name
         """
+        updated = False
         try:
-            conf = self.__open()
-            accounts = ast.literal_eval(conf.get("auth", "accounts"))
+            self.__open()
+            accounts = dict(self.__get("auth", "accounts"))
 
             if account not in accounts:
                 raise Exception("Account does not exist")
 
             del accounts[account]
-            conf.set("auth", "accounts", str(accounts))
+            self.__set("auth", "accounts", accounts)
 
             # disable auth if no more account
             if len(accounts) == 0:
-                conf.set("auth", "enabled", str(False))
+                self.__set("auth", "enabled", False)
+            updated = True
         finally:
-            self.__close(True)
+            self.__close(updated)
 
     def enable_auth(self, enable=True):
         """
@@ -589,8 +711,8 @@ class CleepConf:
             enable (bool): True to enable auth (default) False to disable auth
         """
         try:
-            conf = self.__open()
-            conf.set("auth", "enabled", str(enable))
+            self.__open()
+            self.__set("auth", "enabled", enable)
         finally:
             self.__close(True)
 
@@ -602,8 +724,7 @@ class CleepConf:
             bool: True if auth enabled, False otherwise
         """
         try:
-            conf = self.__open()
-            enabled = ast.literal_eval(conf.get("auth", "enabled"))
-            return enabled
+            self.__open()
+            return self.__get("auth", "enabled")
         finally:
             self.__close()
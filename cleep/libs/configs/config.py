@@ -1,11 +1,32 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import io
 import os
 import re
+import time
 import logging
+from contextlib import contextmanager
+from functools import lru_cache
+from threading import Lock
 from gevent import sleep
 
+
+@lru_cache(maxsize=512)
+def _compile_pattern(pattern, options):
+    """
+    Compile regexp pattern, keeping compiled patterns in cache
+
+    Args:
+        pattern (string): regexp pattern
+        options (flag): regexp flags
+
+    Returns:
+        Pattern: compiled pattern
+    """
+    return re.compile(pattern, options)
+
+
 class Config:
     """
     Helper class to read and write any configuration file.
@@ -23,6 +44,14 @@ class Config:
     MODE_READ = "r"
     MODE_APPEND = "a"
 
+    # files modified less than this delay (seconds) before being read are not cached because a new write
+    # may not change file mtime (mtime granularity is 2 seconds on fat filesystems)
+    RACY_DELAY = 2.0
+
+    # file contents by path, shared by all instances
+    __cache = {}
+    __cache_lock = Lock()
+
     def __init__(self, cleep_filesystem, path, comment_tag, backup=True):
         """
         Constructor
@@ -88,6 +117,7 @@ class Config:
             return False
 
         if os.path.exists(self.backup_path):
+            self.__invalidate_cache(self.__get_path())
             self.cleep_filesystem.copy(self.backup_path, self.__get_path())
             return True
 
@@ -106,6 +136,89 @@ class Config:
 
         return os.path.join(base_path, f"{filename}.backup{ext}")
 
+    def __get_file_key(self, path):
+        """
+        Return key identifying file version
+
+        Args:
+            path (string): file path
+
+        Returns:
+            tuple: file inode, mtime and size. None if file does not exist
+        """
+        try:
+            stat = os.stat(path)
+            return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def __cache_content(self, path, content, trusted):
+        """
+        Store file content in cache
+
+        Args:
+            path (string): file path
+            content (string): file content
+            trusted (bool): True if content was written by this process, otherwise content is cached only if
+                            file was not modified recently
+        """
+        key = self.__get_file_key(path)
+        if key is None:
+            return
+        if not trusted and time.time() - key[1] / 1e9 < self.RACY_DELAY:
+            # file modified too recently, content can't be identified by its key
+            self.__invalidate_cache(path)
+            return
+
+        with self.__cache_lock:
+            self.__cache[path] = {"key": key, "content": content}
+
+    def __invalidate_cache(self, path):
+        """
+        Remove file content from cache
+
+        Args:
+            path (string): file path
+        """
+        with self.__cache_lock:
+            self.__cache.pop(path, None)
+
+    def _read_content(self):
+        """
+        Return config file content, from cache if file has not changed since last read or write
+
+        Returns:
+            string: file content
+
+        Raises:
+            Exception if file doesn't exist
+        """
+        path = self.__get_path()
+        cached = self.__cache.get(path)
+        if cached and cached["key"] == self.__get_file_key(path):
+            return cached["content"]
+
+        fdesc = self._open()
+        try:
+            content = fdesc.read()
+        finally:
+            self._close()
+        self.__cache_content(path, content, False)
+
+        return content
+
+    def _read_lines(self):
+        """
+        Return config file lines
+
+        Returns:
+            list: list of lines (with end of line)
+
+        Raises:
+            Exception if file doesn't exist
+        """
+        return io.StringIO(self._read_content()).readlines()
+
     def _open(self, mode="r", encoding=None):
         """
         Open config file
@@ -123,6 +236,10 @@ class Config:
         if not os.path.exists(self.__get_path()) and mode == self.MODE_READ:
             raise Exception(f"{self.__get_path()} file does not exist")
 
+        if mode != self.MODE_READ:
+            # content written outside _write function
+            self.__invalidate_cache(self.__get_path())
+
         self.logger.debug('Open "%s"', self.__get_path())
         self.__fdesc = self.cleep_filesystem.open(self.__get_path(), mode, encoding)
 
@@ -145,9 +262,11 @@ class Config:
             content (string): content to write
         """
         try:
+            content = content.rstrip()
             fdesc = self._open(self.MODE_WRITE)
-            fdesc.write(content.rstrip())
+            fdesc.write(content)
             self._close()
+            self.__cache_content(self.__get_path(), content, True)
             sleep(0.25)
 
             return True
@@ -156,6 +275,52 @@ class Config:
             self.logger.exception("Failed to write config file:")
             return False
 
+    def _write_atomic(self, content):
+        """
+        Write content as is to config file. Content is written to temporary file then renamed so config file is
+        never partially written.
+
+        Args:
+            content (string): content to write
+
+        Returns:
+            bool: True if content written
+        """
+        path = self.__get_path()
+        self.__invalidate_cache(path)
+        if not self.cleep_filesystem.write_data(path, content, atomic=True):
+            self.logger.error('Failed to write config file "%s"', path)
+            return False
+        self.__cache_content(path, content, True)
+
+        return True
+
+    @contextmanager
+    def _edit_tree(self, parser):
+        """
+        Context manager to edit config file as syntax tree. Tree is parsed once, edits are applied in memory and
+        config file is written once (atomically) when leaving context if tree was modified. Nothing is written if
+        an exception occurs.
+
+        Usage::
+
+            with self._edit_tree(MyParser()) as tree:
+                tree.set("key", "value")
+
+        Args:
+            parser (ConfigTreeParser): parser of config file syntax
+
+        Yields:
+            ConfigTree: config file tree
+        """
+        content = self._read_content() if self.exists() else ""
+        tree = parser.parse(content)
+
+        yield tree
+
+        if tree.is_modified():
+            tree.written = self._write_atomic(tree.to_string())
+
     def exists(self):
         """
         Return True if config file exists
@@ -190,27 +355,35 @@ class Config:
             )
             return []
 
-        results = []
-        fdesc = self._open()
-        content = fdesc.read()
+        content = self._read_content()
         self.logger.trace("content=%s", content)
-        self._close()
-        matches = re.finditer(pattern, content, options)
 
-        # concat content list if options singleline specified (DOTALL)
-        # if re.DOTALL & options:
-        #    content = ''.join(content)
+        return self.__get_matches(pattern, content, options, remove_none)
 
-        for _, match in enumerate(matches):
-            group = match.group().strip()
-            if len(group) > 0 and len(match.groups()) > 0:
-                if remove_none:
-                    groups = list(filter(None, match.groups()))
-                else:
-                    groups = match.groups()
-                results.append((group, groups))
+    def find_many(self, patterns, options=re.UNICODE | re.MULTILINE, remove_none=True):
+        """
+        Find matches of many patterns in config file, reading file only once
 
-        return results
+        Args:
+            patterns (dict): patterns by name
+            options (flag): regexp flags (see https://docs.python.org/2/library/re.html#module-contents)
+            remove_none (bool): True to remove None values from result
+
+        Returns:
+            dict: list of matches by pattern name (see find function for matches format)
+        """
+        if not self.exists():
+            self.logger.debug(
+                "No file found (%s). Return empty result", self.__get_path()
+            )
+            return {name: [] for name in patterns}
+
+        content = self._read_content()
+
+        return {
+            name: self.__get_matches(pattern, content, options, remove_none)
+            for name, pattern in patterns.items()
+        }
 
     def find_in_string(
         self, pattern, content, options=re.UNICODE | re.MULTILINE, remove_none=True
@@ -234,10 +407,26 @@ class Config:
                 ]
 
         """
-        results = []
+        return self.__get_matches(pattern, content, options, remove_none)
 
-        matches = re.finditer(pattern, content, options)
-        for _, match in enumerate(matches):
+    def __get_matches(self, pattern, content, options, remove_none):
+        """
+        Return pattern matches with subgroups in specified content
+
+        Args:
+            pattern (string|Pattern): search pattern
+            content (string): string to search in
+            options (flag): regexp flags. Not used if pattern is already compiled
+            remove_none (bool): True to remove None values from result
+
+        Returns:
+            list: list of matches (see find function)
+        """
+        if not isinstance(pattern, re.Pattern):
+            pattern = _compile_pattern(pattern, options)
+
+        results = []
+        for match in pattern.finditer(content):
             group = match.group().strip()
             if len(group) > 0 and len(match.groups()) > 0:
                 if remove_none:
@@ -269,9 +458,7 @@ class Config:
             return False
 
         # read file content
-        fdesc = self._open()
-        lines = fdesc.readlines()
-        self._close()
+        lines = self._read_lines()
 
         # get line indexes to remove
         found = False
@@ -310,9 +497,7 @@ class Config:
             return False
 
         # read file content
-        fdesc = self._open()
-        lines = fdesc.readlines()
-        self._close()
+        lines = self._read_lines()
 
         # get line indexes to remove
         found = False
@@ -347,9 +532,7 @@ class Config:
             self.logger.debug("No file found (%s)", self.__get_path())
             return False
 
-        fdesc = self._open()
-        lines = fdesc.read()
-        self._close()
+        lines = self._read_content()
 
         # remove content
         before = len(lines)
@@ -379,9 +562,7 @@ class Config:
             self.logger.debug("No file found (%s)", self.__get_path())
             return False
 
-        fdesc = self._open()
-        lines = fdesc.readlines()
-        self._close()
+        lines = self._read_lines()
 
         # get line indexes to remove
         indexes = []
@@ -420,16 +601,15 @@ class Config:
             return False
 
         # read content
-        fdesc = self._open()
-        lines = fdesc.readlines()
-        self._close()
+        lines = self._read_lines()
 
         # remove line
         count = 0
         indexes = []
         index = 0
+        prog = _compile_pattern(line_regexp, 0)
         for line in lines:
-            if re.match(line_regexp, line):
+            if prog.match(line):
                 indexes.append(index)
                 count += 1
 
@@ -470,9 +650,10 @@ class Config:
             return 0
 
         # read content
-        fdesc = self._open()
-        lines = fdesc.readlines()
-        self._close()
+        lines = self._read_lines()
+
+        header_prog = _compile_pattern(header_pattern, 0)
+        line_prog = _compile_pattern(line_pattern, 0)
 
         # get line indexes to remove
         start = False
@@ -486,7 +667,7 @@ class Config:
                 index += 1
                 continue
 
-            if re.match(header_pattern, line):
+            if header_prog.match(line):
                 # header found, start
                 self.logger.trace("Header found, start removing lines")
                 start = True
@@ -504,7 +685,7 @@ class Config:
             ):
                 # commented line
                 pass
-            elif start and re.match(line_pattern, line):
+            elif start and line_prog.match(line):
                 # save index of line to delete
                 self.logger.trace('Line pattern "%s" found', line_pattern)
                 indexes.append(index)
@@ -553,16 +734,14 @@ class Config:
             replace += "\n"
 
         # read content
-        fdesc = self._open()
-        lines = fdesc.readlines()
-        self._close()
+        lines = self._read_lines()
 
         # search line
-        prog = re.compile(pattern)
+        prog = _compile_pattern(pattern, 0)
         new_content = []
         found = False
         for line in lines:
-            if re.match(prog, line) is not None:
+            if prog.match(line) is not None:
                 # line found, append new one
                 new_content.append(replace)
                 found = True
@@ -598,9 +777,7 @@ class Config:
             return False
 
         # read content
-        fdesc = self._open()
-        content = fdesc.readlines()
-        self._close()
+        content = self._read_lines()
 
         if end:
             # add lines at end of file
@@ -645,9 +822,7 @@ class Config:
             return False
 
         # read content
-        fdesc = self._open()
-        content_ = fdesc.read()
-        self._close()
+        content_ = self._read_content()
 
         if end:
             # add new content at end
@@ -674,9 +849,7 @@ class Config:
             return []
 
         # read content
-        fdesc = self._open()
-        lines = fdesc.readlines()
-        self._close()
+        lines = self._read_lines()
 
         return lines
 
@@ -690,9 +863,7 @@ class Config:
             return
 
         # read content
-        fdesc = self._open()
-        lines = fdesc.readlines()
-        self._close()
+        lines = self._read_lines()
 
         # print lines
         self.logger.debug("".join(lines))
@@ -0,0 +1,679 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import re
+import logging
+
+
+class ConfigTreeLine:
+    """
+    Single line of config file. Line is an option if it has a key, otherwise it is a comment, a blank or an
+    unparsed line that is kept as is.
+    """
+
+    __slots__ = ("raw", "key", "value")
+
+    def __init__(self, raw, key=None, value=None):
+        """
+        Constructor
+
+        Args:
+            raw (string): line content with end of line
+            key (string): option key, None if line is not an option
+            value (string): option value
+        """
+        self.raw = raw
+        self.key = key
+        self.value = value
+
+    def is_option(self):
+        """
+        Return True if line is an option
+
+        Returns:
+            bool: True if line is an option
+        """
+        return self.key is not None
+
+    def __repr__(self):
+        return "ConfigTreeLine(%r)" % self.raw
+
+
+class ConfigTreeBlock:
+    """
+    Block of config file (wpa_supplicant network, dhcpcd interface, interfaces stanza...)
+
+    A block is made of leading lines (blank lines before header), a header line, block lines and an optional
+    footer line (closing brace).
+    """
+
+    def __init__(self, parser, kind, name, header, lines=None, footer=None, leading=None):
+        """
+        Constructor
+
+        Args:
+            parser (ConfigTreeParser): parser used to format new lines
+            kind (string): block kind (network, interface, iface...)
+            name (string): block name (can be None)
+            header (ConfigTreeLine): header line
+            lines (list): list of ConfigTreeLine
+            footer (ConfigTreeLine): footer line
+            leading (list): list of ConfigTreeLine before header
+        """
+        self.parser = parser
+        self.kind = kind
+        self.name = name
+        self.header = header
+        self.lines = lines or []
+        self.footer = footer
+        self.leading = leading or []
+        self.modified = False
+
+    def get(self, key, default=None):
+        """
+        Return value of first option with specified key
+
+        Args:
+            key (string): option key
+            default (any): value returned if option does not exist
+
+        Returns:
+            string: option value
+        """
+        for line in self.lines:
+            if line.key == key:
+                return line.value
+        return default
+
+    def get_all(self, key):
+        """
+        Return values of all options with specified key
+
+        Args:
+            key (string): option key
+
+        Returns:
+            list: list of values
+        """
+        return [line.value for line in self.lines if line.key == key]
+
+    def get_options(self):
+        """
+        Return all block options
+
+        Returns:
+            list: list of (key, value) tuples in file order
+        """
+        return [(line.key, line.value) for line in self.lines if line.is_option()]
+
+    def set(self, key, value):
+        """
+        Set option value, replacing first existing option or adding it after last option
+
+        Args:
+            key (string): option key
+            value (string): option value
+        """
+        last_option = -1
+        for index, line in enumerate(self.lines):
+            if line.key == key:
+                if line.value != value:
+                    self.lines[index] = self.__new_line(key, value, line)
+                    self.modified = True
+                return
+            if line.is_option():
+                last_option = index
+
+        reference = self.lines[last_option] if last_option >= 0 else None
+        self.lines.insert(last_option + 1, self.__new_line(key, value, reference))
+        self.modified = True
+
+    def __new_line(self, key, value, reference=None):
+        """
+        Create new option line, using same indentation than reference line
+
+        Args:
+            key (string): option key
+            value (string): option value
+            reference (ConfigTreeLine): line to take indentation from
+
+        Returns:
+            ConfigTreeLine: new line
+        """
+        raw = self.parser.format_option(key, value, True)
+        if reference is not None:
+            indent = raw[: len(raw) - len(raw.lstrip())]
+            reference_indent = reference.raw[: len(reference.raw) - len(reference.raw.lstrip())]
+            raw = reference_indent + raw[len(indent):]
+
+        return ConfigTreeLine(raw, key, value)
+
+    def remove(self, key):
+        """
+        Remove all options with specified key
+
+        Args:
+            key (string): option key
+
+        Returns:
+            int: number of removed options
+        """
+        count = len(self.lines)
+        self.lines = [line for line in self.lines if line.key != key]
+        count -= len(self.lines)
+        self.modified = self.modified or count > 0
+
+        return count
+
+    def to_lines(self):
+        """
+        Return block lines
+
+        Returns:
+            list: list of raw lines
+        """
+        lines = [line.raw for line in self.leading]
+        lines.append(self.header.raw)
+        lines.extend(line.raw for line in self.lines)
+        if self.footer:
+            lines.append(self.footer.raw)
+
+        return lines
+
+    def __repr__(self):
+        return "ConfigTreeBlock(%s %s)" % (self.kind, self.name)
+
+
+class ConfigTree:
+    """
+    Lossless syntax tree of config file
+
+    Tree is made of top level lines and blocks. Serializing an unmodified tree returns exactly the parsed content,
+    edits only rewrite the lines they touch so comments and formatting are preserved.
+    """
+
+    def __init__(self, parser, items):
+        """
+        Constructor
+
+        Args:
+            parser (ConfigTreeParser): parser that built the tree
+            items (list): list of ConfigTreeLine and ConfigTreeBlock
+        """
+        self.parser = parser
+        self.items = items
+        self.modified = False
+        # set to True when tree content has been written to config file
+        self.written = False
+
+    def is_modified(self):
+        """
+        Return True if tree was modified since it was parsed
+
+        Returns:
+            bool: True if tree modified
+        """
+        return self.modified or any(
+            item.modified for item in self.items if isinstance(item, ConfigTreeBlock)
+        )
+
+    def get_blocks(self, kind=None, name=None):
+        """
+        Return blocks
+
+        Args:
+            kind (string): filter on block kind
+            name (string): filter on block name
+
+        Returns:
+            list: list of ConfigTreeBlock
+        """
+        return [
+            item
+            for item in self.items
+            if isinstance(item, ConfigTreeBlock)
+            and (kind is None or item.kind == kind)
+            and (name is None or item.name == name)
+        ]
+
+    def get_block(self, kind, name):
+        """
+        Return first block of specified kind and name
+
+        Args:
+            kind (string): block kind
+            name (string): block name
+
+        Returns:
+            ConfigTreeBlock: block or None if not found
+        """
+        blocks = self.get_blocks(kind, name)
+        return blocks[0] if blocks else None
+
+    def get(self, key, default=None):
+        """
+        Return value of first top level option with specified key
+
+        Args:
+            key (string): option key
+            default (any): value returned if option does not exist
+
+        Returns:
+            string: option value
+        """
+        for item in self.items:
+            if isinstance(item, ConfigTreeLine) and item.key == key:
+                return item.value
+        return default
+
+    def get_all(self, key):
+        """
+        Return values of all top level options with specified key
+
+        Args:
+            key (string): option key
+
+        Returns:
+            list: list of values
+        """
+        return [
+            item.value
+            for item in self.items
+            if isinstance(item, ConfigTreeLine) and item.key == key
+        ]
+
+    def set(self, key, value, first=False):
+        """
+        Set top level option, replacing first existing option or adding it
+
+        Args:
+            key (string): option key
+            value (string): option value
+            first (bool): add option at beginning of file instead of after last top level option
+        """
+        new_line = ConfigTreeLine(self.parser.format_option(key, value, False), key, value)
+        last_option = -1
+        for index, item in enumerate(self.items):
+            if isinstance(item, ConfigTreeLine) and item.key == key:
+                if item.value != value:
+                    self.items[index] = new_line
+                    self.modified = True
+                return
+            if isinstance(item, ConfigTreeLine) and item.is_option():
+                last_option = index
+
+        self.items.insert(0 if first else last_option + 1, new_line)
+        self.modified = True
+
+    def remove(self, key, value=None):
+        """
+        Remove top level options with specified key (and value)
+
+        Args:
+            key (string): option key
+            value (string): option value. If None, all options with key are removed
+
+        Returns:
+            int: number of removed options
+        """
+        count = len(self.items)
+        self.items = [
+            item
+            for item in self.items
+            if not (
+                isinstance(item, ConfigTreeLine)
+                and item.key == key
+                and (value is None or item.value == value)
+            )
+        ]
+        count -= len(self.items)
+        self.modified = self.modified or count > 0
+
+        return count
+
+    def add_block(self, kind, name, options, before=None, header=None):
+        """
+        Add new block
+
+        Args:
+            kind (string): block kind
+            name (string): block name
+            options (list): list of (key, value) block options
+            before (ConfigTreeBlock): insert block before this one instead of at end of file
+            header (string): block header line. Formatted by parser if not specified
+
+        Returns:
+            ConfigTreeBlock: new block
+        """
+        block = self.parser.new_block(kind, name, options, header)
+        if self.items and not self.__ends_with_new_line():
+            self.items.append(ConfigTreeLine("\n"))
+
+        if before is not None:
+            self.items.insert(self.items.index(before), block)
+        else:
+            self.items.append(block)
+        self.modified = True
+
+        return block
+
+    def remove_block(self, block):
+        """
+        Remove block
+
+        Args:
+            block (ConfigTreeBlock): block to remove
+        """
+        self.items.remove(block)
+        self.modified = True
+
+    def __ends_with_new_line(self):
+        """
+        Return True if content ends with end of line
+
+        Returns:
+            bool: True if last line is complete
+        """
+        last = self.items[-1]
+        raw = last.to_lines()[-1] if isinstance(last, ConfigTreeBlock) else last.raw
+
+        return raw.endswith("\n")
+
+    def to_string(self):
+        """
+        Serialize tree
+
+        Returns:
+            string: config file content
+        """
+        lines = []
+        for item in self.items:
+            if isinstance(item, ConfigTreeBlock):
+                lines.extend(item.to_lines())
+            else:
+                lines.append(item.raw)
+
+        return "".join(lines)
+
+
+class ConfigTreePattern:
+    """
+    Regexp based line parser used by ConfigTreeParser
+    """
+
+    def __init__(self, pattern, key_group=1, value_group=2, key_prefix=""):
+        """
+        Constructor
+
+        Args:
+            pattern (string): line pattern
+            key_group (int): pattern group of option key
+            value_group (int): pattern group of option value
+            key_prefix (string): prefix added to key (ie "static ")
+        """
+        self.pattern = re.compile(pattern, re.UNICODE)
+        self.key_group = key_group
+        self.value_group = value_group
+        self.key_prefix = key_prefix
+
+    def match(self, line):
+        """
+        Match line
+
+        Args:
+            line (string): line without end of line
+
+        Returns:
+            tuple: (key, value) or None if line does not match
+        """
+        match = self.pattern.match(line)
+        if not match:
+            return None
+
+        value = match.group(self.value_group) if self.value_group else None
+        return (self.key_prefix + match.group(self.key_group), value.strip() if value else value)
+
+
+class ConfigTreeParser:
+    """
+    Base config file parser. It builds a lossless ConfigTree
+
+    Subclasses describe file syntax using patterns:
+
+        - BLOCK_HEADERS: list of (pattern, kind group, name group) matching block header lines
+        - BLOCK_FOOTER: pattern matching block footer. If None, block ends at next block header or at next
+          top level option if TOP_LEVEL_ENDS_BLOCK is True
+        - TOP_LEVEL_OPTIONS: list of ConfigTreePattern matching top level options
+        - BLOCK_OPTIONS: list of ConfigTreePattern matching block options
+        - COMMENT_TAG: comment tag
+    """
+
+    BLOCK_HEADERS = []
+    BLOCK_FOOTER = None
+    TOP_LEVEL_ENDS_BLOCK = True
+    TOP_LEVEL_OPTIONS = []
+    BLOCK_OPTIONS = []
+    COMMENT_TAG = "#"
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.__headers = [
+            (re.compile(pattern, re.UNICODE), kind_group, name_group)
+            for pattern, kind_group, name_group in self.BLOCK_HEADERS
+        ]
+        self.__footer = re.compile(self.BLOCK_FOOTER, re.UNICODE) if self.BLOCK_FOOTER else None
+
+    def __match_header(self, line):
+        """
+        Match block header
+
+        Args:
+            line (string): line without end of line
+
+        Returns:
+            tuple: (kind, name) or None if line is not a block header
+        """
+        for pattern, kind_group, name_group in self.__headers:
+            match = pattern.match(line)
+            if match:
+                return (
+                    match.group(kind_group),
+                    match.group(name_group) if name_group else None,
+                )
+        return None
+
+    def __match_option(self, line, patterns):
+        """
+        Match option line
+
+        Args:
+            line (string): line without end of line
+            patterns (list): list of ConfigTreePattern
+
+        Returns:
+            tuple: (key, value) or None if line is not an option
+        """
+        if not line.strip() or line.strip().startswith(self.COMMENT_TAG):
+            return None
+        for pattern in patterns:
+            option = pattern.match(line)
+            if option:
+                return option
+        return None
+
+    def __close_block(self, block, items):
+        """
+        Close block moving its trailing blank and comment lines out of block
+
+        Args:
+            block (ConfigTreeBlock): block to close
+            items (list): tree items
+
+        Returns:
+            list: trailing lines removed from block
+        """
+        trailing = []
+        while block.lines and not block.lines[-1].is_option():
+            trailing.insert(0, block.lines.pop())
+        items.append(block)
+
+        return trailing
+
+    def parse(self, content):
+        """
+        Parse content
+
+        Args:
+            content (string): config file content
+
+        Returns:
+            ConfigTree: config tree
+        """
+        items = []
+        block = None
+        pending = []
+
+        for raw in (content or "").splitlines(keepends=True):
+            line = raw.rstrip("\r\n")
+
+            # block footer
+            if block is not None and self.__footer:
+                if self.__footer.match(line):
+                    block.footer = ConfigTreeLine(raw)
+                    items.append(block)
+                    block = None
+                    continue
+
+            # block header
+            header = self.__match_header(line)
+            if header is not None and (block is None or not self.__footer):
+                if block is not None:
+                    pending.extend(self.__close_block(block, items))
+                leading = []
+                while pending and not pending[-1].raw.strip():
+                    leading.insert(0, pending.pop())
+                items.extend(pending)
+                pending = []
+                block = ConfigTreeBlock(
+                    self, header[0], header[1], ConfigTreeLine(raw), leading=leading
+                )
+                continue
+
+            if block is not None:
+                # top level option ends block without footer
+                top_option = (
+                    self.__match_option(line, self.TOP_LEVEL_OPTIONS)
+                    if not self.__footer and self.TOP_LEVEL_ENDS_BLOCK
+                    else None
+                )
+                if top_option is not None:
+                    pending.extend(self.__close_block(block, items))
+                    block = None
+                    items.extend(pending)
+                    pending = []
+                    items.append(ConfigTreeLine(raw, *top_option))
+                    continue
+
+                option = self.__match_option(line, self.BLOCK_OPTIONS)
+                block.lines.append(
+                    ConfigTreeLine(raw, *option) if option else ConfigTreeLine(raw)
+                )
+                continue
+
+            option = self.__match_option(line, self.TOP_LEVEL_OPTIONS)
+            pending.append(ConfigTreeLine(raw, *option) if option else ConfigTreeLine(raw))
+            if option is not None:
+                items.extend(pending)
+                pending = []
+
+        if block is not None:
+            if self.__footer:
+                # unclosed block, keep it as is
+                self.logger.warning("Unclosed %s block found", block.kind)
+            pending = self.__close_block(block, items) + pending
+        items.extend(pending)
+
+        return self.build_tree(items)
+
+    def build_tree(self, items):
+        """
+        Build tree instance. Overwrite it to return typed tree
+
+        Args:
+            items (list): tree items
+
+        Returns:
+            ConfigTree: config tree
+        """
+        return ConfigTree(self, items)
+
+    def format_option(self, key, value, in_block):
+        """
+        Format option line
+
+        Args:
+            key (string): option key
+            value (string): option value
+            in_block (bool): True if option is in a block
+
+        Returns:
+            string: raw line with end of line
+        """
+        raise NotImplementedError("format_option must be implemented")
+
+    def format_header(self, kind, name):
+        """
+        Format block header line
+
+        Args:
+            kind (string): block kind
+            name (string): block name
+
+        Returns:
+            string: raw line with end of line
+        """
+        raise NotImplementedError("format_header must be implemented")
+
+    def format_footer(self, kind):
+        """
+        Format block footer line
+
+        Args:
+            kind (string): block kind
+
+        Returns:
+            string: raw line with end of line or None if block has no footer
+        """
+        return None
+
+    def new_block(self, kind, name, options, header=None):
+        """
+        Create new block
+
+        Args:
+            kind (string): block kind
+            name (string): block name
+            options (list): list of (key, value) block options
+            header (string): block header line. Formatted with format_header if not specified
+
+        Returns:
+            ConfigTreeBlock: new block
+        """
+        lines = [
+            ConfigTreeLine(self.format_option(key, value, True), key, value)
+            for key, value in options
+        ]
+        footer = self.format_footer(kind)
+
+        return ConfigTreeBlock(
+            self,
+            kind,
+            name,
+            ConfigTreeLine(header or self.format_header(kind, name)),
+            lines=lines,
+            footer=ConfigTreeLine(footer) if footer else None,
+            leading=[ConfigTreeLine("\n")],
+        )
@@ -5,8 +5,177 @@ import os
 import re
 from cleep.exception import InvalidParameter, MissingParameter
 from cleep.libs.configs.config import Config
+from cleep.libs.configs.configtree import ConfigTree, ConfigTreeParser, ConfigTreePattern
 from cleep.libs.internals.console import Console
 from cleep.libs.internals.tools import netmask_to_cidr, cidr_to_netmask
+from contextlib import contextmanager
+
+
+class DhcpcdTree(ConfigTree):
+    """
+    dhcpcd.conf syntax tree with typed accessors
+    """
+
+    def get_interfaces(self):
+        """
+        Return configured interfaces and profiles
+
+        Returns:
+            dict: interface configurations::
+
+                {
+                    interface (string): {
+                        interface (string): interface or profile name
+                        netmask (string): netmask
+                        fallback (string): fallback configuration name if any, None otherwise
+                        ip_address (string): configured ip address
+                        gateway (string): gateway ip address
+                        dns_address (string): dns ip address
+                    },
+                    ...
+                }
+
+        """
+        interfaces = {}
+        for block in self.get_blocks():
+            ip_address = block.get("static ip_address")
+            netmask = None
+            if ip_address is not None:
+                # format: X.X.X.X[/X]
+                splits = ip_address.split("/")
+                ip_address = splits[0]
+                try:
+                    netmask = cidr_to_netmask(int(splits[1]))
+                except Exception:
+                    netmask = "255.255.255.0"
+
+            interfaces[block.name] = {
+                "interface": block.name,
+                "netmask": netmask,
+                "fallback": block.get("fallback"),
+                "ip_address": ip_address,
+                "gateway": block.get("static routers"),
+                "dns_address": block.get("static domain_name_servers"),
+            }
+
+        return interfaces
+
+    def __get_static_options(self, ip_address, gateway, netmask, dns_address):
+        """
+        Return static options
+
+        Args:
+            ip_address (string): static ip address
+            gateway (string): gateway address
+            netmask (string): netmask
+            dns_address (string): dns address. Gateway is used if not specified
+
+        Returns:
+            list: list of (key, value) options
+        """
+        return [
+            ("static ip_address", f"{ip_address}/{netmask_to_cidr(netmask)}"),
+            ("static routers", gateway),
+            ("static domain_name_servers", dns_address or gateway),
+        ]
+
+    def add_static_interface(self, interface, ip_address, gateway, netmask, dns_address=None):
+        """
+        Add static interface
+
+        Args:
+            interface (string): interface to configure
+            ip_address (string): static ip address
+            gateway (string): gateway address
+            netmask (string): netmask
+            dns_address (string): dns address
+
+        Raises:
+            InvalidParameter: if interface is already configured
+        """
+        if self.get_block("interface", interface) is not None:
+            raise InvalidParameter(f"Interface {interface} is already configured")
+
+        self.add_block(
+            "interface",
+            interface,
+            self.__get_static_options(ip_address, gateway, netmask, dns_address),
+        )
+
+    def add_fallback_interface(self, interface, ip_address, gateway, netmask, dns_address=None):
+        """
+        Add fallback static profile for interface
+
+        Args:
+            interface (string): interface name
+            ip_address (string): static ip address
+            gateway (string): gateway ip address
+            netmask (string): netmask
+            dns_address (string): dns address
+
+        Raises:
+            InvalidParameter: if interface is already configured
+        """
+        if self.get_block("interface", interface) is not None:
+            raise InvalidParameter(f"Interface {interface} is already configured")
+
+        profile = f"fallback_{interface}"
+        self.add_block(
+            "profile",
+            profile,
+            self.__get_static_options(ip_address, gateway, netmask, dns_address),
+        )
+        self.add_block("interface", interface, [("fallback", profile)])
+
+    def delete_interface(self, interface):
+        """
+        Delete interface configuration and its fallback profile
+
+        Args:
+            interface (string): interface name
+
+        Returns:
+            bool: True if interface deleted, False if interface is not configured
+        """
+        block = self.get_block("interface", interface)
+        if block is None:
+            return False
+
+        fallback = block.get("fallback")
+        if fallback is not None:
+            profile = self.get_block("profile", fallback)
+            if profile is not None:
+                self.remove_block(profile)
+        self.remove_block(block)
+
+        return True
+
+
+class DhcpcdParser(ConfigTreeParser):
+    """
+    dhcpcd.conf file parser
+
+    Options following interface or profile line belong to it until next interface or profile line.
+    """
+
+    BLOCK_HEADERS = [(r"^\s*(interface|profile)\s+(\S+)\s*$", 1, 2)]
+    TOP_LEVEL_ENDS_BLOCK = False
+    TOP_LEVEL_OPTIONS = [ConfigTreePattern(r"^\s*(\S+)(?:\s+(.*?))?\s*$")]
+    BLOCK_OPTIONS = [
+        ConfigTreePattern(r"^\s*static\s+(\S+?)\s*=\s*(.*?)\s*$", key_prefix="static "),
+        ConfigTreePattern(r"^\s*(\S+)(?:\s+(.*?))?\s*$"),
+    ]
+
+    def build_tree(self, items):
+        return DhcpcdTree(self, items)
+
+    def format_option(self, key, value, in_block):
+        if key.startswith("static "):
+            return f"static {key[len('static '):]}={value}\n"
+        return f"{key} {value}\n" if value is not None else f"{key}\n"
+
+    def format_header(self, kind, name):
+        return f"{kind} {name}\n"
 
 
 class DhcpcdConf(Config):
@@ -318,3 +487,21 @@ class DhcpcdConf(Config):
         if interface["fallback"] is not None:
             return self.__delete_fallback_interface(interface)
         return self.__delete_static_interface(interface)
+
+    @contextmanager
+    def edit(self):
+        """
+        Edit config file as syntax tree. All edits are applied in memory and file is written once when leaving
+        context.
+
+        Usage::
+
+            with dhcpcd_conf.edit() as tree:
+                tree.delete_interface("eth0")
+                tree.add_static_interface("eth0", "192.168.1.10", "192.168.1.1", "255.255.255.0")
+
+        Yields:
+            DhcpcdTree: config tree
+        """
+        with self._edit_tree(DhcpcdParser()) as tree:
+            yield tree
@@ -3,6 +3,7 @@
 
 from cleep.libs.configs.config import Config
 from cleep.exception import InvalidParameter
+from cleep.libs.internals.commandcache import get_command_cache
 import logging
 import re
 import time
@@ -159,7 +160,10 @@ ctl.!default {
             lines.append(u'    device %s' % device_id)
         lines.append(u'}')
         self.__last_update = 0
-        return self.add_lines(lines)
+        added = self.add_lines(lines)
+        # default device is cached by Alsa
+        get_command_cache().invalidate(u'alsa')
+        return added
 
     def add_default_ctl_section(self, card_id, device_id=-1):
         """
@@ -191,7 +195,9 @@ ctl.!default {
         lines.append(u'}')
         self.__last_update = 0
         self.logger.trace('Add lines %s' % lines)
-        return self.add_lines(lines)
+        added = self.add_lines(lines)
+        get_command_cache().invalidate(u'alsa')
+        return added
 
     def save_default_file(self, card_id, device_id=0):
         """
@@ -216,7 +222,9 @@ ctl.!default {
         }
         self.logger.trace('content=%s' % content)
 
-        return self._write(content)
+        written = self._write(content)
+        get_command_cache().invalidate(u'alsa')
+        return written
 
     def delete(self):
         """
@@ -232,6 +240,7 @@ ctl.!default {
         state_deleted = True
         if os.path.exists(self.ASOUND_STATE):
             state_deleted = self.cleep_filesystem.rm(self.ASOUND_STATE)
+        get_command_cache().invalidate(u'alsa')
 
         return conf_deleted and state_deleted
 
@@ -3,12 +3,227 @@
 
 from cleep.exception import InvalidParameter, MissingParameter, CommandError
 from cleep.libs.configs.config import Config
+from cleep.libs.configs.configtree import ConfigTree, ConfigTreeLine, ConfigTreeParser, ConfigTreePattern
+from contextlib import contextmanager
 import os
 import re
 import time
 from shutil import copy2
 import logging
 
+
+class NetworkInterfacesTree(ConfigTree):
+    """
+    /etc/network/interfaces syntax tree with typed accessors
+    """
+
+    #using bitmask: OPTION_AUTO + OPTION_HOTPLUG
+    OPTION_NONE = 0
+    OPTION_AUTO = 1
+    OPTION_HOTPLUG = 2
+
+    OPTION_FIELDS = {
+        u'address': u'address',
+        u'netmask': u'netmask',
+        u'broadcast': u'broadcast',
+        u'gateway': u'gateway',
+        u'dns-nameservers': u'dnsnameservers',
+        u'dns-domain': u'dnsdomain',
+        u'wpa-conf': u'wpaconf',
+        u'wpa-roam': u'wpaconf',
+    }
+
+    def __get_interfaces_with_option(self, option):
+        """
+        Return interfaces listed in top level option lines (auto, allow-hotplug)
+
+        Args:
+            option (string): option name
+
+        Returns:
+            list: list of interface names
+        """
+        interfaces = []
+        for value in self.get_all(option):
+            interfaces.extend(value.split())
+        return interfaces
+
+    def get_interfaces(self):
+        """
+        Return interfaces configurations
+
+        Returns:
+            dict: dict of configured interfaces::
+
+                {
+                    interface name (string): {
+                        interface (string): interface name,
+                        mode (string): iface mode,
+                        address (string): ip address,
+                        netmask (string): netmask address,
+                        broadcast (string): broadcast address,
+                        gateway (string): gateway address,
+                        dnsnameservers (string): dns nameservers address,
+                        dnsdomain (string): dns domain address,
+                        hotplug (bool): True if hotplug interface,
+                        auto (bool): True if auto option enabled,
+                        wpaconf (string): wpa profile name
+                    },
+                    ...
+                }
+
+        """
+        auto = self.__get_interfaces_with_option(u'auto') + self.__get_interfaces_with_option(u'allow-auto')
+        hotplug = self.__get_interfaces_with_option(u'allow-hotplug')
+
+        interfaces = {}
+        for block in self.get_blocks(u'iface'):
+            interface = {
+                u'interface': block.name,
+                u'mode': block.header.raw.split()[3],
+                u'address': None,
+                u'netmask': None,
+                u'broadcast': None,
+                u'gateway': None,
+                u'dnsnameservers': None,
+                u'dnsdomain': None,
+                u'hotplug': block.name in hotplug,
+                u'auto': block.name in auto,
+                u'wpaconf': None,
+            }
+            for key, value in block.get_options():
+                if key in self.OPTION_FIELDS:
+                    interface[self.OPTION_FIELDS[key]] = value
+            interfaces.setdefault(block.name, interface)
+
+        return interfaces
+
+    def __add_interface(self, interface, option, mode, options):
+        """
+        Add interface stanza, preceded by its option lines
+
+        Args:
+            interface (string): interface name
+            option (int): interface option mask (none=0|auto=1|hotplug=2)
+            mode (string): iface mode
+            options (list): list of (key, value) stanza options
+
+        Raises:
+            InvalidParameter: if interface is already configured
+        """
+        if self.get_block(u'iface', interface) is not None:
+            raise InvalidParameter(u'Interface "%s" is already configured' % interface)
+
+        block = self.add_block(u'iface', interface, options, header=u'iface %s inet %s\n' % (interface, mode))
+        lines = []
+        if option & self.OPTION_AUTO == self.OPTION_AUTO:
+            lines.append(ConfigTreeLine(u'auto %s\n' % interface, u'auto', interface))
+        if option & self.OPTION_HOTPLUG == self.OPTION_HOTPLUG:
+            lines.append(ConfigTreeLine(u'allow-hotplug %s\n' % interface, u'allow-hotplug', interface))
+        if lines:
+            # keep blank line before options
+            index = self.items.index(block)
+            self.items[index:index] = block.leading + lines
+            block.leading = []
+
+    def add_static_interface(self, interface, option, address, gateway, netmask, dns_nameservers=None, dns_domain=None, broadcast=None, wpa_conf=None):
+        """
+        Add static interface
+
+        Args:
+            interface (string): interface name
+            option (int): interface option mask (none=0|auto=1|hotplug=2)
+            address (string): ip address
+            gateway (string): router ip address
+            netmask (string): netmask
+            dns_nameservers (string): domain name servers
+            dns_domain (string): dns domain
+            broadcast (string): broadcast ip address
+            wpa_conf (string): wpa configuration (usually path to wpa_supplicant.conf file)
+
+        Raises:
+            InvalidParameter: if interface is already configured
+        """
+        options = [(u'address', address), (u'netmask', netmask), (u'gateway', gateway)]
+        for key, value in ((u'dns-domain', dns_domain), (u'dns-nameservers', dns_nameservers), (u'broadcast', broadcast), (u'wpa-conf', wpa_conf)):
+            if value is not None and len(value) > 0:
+                options.append((key, value))
+
+        self.__add_interface(interface, option, u'static', options)
+
+    def add_dhcp_interface(self, interface, option):
+        """
+        Add dhcp interface
+
+        Args:
+            interface (string): interface name
+            option (int): interface option mask (none=0|auto=1|hotplug=2)
+
+        Raises:
+            InvalidParameter: if interface is already configured
+        """
+        self.__add_interface(interface, option, u'dhcp', [])
+
+    def delete_interface(self, interface):
+        """
+        Delete interface stanzas and its auto/hotplug options
+
+        Args:
+            interface (string): interface name
+
+        Returns:
+            bool: True if interface deleted, False if interface is not configured
+        """
+        blocks = self.get_blocks(u'iface', interface)
+        if not blocks:
+            return False
+
+        for block in blocks:
+            self.remove_block(block)
+
+        # remove interface from option lines, keeping other interfaces of the same line
+        for index, item in reversed(list(enumerate(self.items))):
+            if not isinstance(item, ConfigTreeLine) or item.key not in (u'auto', u'allow-auto', u'allow-hotplug'):
+                continue
+            interfaces = item.value.split()
+            if interface not in interfaces:
+                continue
+            interfaces = [name for name in interfaces if name != interface]
+            if interfaces:
+                value = u' '.join(interfaces)
+                self.items[index] = ConfigTreeLine(self.parser.format_option(item.key, value, False), item.key, value)
+            else:
+                del self.items[index]
+
+        return True
+
+
+class NetworkInterfacesParser(ConfigTreeParser):
+    """
+    /etc/network/interfaces file parser
+
+    Stanza options belong to iface or mapping stanza until next stanza line.
+    """
+
+    BLOCK_HEADERS = [
+        (r'^\s*(iface)\s+(\S+)\s+\S+\s+\S+.*$', 1, 2),
+        (r'^\s*(mapping)\s+(\S+).*$', 1, 2),
+    ]
+    TOP_LEVEL_OPTIONS = [
+        ConfigTreePattern(r'^\s*(auto|allow-\S+|source|source-directory|no-auto-down|no-scripts)\s+(.*?)\s*$'),
+    ]
+    BLOCK_OPTIONS = [ConfigTreePattern(r'^\s*(\S+)\s+(.*?)\s*$')]
+
+    def build_tree(self, items):
+        return NetworkInterfacesTree(self, items)
+
+    def format_option(self, key, value, in_block):
+        return u'%s%s %s\n' % (u'  ' if in_block else u'', key, value)
+
+    def format_header(self, kind, name):
+        return u'%s %s\n' % (kind, name)
+
+
 class EtcNetworkInterfaces(Config):
     """
     Helper class to update and read /etc/network/interfaces file.
@@ -449,3 +664,25 @@ class EtcNetworkInterfaces(Config):
         lines.append(u'iface %s inet dhcp\n' % interface)
 
         return self.add_lines(lines)
+
+    @contextmanager
+    def edit(self):
+        """
+        Edit config file as syntax tree. All edits are applied in memory and file is written once when leaving
+        context.
+
+        Usage::
+
+            with etc_network_interfaces.edit() as tree:
+                tree.delete_interface('eth0')
+                tree.add_dhcp_interface('eth0', EtcNetworkInterfaces.OPTION_AUTO)
+
+        Yields:
+            NetworkInterfacesTree: config tree
+        """
+        try:
+            with self._edit_tree(NetworkInterfacesParser()) as tree:
+                yield tree
+        finally:
+            #handle cache
+            self.__last_update = 0
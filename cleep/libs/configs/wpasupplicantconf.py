@@ -3,13 +3,225 @@
 
 from cleep.exception import InvalidParameter, MissingParameter, CommandError
 from cleep.libs.configs.config import Config
+from cleep.libs.configs.configtree import ConfigTree, ConfigTreeParser, ConfigTreePattern
 from cleep.libs.internals.console import Console
+from contextlib import contextmanager
 import logging
 import os
 import re
 import io
 import time
 
+
+class WpaSupplicantTree(ConfigTree):
+    """
+    wpa_supplicant.conf syntax tree with typed accessors
+    """
+
+    ENCRYPTION_TYPE_WPA = 'wpa'
+    ENCRYPTION_TYPE_WPA2 = 'wpa2'
+    ENCRYPTION_TYPE_WEP = 'wep'
+    ENCRYPTION_TYPE_UNSECURED = 'unsecured'
+
+    def __unquote(self, value):
+        """
+        Remove quotes around value
+
+        Args:
+            value (string): value
+
+        Returns:
+            string: unquoted value
+        """
+        return value.replace('"', '').replace('\'', '') if value is not None else None
+
+    def get_country(self):
+        """
+        Return configured country
+
+        Returns:
+            string: country alpha2 code or None if not configured
+        """
+        return self.get('country')
+
+    def set_country(self, alpha2):
+        """
+        Set country
+
+        Args:
+            alpha2 (string): country alpha2 code
+        """
+        self.set('country', alpha2, first=True)
+
+    def get_network_block(self, network):
+        """
+        Return block of specified network
+
+        Args:
+            network (string): network name (ssid)
+
+        Returns:
+            ConfigTreeBlock: network block or None if network is not configured
+        """
+        for block in self.get_blocks('network'):
+            if self.__unquote(block.get('ssid')) == network:
+                return block
+        return None
+
+    def get_networks(self):
+        """
+        Return configured networks
+
+        Returns:
+            dict: networks by name::
+
+                {
+                    network name (string): {
+                        network (string): network name,
+                        password (string): password,
+                        hidden (bool): True if network is hidden,
+                        encryption (string): encryption type (see ENCRYPTION_TYPE_XXX),
+                        disabled (bool): True if network is disabled
+                    },
+                    ...
+                }
+
+        """
+        networks = {}
+        for block in self.get_blocks('network'):
+            network = self.__unquote(block.get('ssid'))
+            key_mgmt = block.get('key_mgmt')
+            if key_mgmt == 'NONE':
+                encryption = self.ENCRYPTION_TYPE_WEP if block.get('wep_key0') else self.ENCRYPTION_TYPE_UNSECURED
+            else:
+                # default encryption is WPA2 even if not specified in wpa_supplicant.conf file
+                encryption = self.ENCRYPTION_TYPE_WPA2
+            networks[network] = {
+                'network': network,
+                'password': self.__unquote(block.get('psk', block.get('wep_key0'))),
+                'hidden': block.get('scan_ssid') == '1',
+                'encryption': encryption,
+                'disabled': block.get('disabled') == '1',
+            }
+
+        return networks
+
+    def add_network(self, network, encryption, password, hidden=False, disabled=False):
+        """
+        Add network
+
+        Args:
+            network (string): network name (ssid)
+            encryption (string): network encryption (see ENCRYPTION_TYPE_XXX)
+            password (string): network password (already encrypted for wpa/wpa2 networks)
+            hidden (bool): hidden network flag
+            disabled (bool): disabled network flag
+
+        Raises:
+            InvalidParameter: if network is already configured
+        """
+        if self.get_network_block(network) is not None:
+            raise InvalidParameter('Network "%s" is already configured' % network)
+
+        options = [('ssid', '"%s"' % network)]
+        if encryption in (self.ENCRYPTION_TYPE_WPA, self.ENCRYPTION_TYPE_WPA2):
+            options.extend([('key_mgmt', 'WPA-PSK'), ('psk', password)])
+        elif encryption == self.ENCRYPTION_TYPE_WEP:
+            options.extend([('key_mgmt', 'NONE'), ('wep_key0', password), ('wep_tx_keyidx', '0')])
+        else:
+            options.append(('key_mgmt', 'NONE'))
+        if hidden:
+            options.append(('scan_ssid', '1'))
+        if disabled:
+            options.append(('disabled', '1'))
+
+        self.add_block('network', None, options)
+
+    def delete_network(self, network):
+        """
+        Delete network
+
+        Args:
+            network (string): network name (ssid)
+
+        Returns:
+            bool: True if network deleted, False if network is not configured
+        """
+        block = self.get_network_block(network)
+        if block is None:
+            return False
+
+        self.remove_block(block)
+        return True
+
+    def set_network_password(self, network, password):
+        """
+        Update network password
+
+        Args:
+            network (string): network name (ssid)
+            password (string): new password (already encrypted for wpa/wpa2 networks)
+
+        Returns:
+            bool: True if password updated, False if network is not configured or unsecured
+        """
+        block = self.get_network_block(network)
+        if block is None:
+            return False
+
+        if block.get('key_mgmt') == 'NONE':
+            if block.get('wep_key0') is None:
+                return False
+            block.set('wep_key0', password)
+        else:
+            block.set('psk', password)
+        return True
+
+    def set_network_disabled(self, network, disabled):
+        """
+        Enable or disable network
+
+        Args:
+            network (string): network name (ssid)
+            disabled (bool): True to disable network
+
+        Returns:
+            bool: True if network updated, False if network is not configured
+        """
+        block = self.get_network_block(network)
+        if block is None:
+            return False
+
+        if disabled:
+            block.set('disabled', '1')
+        else:
+            block.remove('disabled')
+        return True
+
+
+class WpaSupplicantParser(ConfigTreeParser):
+    """
+    wpa_supplicant.conf file parser
+    """
+
+    BLOCK_HEADERS = [(r'^\s*(network)\s*=\s*\{\s*$', 1, None)]
+    BLOCK_FOOTER = r'^\s*\}\s*$'
+    TOP_LEVEL_OPTIONS = [ConfigTreePattern(r'^\s*(\w+)\s*=\s*(.*?)\s*$')]
+    BLOCK_OPTIONS = TOP_LEVEL_OPTIONS
+
+    def build_tree(self, items):
+        return WpaSupplicantTree(self, items)
+
+    def format_option(self, key, value, in_block):
+        return '%s%s=%s\n' % ('\t' if in_block else '', key, value)
+
+    def format_header(self, kind, name):
+        return '%s={\n' % kind
+
+    def format_footer(self, kind):
+        return '}\n'
+
+
 class WpaSupplicantConf(Config):
     """
     Helper class to update and read /etc/wpa_supplicant/wpa_supplicant.conf file
@@ -721,3 +933,82 @@ class WpaSupplicantConf(Config):
         """
         return self.__update_network_disabled_flag(network, True, interface=interface)
 
+    @contextmanager
+    def edit(self, interface=None):
+        """
+        Edit wpa_supplicant config file of specified interface as syntax tree. All edits are applied in memory and
+        file is written once when leaving context. Config file is created if it does not exist.
+
+        Usage::
+
+            with wpa_supplicant_conf.edit('wlan0') as tree:
+                tree.add_network('network1', 'wpa2', encrypted_password)
+                tree.set_network_disabled('network2', True)
+
+        Args:
+            interface (string): interface name. If not specified edit default wpa_supplicant.conf file
+
+        Yields:
+            WpaSupplicantTree: config tree
+        """
+        if not self.has_config(interface):
+            self.save_default_config(interface)
+        configurations = self.__get_configuration_files()
+
+        self.CONF = configurations[interface or 'default']
+        try:
+            with self._edit_tree(WpaSupplicantParser()) as tree:
+                yield tree
+        finally:
+            self.__restore_conf()
+
+    def add_networks(self, networks, interface=None, encrypt_password=True):
+        """
+        Add many networks at once. Config file is read and written only once.
+
+        Args:
+            networks (list): list of networks::
+
+                [
+                    {
+                        network (string): network name (ssid)
+                        encryption (string): network encryption (wpa|wpa2|wep|unsecured)
+                        password (string): network password (not encrypted!)
+                        hidden (bool): hidden network flag (optional)
+                    },
+                    ...
+                ]
+
+            interface (string|None): if specified add networks in specific interface wpa_supplicant.conf file
+            encrypt_password (bool): encrypt password if necessary before adding it to config file (default True)
+
+        Returns:
+            bool: True if networks successfully added
+
+        Raises:
+            MissingParameter, InvalidParameter
+        """
+        # check params and prepare networks before touching config file
+        entries = []
+        for network in networks:
+            name = network.get('network')
+            encryption = network.get('encryption')
+            password = network.get('password')
+            if name is None or len(name) == 0:
+                raise MissingParameter('Parameter "network" is missing')
+            if encryption is None or len(encryption) == 0:
+                raise MissingParameter('Parameter "encryption" is missing')
+            if encryption not in self.ENCRYPTION_TYPES:
+                raise InvalidParameter('Parameter "encryption" is invalid (available: %s)' % (','.join(self.ENCRYPTION_TYPES)))
+            if encryption != self.ENCRYPTION_TYPE_UNSECURED and (password is None or len(password) == 0):
+                raise MissingParameter('Parameter "password" is missing')
+
+            if encrypt_password and encryption in [self.ENCRYPTION_TYPE_WPA, self.ENCRYPTION_TYPE_WPA2]:
+                password = self.encrypt_password(name, password)
+            entries.append((name, encryption, password, network.get('hidden', False)))
+
+        with self.edit(interface) as tree:
+            for name, encryption, password, hidden in entries:
+                tree.add_network(name, encryption, password, hidden=hidden)
+
+        return tree.written
@@ -105,7 +105,7 @@ class Driver:
             callback(self.type, self.name, success, message)
 
         self.logger.trace('Launch driver install task')
-        task = self.task_factory.create_task(None, install, [end_callback, params])
+        task = self.task_factory.create_task(None, install, [end_callback, params], long_running=True)
         task.start()
         return task
 
@@ -143,7 +143,7 @@ class Driver:
             callback(self.type, self.name, success, message)
 
         self.logger.trace('Launch driver uninstall task')
-        task = self.task_factory.create_task(None, uninstall, [end_callback, params])
+        task = self.task_factory.create_task(None, uninstall, [end_callback, params], long_running=True)
         task.start()
         return task
 
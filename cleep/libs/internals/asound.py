@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import errno
+import fcntl
+import logging
+from threading import Lock
+
+__all__ = ["Asound"]
+
+
+class Asound:
+    """
+    Read ALSA sound cards and PCM devices directly from procfs, without spawning aplay or arecord
+    commands, and detect sound controls changes (volume, mute, route...) using kernel control events.
+    """
+
+    PROC_PATH = "/proc"
+    DEV_PATH = "/dev"
+
+    STREAM_PLAYBACK = "playback"
+    STREAM_CAPTURE = "capture"
+
+    # _IOWR('U', 0x16, int)
+    SNDRV_CTL_IOCTL_SUBSCRIBE_EVENTS = 0xC0045516
+    READ_SIZE = 4096
+
+    def __init__(self, proc_path=None, dev_path=None):
+        """
+        Constructor
+
+        Args:
+            proc_path (string): procfs mount path (default PROC_PATH)
+            dev_path (string): devices path (default DEV_PATH)
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.proc_path = proc_path or self.PROC_PATH
+        self.dev_path = dev_path or self.DEV_PATH
+
+        self.__lock = Lock()
+        self.__cards_content = None
+        self.__controls = {}
+
+    def is_available(self):
+        """
+        Return True if sound cards can be read from procfs
+
+        Returns:
+            bool: True if procfs is available
+        """
+        return os.path.exists(os.path.join(self.proc_path, "asound", "cards"))
+
+    def get_devices(self, stream):
+        """
+        Return PCM devices of specified stream
+
+        Args:
+            stream (string): STREAM_PLAYBACK or STREAM_CAPTURE
+
+        Returns:
+            dict: devices by card (same format than Alsa.get_playback_devices)::
+
+                {
+                    card id (int): {
+                        name (string): card name
+                        desc (string): card description
+                        devices (dict): {
+                            deviceid (int): {
+                                name (string): device name
+                                desc (string): device description
+                                cardid (int): card id
+                                deviceid (int): device id
+                            },
+                            ...
+                        }
+                    },
+                    ...
+                }
+
+        """
+        cards = self.__get_cards(self.__read("asound", "cards") or "")
+        entries = {}
+        for line in (self.__read("asound", "pcm") or "").splitlines():
+            # 00-01: bcm2835 IEC958/HDMI : bcm2835 IEC958/HDMI : playback 1
+            matches = re.match(r"^(\d+)-(\d+): (.*?) : (.*?)((?: : (?:playback|capture) \d+)+)\s*$", line)
+            if not matches:
+                continue
+            streams = dict(re.findall(r"(playback|capture) (\d+)", matches.group(5)))
+            card_id = int(matches.group(1))
+            if stream not in streams or card_id not in cards:
+                continue
+
+            device_id = int(matches.group(2))
+            card = cards[card_id]
+            if card_id not in entries:
+                entries[card_id] = {
+                    "name": card["name"],
+                    "desc": card["desc"],
+                    "devices": {},
+                }
+            entries[card_id]["devices"][device_id] = {
+                "deviceid": device_id,
+                "cardid": card_id,
+                "name": matches.group(3).strip() or card["name"],
+                "desc": matches.group(4).strip() or card["name"],
+            }
+
+        return entries
+
+    def has_changed(self):
+        """
+        Return True if sound cards or their controls changed since last call. Kernel control events
+        of each card are subscribed on first call.
+
+        Returns:
+            bool: True if something changed, always True if changes cannot be detected
+        """
+        with self.__lock:
+            cards_content = self.__read("asound", "cards")
+            if cards_content is None:
+                return True
+            if cards_content != self.__cards_content:
+                self.__cards_content = cards_content
+                self.__subscribe(self.__get_cards(cards_content).keys())
+                return True
+
+            if not self.__controls or None in self.__controls.values():
+                # some controls cannot be watched
+                self.__drain()
+                return True
+
+            return self.__drain()
+
+    def close(self):
+        """
+        Close controls subscriptions
+        """
+        with self.__lock:
+            self.__unsubscribe()
+            self.__cards_content = None
+
+    def __read(self, *path):
+        """
+        Read procfs file
+
+        Returns:
+            string: file content or None if file does not exist
+        """
+        try:
+            with open(os.path.join(self.proc_path, *path), encoding="utf-8", errors="replace") as fd:
+                return fd.read()
+        except OSError:
+            return None
+
+    def __get_cards(self, content):
+        """
+        Parse /proc/asound/cards content
+
+        Returns:
+            dict: cards by id::
+
+                {
+                    card id (int): {
+                        name (string): card name (card identifier)
+                        desc (string): card description (card short name)
+                    },
+                    ...
+                }
+
+        """
+        cards = {}
+        for line in content.splitlines():
+            #  0 [ALSA           ]: bcm2835_alsa - bcm2835 ALSA
+            matches = re.match(r"^\s*(\d+)\s+\[(.*?)\s*\]: .*? - (.*)$", line)
+            if matches:
+                cards[int(matches.group(1))] = {
+                    "name": matches.group(2),
+                    "desc": matches.group(3).strip(),
+                }
+        return cards
+
+    def __subscribe(self, card_ids):
+        """
+        Open control device of each card and subscribe to its events (must be called with lock acquired)
+        """
+        self.__unsubscribe()
+        for card_id in card_ids:
+            path = os.path.join(self.dev_path, "snd", "controlC%s" % card_id)
+            fd = None
+            try:
+                fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+                fcntl.ioctl(fd, self.SNDRV_CTL_IOCTL_SUBSCRIBE_EVENTS, b"\x01\x00\x00\x00")
+            except OSError as error:
+                self.logger.debug("Unable to watch controls of card %s: %s", card_id, error)
+                if fd is not None:
+                    os.close(fd)
+                fd = None
+            self.__controls[card_id] = fd
+
+    def __unsubscribe(self):
+        """
+        Close controls devices (must be called with lock acquired)
+        """
+        for fd in self.__controls.values():
+            if fd is not None:
+                os.close(fd)
+        self.__controls = {}
+
+    def __drain(self):
+        """
+        Read all pending controls events (must be called with lock acquired)
+
+        Returns:
+            bool: True if at least one event was pending
+        """
+        changed = False
+        for card_id, fd in self.__controls.items():
+            if fd is None:
+                continue
+            while True:
+                try:
+                    data = os.read(fd, self.READ_SIZE)
+                except OSError as error:
+                    if error.errno not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                        self.logger.debug("Unable to read controls events of card %s: %s", card_id, error)
+                        changed = True
+                    break
+                if not data:
+                    break
+                changed = True
+
+        return changed
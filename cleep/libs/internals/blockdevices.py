@@ -0,0 +1,269 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import logging
+
+__all__ = ["BlockDevices"]
+
+
+class BlockDevices:
+    """
+    Read block devices infos directly from sysfs, procfs and udev database, without spawning
+    lsblk, blkid or udevadm commands.
+
+    Only physical disks (block devices backed by a device) and their partitions are reported:
+    virtual devices (loop, ram, zram, device mapper...) and optical drives are ignored.
+    """
+
+    SYS_PATH = "/sys"
+    DEV_PATH = "/dev"
+    PROC_PATH = "/proc"
+    UDEV_DATA_PATH = "/run/udev/data"
+    SECTOR_SIZE = 512
+    IGNORED_DEVICES = ("sr",)
+
+    def __init__(self, sys_path=None, dev_path=None, proc_path=None, udev_data_path=None):
+        """
+        Constructor
+
+        Args:
+            sys_path (string): sysfs mount path (default SYS_PATH)
+            dev_path (string): devices path (default DEV_PATH)
+            proc_path (string): procfs mount path (default PROC_PATH)
+            udev_data_path (string): udev database path (default UDEV_DATA_PATH)
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.sys_path = sys_path or self.SYS_PATH
+        self.dev_path = dev_path or self.DEV_PATH
+        self.proc_path = proc_path or self.PROC_PATH
+        self.udev_data_path = udev_data_path or self.UDEV_DATA_PATH
+
+    def is_available(self):
+        """
+        Return True if block devices can be read from sysfs
+
+        Returns:
+            bool: True if sysfs is available
+        """
+        return os.path.isdir(os.path.join(self.sys_path, "block")) and os.path.isdir(
+            os.path.join(self.sys_path, "class", "block")
+        )
+
+    def is_udev_available(self):
+        """
+        Return True if udev database is available
+
+        Returns:
+            bool: True if udev database is available
+        """
+        return os.path.isdir(self.udev_data_path)
+
+    def get_devices(self):
+        """
+        Return disks and their partitions (same structure than lsblk command helper)
+
+        Returns:
+            dict: devices infos by drive::
+
+                {
+                    drive name (string): {
+                        device name (string): {
+                            name (string): device name,
+                            major (string): major number,
+                            minor (string): minor number,
+                            size (int): device size (bytes),
+                            totalsize (int): drive total size (bytes),
+                            percent (int): device size over drive total size,
+                            readonly (bool): True if device is readonly,
+                            mountpoint (string): mountpoint or empty string if not mounted,
+                            partition (bool): True if device is a partition,
+                            removable (bool): True if drive is removable (external disk/usb stick...),
+                            drivemodel (string): drive model (None for partitions),
+                        },
+                        ...
+                    },
+                    ...
+                }
+
+        """
+        mountpoints = self.__get_mountpoints()
+        devices = {}
+        for drive in sorted(os.listdir(os.path.join(self.sys_path, "block"))):
+            drive_path = os.path.join(self.sys_path, "block", drive)
+            if drive.startswith(self.IGNORED_DEVICES) or not os.path.exists(os.path.join(drive_path, "device")):
+                continue
+
+            total_size = self.__get_size(drive_path)
+            removable = self.__read(os.path.join(drive_path, "removable")) == "1"
+            model = self.__read(os.path.join(drive_path, "device", "model"))
+            devices[drive] = {
+                drive: self.__get_device_infos(drive, drive_path, total_size, removable, mountpoints, False, model or ""),
+            }
+            for name, path in self.__get_partitions(drive_path):
+                devices[drive][name] = self.__get_device_infos(name, path, total_size, removable, mountpoints, True)
+
+        return devices
+
+    def get_filesystems(self):
+        """
+        Return filesystems of block devices (same structure than blkid command helper). Only
+        devices with uuid, filesystem type and partuuid are returned
+
+        Returns:
+            dict: filesystems by device path::
+
+                {
+                    device (string): {
+                        device (string): device path,
+                        uuid (string): filesystem uuid,
+                        type (string): filesystem type,
+                        partuuid (string): partition uuid
+                    },
+                    ...
+                }
+
+        """
+        uuids = self.__get_links("by-uuid")
+        partuuids = self.__get_links("by-partuuid")
+        filesystems = {}
+        for name in sorted(os.listdir(os.path.join(self.sys_path, "class", "block"))):
+            properties = self.get_udev_properties(name) or {}
+            uuid = properties.get("ID_FS_UUID") or uuids.get(name)
+            fstype = properties.get("ID_FS_TYPE")
+            partuuid = properties.get("ID_PART_ENTRY_UUID") or partuuids.get(name)
+            if uuid and fstype and partuuid:
+                device = os.path.join(self.dev_path, name)
+                filesystems[device] = {
+                    "device": device,
+                    "uuid": uuid,
+                    "type": fstype,
+                    "partuuid": partuuid,
+                }
+
+        return filesystems
+
+    def get_udev_properties(self, device):
+        """
+        Return udev properties of specified device (same as "udevadm info --query=property")
+
+        Args:
+            device (string): device name or path (mmcblk0, /dev/sda...)
+
+        Returns:
+            dict: udev properties (ordered as stored in udev database) or None if device is not
+                  found in udev database
+        """
+        name = os.path.basename(device)
+        devnum = self.__read(os.path.join(self.sys_path, "class", "block", name, "dev"))
+        if not devnum:
+            return None
+
+        try:
+            with open(os.path.join(self.udev_data_path, "b%s" % devnum), encoding="utf-8", errors="replace") as fd:
+                lines = fd.read().splitlines()
+        except OSError:
+            return None
+
+        properties = {}
+        for line in lines:
+            if line.startswith("E:") and "=" in line:
+                key, value = line[2:].split("=", 1)
+                properties[key] = value
+        return properties
+
+    def __get_device_infos(self, name, path, total_size, removable, mountpoints, partition, model=None):
+        """
+        Return device infos (see get_devices)
+        """
+        major, _, minor = (self.__read(os.path.join(path, "dev")) or "").partition(":")
+        size = self.__get_size(path)
+        return {
+            "name": name,
+            "major": major,
+            "minor": minor,
+            "size": size,
+            "totalsize": total_size,
+            "percent": int(float(size) / float(total_size) * 100.0) if total_size else None,
+            "readonly": self.__read(os.path.join(path, "ro")) == "1",
+            "mountpoint": mountpoints.get("%s:%s" % (major, minor), ""),
+            "partition": partition,
+            "removable": removable,
+            "drivemodel": model,
+        }
+
+    def __get_partitions(self, drive_path):
+        """
+        Return drive partitions sorted by partition number
+
+        Returns:
+            list: list of tuples (partition name, partition sysfs path)
+        """
+        partitions = []
+        for name in os.listdir(drive_path):
+            number = self.__read(os.path.join(drive_path, name, "partition"))
+            if number is not None:
+                partitions.append((int(number), name, os.path.join(drive_path, name)))
+        return [(name, path) for _, name, path in sorted(partitions)]
+
+    def __get_size(self, path):
+        """
+        Return device size in bytes (sysfs size is always expressed in 512 bytes sectors)
+        """
+        size = self.__read(os.path.join(path, "size"))
+        return int(size) * self.SECTOR_SIZE if size else 0
+
+    def __get_mountpoints(self):
+        """
+        Return mountpoints by device number. Device number is used instead of device name
+        because root filesystem device can be mounted as /dev/root
+
+        Returns:
+            dict: first mountpoint by device number (major:minor)
+        """
+        mountpoints = {}
+        try:
+            with open(os.path.join(self.proc_path, "self", "mountinfo"), encoding="utf-8") as fd:
+                for line in fd:
+                    fields = line.split()
+                    if len(fields) > 4 and fields[2] not in mountpoints:
+                        # mountpoint special chars are escaped in octal (\040 for space)
+                        mountpoints[fields[2]] = re.sub(r"\\([0-7]{3})", lambda match: chr(int(match.group(1), 8)), fields[4])
+        except OSError:
+            self.logger.warning("Unable to read mountpoints")
+        return mountpoints
+
+    def __get_links(self, kind):
+        """
+        Return device names and their identifiers from /dev/disk/<kind> symlinks
+
+        Args:
+            kind (string): links kind (by-uuid, by-partuuid)
+
+        Returns:
+            dict: identifier by device name
+        """
+        links = {}
+        path = os.path.join(self.dev_path, "disk", kind)
+        if not os.path.isdir(path):
+            return links
+        for identifier in os.listdir(path):
+            try:
+                links[os.path.basename(os.readlink(os.path.join(path, identifier)))] = identifier
+            except OSError:  # pragma: no cover
+                pass
+        return links
+
+    def __read(self, path):
+        """
+        Read sysfs attribute
+
+        Returns:
+            string: stripped attribute value or None if attribute does not exist
+        """
+        try:
+            with open(path, encoding="utf-8", errors="replace") as fd:
+                return fd.read().strip()
+        except OSError:
+            return None
@@ -6,9 +6,12 @@ from cleep.libs.internals.readwrite import ReadWrite, ReadWriteContext
 from cleep.exception import InvalidParameter
 import logging
 import os
+import time
+from contextlib import contextmanager
 from threading import Timer, Lock
 import io
 import shutil
+import stat
 import json
 import locale
 from distutils import dir_util
@@ -18,6 +21,9 @@ class CleepFilesystem():
     """
     Filesystem helper with read/write filesystem support (uses readwrite lib)
     A debounce function waits to switch to readonly mode to reduce number of switches
+
+    Group of writes can be done in a transaction (see transaction function) to hold a single read/write
+    window and sync filesystem once when transaction ends.
     """
 
     # read/write debounce duration
@@ -38,6 +44,13 @@ class CleepFilesystem():
         self.__rw_lock = Lock()
         self.__debounce_timer_root = None
         self.__debounce_timer_boot = None
+        # timestamp partition was remounted in read/write mode (None if partition is readonly)
+        self.__rw_since = {'root': None, 'boot': None}
+        self.__stats = {
+            'remounts': {'root': 0, 'boot': 0},
+            'rw_duration': {'root': 0.0, 'boot': 0.0},
+            'transactions': 0,
+        }
 
         # check if os is in readonly mode
         self.is_readonly_fs = self.__is_readonly_filesystem()
@@ -127,10 +140,12 @@ class CleepFilesystem():
             self.__debounce_timer_root = None
             self.logger.trace('/!\\ Disable writings for root partition')
             self.rw.disable_write_on_root(context)
+            self.__end_rw_window('root')
         if boot and process_boot:
             self.__debounce_timer_boot = None
             self.logger.trace('/!\\ Disable writings for boot partition')
             self.rw.disable_write_on_boot(context)
+            self.__end_rw_window('boot')
 
         # release lock
         self.logger.trace('Release lock in really_disable_write')
@@ -163,13 +178,15 @@ class CleepFilesystem():
             self.__debounce_timer_boot.cancel()
             self.__debounce_timer_boot = None
 
-        if root and self.__counter_root == 0:
-            # first to request writing, enable it
+        if root and self.__counter_root == 0 and self.__rw_since['root'] is None:
+            # first to request writing and partition is not still writable (debounce), enable it
             self.logger.trace('/!\\ Enable writings on root partition')
-            self.rw.enable_write_on_root()
-        if boot and self.__counter_boot == 0:
+            if self.rw.enable_write_on_root():
+                self.__start_rw_window('root')
+        if boot and self.__counter_boot == 0 and self.__rw_since['boot'] is None:
             self.logger.trace('/!\\ Enable writings on boot partition')
-            self.rw.enable_write_on_boot()
+            if self.rw.enable_write_on_boot():
+                self.__start_rw_window('boot')
 
         # increase usage counter
         if root:
@@ -183,6 +200,93 @@ class CleepFilesystem():
         self.logger.trace('Release lock in enable_write')
         self.__rw_lock.release()
 
+    def __start_rw_window(self, partition):
+        """
+        Record partition remount in read/write mode
+
+        Args:
+            partition (string): partition name (root or boot)
+        """
+        self.__stats['remounts'][partition] += 1
+        self.__rw_since[partition] = time.time()
+
+    def __end_rw_window(self, partition):
+        """
+        Record partition remount in readonly mode
+
+        Args:
+            partition (string): partition name (root or boot)
+        """
+        if self.__rw_since[partition] is not None:
+            self.__stats['rw_duration'][partition] += time.time() - self.__rw_since[partition]
+            self.__rw_since[partition] = None
+
+    def get_stats(self):
+        """
+        Return read/write statistics
+
+        Returns:
+            dict: statistics::
+
+                {
+                    remounts (dict): number of read/write remounts by partition (root, boot)
+                    rw_duration (dict): time spent in read/write mode by partition (seconds)
+                    transactions (int): number of transactions
+                }
+
+        """
+        self.__rw_lock.acquire()
+        now = time.time()
+        stats = {
+            'remounts': dict(self.__stats['remounts']),
+            'rw_duration': {
+                partition: duration + (now - self.__rw_since[partition] if self.__rw_since[partition] else 0.0)
+                for partition, duration in self.__stats['rw_duration'].items()
+            },
+            'transactions': self.__stats['transactions'],
+        }
+        self.__rw_lock.release()
+
+        return stats
+
+    @contextmanager
+    def transaction(self, root=True, boot=False):
+        """
+        Group writes in a single read/write window
+
+        Partitions stay writable during the whole transaction, so writes done inside it (using this
+        instance functions) do not remount partitions. Filesystem is synced once when transaction ends.
+        Transactions can be nested.
+
+        Usage::
+
+            with cleep_filesystem.transaction():
+                cleep_filesystem.write_data(path1, data1)
+                cleep_filesystem.copy(src, path2)
+
+        Args:
+            root (bool): enable write on root partition (default True)
+            boot (bool): enable write on boot partition (default False)
+        """
+        need_write = self.is_readonly_fs and (root or boot)
+        if need_write:
+            self.__enable_write(root=root, boot=boot)
+        self.__stats['transactions'] += 1
+
+        try:
+            yield self
+
+        finally:
+            # flush all writes at once
+            os.sync()
+            if need_write:
+                context = ReadWriteContext()
+                context.action = 'transaction'
+                context.is_readonly_fs = self.is_readonly_fs
+                context.root = root
+                context.boot = boot
+                self.__disable_write(context, root=root, boot=boot)
+
     def __disable_write(self, context, root=True, boot=False):
         """
         Disable write mode
@@ -352,7 +456,7 @@ class CleepFilesystem():
                 root = self.rw.is_path_on_root(fd.name)
                 self.__disable_write(context, root, not root)
 
-    def write_data(self, path, data, encoding=None):
+    def write_data(self, path, data, encoding=None, atomic=False):
         """
         Write data on specified path
 
@@ -360,6 +464,8 @@ class CleepFilesystem():
             path (string): file path
             data (any): data to write
             encoding (string): file encoding (default is system one)
+            atomic (bool): write data to temporary file, sync it and rename it to path. File content is
+                           never partially written (default False)
 
         Returns:
             bool: True if operation succeed
@@ -367,6 +473,9 @@ class CleepFilesystem():
         if not isinstance(data, str):
             raise InvalidParameter('Data must be string')
 
+        if atomic:
+            return self.__write_data_atomic(path, data, encoding)
+
         fp = None
         try:
             fp = self.open(path, 'w', encoding)
@@ -387,6 +496,63 @@ class CleepFilesystem():
             if fp:
                 self.close(fp)
 
+    def __write_data_atomic(self, path, data, encoding=None):
+        """
+        Write data to temporary file, fsync it and rename it to specified path
+
+        Args:
+            path (string): file path
+            data (string): data to write
+            encoding (string): file encoding (default is system one)
+
+        Returns:
+            bool: True if operation succeed
+        """
+        tmp_path = '%s.tmp' % path
+        need_write = self.is_readonly_fs and not self.__is_on_tmp(path)
+        root = self.rw.is_path_on_root(path) if need_write else True
+        if need_write:
+            self.__enable_write(root=root, boot=not root)
+
+        try:
+            with io.open(tmp_path, mode='w', encoding=encoding or self.get_default_encoding()) as fp:
+                fp.write(data)
+                fp.flush()
+                os.fsync(fp.fileno())
+            if os.path.exists(path):
+                # keep original file permissions
+                os.chmod(tmp_path, stat.S_IMODE(os.stat(path).st_mode))
+            os.replace(tmp_path, path)
+
+            # sync directory to persist rename
+            dir_fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+            return True
+
+        except:
+            self.logger.exception('Unable to write content to file "%s"' % path)
+            self.__report_exception({
+                'message': 'Unable to write content to file "%s"' % path,
+                'encoding': encoding or self.get_default_encoding(),
+                'path': path
+            })
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+
+        finally:
+            if need_write:
+                context = ReadWriteContext()
+                context.src = path
+                context.action = 'write_atomic'
+                context.is_readonly_fs = self.is_readonly_fs
+                context.root = root
+                context.boot = not root
+                self.__disable_write(context, root, not root)
+
     def read_data(self, path, encoding=None):
         """
         Read file content
@@ -444,7 +610,7 @@ class CleepFilesystem():
 
         return lines
 
-    def write_json(self, path, data, encoding=None):
+    def write_json(self, path, data, encoding=None, atomic=False):
         """
         Write file as json format
 
@@ -452,6 +618,7 @@ class CleepFilesystem():
             path (string): file path
             data (any): data to write as json
             encoding (string): file encoding (default is system one)
+            atomic (bool): write file atomically (see write_data)
 
         Returns:
             bool: True if operation succeed
@@ -459,7 +626,7 @@ class CleepFilesystem():
         # ensure_ascii as workaround for unicode encoding on python 2.X https://bugs.python.org/issue13769
         json_data = str(json.dumps(data, indent=4, ensure_ascii=False, sort_keys=True))
 
-        return self.write_data(path, json_data, encoding)
+        return self.write_data(path, json_data, encoding, atomic=atomic)
 
     def rename(self, src, dst):
         """
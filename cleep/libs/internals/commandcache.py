@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import logging
+import time
+import copy
+from threading import Lock, Event
+
+__all__ = ["CommandCache", "get_command_cache"]
+
+
+class CommandCache:
+    """
+    Process-wide cache of command results.
+
+    Results are stored by key, a tuple whose first item is the command name (ie ("lsblk", True) or
+    ("udevadm", True, "sda")), and expire after the ttl specified by caller. When a result is expired,
+    only one caller runs the loader: concurrent callers asking for the same key wait for its result
+    instead of spawning the same command again.
+
+    Note:
+        Cached result is never returned as is: each caller receives its own copy that it can modify.
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.__lock = Lock()
+        self.__entries = {}
+        self.__loading = {}
+        self.__generations = {}
+        self.__stats = {}
+
+    def get(self, key, ttl, loader):
+        """
+        Get command result from cache, loading it if necessary
+
+        Args:
+            key (tuple): result key. First item is command name
+            ttl (float): result time to live (seconds)
+            loader (function): function (without parameter) returning command result
+
+        Returns:
+            any: copy of command result
+
+        Raises:
+            Exception: exception raised by loader
+        """
+        name = key[0]
+        leader = False
+        with self.__lock:
+            stats = self.__get_name_stats(name)
+            entry = self.__entries.get(key)
+            if entry and time.monotonic() - entry["timestamp"] <= ttl:
+                stats["hits"] += 1
+                loading = None
+            else:
+                entry = None
+                loading = self.__loading.get(key)
+                if loading:
+                    stats["waits"] += 1
+                else:
+                    stats["misses"] += 1
+                    loading = {
+                        "done": Event(),
+                        "value": None,
+                        "error": None,
+                        "generation": self.__generations.get(name, 0),
+                    }
+                    self.__loading[key] = loading
+                    leader = True
+
+        if entry:
+            # cached value is never modified, it can be copied outside lock
+            return copy.deepcopy(entry["value"])
+
+        if not leader:
+            # result is being loaded by another caller
+            loading["done"].wait()
+            if loading["error"]:
+                raise loading["error"]
+            return copy.deepcopy(loading["value"])
+
+        try:
+            loading["value"] = loader()
+        except Exception as error:
+            loading["error"] = error
+            with self.__lock:
+                self.__get_name_stats(name)["errors"] += 1
+            raise
+        finally:
+            with self.__lock:
+                del self.__loading[key]
+                if loading["error"] is None and loading["generation"] == self.__generations.get(name, 0):
+                    self.__entries[key] = {
+                        "value": loading["value"],
+                        "timestamp": time.monotonic(),
+                    }
+            loading["done"].set()
+
+        return copy.deepcopy(loading["value"])
+
+    def invalidate(self, *names):
+        """
+        Invalidate cached results. Results being loaded are returned to their callers but not cached
+
+        Args:
+            names (string): name of commands to invalidate. All commands are invalidated if not specified
+        """
+        with self.__lock:
+            names = names or set(key[0] for key in list(self.__entries) + list(self.__loading))
+            for name in names:
+                self.__generations[name] = self.__generations.get(name, 0) + 1
+                self.__get_name_stats(name)["invalidations"] += 1
+            self.__entries = {key: entry for key, entry in self.__entries.items() if key[0] not in names}
+
+    def get_stats(self):
+        """
+        Return cache statistics
+
+        Returns:
+            dict: cache statistics::
+
+                {
+                    entries (int): number of cached results
+                    hits (int): number of results returned from cache
+                    misses (int): number of results loaded
+                    waits (int): number of callers that waited for a result being loaded
+                    commands (dict): statistics by command name::
+
+                        {
+                            name (string): {
+                                hits (int), misses (int), waits (int), errors (int), invalidations (int)
+                            },
+                            ...
+                        }
+
+                }
+
+        """
+        with self.__lock:
+            commands = {name: dict(stats) for name, stats in self.__stats.items()}
+            entries = len(self.__entries)
+
+        return {
+            "entries": entries,
+            "hits": sum(stats["hits"] for stats in commands.values()),
+            "misses": sum(stats["misses"] for stats in commands.values()),
+            "waits": sum(stats["waits"] for stats in commands.values()),
+            "commands": commands,
+        }
+
+    def __get_name_stats(self, name):
+        """
+        Return statistics of specified command name (must be called with lock acquired)
+        """
+        if name not in self.__stats:
+            self.__stats[name] = {
+                "hits": 0,
+                "misses": 0,
+                "waits": 0,
+                "errors": 0,
+                "invalidations": 0,
+            }
+        return self.__stats[name]
+
+
+_command_cache = None
+_command_cache_lock = Lock()
+
+
+def get_command_cache():
+    """
+    Return command cache shared by all command helpers
+
+    Returns:
+        CommandCache: shared command cache instance
+    """
+    global _command_cache
+    with _command_cache_lock:
+        if _command_cache is None:
+            _command_cache = CommandCache()
+        return _command_cache
@@ -3,18 +3,14 @@
 
 import sys
 import subprocess
+import selectors
 import time
-from gevent import sleep
-from threading import Timer, Thread, Event
-
-try:  # pragma: no cover
-    from Queue import Queue, Empty
-except ImportError:  # pragma: no cover
-    from queue import Queue, Empty  # python 3.x
+from threading import Timer, Thread, Event, BoundedSemaphore
 import os
 from signal import SIGKILL
 import logging
 import re
+from cleep.libs.internals.consolereactor import get_reactor
 
 ON_POSIX = "posix" in sys.builtin_module_names
 
@@ -73,12 +69,12 @@ class EndlessConsole(Thread):
         c.join()
 
     Note:
-        Subprocess output async reading copied from https://stackoverflow.com/a/4896288
+        Outputs of all endless consoles are read by a shared ConsoleReactor: console thread only
+        triggers callbacks as soon as lines are received and when process terminates.
     """
 
     DEFAULT_OPTS = {
         'exec_dir': None,
-        'delay': 0.2,
         'env': {},
     }
 
@@ -96,7 +92,6 @@ class EndlessConsole(Thread):
 
                 {
                     exec_dir (str): Command line execution dir. Use APP_BIN_PATH from env if specified and exec_dir not set (defaut None),
-                    delay (double): Delay between std outputs checks (default 0.20),
                     env (dict): Command line env vars to inject during command execution. get_env() function can be called to
                                 fill this option (default {}),
                 }
@@ -117,10 +112,7 @@ class EndlessConsole(Thread):
         self.stopped = Event()
         self.killed = False
         self.__start_time = 0
-        self.__stdout_queue = Queue()
-        self.__stderr_queue = Queue()
-        self.__stdout_thread = None
-        self.__stderr_thread = None
+        self.__watch = None
         self.__opts = set_opts(opts, self.DEFAULT_OPTS)
 
     def __del__(self):
@@ -129,16 +121,6 @@ class EndlessConsole(Thread):
         """
         self.__stop()
 
-    def __enqueue_output(self, output, queue):
-        for line in iter(output.readline, b""):
-            if self.stopped.is_set():
-                break
-            queue.put(line.decode("utf-8").rstrip())
-        try:
-            output.close()
-        except Exception:  # pragma: no cover
-            pass
-
     def get_start_time(self):
         """
         Return process start time
@@ -153,6 +135,9 @@ class EndlessConsole(Thread):
         Stop command line execution
         """
         self.stopped.set()
+        watch = self.__watch
+        if watch:
+            watch.cancel()
 
     def stop(self):
         """
@@ -168,50 +153,29 @@ class EndlessConsole(Thread):
         self.killed = True
         self.__stop()
 
-    def __send_stds(self):
+    def __send_stds(self, stdout, stderr):
         """
-        Read queues and send outputs if available
+        Send outputs to callback
 
-        Returns:
-            True if something sent, False otherwise
+        Args:
+            stdout (string): stdout line
+            stderr (string): stderr line
         """
         if not self.callback:
-            return False
-
-        stdout = None
-        stderr = None
-
-        try:
-            stdout = self.__stdout_queue.get_nowait()
-        except Empty:
-            pass
-        except Exception:  # pragma: no cover
-            self.logger.exception("Error getting stdout queue")
+            return
 
         try:
-            stderr = self.__stderr_queue.get_nowait()
-        except Empty:
-            pass
-        except Exception:  # pragma: no cover
-            self.logger.exception("Error getting stderr queue")
-
-        if stdout is not None or stderr is not None:
-            try:
-                self.callback(stdout, stderr)
-            except Exception:
-                self.logger.exception(
-                    "Exception occured during EndlessCommand callback:"
-                )
-            return True
-
-        return False
+            self.callback(stdout, stderr)
+        except Exception:
+            self.logger.exception(
+                "Exception occured during EndlessCommand callback:"
+            )
 
     def run(self):
         """
         Console process
         """
         # launch command
-        return_code = None
         self.__start_time = time.time()
         shell = isinstance(self.command, str)
 
@@ -229,52 +193,17 @@ class EndlessConsole(Thread):
         pid = proc.pid
         self.logger.trace("PID=%d", pid)
 
-        if self.callback:
-            # async stdout reading
-            self.__stdout_thread = Thread(
-                target=self.__enqueue_output,
-                args=(proc.stdout, self.__stdout_queue),
-                daemon=True,
-                name="endlessconsole-stdout",
-            )
-            self.__stdout_thread.start()
-
-            # async stderr reading
-            self.__stderr_thread = Thread(
-                target=self.__enqueue_output,
-                args=(proc.stderr, self.__stderr_queue),
-                daemon=True,
-                name="endlessconsole-stderr",
-            )
-            self.__stderr_thread.start()
-
-        # wait for end of command line
-        while not self.stopped.is_set():
-            # check process status
-            proc.poll()
-
-            # read outputs and trigger callback
-            self.__send_stds()
-
-            # check end of command
-            if proc.returncode is not None:
-                return_code = proc.returncode
-                self.logger.debug(
-                    "Process is terminated with return code %s", proc.returncode
-                )
+        # send outputs until end of command line
+        self.__watch = get_reactor().watch(proc)
+        if self.stopped.is_set():
+            self.__watch.cancel()
+        while True:
+            line = self.__watch.get()
+            if line is None:
                 break
-
-            # pause
-            sleep(self.__opts.get('delay', 0.2))
-
-        # purge queues
-        self.logger.trace("Purging outputs...")
-        count = 0
-        while self.__send_stds() or count <= 5:
-            self.logger.trace(" purging...")
-            count += 1
-            sleep(0.05)
-        self.logger.trace("Purge completed")
+            self.__send_stds(*line)
+        return_code = self.__watch.returncode
+        self.logger.debug("Process is terminated with return code %s", return_code)
 
         # make sure all stds are closed
         try:
@@ -326,6 +255,14 @@ class Console:
         'env': {},
     }
 
+    # maximum number of processes spawned simultaneously by all consoles
+    MAX_PROCESSES = 10
+    # process status check delay when process exit cannot be watched (no pidfd support)
+    POLL_DELAY = 0.125
+    READ_SIZE = 65536
+
+    __processes = BoundedSemaphore(MAX_PROCESSES)
+
     def __init__(self):
         """
         Constructor
@@ -345,17 +282,146 @@ class Console:
         if self.timer:  # pragma: no cover
             self.timer.cancel()
 
-    def __process_lines(self, lines):
+    def __open_pidfd(self, pid):
         """
-        Remove end of line char for given lines and convert lines to unicode
+        Open file descriptor that becomes readable when process exits
 
         Args:
-            lines (list): list of lines
+            pid (int): process id
 
-        Results:
-            list: input list of lines with eol removed
+        Returns:
+            int: pidfd or None if not supported
         """
-        return [line.decode("utf-8").rstrip() for line in lines]
+        try:
+            return os.pidfd_open(pid)
+        except (AttributeError, OSError):  # pragma: no cover
+            return None
+
+    def __split_lines(self, buffer, line_callback, is_stderr, flush=False):
+        """
+        Extract complete lines from buffer
+
+        Args:
+            buffer (bytearray): output buffer. Extracted lines are removed from it
+            line_callback (function): function called for each line
+            is_stderr (bool): True if buffer contains stderr output
+            flush (bool): True to also extract last incomplete line
+
+        Returns:
+            list: list of lines with eol removed
+        """
+        raw_lines = buffer.split(b"\n")
+        remaining = b"" if flush else raw_lines.pop()
+        if flush and not raw_lines[-1]:
+            raw_lines.pop()
+        buffer[:] = remaining
+
+        lines = [line.decode("utf-8", errors="replace").rstrip() for line in raw_lines]
+        if line_callback:
+            for line in lines:
+                try:
+                    line_callback(None, line) if is_stderr else line_callback(line, None)
+                except Exception:
+                    self.logger.exception("Exception occured during command line callback:")
+
+        return lines
+
+    def __read_output(self, fd, buffer):
+        """
+        Read available data from non blocking output
+
+        Args:
+            fd (int): output file descriptor
+            buffer (bytearray): buffer to append data to
+
+        Returns:
+            bool: False if end of output is reached
+        """
+        while True:
+            try:
+                data = os.read(fd, self.READ_SIZE)
+            except BlockingIOError:
+                return True
+            except OSError:  # pragma: no cover
+                return False
+            if not data:
+                return False
+            buffer.extend(data)
+            if len(data) < self.READ_SIZE:
+                return True
+
+    def __wait_process(self, proc, timeout, line_callback):
+        """
+        Read process outputs while it is running and return as soon as it exits
+
+        Args:
+            proc (Popen): process
+            timeout (float): timeout (seconds)
+            line_callback (function): function called for each output line
+
+        Returns:
+            tuple: (finished (bool), stdout lines (list), stderr lines (list))
+        """
+        deadline = time.monotonic() + timeout
+        outputs = {
+            proc.stdout.fileno(): {"buffer": bytearray(), "lines": [], "stderr": False},
+            proc.stderr.fileno(): {"buffer": bytearray(), "lines": [], "stderr": True},
+        }
+        pidfd = self.__open_pidfd(proc.pid)
+        finished = False
+
+        try:
+            with selectors.DefaultSelector() as selector:
+                for fd in outputs:
+                    os.set_blocking(fd, False)
+                    selector.register(fd, selectors.EVENT_READ)
+                if pidfd is not None:
+                    selector.register(pidfd, selectors.EVENT_READ)
+
+                opened = len(outputs)
+                while not finished:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+
+                    if not opened:
+                        # all outputs closed, process is ending
+                        try:
+                            proc.wait(timeout=remaining)
+                            finished = True
+                        except subprocess.TimeoutExpired:
+                            pass
+                        break
+
+                    events = selector.select(remaining if pidfd is not None else min(remaining, self.POLL_DELAY))
+                    exited = False
+                    for key, _ in events:
+                        if key.fd == pidfd:
+                            exited = True
+                            continue
+                        output = outputs[key.fd]
+                        if not self.__read_output(key.fd, output["buffer"]):
+                            selector.unregister(key.fd)
+                            opened -= 1
+                        output["lines"].extend(self.__split_lines(output["buffer"], line_callback, output["stderr"]))
+
+                    if exited or (pidfd is None and proc.poll() is not None):
+                        # process exited, get outputs still available (children may keep them opened)
+                        for fd, output in outputs.items():
+                            if fd in selector.get_map():
+                                self.__read_output(fd, output["buffer"])
+                        proc.wait()
+                        finished = True
+
+                for output in outputs.values():
+                    output["lines"].extend(
+                        self.__split_lines(output["buffer"], line_callback, output["stderr"], flush=True)
+                    )
+        finally:
+            if pidfd is not None:
+                os.close(pidfd)
+
+        return finished, outputs[proc.stdout.fileno()]["lines"], outputs[proc.stderr.fileno()]["lines"]
 
     def get_last_return_code(self):
         """
@@ -369,12 +435,14 @@ class Console:
         """
         return self.last_return_code
 
-    def command(self, command, timeout=2.0, opts=DEFAULT_OPTS):
+    def command(self, command, timeout=2.0, opts=DEFAULT_OPTS, line_callback=None):
         """
         Execute specified command line with auto kill after timeout
 
         Note:
-            This function is blocking
+            This function is blocking. Outputs are read while command is running and function returns
+            as soon as command terminates. Number of processes running simultaneously is limited to
+            MAX_PROCESSES, command waits for a free slot (within timeout) before being launched.
 
         Args:
             command (string|list): command to execute. It is advised to use list version.
@@ -387,6 +455,10 @@ class Console:
                                 fill this option (default {}),
                 }
 
+            line_callback (function): function called for each output line while command is running (the function
+                                      will be called with 2 arguments: stdout (string) and stderr (string), one of them
+                                      being None)
+
         Returns:
             dict: result of command::
 
@@ -407,6 +479,42 @@ class Console:
         if timeout is None or timeout <= 0.0:
             raise Exception("Timeout is mandatory and must be greater than 0")
 
+        # wait for free process slot
+        start = time.monotonic()
+        if not Console.__processes.acquire(timeout=timeout):
+            self.logger.warning(
+                'Too many running processes, command "%s" was not launched', command
+            )
+            result = {
+                "returncode": None,
+                "error": False,
+                "killed": True,
+                "stdout": [],
+                "stderr": [],
+            }
+            if self.__callback:
+                self.__callback(result)
+            return result
+
+        try:
+            return self.__command(command, shell, timeout - (time.monotonic() - start), opts, line_callback)
+        finally:
+            Console.__processes.release()
+
+    def __command(self, command, shell, timeout, opts, line_callback):
+        """
+        Launch command and wait for its end
+
+        Args:
+            command (string|list): command to execute
+            shell (bool): True to execute command through shell
+            timeout (float): wait timeout before killing process
+            opts (dict): command options
+            line_callback (function): function called for each output line
+
+        Returns:
+            dict: result of command (see command function)
+        """
         # launch command
         proc = subprocess.Popen(
             command,
@@ -422,31 +530,13 @@ class Console:
         pid = proc.pid
 
         # wait for end of command line
-        done = False
-        start = time.time()
-        killed = False
+        finished, stdout, stderr = self.__wait_process(proc, max(timeout, 0.0), line_callback)
+        killed = not finished
         return_code = None
-        while not done:
-            # check if command has finished
-            proc.poll()
-            if proc.returncode is not None:
-                # command terminated
-                self.logger.trace(
-                    "Command terminated with returncode %s", proc.returncode
-                )
-                return_code = proc.returncode
-                self.last_return_code = return_code
-                done = True
-                break
-
-            # check timeout
-            if time.time() > (start + timeout):
-                # timeout is over, kill command
-                killed = True
-                break
-
-            # pause
-            sleep(0.125)
+        if finished:
+            self.logger.trace("Command terminated with returncode %s", proc.returncode)
+            return_code = proc.returncode
+            self.last_return_code = return_code
 
         # prepare result
         result = {
@@ -457,9 +547,9 @@ class Console:
             "stderr": [],
         }
         if not killed:
-            result["stderr"] = self.__process_lines(proc.stderr.readlines())
+            result["stderr"] = stderr
             result["error"] = len(result["stderr"]) > 0
-            result["stdout"] = self.__process_lines(proc.stdout.readlines())
+            result["stdout"] = stdout
         self.logger.trace("Result: %s" % result)
 
         # make sure all stds are closed
@@ -0,0 +1,445 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import logging
+import selectors
+from collections import deque
+from threading import Thread, Lock, Condition
+
+__all__ = ["ConsoleReactor", "ProcessWatch", "get_reactor"]
+
+
+class ProcessWatch:
+    """
+    Process watched by ConsoleReactor.
+
+    Output lines read by reactor are buffered until consumer gets them. Buffer is bounded: when it
+    is full, reactor stops reading process outputs (process is blocked when its pipes are full)
+    until consumer catches up.
+    """
+
+    def __init__(self, owner, proc, max_lines):
+        """
+        Constructor
+
+        Args:
+            owner (ConsoleReactor): reactor watching process
+            proc (Popen): watched process
+            max_lines (int): maximum number of buffered lines
+        """
+        self.owner = owner
+        self.proc = proc
+        self.max_lines = max_lines
+        self.returncode = None
+        self.cancelled = False
+
+        self.__lines = deque()
+        self.__condition = Condition()
+        self.__ended = False
+        self.__paused = False
+
+    def get(self):
+        """
+        Wait for next output line
+
+        Returns:
+            tuple: (stdout (string), stderr (string)) with one of them set to None, or None when process
+                   has ended (returncode is then available) or when watch is cancelled
+        """
+        with self.__condition:
+            while not self.__lines and not self.__ended:
+                self.__condition.wait()
+            if not self.__lines:
+                return None
+            line = self.__lines.popleft()
+            resume = self.__paused and len(self.__lines) <= self.max_lines // 2
+            if resume:
+                self.__paused = False
+
+        if resume:
+            self.owner.resume(self)
+        return line
+
+    def cancel(self):
+        """
+        Stop watching process. Process is not killed
+        """
+        self.owner.cancel(self)
+
+    def is_ended(self):
+        """
+        Return True if process has ended (or watch is cancelled) and all lines were consumed
+
+        Returns:
+            bool: True if ended
+        """
+        with self.__condition:
+            return self.__ended and not self.__lines
+
+    def _put(self, stdout, stderr):
+        """
+        Buffer output line
+
+        Returns:
+            bool: False if buffer is full and reactor must pause reading
+        """
+        with self.__condition:
+            self.__lines.append((stdout, stderr))
+            self.__condition.notify()
+            if len(self.__lines) >= self.max_lines:
+                self.__paused = True
+            return not self.__paused
+
+    def _end(self, returncode=None):
+        """
+        Flag process as ended
+        """
+        with self.__condition:
+            self.returncode = returncode
+            self.__ended = True
+            self.__condition.notify_all()
+
+
+class ConsoleReactor:
+    """
+    Read outputs of all watched processes from a single thread.
+
+    Process outputs and exits are multiplexed with a selector: lines are delivered as soon as they are
+    written and process exit is notified immediately (using pidfd, or by polling process status every
+    POLL_DELAY seconds if pidfd is not supported). Reactor thread is started with first watched process
+    and stops when no process is watched anymore.
+    """
+
+    MAX_LINES = 1000
+    MAX_LINE_SIZE = 65536
+    READ_SIZE = 65536
+    POLL_DELAY = 0.25
+
+    def __init__(self, name="consolereactor", max_lines=None):
+        """
+        Constructor
+
+        Args:
+            name (string): reactor name, used to name thread
+            max_lines (int): maximum number of buffered lines per process (default MAX_LINES)
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.name = name
+        self.max_lines = max_lines or self.MAX_LINES
+
+        self.__lock = Lock()
+        self.__thread = None
+        self.__wakeup = None
+        self.__requests = []
+        self.__watches_count = 0
+
+    def watch(self, proc):
+        """
+        Watch process outputs and exit
+
+        Args:
+            proc (Popen): process launched with stdout and stderr pipes
+
+        Returns:
+            ProcessWatch: process watch
+        """
+        watch = ProcessWatch(self, proc, self.max_lines)
+        with self.__lock:
+            self.__watches_count += 1
+        self.__request("watch", watch)
+        return watch
+
+    def cancel(self, watch):
+        """
+        Stop watching process
+
+        Args:
+            watch (ProcessWatch): process watch
+        """
+        self.__request("cancel", watch)
+
+    def resume(self, watch):
+        """
+        Resume reading outputs of paused process
+
+        Args:
+            watch (ProcessWatch): process watch
+        """
+        self.__request("resume", watch)
+
+    def get_watches_count(self):
+        """
+        Return number of watched processes
+
+        Returns:
+            int: number of watched processes
+        """
+        with self.__lock:
+            return self.__watches_count
+
+    def __request(self, action, watch):
+        """
+        Send request to reactor thread (selector is only updated by reactor thread)
+        """
+        thread = None
+        with self.__lock:
+            self.__requests.append((action, watch))
+            if self.__thread is None:
+                if action != "watch":
+                    self.__requests.pop()
+                    return
+                reader, self.__wakeup = os.pipe()
+                os.set_blocking(reader, False)
+                os.set_blocking(self.__wakeup, False)
+                self.__thread = thread = Thread(target=self.__run, args=(reader,), name=self.name, daemon=True)
+            else:
+                try:
+                    os.write(self.__wakeup, b"\0")
+                except BlockingIOError:  # pragma: no cover
+                    # reactor is already notified
+                    pass
+
+        # start thread outside lock: thread start may switch to the new thread
+        if thread:
+            thread.start()
+
+    def __run(self, wakeup):
+        """
+        Reactor loop
+
+        Args:
+            wakeup (int): read end of wakeup pipe
+        """
+        watches = {}
+        with selectors.DefaultSelector() as selector:
+            selector.register(wakeup, selectors.EVENT_READ)
+            try:
+                while True:
+                    with self.__lock:
+                        requests, self.__requests = self.__requests, []
+                        if not requests and not watches:
+                            os.close(self.__wakeup)
+                            self.__wakeup = None
+                            self.__thread = None
+                            break
+
+                    for action, watch in requests:
+                        if action == "watch":
+                            watches[watch] = self.__register(selector, watch)
+                        elif action == "cancel" and watch in watches:
+                            watch.cancelled = True
+                            self.__unregister(selector, watch, watches.pop(watch))
+                        elif action == "resume" and watch in watches:
+                            self.__register_outputs(selector, watch, watches[watch])
+
+                    timeout = None if all(state["pidfd"] is not None for state in watches.values()) else self.POLL_DELAY
+                    exited = set()
+                    for key, _ in selector.select(timeout):
+                        if key.fd == wakeup:
+                            self.__drain_wakeup(wakeup)
+                            continue
+                        watch, fd = key.data
+                        if watch not in watches:  # pragma: no cover
+                            continue
+                        if fd is None:
+                            exited.add(watch)
+                        else:
+                            self.__read(selector, watch, watches[watch], fd)
+
+                    for watch, state in watches.items():
+                        if state["pidfd"] is None and self.__is_exited(watch.proc):
+                            exited.add(watch)
+                    for watch in exited:
+                        self.__unregister(selector, watch, watches.pop(watch), ended=True)
+            except Exception:  # pragma: no cover
+                self.logger.exception("Console reactor failed")
+                with self.__lock:
+                    os.close(self.__wakeup)
+                    self.__wakeup = None
+                    self.__thread = None
+                    requests, self.__requests = self.__requests, []
+                for watch, state in watches.items():
+                    self.__unregister(selector, watch, state)
+                for action, watch in requests:
+                    if action == "watch":
+                        with self.__lock:
+                            self.__watches_count -= 1
+                        watch._end()
+            finally:
+                os.close(wakeup)
+
+    def __register(self, selector, watch):
+        """
+        Register process outputs and pidfd
+
+        Returns:
+            dict: watch state
+        """
+        state = {
+            "pidfd": None,
+            "outputs": {},
+            "registered": set(),
+        }
+        for output, is_stderr in ((watch.proc.stdout, False), (watch.proc.stderr, True)):
+            fd = output.fileno()
+            os.set_blocking(fd, False)
+            state["outputs"][fd] = {"buffer": bytearray(), "stderr": is_stderr, "opened": True}
+
+        try:
+            state["pidfd"] = os.pidfd_open(watch.proc.pid)
+            selector.register(state["pidfd"], selectors.EVENT_READ, (watch, None))
+        except (AttributeError, OSError):  # pragma: no cover
+            state["pidfd"] = None
+
+        self.__register_outputs(selector, watch, state)
+        return state
+
+    def __register_outputs(self, selector, watch, state):
+        """
+        Register opened process outputs (not already registered)
+        """
+        for fd, output in state["outputs"].items():
+            if output["opened"] and fd not in state["registered"]:
+                try:
+                    selector.register(fd, selectors.EVENT_READ, (watch, fd))
+                    state["registered"].add(fd)
+                except PermissionError:
+                    # output is a regular file that cannot be polled, it is always readable
+                    while output["opened"]:
+                        self.__read_output(fd, output)
+                        self.__send_lines(watch, output)
+
+    def __unregister_outputs(self, selector, state):
+        """
+        Unregister process outputs (process is paused or outputs are closed)
+        """
+        for fd in state["registered"]:
+            selector.unregister(fd)
+        state["registered"].clear()
+
+    def __unregister(self, selector, watch, state, ended=False):
+        """
+        Stop watching process. Remaining outputs are read if process has ended
+        """
+        if ended:
+            for fd, output in state["outputs"].items():
+                if output["opened"]:
+                    self.__read_output(fd, output)
+                self.__send_lines(watch, output, flush=True)
+
+        self.__unregister_outputs(selector, state)
+        if state["pidfd"] is not None:
+            selector.unregister(state["pidfd"])
+            os.close(state["pidfd"])
+
+        returncode = None
+        if ended:
+            try:
+                watch.proc.wait(timeout=1.0)
+                returncode = watch.proc.returncode
+            except Exception:  # pragma: no cover
+                self.logger.exception("Unable to get return code of process %s", watch.proc.pid)
+        with self.__lock:
+            self.__watches_count -= 1
+        watch._end(returncode)
+
+    def __read(self, selector, watch, state, fd):
+        """
+        Read available process output and send lines. Output is unregistered when closed and all
+        process outputs are unregistered (paused) when watch buffer is full
+        """
+        output = state["outputs"][fd]
+        self.__read_output(fd, output)
+        accepted = self.__send_lines(watch, output)
+        if not output["opened"] and fd in state["registered"]:
+            selector.unregister(fd)
+            state["registered"].discard(fd)
+        if not accepted:
+            self.__unregister_outputs(selector, state)
+
+    def __read_output(self, fd, output):
+        """
+        Read available data from non blocking output
+        """
+        while output["opened"]:
+            try:
+                data = os.read(fd, self.READ_SIZE)
+            except BlockingIOError:
+                return
+            except OSError:  # pragma: no cover
+                data = b""
+            if not data:
+                output["opened"] = False
+                return
+            output["buffer"].extend(data)
+            if len(data) < self.READ_SIZE or len(output["buffer"]) >= self.MAX_LINE_SIZE:
+                return
+
+    def __send_lines(self, watch, output, flush=False):
+        """
+        Send complete lines to watch. Too long lines are split
+
+        Returns:
+            bool: False if watch buffer is full
+        """
+        buffer = output["buffer"]
+        flush = flush or not output["opened"]
+        accepted = True
+        start = 0
+        while True:
+            end = buffer.find(b"\n", start)
+            if end >= 0:
+                next_start = end + 1
+            elif len(buffer) - start >= self.MAX_LINE_SIZE:
+                end = next_start = start + self.MAX_LINE_SIZE
+            elif flush and start < len(buffer):
+                end = next_start = len(buffer)
+            else:
+                break
+            line = buffer[start:end].decode("utf-8", errors="replace").rstrip()
+            start = next_start
+            if output["stderr"]:
+                accepted = watch._put(None, line) and accepted
+            else:
+                accepted = watch._put(line, None) and accepted
+        del buffer[:start]
+        return accepted
+
+    def __is_exited(self, proc):
+        """
+        Check process status
+
+        Returns:
+            bool: True if process has exited
+        """
+        proc.poll()
+        return proc.returncode is not None
+
+    def __drain_wakeup(self, wakeup):
+        """
+        Empty wakeup pipe
+        """
+        try:
+            while os.read(wakeup, 1024):
+                pass
+        except BlockingIOError:
+            pass
+
+
+_reactor = None
+_reactor_lock = Lock()
+
+
+def get_reactor():
+    """
+    Return reactor shared by all endless consoles
+
+    Returns:
+        ConsoleReactor: shared reactor instance
+    """
+    global _reactor
+    with _reactor_lock:
+        if _reactor is None:
+            _reactor = ConsoleReactor()
+        return _reactor
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import logging
+
+
+class DeviceRegistry:
+    """
+    Devices registry with primary key on device uuid and optional secondary indexes on device fields
+
+    Secondary indexes map field value to uuids of devices having this value. They are kept in sync when
+    devices are added, updated or deleted so lookups on indexed fields do not scan all devices. Lookups on
+    fields that are not indexed (or with unhashable values) fall back to a scan.
+    """
+
+    def __init__(self, indexes=None):
+        """
+        Constructor
+
+        Args:
+            indexes (list): device fields to index
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.__devices = {}
+        self.__indexes = {field: {} for field in (indexes or [])}
+        self.source = None
+
+    def __is_hashable(self, value):
+        """
+        Check if value can be used as index key
+
+        Args:
+            value (any): value to check
+
+        Returns:
+            bool: True if value is hashable
+        """
+        try:
+            hash(value)
+            return True
+        except TypeError:
+            return False
+
+    def __index(self, device):
+        """
+        Add device to secondary indexes
+
+        Args:
+            device (dict): device data
+        """
+        for field, index in self.__indexes.items():
+            if field in device and self.__is_hashable(device[field]):
+                index.setdefault(device[field], {})[device["uuid"]] = True
+
+    def __unindex(self, device):
+        """
+        Remove device from secondary indexes
+
+        Args:
+            device (dict): device data
+        """
+        for field, index in self.__indexes.items():
+            if field not in device or not self.__is_hashable(device[field]):
+                continue
+            uuids = index.get(device[field], {})
+            uuids.pop(device["uuid"], None)
+            if not uuids:
+                index.pop(device[field], None)
+
+    def get_indexes(self):
+        """
+        Return indexed fields
+
+        Returns:
+            list: indexed device fields
+        """
+        return list(self.__indexes.keys())
+
+    def load(self, devices, source=None):
+        """
+        Load devices, replacing existing ones
+
+        Args:
+            devices (dict): devices by uuid
+            source (any): object devices were loaded from, useful to detect registry is outdated
+        """
+        self.__devices = {}
+        for index in self.__indexes.values():
+            index.clear()
+        for device_uuid, device in devices.items():
+            self.__devices[device_uuid] = device
+            self.__index(device)
+        self.source = source
+
+    def set(self, device):
+        """
+        Add or replace device
+
+        Args:
+            device (dict): device data. It must contains "uuid" field
+        """
+        previous = self.__devices.get(device["uuid"])
+        if previous is not None:
+            self.__unindex(previous)
+        self.__devices[device["uuid"]] = device
+        self.__index(device)
+
+    def delete(self, device_uuid):
+        """
+        Delete device
+
+        Args:
+            device_uuid (str): device uuid
+
+        Returns:
+            dict: deleted device or None if device does not exist
+        """
+        device = self.__devices.pop(device_uuid, None)
+        if device is not None:
+            self.__unindex(device)
+        return device
+
+    def get(self, device_uuid):
+        """
+        Return device
+
+        Args:
+            device_uuid (str): device uuid
+
+        Returns:
+            dict: device data or None if device does not exist
+        """
+        return self.__devices.get(device_uuid)
+
+    def search(self, key, value):
+        """
+        Return devices which key field has specified value
+
+        Args:
+            key (str): device field
+            value (any): field value
+
+        Returns:
+            list: matching devices
+        """
+        if key in self.__indexes and self.__is_hashable(value):
+            return [self.__devices[device_uuid] for device_uuid in self.__indexes[key].get(value, {})]
+
+        return [
+            device
+            for device in self.__devices.values()
+            if key in device and device[key] == value
+        ]
+
+    def count(self):
+        """
+        Return number of devices
+
+        Returns:
+            int: number of devices
+        """
+        return len(self.__devices)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import copy
+
+__all__ = ["FrozenDict", "FrozenList", "freeze"]
+
+
+def _read_only(*args, **kwargs):
+    """
+    Replacement of mutating methods
+
+    Raises:
+        TypeError: always
+    """
+    raise TypeError("Config snapshot is read-only, use a copy to modify it")
+
+
+class FrozenDict(dict):
+    """
+    Read-only dict
+
+    It is a dict subclass so it can be used everywhere a dict is expected (json serialization, isinstance
+    checks...) but all mutating methods raise TypeError. Copying it returns a regular mutable dict.
+    """
+
+    __setitem__ = _read_only
+    __delitem__ = _read_only
+    __ior__ = _read_only
+    clear = _read_only
+    pop = _read_only
+    popitem = _read_only
+    setdefault = _read_only
+    update = _read_only
+
+    def __copy__(self):
+        return dict(self)
+
+    def copy(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return {key: copy.deepcopy(value, memo) for key, value in self.items()}
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
+class FrozenList(list):
+    """
+    Read-only list
+
+    All mutating methods raise TypeError. Copying it returns a regular mutable list.
+    """
+
+    __setitem__ = _read_only
+    __delitem__ = _read_only
+    __iadd__ = _read_only
+    __imul__ = _read_only
+    append = _read_only
+    extend = _read_only
+    insert = _read_only
+    pop = _read_only
+    remove = _read_only
+    clear = _read_only
+    sort = _read_only
+    reverse = _read_only
+
+    def __copy__(self):
+        return list(self)
+
+    def copy(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return [copy.deepcopy(value, memo) for value in self]
+
+    def __reduce__(self):
+        return (list, (list(self),))
+
+
+def freeze(value):
+    """
+    Return read-only version of specified value
+
+    Dicts and lists are recursively converted to FrozenDict and FrozenList. Already frozen values are returned
+    as is, so freezing a new version of a snapshot only converts changed values.
+
+    Args:
+        value (any): value to freeze
+
+    Returns:
+        any: frozen value
+    """
+    if isinstance(value, (FrozenDict, FrozenList)):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(item) for item in value)
+    if isinstance(value, tuple):
+        return tuple(freeze(item) for item in value)
+    return value
@@ -93,7 +93,9 @@ class InstallDeb:
 
         # update status
         if killed:
-            self.status = self.STATUS_KILLED
+            # keep timeout status set by watchdog
+            if self.status != self.STATUS_TIMEOUT:
+                self.status = self.STATUS_KILLED
         elif return_code != 0:
             self.status = self.STATUS_ERROR
         else:
@@ -178,9 +180,9 @@ class InstallDeb:
                     self.get_status(),
                 )
                 error = True
+                self.status = self.STATUS_TIMEOUT
                 self._console.kill()
                 self.running = False
-                self.status = self.STATUS_TIMEOUT
 
             sleep(0.25)
 
@@ -249,9 +251,9 @@ class InstallDeb:
                         self.get_status(),
                     )
                     error = True
+                    self.status = self.STATUS_TIMEOUT
                     self._console.kill()
                     self.running = False
-                    self.status = self.STATUS_TIMEOUT
 
                 sleep(0.25)
 
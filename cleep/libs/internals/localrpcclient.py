@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import socket
+from http.client import HTTPConnection
+from urllib.parse import urlencode
+
+
+class UnixSocketHTTPConnection(HTTPConnection):
+    """
+    HTTP connection over unix domain socket
+    """
+
+    def __init__(self, socket_path, timeout=None):
+        """
+        Constructor
+
+        Args:
+            socket_path (str): unix socket path
+            timeout (float): socket timeout
+        """
+        HTTPConnection.__init__(self, "localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        """
+        Connect to unix socket
+        """
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class LocalRpcClient:
+    """
+    Client for Cleep RPC server unix socket listener.
+
+    It is intended to be used by local tools and processes running on the device to request Cleep without
+    going through network stack.
+    """
+
+    DEFAULT_TIMEOUT = 30.0
+
+    def __init__(self, socket_path, timeout=DEFAULT_TIMEOUT):
+        """
+        Constructor
+
+        Args:
+            socket_path (str): RPC server unix socket path
+            timeout (float): request timeout
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def __request(self, method, path, body=None, headers=None):
+        """
+        Perform request
+
+        Args:
+            method (str): HTTP method
+            path (str): request path
+            body (str): request body
+            headers (dict): request headers
+
+        Returns:
+            tuple: response status and body::
+
+                (
+                    int: response status
+                    bytes: response body
+                )
+
+        """
+        connection = UnixSocketHTTPConnection(self.socket_path, self.timeout)
+        try:
+            connection.request(method, path, body=body, headers=headers or {})
+            response = connection.getresponse()
+            content = response.read()
+            self.logger.debug("%s %s: status=%s", method, path, response.status)
+            return response.status, content
+        finally:
+            connection.close()
+
+    def __decode(self, status, content):
+        """
+        Decode json response
+
+        Raises:
+            Exception: if response is not a valid json
+        """
+        try:
+            return json.loads(content)
+        except Exception as error:
+            raise Exception(f"Invalid response from RPC server (status {status})") from error
+
+    def get(self, path, params=None):
+        """
+        Perform GET request on RPC server
+
+        Args:
+            path (str): route path (ie "/doc/system")
+            params (dict): query string parameters
+
+        Returns:
+            any: decoded json response
+        """
+        if params:
+            path = f"{path}?{urlencode(params)}"
+        return self.__decode(*self.__request("GET", path))
+
+    def post(self, path, data=None):
+        """
+        Perform POST request on RPC server
+
+        Args:
+            path (str): route path (ie "/command")
+            data (dict): json payload
+
+        Returns:
+            any: decoded json response
+        """
+        body = json.dumps(data or {})
+        headers = {"Content-Type": "application/json"}
+        return self.__decode(*self.__request("POST", path, body, headers))
+
+    def command(self, command, to, params=None, timeout=None):
+        """
+        Send command to specified application
+
+        Args:
+            command (str): command name
+            to (str): command recipient
+            params (dict): command parameters
+            timeout (float): command timeout
+
+        Returns:
+            dict: MessageResponse as dict
+        """
+        data = {
+            "command": command,
+            "to": to,
+            "params": params or {},
+        }
+        if timeout is not None:
+            data["timeout"] = timeout
+        return self.post("/command", data)
@@ -0,0 +1,371 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+import re
+import time
+from threading import Lock
+from cleep.libs.internals.tools import TRACE
+
+
+class LogReader:
+    """
+    Cleep log file reader
+
+    Reads log file from its end (tail) or from a byte offset without loading the whole file in memory.
+    Lines can be filtered by minimum log level and by logger name. Lines that do not start a log record
+    (like exception tracebacks) are attached to the previous record.
+
+    Follow mode is a long poll: each follower holds one RPC server worker until new lines are available or
+    timeout is reached, so concurrent followers are limited to MAX_FOLLOWERS.
+    """
+
+    BLOCK_SIZE = 8192
+    MAX_BYTES = 65536
+    MAX_TAIL_LINES = 5000
+    MAX_CONTINUATION_LINES = 200
+    MAX_LINE_SIZE = 16384
+    FOLLOW_POLL_DURATION = 0.5
+    MAX_FOLLOWERS = 2
+    LEVELS = {
+        "TRACE": TRACE,
+        "DEBUG": logging.DEBUG,
+        "INFO": logging.INFO,
+        "WARN": logging.WARNING,
+        "WARNING": logging.WARNING,
+        "ERROR": logging.ERROR,
+        "CRITICAL": logging.CRITICAL,
+        "FATAL": logging.FATAL,
+    }
+    # matches "%(asctime)s %(name)-12s[%(filename)s:%(lineno)d] %(levelname)-5s : %(message)s" format
+    RECORD_PATTERN = re.compile(
+        r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3} (?P<name>.+?)\s*\[[^\]]*\] (?P<level>[A-Z]+)\s* : "
+    )
+
+    def __init__(self, log_file):
+        """
+        Constructor
+
+        Args:
+            log_file (str): log file path
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.log_file = log_file
+        self.__followers = 0
+        self.__followers_lock = Lock()
+
+    def __get_positive_int(self, value, name):
+        """
+        Convert parameter value to positive integer
+
+        Args:
+            value (any): parameter value
+            name (str): parameter name
+
+        Returns:
+            int: converted value
+
+        Raises:
+            ValueError: if value is not a positive integer
+        """
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f'Parameter "{name}" must be an integer') from None
+        if value < 0:
+            raise ValueError(f'Parameter "{name}" must be positive')
+        return value
+
+    def __get_level(self, level):
+        """
+        Convert level to its numeric value
+
+        Args:
+            level (str|int): level name or value
+
+        Returns:
+            int: level value or None if level is not specified
+
+        Raises:
+            ValueError: if level is invalid
+        """
+        if level is None or level == "":
+            return None
+        if isinstance(level, int):
+            return level
+        if str(level).isdigit():
+            return int(level)
+        if str(level).upper() not in self.LEVELS:
+            raise ValueError(f'Invalid log level "{level}"')
+        return self.LEVELS[str(level).upper()]
+
+    def __parse_record(self, line):
+        """
+        Parse record header line
+
+        Args:
+            line (str): log line
+
+        Returns:
+            tuple: (logger name, level value) or None if line is not a record header
+        """
+        match = self.RECORD_PATTERN.match(line)
+        if not match:
+            return None
+        return (match.group("name"), self.LEVELS.get(match.group("level"), logging.NOTSET))
+
+    def __match_record(self, record, level, logger_name):
+        """
+        Check if record matches filters
+
+        Args:
+            record (tuple): parsed record (see __parse_record). None for lines without record header
+            level (int): minimum level
+            logger_name (str): logger name
+
+        Returns:
+            bool: True if record matches filters
+        """
+        if level is None and not logger_name:
+            return True
+        if record is None:
+            return False
+        if level is not None and record[1] < level:
+            return False
+        if logger_name and record[0] != logger_name:
+            return False
+        return True
+
+    def __decode(self, line):
+        """
+        Decode file line
+
+        Args:
+            line (bytes): raw line
+
+        Returns:
+            str: decoded line
+        """
+        return line.decode("utf-8", errors="replace")
+
+    def __reversed_lines(self, fd, end):
+        """
+        Iterate over file lines from specified position to beginning of file. Lines longer than
+        MAX_LINE_SIZE are truncated (only their beginning is kept)
+
+        Args:
+            fd (file): file descriptor opened in binary mode
+            end (int): position to read from
+
+        Yields:
+            bytes: line (with its trailing new line)
+        """
+        position = end
+        remaining = b""
+        while position > 0:
+            size = min(self.BLOCK_SIZE, position)
+            position -= size
+            fd.seek(position)
+            block = fd.read(size) + remaining
+            lines = block.splitlines(keepends=True)
+            # first line may be incomplete, keep it for next block
+            remaining = lines.pop(0) if lines else b""
+            # beginning of line may not be found yet: keep only its first bytes to bound memory usage
+            remaining = self.__truncate_line(remaining)
+            for line in reversed(lines):
+                yield self.__truncate_line(line)
+        if remaining:
+            yield remaining
+
+    def __truncate_line(self, line):
+        """
+        Truncate line longer than MAX_LINE_SIZE, keeping its trailing new line
+
+        Args:
+            line (bytes): line
+
+        Returns:
+            bytes: truncated line
+        """
+        if len(line) <= self.MAX_LINE_SIZE:
+            return line
+        ending = b"\n" if line.endswith(b"\n") else b""
+        return line[: self.MAX_LINE_SIZE - len(ending)] + ending
+
+    def __build_result(self, lines, offset, size):
+        """
+        Build result dict
+
+        Returns:
+            dict: read result::
+
+                {
+                    lines (list): list of lines
+                    offset (int): offset to use to read next lines
+                    size (int): current file size
+                }
+
+        """
+        return {
+            "lines": lines,
+            "offset": offset,
+            "size": size,
+        }
+
+    def tail(self, count=100, level=None, logger_name=None):
+        """
+        Return last lines of log file
+
+        Args:
+            count (int): number of lines to return (capped to MAX_TAIL_LINES). When filters are specified, oldest
+                returned record is truncated by its end so its header line is always returned
+            level (str|int): minimum level of returned records (default all)
+            logger_name (str): return only records of specified logger (default all)
+
+        Returns:
+            dict: read result (see read function)
+
+        Raises:
+            ValueError: if parameters are invalid
+        """
+        count = min(self.__get_positive_int(count, "count"), self.MAX_TAIL_LINES)
+        level = self.__get_level(level)
+        filtered = level is not None or bool(logger_name)
+        if not os.path.exists(self.log_file):
+            return self.__build_result([], 0, 0)
+
+        selected = []
+        with open(self.log_file, "rb") as fd:
+            size = fd.seek(0, os.SEEK_END)
+            # continuation lines are read before their record header, keep them until header is found
+            continuation = []
+            for raw_line in self.__reversed_lines(fd, size):
+                if len(selected) >= count:
+                    break
+                line = self.__decode(raw_line)
+                if not filtered:
+                    selected.append(line)
+                    continue
+
+                record = self.__parse_record(line)
+                if record is None:
+                    if len(continuation) < self.MAX_CONTINUATION_LINES:
+                        continuation.append(line)
+                    continue
+
+                if self.__match_record(record, level, logger_name):
+                    # truncate record by its end to always return the header that matched filters
+                    remaining = count - len(selected)
+                    if len(continuation) >= remaining:
+                        continuation = continuation[len(continuation) - remaining + 1:]
+                    selected.extend(continuation)
+                    selected.append(line)
+                continuation = []
+
+        selected.reverse()
+        return self.__build_result(selected, size, size)
+
+    def read(self, offset=0, level=None, logger_name=None, max_bytes=None):
+        """
+        Read log file lines from specified offset
+
+        Only full lines are returned, remaining content will be returned on next call using returned offset.
+        If offset is greater than file size (log file rotated), file is read from beginning.
+
+        Args:
+            offset (int): byte offset to read from
+            level (str|int): minimum level of returned records (default all)
+            logger_name (str): return only records of specified logger (default all)
+            max_bytes (int): maximum number of bytes to read (default MAX_BYTES)
+
+        Returns:
+            dict: read result::
+
+                {
+                    lines (list): list of lines
+                    offset (int): offset to use to read next lines
+                    size (int): current file size
+                }
+
+        Raises:
+            ValueError: if parameters are invalid
+        """
+        offset = self.__get_positive_int(offset, "offset")
+        max_bytes = min(self.__get_positive_int(max_bytes or self.MAX_BYTES, "max_bytes"), self.MAX_BYTES)
+        level = self.__get_level(level)
+        if not os.path.exists(self.log_file):
+            return self.__build_result([], 0, 0)
+
+        with open(self.log_file, "rb") as fd:
+            size = fd.seek(0, os.SEEK_END)
+            if offset > size:
+                self.logger.debug("Log file seems rotated, read it from beginning")
+                offset = 0
+            fd.seek(offset)
+            data = fd.read(max_bytes)
+
+        # drop incomplete last line unless it fills the whole buffer
+        last_new_line = data.rfind(b"\n")
+        if last_new_line >= 0:
+            data = data[: last_new_line + 1]
+        elif len(data) < max_bytes:
+            data = b""
+
+        lines = []
+        matched = False
+        for raw_line in data.splitlines(keepends=True):
+            line = self.__decode(raw_line)
+            record = self.__parse_record(line)
+            if record is not None:
+                matched = self.__match_record(record, level, logger_name)
+            elif not lines and not matched:
+                # orphan continuation lines at beginning of chunk
+                matched = self.__match_record(None, level, logger_name)
+            if matched:
+                lines.append(line)
+
+        return self.__build_result(lines, offset + len(data), size)
+
+    def follow(self, offset, timeout=60.0, level=None, logger_name=None, max_bytes=None):
+        """
+        Wait for new lines after specified offset and return them
+
+        Args:
+            offset (int): byte offset to read from (usually offset returned by previous tail or read call)
+            timeout (float): maximum time to wait for new lines (in seconds)
+            level (str|int): minimum level of returned records (default all)
+            logger_name (str): return only records of specified logger (default all)
+            max_bytes (int): maximum number of bytes to read (default MAX_BYTES)
+
+        Returns:
+            dict: read result (see read function). Lines are empty if timeout is reached
+
+        Raises:
+            ValueError: if parameters are invalid
+            Exception: if too many followers are already waiting
+        """
+        offset = self.__get_positive_int(offset, "offset")
+        if max_bytes:
+            self.__get_positive_int(max_bytes, "max_bytes")
+        level = self.__get_level(level)
+
+        with self.__followers_lock:
+            if self.__followers >= self.MAX_FOLLOWERS:
+                raise Exception("Too many log followers, retry later")
+            self.__followers += 1
+
+        try:
+            end_time = time.time() + float(timeout)
+            while True:
+                size = os.path.getsize(self.log_file) if os.path.exists(self.log_file) else 0
+                if size != offset:
+                    result = self.read(offset, level=level, logger_name=logger_name, max_bytes=max_bytes)
+                    if result["lines"] or result["offset"] != offset:
+                        return result
+                if time.time() >= end_time:
+                    return self.__build_result([], offset, size)
+                time.sleep(self.FOLLOW_POLL_DURATION)
+        finally:
+            with self.__followers_lock:
+                self.__followers -= 1
@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import errno
+import logging
+import os
+import socket
+import struct
+
+__all__ = ["Nl80211"]
+
+
+class Nl80211:
+    """
+    Minimal nl80211 client (generic netlink) returning wireless interfaces and their associated
+    network in-process, like "iw dev" does, without spawning any command.
+    """
+
+    NETLINK_GENERIC = 16
+    GENL_ID_CTRL = 0x10
+    CTRL_CMD_GETFAMILY = 3
+    CTRL_ATTR_FAMILY_ID = 1
+    CTRL_ATTR_FAMILY_NAME = 2
+    NL80211_CMD_GET_INTERFACE = 5
+    NL80211_ATTR_WIPHY = 1
+    NL80211_ATTR_IFNAME = 4
+    NL80211_ATTR_IFTYPE = 5
+    NL80211_ATTR_SSID = 52
+
+    NLM_F_REQUEST = 0x1
+    NLM_F_DUMP = 0x300
+    NLMSG_ERROR = 2
+    NLMSG_DONE = 3
+    NLA_TYPE_MASK = 0x3FFF
+
+    NLMSG_HEADER = struct.Struct("=IHHII")
+    GENL_HEADER = struct.Struct("=BBH")
+    NLA_HEADER = struct.Struct("=HH")
+
+    TIMEOUT = 1.0
+    RECV_SIZE = 65536
+
+    def __init__(self, timeout=None):
+        """
+        Constructor
+
+        Args:
+            timeout (float): netlink requests timeout (default TIMEOUT)
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.timeout = timeout or self.TIMEOUT
+        self.__seq = 0
+
+    def get_interfaces(self):
+        """
+        Return wireless interfaces
+
+        Returns:
+            dict: wireless interfaces by name (empty if nl80211 is not loaded)::
+
+                {
+                    interface (string): {
+                        interface (string): interface name,
+                        wiphy (int): physical device index,
+                        type (int): interface type (nl80211_iftype),
+                        network (string): associated network or None if not associated
+                    },
+                    ...
+                }
+
+        Raises:
+            OSError: if netlink request failed
+        """
+        with socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, self.NETLINK_GENERIC) as sock:
+            sock.settimeout(self.timeout)
+            sock.bind((0, 0))
+
+            family_id = self.__get_family_id(sock, "nl80211")
+            if family_id is None:
+                self.logger.debug("nl80211 is not available, no wireless interface")
+                return {}
+
+            interfaces = {}
+            for attributes in self.__request(sock, family_id, self.NL80211_CMD_GET_INTERFACE, 0, dump=True):
+                if self.NL80211_ATTR_IFNAME not in attributes:
+                    continue
+                name = self.__get_string(attributes[self.NL80211_ATTR_IFNAME])
+                ssid = attributes.get(self.NL80211_ATTR_SSID)
+                interfaces[name] = {
+                    "interface": name,
+                    "wiphy": self.__get_u32(attributes.get(self.NL80211_ATTR_WIPHY)),
+                    "type": self.__get_u32(attributes.get(self.NL80211_ATTR_IFTYPE)),
+                    "network": ssid.decode("utf-8", errors="replace") if ssid else None,
+                }
+
+        return interfaces
+
+    def __get_family_id(self, sock, name):
+        """
+        Resolve generic netlink family id
+
+        Returns:
+            int: family id or None if family is not registered
+        """
+        try:
+            replies = list(
+                self.__request(
+                    sock,
+                    self.GENL_ID_CTRL,
+                    self.CTRL_CMD_GETFAMILY,
+                    1,
+                    {self.CTRL_ATTR_FAMILY_NAME: name.encode("utf-8") + b"\0"},
+                )
+            )
+        except OSError as error:
+            if error.errno == errno.ENOENT:
+                return None
+            raise
+
+        for attributes in replies:
+            if self.CTRL_ATTR_FAMILY_ID in attributes:
+                return struct.unpack_from("=H", attributes[self.CTRL_ATTR_FAMILY_ID])[0]
+        return None
+
+    def __request(self, sock, msg_type, cmd, version, attributes=None, dump=False):
+        """
+        Send generic netlink request and return replies attributes
+
+        Returns:
+            generator: attributes (dict) of each reply
+
+        Raises:
+            OSError: if kernel returned an error
+        """
+        self.__seq += 1
+        seq = self.__seq
+        payload = self.GENL_HEADER.pack(cmd, version, 0)
+        for attr_type, value in (attributes or {}).items():
+            payload += self.__pack_attribute(attr_type, value)
+        flags = self.NLM_F_REQUEST | (self.NLM_F_DUMP if dump else 0)
+        sock.send(self.NLMSG_HEADER.pack(self.NLMSG_HEADER.size + len(payload), msg_type, flags, seq, 0) + payload)
+
+        while True:
+            data = sock.recv(self.RECV_SIZE)
+            offset = 0
+            while offset + self.NLMSG_HEADER.size <= len(data):
+                length, reply_type, _, reply_seq, _ = self.NLMSG_HEADER.unpack_from(data, offset)
+                if length < self.NLMSG_HEADER.size:
+                    raise OSError(errno.EBADMSG, "Invalid netlink message")
+                message = data[offset + self.NLMSG_HEADER.size : offset + length]
+                offset += (length + 3) & ~3
+                if reply_seq != seq:
+                    continue
+
+                if reply_type == self.NLMSG_DONE:
+                    return
+                if reply_type == self.NLMSG_ERROR:
+                    error = struct.unpack_from("=i", message)[0]
+                    if error:
+                        raise OSError(-error, os.strerror(-error))
+                    return
+                yield self.__parse_attributes(message[self.GENL_HEADER.size :])
+                if not dump:
+                    return
+
+    def __pack_attribute(self, attr_type, value):
+        """
+        Pack netlink attribute (padded to 4 bytes)
+        """
+        length = self.NLA_HEADER.size + len(value)
+        return self.NLA_HEADER.pack(length, attr_type) + value + b"\0" * (((length + 3) & ~3) - length)
+
+    def __parse_attributes(self, data):
+        """
+        Parse netlink attributes
+
+        Returns:
+            dict: attributes values (bytes) by type
+        """
+        attributes = {}
+        offset = 0
+        while offset + self.NLA_HEADER.size <= len(data):
+            length, attr_type = self.NLA_HEADER.unpack_from(data, offset)
+            if length < self.NLA_HEADER.size:
+                break
+            attributes[attr_type & self.NLA_TYPE_MASK] = data[offset + self.NLA_HEADER.size : offset + length]
+            offset += (length + 3) & ~3
+        return attributes
+
+    def __get_string(self, value):
+        """
+        Decode null terminated string attribute
+        """
+        return value.split(b"\0", 1)[0].decode("utf-8", errors="replace")
+
+    def __get_u32(self, value):
+        """
+        Decode u32 attribute
+        """
+        return struct.unpack_from("=I", value)[0] if value and len(value) >= 4 else None
@@ -2,10 +2,11 @@
 # -*- coding: utf-8 -*-
 
 from cleep.libs.internals.console import Console
+import ctypes
 import logging
 import os
+import time
 import traceback
-from subprocess import Popen, PIPE
 
 
 class ReadWriteContext:
@@ -46,6 +47,25 @@ class ReadWrite:
 
     CLEEP_DIR = "/tmp/cleep"
 
+    MOUNTINFO_PATH = "/proc/self/mountinfo"
+    FD_DIR = "/proc/self/fd"
+    FDINFO_DIR = "/proc/self/fdinfo"
+    # mountinfo content is cached during this time (seconds). Cache is invalidated on each remount
+    MOUNTINFO_CACHE_TTL = 1.0
+
+    # mount(2) flags (from linux/mount.h)
+    MS_RDONLY = 1
+    MS_REMOUNT = 32
+    MOUNT_FLAGS = {
+        "nosuid": 2,
+        "nodev": 4,
+        "noexec": 8,
+        "noatime": 1024,
+        "nodiratime": 2048,
+        "relatime": 2097152,
+        "strictatime": 16777216,
+    }
+
     def __init__(self):
         """
         Constructor
@@ -55,6 +75,30 @@ class ReadWrite:
         # self.logger.setLevel(logging.DEBUG)
         self.status = {}
         self.crash_report = None
+        self.__mountinfo = None
+        self.__mountinfo_timestamp = 0
+        self.libc = self.__load_libc()
+
+    def __load_libc(self):
+        """
+        Load libc to perform remount syscall
+
+        Returns:
+            CDLL: libc instance or None if not available (remount will be performed using mount command)
+        """
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            libc.mount.argtypes = (
+                ctypes.c_char_p,
+                ctypes.c_char_p,
+                ctypes.c_char_p,
+                ctypes.c_ulong,
+                ctypes.c_void_p,
+            )
+            return libc
+        except Exception:
+            self.logger.debug("Mount syscall is not available, mount command will be used")
+            return None
 
     def set_crash_report(self, crash_report):
         """
@@ -68,14 +112,39 @@ class ReadWrite:
     def __get_opened_files_for_writing(self):
         """
         Return opened files for writing for current program
+
+        Returns:
+            list: list of opened files for writing ("<fd> <path>")
         """
-        cmd = '/usr/bin/lsof -p %s | grep -e "[[:digit:]]\+w"' % os.getpid()
-        return [
-            line.decode("utf-8").replace("\n", "")
-            for line in Popen(
-                cmd, shell=True, stdout=PIPE
-            ).stdout.readlines()
-        ]
+        files = []
+        try:
+            fds = os.listdir(self.FD_DIR)
+        except OSError:
+            self.logger.exception("Unable to list opened files")
+            return files
+
+        for fd in sorted(fds, key=lambda fd: int(fd) if fd.isdigit() else -1):
+            try:
+                path = os.readlink(os.path.join(self.FD_DIR, fd))
+                if not path.startswith("/"):
+                    # pipe, socket, anon inode...
+                    continue
+                with open(os.path.join(self.FDINFO_DIR, fd)) as fdinfo:
+                    flags = next(
+                        (
+                            int(line.split()[1], 8)
+                            for line in fdinfo
+                            if line.startswith("flags:")
+                        ),
+                        0,
+                    )
+                if flags & (os.O_WRONLY | os.O_RDWR):
+                    files.append("%s %s" % (fd, path))
+            except (OSError, ValueError, IndexError):
+                # fd closed meanwhile
+                continue
+
+        return files
 
     def is_path_on_root(self, path):
         """
@@ -94,6 +163,58 @@ class ReadWrite:
             and path.startswith(self.PARTITION_ROOT)
         )
 
+    def __read_mountinfo(self):
+        """
+        Read and parse mountinfo file. Content is cached during MOUNTINFO_CACHE_TTL seconds or until next remount
+
+        Returns:
+            dict: mount options by mount point, None if mountinfo is not readable::
+
+                {
+                    mountpoint (str): {
+                        options (list): per mount options
+                        super_options (list): superblock options
+                    },
+                    ...
+                }
+
+        """
+        now = time.monotonic()
+        if self.__mountinfo is not None and now - self.__mountinfo_timestamp < self.MOUNTINFO_CACHE_TTL:
+            return self.__mountinfo
+
+        try:
+            with open(self.MOUNTINFO_PATH) as mountinfo_file:
+                lines = mountinfo_file.readlines()
+        except OSError:
+            self.logger.exception('Unable to read "%s"' % self.MOUNTINFO_PATH)
+            return None
+
+        # line format: id parent major:minor root mountpoint options [optional fields...] - fstype source superoptions
+        # last entry wins for same mountpoint (over-mount)
+        mountinfo = {}
+        for line in lines:
+            fields = line.split()
+            try:
+                separator = fields.index("-", 6)
+                mountpoint = fields[4].replace("\\040", " ")
+                mountinfo[mountpoint] = {
+                    "options": fields[5].split(","),
+                    "super_options": fields[separator + 3].split(",") if len(fields) > separator + 3 else [],
+                }
+            except (ValueError, IndexError):
+                self.logger.debug('Invalid mountinfo line "%s"' % line.strip())
+
+        self.__mountinfo = mountinfo
+        self.__mountinfo_timestamp = now
+        return mountinfo
+
+    def __invalidate_mountinfo(self):
+        """
+        Invalidate cached mountinfo content
+        """
+        self.__mountinfo = None
+
     def __refresh(self, partition):
         """
         Refresh data
@@ -101,33 +222,66 @@ class ReadWrite:
         Args:
             partition (string): partition to work on
         """
-        partition_mod = partition.replace("/", "\/")
-        command = (
-            r'/bin/mount | sed -n -e "s/^.* on %s .*(\(r[w|o]\).*/\1/p"' % partition_mod
-        )
-        res = self.console.command(command)
-        # self.logger.debug('Command "%s" result: %s' % (command, res))
-
-        # check errors
-        if res["error"] or res["killed"] or len(res["stdout"]) == 0:
-            self.logger.error("Error when getting rw/ro flag: %s" % res)
+        mountinfo = self.__read_mountinfo()
+        if mountinfo is None or partition not in mountinfo:
+            self.logger.error('Error when getting rw/ro flag of partition "%s"' % partition)
             self.status[partition] = self.STATUS_UNKNOWN
             return
 
-        # parse result
-        line = res["stdout"][0].strip()
-        if line == "rw":
-            self.status[partition] = self.STATUS_WRITE
-            self.logger.trace('Partition "%s" is in WRITE mode' % partition)
-        elif line == "ro":
+        # partition is readonly if mount point or its superblock is readonly
+        options = mountinfo[partition]["options"] + mountinfo[partition]["super_options"]
+        if "ro" in options:
             self.status[partition] = self.STATUS_READ
             self.logger.trace('Partition "%s" is in READ mode' % partition)
+        elif "rw" in options:
+            self.status[partition] = self.STATUS_WRITE
+            self.logger.trace('Partition "%s" is in WRITE mode' % partition)
         else:
             self.status[partition] = self.STATUS_UNKNOWN
             self.logger.error(
-                'Unable to get partition "%s" status: %s' % (partition, res["stdout"])
+                'Unable to get partition "%s" status: %s' % (partition, mountinfo[partition])
+            )
+
+    def __remount(self, partition, readonly):
+        """
+        Remount partition in read-only or read-write mode
+
+        Remount is performed using mount syscall keeping current per mount flags. It fallbacks to mount
+        command if syscall is not available.
+
+        Args:
+            partition (string): partition to work on
+            readonly (bool): True to remount partition in read-only mode, False for read-write mode
+
+        Returns:
+            dict: remount result (same format than Console.command result)
+        """
+        self.__invalidate_mountinfo()
+
+        if not self.libc:
+            return self.console.command(
+                "/bin/mount -o remount,%s %s" % ("ro" if readonly else "rw", partition),
+                timeout=10.0,
             )
 
+        mountinfo = self.__read_mountinfo() or {}
+        options = mountinfo.get(partition, {}).get("options", [])
+        flags = self.MS_REMOUNT | (self.MS_RDONLY if readonly else 0)
+        for option in options:
+            flags |= self.MOUNT_FLAGS.get(option, 0)
+
+        returncode = self.libc.mount(None, partition.encode("utf-8"), None, flags, None)
+        error = ctypes.get_errno() if returncode != 0 else 0
+        self.__invalidate_mountinfo()
+
+        return {
+            "error": returncode != 0,
+            "killed": False,
+            "returncode": error,
+            "stdout": [],
+            "stderr": [os.strerror(error)] if returncode != 0 else [],
+        }
+
     def __is_cleep_iso(self):
         """
         Detect if cleep is running on cleep iso
@@ -149,7 +303,7 @@ class ReadWrite:
 
     def get_status(self):
         """
-        Return current filesystem status requesting mount command
+        Return current filesystem status reading mountinfo
 
         Returns:
             dict: partition status (please check STATUS_UNKNOWN that appears when problem occurs)::
@@ -185,10 +339,8 @@ class ReadWrite:
             self.logger.trace("Running in CI env")
             return False
 
-        # execute command
-        res = self.console.command(
-            "/bin/mount -o remount,rw %s" % partition, timeout=10.0
-        )
+        # remount partition
+        res = self.__remount(partition, False)
         self.logger.trace("Res: %s" % res)
 
         # check errors
@@ -202,7 +354,7 @@ class ReadWrite:
             # dump opened files to log
             self.logger.error(
                 "Opened files in RW by PID[%s]: %s"
-                % (os.getpid(), "".join(self.__get_opened_files_for_writing()))
+                % (os.getpid(), ", ".join(self.__get_opened_files_for_writing()))
             )
 
             # and send crash report
@@ -238,10 +390,8 @@ class ReadWrite:
         if self.__is_ci_env(): # pragma: no cover
             return False
 
-        # execute command
-        res = self.console.command(
-            "/bin/mount -o remount,ro %s" % partition, timeout=10.0
-        )
+        # remount partition
+        res = self.__remount(partition, True)
 
         # check errors
         if res["error"] or res["killed"]:
@@ -255,7 +405,7 @@ class ReadWrite:
             opened_files = self.__get_opened_files_for_writing()
             self.logger.error(
                 "Opened files in RW by PID[%s]: %s"
-                % (os.getpid(), "".join(opened_files))
+                % (os.getpid(), ", ".join(opened_files))
             )
 
             # do not crash report if filesystem is busy
@@ -0,0 +1,348 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import cProfile
+import io
+import logging
+import pstats
+import random
+import time
+from collections import deque
+from threading import Lock
+
+
+class RequestProfiler:
+    """
+    WSGI middleware that profiles requests handled by wrapped application
+
+    It records per route and per command (to, command) statistics:
+
+        * latency histogram
+        * response sizes
+        * error rates
+
+    Requests slower than configured threshold are logged and kept in a slow requests list. A sample of
+    requests can be profiled with cProfile, profile is attached to slow request entry. Only one request is
+    profiled at a time, from application entry until application returns its response (response sending
+    is not profiled). cProfile records the whole OS thread: under gevent a capture also contains calls of
+    other request greenlets running at the same time.
+
+    Requests that match no route are recorded under the same "<method> <unmatched>" key and at most
+    MAX_COMMANDS commands are recorded (other ones are recorded under "<other>" key), so statistics
+    cannot grow without limit with invalid requests.
+
+    Long poll routes (see excluded_routes) are expected to be slow: they are recorded in statistics but
+    never logged as slow requests nor profiled.
+
+    Command and error are set by wrapped application in WSGI environ using ENVIRON_COMMAND and
+    ENVIRON_ERROR keys.
+    """
+
+    ENVIRON_COMMAND = "cleep.command"
+    ENVIRON_ERROR = "cleep.error"
+    # histogram buckets upper bounds in milliseconds (last bucket holds slower requests)
+    BUCKETS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+    MAX_SLOW_REQUESTS = 50
+    MAX_COMMANDS = 200
+    UNMATCHED_ROUTE = "<unmatched>"
+    OTHER_COMMANDS = "<other>"
+    PROFILE_STATS_LINES = 25
+
+    def __init__(self, app, slow_threshold=1.0, profile_rate=0.0, excluded_routes=None):
+        """
+        Constructor
+
+        Args:
+            app (callable): WSGI application to profile
+            slow_threshold (float): duration (in seconds) above which request is considered slow
+            profile_rate (float): rate of requests to profile with cProfile (0.0 to disable, 1.0 for all)
+            excluded_routes (list): routes ("<method> <rule>") excluded from slow requests and profiling
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.app = app
+        self.slow_threshold = float(slow_threshold)
+        self.profile_rate = float(profile_rate)
+        self.excluded_routes = set(excluded_routes or [])
+        self.__lock = Lock()
+        self.__started_at = time.time()
+        self.__routes = {}
+        self.__commands = {}
+        self.__slow_requests = deque(maxlen=self.MAX_SLOW_REQUESTS)
+        self.__profiling = False
+
+    def __call__(self, environ, start_response):
+        """
+        WSGI entry point
+        """
+        context = {
+            "start": time.time(),
+            "status": 500,
+            "size": 0,
+            "profiler": None,
+        }
+
+        def profiled_start_response(status, headers, exc_info=None):
+            try:
+                context["status"] = int(str(status).split(" ", 1)[0])
+            except ValueError:  # pragma: no cover
+                pass
+            return start_response(status, headers, exc_info)
+
+        if (
+            self.profile_rate > 0.0
+            and not self.__profiling
+            and f"{environ.get('REQUEST_METHOD')} {environ.get('PATH_INFO')}" not in self.excluded_routes
+            and random.random() < self.profile_rate
+        ):
+            self.__profiling = True
+            context["profiler"] = cProfile.Profile()
+            context["profiler"].enable()
+
+        try:
+            body = self.app(environ, profiled_start_response)
+        except Exception:
+            self.__stop_profiler(context)
+            self.__finish(environ, context)
+            raise
+        self.__stop_profiler(context)
+
+        return ProfiledResponse(body, lambda size: self.__on_response_end(environ, context, size))
+
+    def __stop_profiler(self, context):
+        """
+        Stop request profiler if request is profiled
+
+        Args:
+            context (dict): request context
+        """
+        if context["profiler"]:
+            context["profiler"].disable()
+            self.__profiling = False
+
+    def __on_response_end(self, environ, context, size):
+        """
+        Called when response is fully sent
+
+        Args:
+            environ (dict): WSGI environ
+            context (dict): request context
+            size (int): response size
+        """
+        context["size"] = size
+        self.__finish(environ, context)
+
+    def __finish(self, environ, context):
+        """
+        Record request statistics
+
+        Args:
+            environ (dict): WSGI environ
+            context (dict): request context
+        """
+        duration = time.time() - context["start"]
+        route = environ.get("bottle.route")
+        route = f"{environ.get('REQUEST_METHOD')} {route.rule if route else self.UNMATCHED_ROUTE}"
+        command = environ.get(self.ENVIRON_COMMAND)
+        command = f"{command[0]}.{command[1]}" if command else None
+        error = context["status"] >= 500 or bool(environ.get(self.ENVIRON_ERROR))
+        slow = duration >= self.slow_threshold and route not in self.excluded_routes
+        profile = self.__format_profile(context["profiler"]) if slow and context["profiler"] else None
+
+        with self.__lock:
+            self.__record(self.__routes, route, duration, context["size"], error)
+            if command:
+                if command not in self.__commands and len(self.__commands) >= self.MAX_COMMANDS:
+                    command = self.OTHER_COMMANDS
+                self.__record(self.__commands, command, duration, context["size"], error)
+
+            if slow:
+                self.logger.warning(
+                    'Slow request "%s"%s took %.3f seconds',
+                    route,
+                    f' for command "{command}"' if command else "",
+                    duration,
+                )
+                self.__slow_requests.append({
+                    "timestamp": int(context["start"]),
+                    "route": route,
+                    "command": command,
+                    "duration": round(duration, 6),
+                    "status": context["status"],
+                    "size": context["size"],
+                    "profile": profile,
+                })
+
+    def __record(self, stats, key, duration, size, error):
+        """
+        Record request in specified stats
+
+        Args:
+            stats (dict): stats to update
+            key (str): stats key
+            duration (float): request duration (seconds)
+            size (int): response size
+            error (bool): True if request failed
+        """
+        if key not in stats:
+            stats[key] = {
+                "count": 0,
+                "errors": 0,
+                "duration_total": 0.0,
+                "duration_max": 0.0,
+                "size_total": 0,
+                "size_max": 0,
+                "histogram": [0] * (len(self.BUCKETS) + 1),
+            }
+        stat = stats[key]
+        stat["count"] += 1
+        stat["errors"] += 1 if error else 0
+        stat["duration_total"] += duration
+        stat["duration_max"] = max(stat["duration_max"], duration)
+        stat["size_total"] += size
+        stat["size_max"] = max(stat["size_max"], size)
+        duration_ms = duration * 1000.0
+        bucket = len(self.BUCKETS)
+        for index, upper_bound in enumerate(self.BUCKETS):
+            if duration_ms <= upper_bound:
+                bucket = index
+                break
+        stat["histogram"][bucket] += 1
+
+    def __format_profile(self, profiler):
+        """
+        Format cProfile profile
+
+        Args:
+            profiler (Profile): cProfile instance
+
+        Returns:
+            str: profile stats sorted by cumulative time or None if profile is empty
+        """
+        try:
+            output = io.StringIO()
+            stats = pstats.Stats(profiler, stream=output)
+            stats.sort_stats("cumulative").print_stats(self.PROFILE_STATS_LINES)
+            return output.getvalue()
+        except TypeError:
+            # no profile data
+            return None
+
+    def __format_stats(self, stats):
+        """
+        Format stats
+
+        Args:
+            stats (dict): stats to format
+
+        Returns:
+            dict: formatted stats
+        """
+        labels = [f"<={upper_bound}ms" for upper_bound in self.BUCKETS] + [f">{self.BUCKETS[-1]}ms"]
+        formatted = {}
+        for key, stat in stats.items():
+            formatted[key] = {
+                "count": stat["count"],
+                "errors": stat["errors"],
+                "error_rate": round(stat["errors"] / stat["count"], 4),
+                "duration_avg": round(stat["duration_total"] / stat["count"], 6),
+                "duration_max": round(stat["duration_max"], 6),
+                "size_avg": int(stat["size_total"] / stat["count"]),
+                "size_max": stat["size_max"],
+                "histogram": dict(zip(labels, stat["histogram"])),
+            }
+        return formatted
+
+    def configure(self, slow_threshold=None, profile_rate=None):
+        """
+        Update profiler configuration at runtime
+
+        Args:
+            slow_threshold (float): duration (in seconds) above which request is considered slow
+            profile_rate (float): rate of requests to profile with cProfile (0.0 to disable, 1.0 for all)
+
+        Raises:
+            ValueError: if parameter is invalid
+        """
+        if slow_threshold is not None:
+            if float(slow_threshold) < 0.0:
+                raise ValueError('Parameter "slow_threshold" must be positive')
+            self.slow_threshold = float(slow_threshold)
+        if profile_rate is not None:
+            if not 0.0 <= float(profile_rate) <= 1.0:
+                raise ValueError('Parameter "profile_rate" must be between 0.0 and 1.0')
+            self.profile_rate = float(profile_rate)
+
+    def reset(self):
+        """
+        Clear all recorded statistics
+        """
+        with self.__lock:
+            self.__started_at = time.time()
+            self.__routes.clear()
+            self.__commands.clear()
+            self.__slow_requests.clear()
+
+    def get_stats(self):
+        """
+        Return recorded statistics
+
+        Returns:
+            dict: statistics::
+
+                {
+                    since (int): timestamp of statistics start
+                    slow_threshold (float): slow request threshold
+                    profile_rate (float): profiled requests rate
+                    excluded_routes (list): routes excluded from slow requests and profiling
+                    routes (dict): stats by route ("<method> <rule>")
+                    commands (dict): stats by command ("<to>.<command>")
+                    slow_requests (list): last slow requests
+                }
+
+        """
+        with self.__lock:
+            return {
+                "since": int(self.__started_at),
+                "slow_threshold": self.slow_threshold,
+                "profile_rate": self.profile_rate,
+                "excluded_routes": sorted(self.excluded_routes),
+                "routes": self.__format_stats(self.__routes),
+                "commands": self.__format_stats(self.__commands),
+                "slow_requests": list(self.__slow_requests),
+            }
+
+
+class ProfiledResponse:
+    """
+    WSGI response iterable wrapper that counts sent bytes and notifies when response is closed
+    """
+
+    def __init__(self, body, on_end):
+        """
+        Constructor
+
+        Args:
+            body (iterable): wrapped WSGI response
+            on_end (callable): function called with response size when response is closed
+        """
+        self.body = body
+        self.on_end = on_end
+        self.size = 0
+        self.ended = False
+
+    def __iter__(self):
+        for chunk in self.body:
+            self.size += len(chunk)
+            yield chunk
+
+    def close(self):
+        """
+        Close response
+        """
+        try:
+            if hasattr(self.body, "close"):
+                self.body.close()
+        finally:
+            if not self.ended:
+                self.ended = True
+                self.on_end(self.size)
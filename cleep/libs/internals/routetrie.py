@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+class RouteTrie:
+    """
+    Prefix tree of url routes
+
+    Routes are split on "/" so a prefix only matches full route segments ("alexa" prefix matches "alexa"
+    and "alexa/intent" routes but not "alexabot" one). Empty prefix matches all routes.
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self.__root = {"children": {}, "values": []}
+
+    def __split(self, route):
+        """
+        Split route in segments
+
+        Args:
+            route (str): route
+
+        Returns:
+            list: route segments
+        """
+        return [segment for segment in (route or "").split("/") if segment]
+
+    def add(self, prefix, value):
+        """
+        Add value for specified route prefix
+
+        Args:
+            prefix (str): route prefix
+            value (any): value associated to prefix
+        """
+        node = self.__root
+        for segment in self.__split(prefix):
+            node = node["children"].setdefault(segment, {"children": {}, "values": []})
+        if value not in node["values"]:
+            node["values"].append(value)
+
+    def remove(self, value):
+        """
+        Remove value from all prefixes
+
+        Args:
+            value (any): value to remove
+        """
+        nodes = [self.__root]
+        while nodes:
+            node = nodes.pop()
+            if value in node["values"]:
+                node["values"].remove(value)
+            nodes.extend(node["children"].values())
+
+    def match(self, route):
+        """
+        Return values of longest prefix matching specified route
+
+        Args:
+            route (str): route
+
+        Returns:
+            list: matching values (empty list if no prefix matches)
+        """
+        node = self.__root
+        values = node["values"]
+        for segment in self.__split(route):
+            node = node["children"].get(segment)
+            if node is None:
+                break
+            if node["values"]:
+                values = node["values"]
+        return list(values)
@@ -0,0 +1,405 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import logging
+import importlib
+from contextlib import contextmanager
+from threading import Lock, Condition, local
+
+__all__ = ["StartupProfiler", "get_startup_profiler"]
+
+
+class StartupProfiler:
+    """
+    Cleep boot profiler (enabled with --profile-startup command line option).
+
+    Boot phases are identified by a path (ie ("bootstrap", "events_broker") or ("apps", "network", "init")).
+    For each phase it records:
+
+        * wall time
+        * CPU time of the thread running the phase
+        * time spent importing python modules (first import of a module only)
+
+    Report is saved as JSON (REPORT_PATH) and as folded stacks (FOLDED_PATH) that can be rendered with
+    flamegraph tools (flamegraph.pl, speedscope...).
+
+    Note:
+        Apps are loaded concurrently and under gevent all greenlets share the same OS thread: CPU time
+        of a phase also contains CPU time of greenlets running at the same time, and phases of different
+        apps overlap in folded stacks.
+    """
+
+    REPORT_PATH = "/var/opt/cleep/startup_profile.json"
+    FOLDED_PATH = "/var/opt/cleep/startup_profile.folded"
+    ROOT = "cleep"
+    STOP_TIMEOUT = 60.0
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.__lock = Lock()
+        self.__pending_done = Condition(self.__lock)
+        self.__local = local()
+        self.__enabled = False
+        self.__started_at = None
+        self.__start = None
+        self.__start_cpu = None
+        self.__phases = {}
+        self.__pending = 0
+        self.__imports = 0.0
+        self.__find_and_load = None
+        self.__report = None
+
+    def is_enabled(self):
+        """
+        Return True if boot is being profiled
+
+        Returns:
+            bool: True if profiling is running
+        """
+        return self.__enabled
+
+    def start(self):
+        """
+        Start profiling
+        """
+        with self.__lock:
+            if self.__enabled:
+                return
+            self.__enabled = True
+            self.__started_at = time.time()
+            self.__start = time.perf_counter()
+            self.__start_cpu = time.process_time()
+            self.__phases = {}
+            self.__pending = 0
+            self.__imports = 0.0
+            self.__report = None
+        self.__install_import_hook()
+        self.logger.info("Startup profiling enabled")
+
+    def stop(self, timeout=None):
+        """
+        Stop profiling and build report. It waits for phases returned by wrap to be executed
+
+        Args:
+            timeout (float): maximum time to wait for wrapped phases (default STOP_TIMEOUT)
+
+        Returns:
+            dict: report (see get_report) or None if profiling is not running
+        """
+        with self.__lock:
+            if not self.__enabled:
+                return None
+            end = time.monotonic() + (self.STOP_TIMEOUT if timeout is None else timeout)
+            while self.__pending > 0 and time.monotonic() < end:
+                self.__pending_done.wait(end - time.monotonic())
+            if self.__pending > 0:
+                self.logger.warning("Startup profile stopped while %s phases are still running", self.__pending)
+            self.__enabled = False
+        self.__uninstall_import_hook()
+
+        with self.__lock:
+            self.__report = self.__build_report()
+            return self.__report
+
+    @contextmanager
+    def phase(self, *path):
+        """
+        Profile phase executed in with block. Phase executed several times is summed
+
+        Args:
+            path (string): phase path items
+        """
+        if not self.__enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        start_cpu = time.thread_time()
+        start_imports = self.__get_thread_imports()
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self.__record(
+                path,
+                start,
+                time.perf_counter() - start,
+                time.thread_time() - start_cpu,
+                self.__get_thread_imports() - start_imports,
+                failed,
+            )
+
+    def wrap(self, function, *path):
+        """
+        Return function that profiles specified function as a phase. Profiling stop waits for returned
+        function to be executed
+
+        Args:
+            function (callable): function to profile
+            path (string): phase path items
+
+        Returns:
+            callable: wrapped function or function itself if profiling is not running
+        """
+        with self.__lock:
+            if not self.__enabled:
+                return function
+            self.__pending += 1
+
+        def profiled(*args, **kwargs):
+            try:
+                with self.phase(*path):
+                    return function(*args, **kwargs)
+            finally:
+                with self.__lock:
+                    self.__pending -= 1
+                    self.__pending_done.notify_all()
+
+        return profiled
+
+    def get_report(self):
+        """
+        Return report of current boot
+
+        Returns:
+            dict: report or None if boot was not profiled or profiling is still running::
+
+                {
+                    started (int): boot timestamp
+                    duration (float): profiling duration (seconds)
+                    cpu (float): process CPU time (seconds)
+                    imports (float): modules import time of all threads (seconds)
+                    phases (list): phases sorted by start::
+
+                        [
+                            {
+                                path (string): phase path ("bootstrap/events_broker")
+                                start (float): phase start since boot (seconds)
+                                wall (float): phase wall time (seconds)
+                                cpu (float): phase thread CPU time (seconds)
+                                imports (float): phase modules import time (seconds)
+                                count (int): number of executions
+                                failed (bool): True if phase raised an exception
+                            },
+                            ...
+                        ]
+
+                    apps (dict): apps phases by app name and step (import, init, configure, start)
+                    folded (list): folded stacks of phases self wall time in microseconds
+                }
+
+        """
+        with self.__lock:
+            return self.__report
+
+    def get_last_report(self, cleep_filesystem):
+        """
+        Return report of current boot or saved report of last profiled boot
+
+        Args:
+            cleep_filesystem (CleepFilesystem): filesystem instance
+
+        Returns:
+            dict: report (see get_report) or None if no report is available
+        """
+        report = self.get_report()
+        if report is None and os.path.exists(self.REPORT_PATH):
+            report = cleep_filesystem.read_json(self.REPORT_PATH)
+
+        return report
+
+    def save(self, cleep_filesystem):
+        """
+        Save report of current boot
+
+        Args:
+            cleep_filesystem (CleepFilesystem): filesystem instance
+
+        Returns:
+            bool: True if report is saved
+        """
+        report = self.get_report()
+        if report is None:
+            return False
+
+        report_dir = os.path.dirname(self.REPORT_PATH)
+        if not os.path.exists(report_dir):
+            cleep_filesystem.mkdirs(report_dir)
+        saved = cleep_filesystem.write_json(self.REPORT_PATH, report)
+        saved = cleep_filesystem.write_data(self.FOLDED_PATH, "".join(f"{line}\n" for line in report["folded"])) and saved
+        if saved:
+            self.logger.info('Startup profile saved to "%s" and "%s"', self.REPORT_PATH, self.FOLDED_PATH)
+
+        return saved
+
+    def __get_thread_imports(self):
+        """
+        Return modules import time of current thread
+
+        Returns:
+            float: import time (seconds)
+        """
+        return getattr(self.__local, "imports", 0.0)
+
+    def __install_import_hook(self):
+        """
+        Measure modules import time replacing importlib loader entry point (used by import statement and
+        importlib.import_module)
+        """
+        bootstrap = getattr(importlib, "_bootstrap", None)
+        find_and_load = getattr(bootstrap, "_find_and_load", None)
+        if find_and_load is None:  # pragma: no cover
+            self.logger.warning("Modules import time is not available")
+            return
+        thread_local = self.__local
+
+        def profiled_find_and_load(name, import_):
+            if getattr(thread_local, "importing", False):
+                # nested import is already measured
+                return find_and_load(name, import_)
+            thread_local.importing = True
+            start = time.perf_counter()
+            try:
+                return find_and_load(name, import_)
+            finally:
+                duration = time.perf_counter() - start
+                thread_local.importing = False
+                thread_local.imports = getattr(thread_local, "imports", 0.0) + duration
+                with self.__lock:
+                    self.__imports += duration
+
+        self.__find_and_load = find_and_load
+        bootstrap._find_and_load = profiled_find_and_load
+
+    def __uninstall_import_hook(self):
+        """
+        Restore importlib loader entry point
+        """
+        if self.__find_and_load is not None:
+            importlib._bootstrap._find_and_load = self.__find_and_load
+            self.__find_and_load = None
+
+    def __record(self, path, start, wall, cpu, imports, failed):
+        """
+        Record phase execution
+
+        Args:
+            path (tuple): phase path
+            start (float): phase start (perf_counter)
+            wall (float): phase wall time
+            cpu (float): phase thread CPU time
+            imports (float): phase import time
+            failed (bool): True if phase failed
+        """
+        with self.__lock:
+            if not self.__enabled:
+                return
+            phase = self.__phases.get(path)
+            if phase is None:
+                phase = self.__phases[path] = {
+                    "start": start - self.__start,
+                    "wall": 0.0,
+                    "cpu": 0.0,
+                    "imports": 0.0,
+                    "count": 0,
+                    "failed": False,
+                }
+            phase["wall"] += wall
+            phase["cpu"] += cpu
+            phase["imports"] += imports
+            phase["count"] += 1
+            phase["failed"] = phase["failed"] or failed
+
+    def __build_report(self):
+        """
+        Build report from recorded phases (must be called with lock acquired)
+
+        Returns:
+            dict: report (see get_report)
+        """
+        duration = time.perf_counter() - self.__start
+        phases = []
+        apps = {}
+        for path, phase in sorted(self.__phases.items(), key=lambda item: item[1]["start"]):
+            values = {
+                "start": round(phase["start"], 6),
+                "wall": round(phase["wall"], 6),
+                "cpu": round(phase["cpu"], 6),
+                "imports": round(phase["imports"], 6),
+            }
+            phases.append({
+                "path": "/".join(path),
+                **values,
+                "count": phase["count"],
+                "failed": phase["failed"],
+            })
+            if len(path) == 3 and path[0] == "apps":
+                apps.setdefault(path[1], {})[path[2]] = values
+
+        return {
+            "started": int(self.__started_at),
+            "duration": round(duration, 6),
+            "cpu": round(time.process_time() - self.__start_cpu, 6),
+            "imports": round(self.__imports, 6),
+            "phases": phases,
+            "apps": apps,
+            "folded": self.__get_folded_stacks(duration),
+        }
+
+    def __get_folded_stacks(self, duration):
+        """
+        Return folded stacks of recorded phases. Stack value is phase self wall time (phase wall time minus
+        its children wall time) in microseconds. Phases that are not recorded have no self time
+
+        Args:
+            duration (float): profiling duration, used as root wall time
+
+        Returns:
+            list: folded stacks ("cleep;apps;network;init 1234")
+        """
+        walls = {(): duration}
+        for path, phase in self.__phases.items():
+            walls[path] = phase["wall"]
+        children = {}
+        for path in walls:
+            if not path:
+                continue
+            # children time is substracted from nearest recorded parent
+            parent = path[:-1]
+            while parent not in walls:
+                parent = parent[:-1]
+            children[parent] = children.get(parent, 0.0) + walls[path]
+
+        folded = []
+        for path in sorted(walls):
+            self_time = int(round((walls[path] - children.get(path, 0.0)) * 1000000))
+            if self_time > 0:
+                folded.append("%s %d" % (";".join((self.ROOT,) + path), self_time))
+
+        return folded
+
+
+_startup_profiler = None
+_startup_profiler_lock = Lock()
+
+
+def get_startup_profiler():
+    """
+    Return startup profiler shared by Cleep core
+
+    Returns:
+        StartupProfiler: shared startup profiler instance
+    """
+    global _startup_profiler
+    with _startup_profiler_lock:
+        if _startup_profiler is None:
+            _startup_profiler = StartupProfiler()
+        return _startup_profiler
@@ -3,9 +3,11 @@
 
 import os
 import logging
-from threading import Thread, Event
+import time
+from threading import Thread, Event, Condition
 from time import perf_counter
-from gevent import sleep
+from cleep.libs.internals.taskscheduler import get_scheduler
+from cleep.libs.internals.taskexecutor import get_executor
 
 __all__ = ["Task", "CountTask", "CancelableTimer"]
 
@@ -30,21 +32,41 @@ class CancelableTimer(Thread):
         self._kwargs = task_kwargs or {}
         self._interval = interval
         self.logger = logging.getLogger(self.__class__.__name__)
+        self.__ran = False
 
     def run(self):
-        while self._interval > 0 and not self.__event.is_set():
-            timeout = self._interval if self._interval <= 1 else 1
-            self.logger.trace('Task tick: interval=%s timeout=%s', self._interval, timeout)
-            self.__event.wait(timeout)
-            self._interval -= 1
+        if self._interval > 0:
+            self.__event.wait(self._interval)
 
         if not self.__event.is_set():
-            self.logger.trace("Task %s ran", self._task.__name__)
+            self.logger.trace("Task %s ran", getattr(self._task, "__name__", "unnamed"))
+            self.__ran = True
             self._task(*self._args, **self._kwargs)
 
     def cancel(self):
         self.__event.set()
 
+    def get_stats(self):
+        """
+        Return timer statistics
+
+        Returns:
+            dict: timer statistics (see Task.get_stats). Run durations are not measured
+        """
+        if self.is_alive():
+            state = Task.STATE_RUNNING if self.__ran else Task.STATE_SCHEDULED
+        elif self.__event.is_set() and not self.__ran:
+            state = Task.STATE_STOPPED
+        else:
+            state = Task.STATE_ENDED if self.__ran else Task.STATE_CREATED
+
+        return {
+            "name": self.name,
+            "state": state,
+            "interval": self._interval,
+            "runs": 1 if self.__ran and not self.is_alive() else 0,
+        }
+
 
 class Task:
     """
@@ -52,8 +74,22 @@ class Task:
 
     If interval is specified task is executed periodically.
     If interval is None or 0 task is executed immediately and only once
+
+    Periodic task runs are scheduled on shared TaskScheduler and one-shot tasks are run by shared
+    TaskExecutor, instead of using one thread per run.
+
+    Task records its runs statistics (see get_stats).
     """
 
+    STATE_CREATED = "created"
+    STATE_SCHEDULED = "scheduled"
+    STATE_RUNNING = "running"
+    STATE_STOPPED = "stopped"
+    STATE_ENDED = "ended"
+
+    # run started later than this delay after its deadline is counted as late (seconds)
+    LATE_THRESHOLD = 0.5
+
     def __init__(
         self,
         interval,
@@ -63,6 +99,8 @@ class Task:
         task_args=None,
         task_kwargs=None,
         end_callback=None,
+        scheduler=None,
+        executor=None,
     ):
         """
         Create new task
@@ -75,6 +113,8 @@ class Task:
             task_args (list): list of task parameters
             task_kwargs (dict): dict of task parameters
             end_callback (function): call this function as soon as task is terminated
+            scheduler (TaskScheduler): scheduler that runs periodic task. Shared scheduler is used if not specified
+            executor (TaskExecutor): executor that runs one-shot task. Shared executor is used if not specified
         """
         self._task = task
         try:
@@ -87,17 +127,72 @@ class Task:
         self._args = task_args or []
         self._kwargs = task_kwargs or {}
         self._interval = 0.0 if interval is None else interval
-        self.__timer = None
         self._run_count = None
+        self._scheduler = scheduler or get_scheduler()
+        self._executor = executor or get_executor()
+        self.__scheduled = None
+        self.__running = 0
+        self.__runs = 0
+        self.__generation = 0
+        self.__state = Condition()
         self.__stopped = False
         self.__end_callback = end_callback
         self.__task_start_timestamp = perf_counter()
         self._app_stop_event = app_stop_event
+        self.__stats = {
+            "failures": 0,
+            "last_run": None,
+            "last_duration": 0.0,
+            "total_duration": 0.0,
+            "max_duration": 0.0,
+            "late_ticks": 0,
+            "missed_ticks": 0,
+            "overruns": 0,
+        }
+
+    def __schedule(self, delay):
+        """
+        Schedule next task run. State lock must be held
+
+        Args:
+            delay (float): delay before running task (in seconds)
 
-    def __run(self):
+        Returns:
+            bool: False if task run was rejected by executor (task is then stopped and counted as failed)
+        """
+        generation = self.__generation
+        deadline = perf_counter() + max(delay, 0.0)
+        if not self._interval:
+            # one-shot task is run asap by executor
+            self.__scheduled = self._executor.submit(lambda: self.__run(generation, deadline), self._task_name)
+            if self.__scheduled is None:
+                self.logger.error('Task "%s" was rejected because too many tasks are pending', self._task_name)
+                self.__stats["failures"] += 1
+                self.__stopped = True
+                self.__state.notify_all()
+                return False
+            return True
+
+        self.__scheduled = self._scheduler.schedule(delay, lambda: self.__run(generation, deadline), self._task_name)
+        return True
+
+    def __run(self, generation, deadline):
         """
         Run the task
+
+        Args:
+            generation (int): task generation when run was scheduled
+            deadline (float): perf_counter timestamp the run was scheduled at
         """
+        with self.__state:
+            if generation == self.__generation:
+                self.__scheduled = None
+            self.__running += 1
+            if self._interval and perf_counter() - deadline > self.LATE_THRESHOLD:
+                self.__stats["late_ticks"] += 1
+            self.__stats["last_run"] = time.time()
+        start = perf_counter()
+
         # execute task
         if self._run_count is not None:
             self._run_count -= 1
@@ -106,7 +201,7 @@ class Task:
         try:
             self._task(*self._args, **self._kwargs)
 
-            # launch again the timer if periodic task
+            # launch again the task if periodic task
             if self._interval:
                 if self._run_count is None:
                     # interval specified + run_count is NOT configured
@@ -115,45 +210,60 @@ class Task:
                     # interval specified + run_count is configured
                     if self._run_count > 0:
                         run_again = True
-            else:
-                # interval not configured, don't run task again
-                run_again = False
-                self.__timer = None
 
         except Exception:
             # exception occured
+            self.__stats["failures"] += 1
             if self.logger:
                 self.logger.exception("Exception occured in task execution:")
 
-        # run again task?
-        if run_again and not self.__stopped:
-            self.__task_start_timestamp += self._interval
-            adjusted_interval = self.__task_start_timestamp - perf_counter()
-            self.__timer = CancelableTimer(adjusted_interval, self.__run)
-            self.__timer.name = self._task_name
-            self.__timer.daemon = True
-            self.__timer.start()
-        elif self.__end_callback:
+        duration = perf_counter() - start
+        with self.__state:
+            self.__running -= 1
+            self.__runs += 1
+            self.__stats["last_duration"] = duration
+            self.__stats["total_duration"] += duration
+            self.__stats["max_duration"] = max(self.__stats["max_duration"], duration)
+            if self._interval and duration > self._interval:
+                self.__stats["overruns"] += 1
+
+            # run again task? Task restarted meanwhile is already scheduled
+            ended = True
+            if generation != self.__generation:
+                ended = False
+            elif run_again and not self.__stopped and not self._app_stop_event.is_set():
+                self.__task_start_timestamp += self._interval
+                now = perf_counter()
+                if now - self.__task_start_timestamp >= self._interval:
+                    # task overran its interval, skip missed ticks instead of running them in burst
+                    missed = int((now - self.__task_start_timestamp) // self._interval)
+                    self.__stats["missed_ticks"] += missed
+                    self.__task_start_timestamp += missed * self._interval
+                self.__schedule(self.__task_start_timestamp - now)
+                ended = False
+            self.__state.notify_all()
+
+        if ended and self.__end_callback:
             self.__end_callback()
 
     def wait(self):
         """
         Wait for current task to be done
         """
-        if self._run_count is None and not self.__timer:
-            self.logger.warning("No task is running")
-            return
-
-        if self._run_count is None:
-            while (
-                not self.__timer or not self.__timer.is_alive()
-            ):  # pragma: no cover - sync
-                sleep(0.1)
-            self.__timer.join()
-        else:
-            while self._run_count > 0:
-                if self.__timer and self.__timer.is_alive():
-                    self.__timer.join()
+        with self.__state:
+            if not self.__scheduled and not self.__running:
+                self.logger.warning("No task is running")
+                return
+
+            if self._run_count is None:
+                # wait for next run
+                runs = self.__runs
+                while (self.__scheduled or self.__running) and self.__runs == runs:
+                    self.__state.wait()
+            else:
+                # wait for all runs
+                while self.__scheduled or self.__running:
+                    self.__state.wait()
 
     def start(self):
         """
@@ -164,28 +274,33 @@ class Task:
             self.stop()
             return
 
-        if self.__timer:
-            self.stop()
-        self.__timer = CancelableTimer(self._interval, self.__run)
-        self.__timer.daemon = True
-        self.__timer.name = self._task_name
+        with self.__state:
+            if self.__scheduled:
+                self.__scheduled.cancel()
+            self.__stopped = False
+            self.__generation += 1
 
-        # accuracy
-        self.__task_start_timestamp = perf_counter() + self._interval
+            # accuracy
+            self.__task_start_timestamp = perf_counter() + self._interval
+            scheduled = self.__schedule(self._interval)
 
-        self.__timer.start()
+        if not scheduled and self.__end_callback:
+            # task will never run, end it now to not block caller waiting for it
+            self.__end_callback()
 
     def stop(self):
         """
         Stop the task
         """
-        # cancel timer if it is in waiting stage
-        if self.__timer:
-            self.__timer.cancel()
-            self.__timer = None
+        with self.__state:
+            # cancel run if it is in waiting stage
+            if self.__scheduled:
+                self.__scheduled.cancel()
+                self.__scheduled = None
 
-        # do not restart timer if task is running
-        self.__stopped = True
+            # do not schedule task again if task is running
+            self.__stopped = True
+            self.__state.notify_all()
 
     def is_running(self):
         """
@@ -194,7 +309,96 @@ class Task:
         Returns:
             bool: True if running
         """
-        return bool(self.__timer and self.__timer.is_alive())
+        return bool(self.__scheduled or self.__running)
+
+    def is_alive(self):
+        """
+        Thread like alias of is_running
+
+        Returns:
+            bool: True if running
+        """
+        return self.is_running()
+
+    def cancel(self):
+        """
+        Thread like alias of stop
+        """
+        self.stop()
+
+    def get_name(self):
+        """
+        Return task name
+
+        Returns:
+            string: task name
+        """
+        return self._task_name
+
+    def get_state(self):
+        """
+        Return task lifecycle state
+
+        Returns:
+            string: task state (see STATE_XXX)
+        """
+        with self.__state:
+            if self.__running:
+                return self.STATE_RUNNING
+            if self.__scheduled:
+                return self.STATE_SCHEDULED
+            if self.__stopped:
+                return self.STATE_STOPPED
+            return self.STATE_ENDED if self.__runs else self.STATE_CREATED
+
+    def get_stats(self):
+        """
+        Return task statistics
+
+        Returns:
+            dict: task statistics::
+
+                {
+                    name (string): task name
+                    state (string): task state (see STATE_XXX)
+                    interval (float): task interval (0 for one-shot task)
+                    runs (int): number of runs
+                    remaining_runs (int): number of remaining runs for CountTask, None otherwise
+                    failures (int): number of runs that raised an exception
+                    last_run (float): last run start timestamp or None if task never ran
+                    duration (dict): runs duration (seconds)::
+
+                        {
+                            last (float): last run duration
+                            average (float): average run duration
+                            max (float): max run duration
+                        }
+
+                    late_ticks (int): number of runs started after their deadline (see LATE_THRESHOLD)
+                    missed_ticks (int): number of runs skipped because task overran its interval
+                    overruns (int): number of runs that lasted longer than interval
+                }
+
+        """
+        state = self.get_state()
+        with self.__state:
+            return {
+                "name": self._task_name,
+                "state": state,
+                "interval": self._interval,
+                "runs": self.__runs,
+                "remaining_runs": self._run_count,
+                "failures": self.__stats["failures"],
+                "last_run": self.__stats["last_run"],
+                "duration": {
+                    "last": self.__stats["last_duration"],
+                    "average": self.__stats["total_duration"] / self.__runs if self.__runs else 0.0,
+                    "max": self.__stats["max_duration"],
+                },
+                "late_ticks": self.__stats["late_ticks"],
+                "missed_ticks": self.__stats["missed_ticks"],
+                "overruns": self.__stats["overruns"],
+            }
 
 
 
@@ -213,6 +417,8 @@ class CountTask(Task):
         task_args=None,
         task_kwargs=None,
         end_callback=None,
+        scheduler=None,
+        executor=None,
     ):
         """
         Constructor
@@ -226,8 +432,10 @@ class CountTask(Task):
             task_args (list): list of task parameters
             task_kwargs (dict): dict of task parameters
             end_callback (function): call this function as soon as task is terminated
+            scheduler (TaskScheduler): scheduler that runs task. Shared scheduler is used if not specified
+            executor (TaskExecutor): executor that runs one-shot task. Shared executor is used if not specified
         """
         Task.__init__(
-            self, interval, task, logger, app_stop_event, task_args, task_kwargs, end_callback
+            self, interval, task, logger, app_stop_event, task_args, task_kwargs, end_callback, scheduler, executor
         )
         self._run_count = count
@@ -0,0 +1,308 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import logging
+from collections import deque
+from threading import Thread, Lock, Condition
+from time import perf_counter
+
+__all__ = ["TaskExecutor", "ScheduledCall", "get_executor", "get_long_running_executor"]
+
+
+class ScheduledCall:
+    """
+    Handle on a call submitted to TaskExecutor or scheduled by TaskScheduler
+    """
+
+    __slots__ = ("deadline", "sequence", "callback", "name", "cancelled", "_owner")
+
+    def __init__(self, owner, deadline, sequence, callback, name):
+        """
+        Constructor
+
+        Args:
+            owner (TaskExecutor|TaskScheduler): instance that owns the call (used to cancel it)
+            deadline (float): perf_counter timestamp the call must be run at
+            sequence (int): sequence number to keep calls with same deadline ordered
+            callback (function): function to call
+            name (string): call name (used in logs)
+        """
+        self._owner = owner
+        self.deadline = deadline
+        self.sequence = sequence
+        self.callback = callback
+        self.name = name
+        self.cancelled = False
+
+    def __lt__(self, other):
+        return (self.deadline, self.sequence) < (other.deadline, other.sequence)
+
+    def cancel(self):
+        """
+        Cancel call. It has no effect if call is already running
+        """
+        self._owner.cancel(self)
+
+
+class TaskExecutor:
+    """
+    Bounded pool of named worker threads running submitted calls asap.
+
+    Workers are started on demand up to max_workers and stop after being idle for WORKER_IDLE_TIMEOUT
+    seconds. When all workers are busy calls are queued, and calls are rejected when queue is full.
+    """
+
+    MAX_WORKERS = 8
+    MAX_QUEUE = 100
+    WORKER_IDLE_TIMEOUT = 60.0
+
+    def __init__(self, name="executor", max_workers=None, max_queue=None):
+        """
+        Constructor
+
+        Args:
+            name (string): executor name, used to name worker threads
+            max_workers (int): maximum number of workers (default MAX_WORKERS)
+            max_queue (int): maximum number of queued calls, 0 for unbounded queue (default MAX_QUEUE)
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.name = name
+        self.max_workers = max_workers or self.MAX_WORKERS
+        self.max_queue = self.MAX_QUEUE if max_queue is None else max_queue
+
+        self.__lock = Lock()
+        self.__work = Condition(self.__lock)
+        self.__queue = deque()
+        self.__workers = 0
+        self.__idle_workers = 0
+        self.__stopped = False
+        self.__stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "latency_last": 0.0,
+            "latency_total": 0.0,
+            "latency_max": 0.0,
+        }
+
+    def submit(self, callback, name=None):
+        """
+        Submit call to run asap
+
+        Args:
+            callback (function): function to call (without parameter)
+            name (string): call name
+
+        Returns:
+            ScheduledCall: call handle or None if call was rejected
+        """
+        call = ScheduledCall(self, perf_counter(), 0, callback, name or getattr(callback, "__name__", "unnamed"))
+
+        return call if self.execute(call) else None
+
+    def execute(self, call):
+        """
+        Run existing call asap
+
+        Args:
+            call (ScheduledCall): call to run
+
+        Returns:
+            bool: True if call is queued, False if it was rejected
+        """
+        with self.__lock:
+            if self.__stopped:
+                self.logger.debug('Call "%s" is rejected because executor "%s" is stopped', call.name, self.name)
+                self.__stats["rejected"] += 1
+                return False
+
+            busy = self.__idle_workers <= len(self.__queue) and self.__workers >= self.max_workers
+            if busy and self.max_queue and len(self.__queue) >= self.max_queue:
+                self.logger.warning(
+                    'Call "%s" is rejected because executor "%s" queue is full (%s calls)',
+                    call.name,
+                    self.name,
+                    len(self.__queue),
+                )
+                self.__stats["rejected"] += 1
+                return False
+
+            self.__stats["submitted"] += 1
+            self.__queue.append(call)
+            if self.__idle_workers >= len(self.__queue):
+                self.__work.notify()
+            elif self.__workers < self.max_workers:
+                self.__workers += 1
+                worker = Thread(target=self.__work_loop, name=f"{self.name}.worker", daemon=True)
+                worker.start()
+            else:
+                self.logger.debug('All "%s" workers are busy, call "%s" is queued', self.name, call.name)
+
+        return True
+
+    def cancel(self, call):
+        """
+        Cancel queued call
+
+        Args:
+            call (ScheduledCall): call to cancel
+        """
+        with self.__lock:
+            call.cancelled = True
+            try:
+                self.__queue.remove(call)
+            except ValueError:
+                pass
+
+    def stop(self):
+        """
+        Stop executor. Queued calls are dropped, running calls are not interrupted
+        """
+        with self.__lock:
+            self.__stopped = True
+            for call in self.__queue:
+                call.cancelled = True
+            self.__queue.clear()
+            self.__work.notify_all()
+
+    def get_queue_depth(self):
+        """
+        Return number of calls waiting for a worker
+
+        Returns:
+            int: number of queued calls
+        """
+        with self.__lock:
+            return len(self.__queue)
+
+    def get_workers_count(self):
+        """
+        Return number of running workers
+
+        Returns:
+            int: number of workers
+        """
+        with self.__lock:
+            return self.__workers
+
+    def get_stats(self):
+        """
+        Return executor statistics
+
+        Returns:
+            dict: statistics::
+
+                {
+                    name (string): executor name
+                    workers (int): number of running workers
+                    idle_workers (int): number of workers waiting for a call
+                    max_workers (int): maximum number of workers
+                    queue_depth (int): number of calls waiting for a worker
+                    max_queue (int): maximum number of queued calls (0 if unbounded)
+                    submitted (int): number of accepted calls
+                    completed (int): number of calls run successfully
+                    failed (int): number of calls that raised an exception
+                    rejected (int): number of rejected calls
+                    latency (dict): delay between call deadline and call start (seconds)::
+
+                        {
+                            last (float): last call latency
+                            average (float): average latency
+                            max (float): max latency
+                        }
+
+                }
+
+        """
+        with self.__lock:
+            started = self.__stats["completed"] + self.__stats["failed"]
+            return {
+                "name": self.name,
+                "workers": self.__workers,
+                "idle_workers": self.__idle_workers,
+                "max_workers": self.max_workers,
+                "queue_depth": len(self.__queue),
+                "max_queue": self.max_queue,
+                "submitted": self.__stats["submitted"],
+                "completed": self.__stats["completed"],
+                "failed": self.__stats["failed"],
+                "rejected": self.__stats["rejected"],
+                "latency": {
+                    "last": self.__stats["latency_last"],
+                    "average": self.__stats["latency_total"] / started if started else 0.0,
+                    "max": self.__stats["latency_max"],
+                },
+            }
+
+    def __work_loop(self):
+        """
+        Worker thread: run queued calls
+        """
+        while True:
+            with self.__lock:
+                while not self.__queue and not self.__stopped:
+                    self.__idle_workers += 1
+                    notified = self.__work.wait(self.WORKER_IDLE_TIMEOUT)
+                    self.__idle_workers -= 1
+                    if not notified and not self.__queue:
+                        break
+
+                if not self.__queue:
+                    self.__workers -= 1
+                    return
+                call = self.__queue.popleft()
+                if call.cancelled:
+                    continue
+
+                latency = max(perf_counter() - call.deadline, 0.0)
+                self.__stats["latency_last"] = latency
+                self.__stats["latency_total"] += latency
+                self.__stats["latency_max"] = max(self.__stats["latency_max"], latency)
+
+            failed = False
+            try:
+                call.callback()
+            except Exception:
+                failed = True
+                self.logger.exception('Exception occured in call "%s"', call.name)
+
+            with self.__lock:
+                self.__stats["failed" if failed else "completed"] += 1
+
+
+# long running calls are never rejected and must not starve short one-shot tasks
+LONG_RUNNING_MAX_WORKERS = 64
+
+_executor = None
+_long_running_executor = None
+_executor_lock = Lock()
+
+
+def get_executor():
+    """
+    Return executor shared by all one-shot tasks
+
+    Returns:
+        TaskExecutor: shared executor instance
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = TaskExecutor("oneshot")
+        return _executor
+
+
+def get_long_running_executor():
+    """
+    Return executor shared by long running one-shot tasks (apps startup, drivers install...). Its queue
+    is unbounded so calls are never rejected
+
+    Returns:
+        TaskExecutor: shared long running executor instance
+    """
+    global _long_running_executor
+    with _executor_lock:
+        if _long_running_executor is None:
+            _long_running_executor = TaskExecutor("longrunning", LONG_RUNNING_MAX_WORKERS, max_queue=0)
+        return _long_running_executor
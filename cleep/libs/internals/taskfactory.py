@@ -5,6 +5,9 @@ from inspect import currentframe, getframeinfo, getmodulename
 from pathlib import Path
 import logging
 from cleep.libs.internals.task import Task, CountTask, CancelableTimer
+from cleep.libs.internals.taskscheduler import get_scheduler
+from cleep.libs.internals.taskexecutor import get_executor, get_long_running_executor
+from cleep.libs.internals.taskregistry import TaskRegistry
 
 
 class TaskFactory:
@@ -21,10 +24,13 @@ class TaskFactory:
         """
         self.logger = logging.getLogger(self.__class__.__name__)
         self.__app_stop_event = bootstrap["app_stop_event"]
-        self.tasks = []
+        self.registry = TaskRegistry()
+        self.scheduler = get_scheduler()
+        self.executor = get_executor()
+        self.long_running_executor = get_long_running_executor()
 
     def create_task(
-        self, interval, task, task_args=None, task_kwargs=None, end_callback=None
+        self, interval, task, task_args=None, task_kwargs=None, end_callback=None, long_running=False
     ):
         """
         Create new task
@@ -35,11 +41,11 @@ class TaskFactory:
             task_args (list): list of task parameters
             task_kwargs (dict): dict of task parameters
             end_callback (function): call this function as soon as task is terminatedœ
+            long_running (bool): one-shot task that can last or block (default False). It is run on
+                                 dedicated executor that never rejects it
         """
         # get logger instance from caller
-        caller_frame = currentframe().f_back
-        first_arg_name = caller_frame.f_code.co_varnames[0]
-        caller_instance = caller_frame.f_locals[first_arg_name]
+        caller_instance = self.__get_caller_instance(currentframe().f_back)
         logger = self.__get_logger(caller_instance)
 
         # create new task
@@ -51,8 +57,9 @@ class TaskFactory:
             task_args,
             task_kwargs,
             end_callback,
+            executor=self.long_running_executor if long_running else None,
         )
-        self.tasks.append(task)
+        self.registry.register(task, self.__get_owner(caller_instance))
         return task
 
     def create_count_task(
@@ -73,9 +80,7 @@ class TaskFactory:
             Task instance
         """
         # get logger instance from caller
-        caller_frame = currentframe().f_back
-        first_arg_name = caller_frame.f_code.co_varnames[0]
-        caller_instance = caller_frame.f_locals[first_arg_name]
+        caller_instance = self.__get_caller_instance(currentframe().f_back)
         logger = self.__get_logger(caller_instance)
 
         # create new task
@@ -89,7 +94,7 @@ class TaskFactory:
             task_kwargs,
             end_callback,
         )
-        self.tasks.append(task)
+        self.registry.register(task, self.__get_owner(caller_instance))
         return task
 
     def create_timer(self, interval, task, task_args=None, task_kwargs=None):
@@ -103,18 +108,100 @@ class TaskFactory:
         Returns:
             CancelableTimer instance
         """
+        caller_instance = self.__get_caller_instance(currentframe().f_back)
+
         timer = CancelableTimer(interval, task, task_args, task_kwargs)
-        self.tasks.append(timer)
+        self.registry.register(timer, self.__get_owner(caller_instance))
         return timer
 
     def stop_all_tasks(self):
         """
         Stop all tasks
         """
-        for task in self.tasks:
+        for task in self.registry.get_tasks():
             if task.is_alive():
                 task.cancel()
 
+    def get_stats(self):
+        """
+        Return tasks statistics
+
+        Returns:
+            dict: statistics::
+
+                {
+                    scheduler (dict): periodic tasks scheduler statistics (see TaskScheduler.get_stats)
+                    executor (dict): one-shot tasks executor statistics (see TaskExecutor.get_stats)
+                    long_running_executor (dict): long running one-shot tasks executor statistics
+                }
+
+        """
+        return {
+            "scheduler": self.scheduler.get_stats(),
+            "executor": self.executor.get_stats(),
+            "long_running_executor": self.long_running_executor.get_stats(),
+        }
+
+    @property
+    def tasks(self):
+        """
+        Return alive tasks created by factory
+
+        Returns:
+            list: list of tasks
+        """
+        return self.registry.get_tasks()
+
+    def get_tasks(self):
+        """
+        Return statistics of tasks created by factory
+
+        Returns:
+            list: list of task statistics (see TaskRegistry.get_stats)
+        """
+        return self.registry.get_stats()
+
+    def get_tasks_summary(self):
+        """
+        Return summary of tasks created by factory
+
+        Returns:
+            dict: tasks summary (see TaskRegistry.get_summary)
+        """
+        return self.registry.get_summary()
+
+    def __get_caller_instance(self, caller_frame):
+        """
+        Return instance of caller (first argument of calling function)
+
+        Args:
+            caller_frame (frame): caller frame
+
+        Returns:
+            object: caller instance or None if caller is not a method
+        """
+        if not caller_frame.f_code.co_argcount:
+            return None
+        first_arg_name = caller_frame.f_code.co_varnames[0]
+        return caller_frame.f_locals.get(first_arg_name)
+
+    def __get_owner(self, caller_instance):
+        """
+        Get name of module owning task
+
+        Args:
+            caller_instance (object): caller instance
+
+        Returns:
+            string: owner name or None if unknown
+        """
+        if caller_instance is None:
+            return None
+        try:
+            return caller_instance._get_module_name()
+        except Exception:
+            return type(caller_instance).__name__
+
     def __get_logger(self, caller_instance):
         """
         Get logger from caller instance or from internal logger
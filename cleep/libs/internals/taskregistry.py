@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import logging
+import weakref
+from threading import Lock
+
+__all__ = ["TaskRegistry"]
+
+
+class TaskRegistry:
+    """
+    Keep track of tasks created by TaskFactory.
+
+    Tasks are referenced weakly: a task that is not referenced anymore by its owner (and not
+    scheduled) is garbage collected and silently removed from registry.
+    """
+
+    # task states that are considered as active
+    ACTIVE_STATES = ("scheduled", "running")
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.__tasks = weakref.WeakKeyDictionary()
+        self.__lock = Lock()
+
+    def __len__(self):
+        with self.__lock:
+            return len(self.__tasks)
+
+    def register(self, task, owner=None):
+        """
+        Register task
+
+        Args:
+            task (Task|CancelableTimer): task to register
+            owner (string): name of module that owns the task
+        """
+        with self.__lock:
+            self.__tasks[task] = owner
+
+    def unregister(self, task):
+        """
+        Unregister task
+
+        Args:
+            task (Task|CancelableTimer): task to unregister
+        """
+        with self.__lock:
+            self.__tasks.pop(task, None)
+
+    def get_tasks(self):
+        """
+        Return registered tasks
+
+        Returns:
+            list: list of tasks
+        """
+        with self.__lock:
+            return list(self.__tasks.keys())
+
+    def get_stats(self):
+        """
+        Return statistics of registered tasks
+
+        Returns:
+            list: list of task statistics (see Task.get_stats) with extra owner (string) field
+        """
+        with self.__lock:
+            tasks = list(self.__tasks.items())
+
+        stats = []
+        for task, owner in tasks:
+            try:
+                task_stats = task.get_stats()
+            except Exception:
+                self.logger.exception("Unable to get task stats")
+                continue
+            task_stats["owner"] = owner
+            stats.append(task_stats)
+
+        return stats
+
+    def get_summary(self):
+        """
+        Return tasks summary
+
+        Returns:
+            dict: tasks summary::
+
+                {
+                    total (int): number of registered tasks
+                    states (dict): number of tasks per state
+                    overrunning (list): names of active tasks whose last run lasted longer than interval
+                    failing (list): names of tasks whose runs raised an exception
+                }
+
+        """
+        summary = {
+            "total": 0,
+            "states": {},
+            "overrunning": [],
+            "failing": [],
+        }
+        for stats in self.get_stats():
+            summary["total"] += 1
+            summary["states"][stats["state"]] = summary["states"].get(stats["state"], 0) + 1
+            duration = stats.get("duration")
+            if (
+                stats["state"] in self.ACTIVE_STATES
+                and duration
+                and stats["interval"]
+                and duration["last"] > stats["interval"]
+            ):
+                summary["overrunning"].append(stats["name"])
+            if stats.get("failures"):
+                summary["failing"].append(stats["name"])
+
+        return summary
@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import logging
+import heapq
+import itertools
+from threading import Thread, Lock, Condition
+from time import perf_counter
+from cleep.libs.internals.taskexecutor import TaskExecutor, ScheduledCall
+
+__all__ = ["TaskScheduler", "ScheduledCall", "get_scheduler"]
+
+
+class TaskScheduler:
+    """
+    Run scheduled calls from a single dispatcher thread and a small pool of worker threads.
+
+    Scheduled calls are stored in a heap sorted by deadline. The dispatcher sleeps until the
+    nearest deadline (or indefinitely if nothing is scheduled) and hands expired calls to its
+    TaskExecutor, so a slow call never delays other deadlines. Executor queue is unbounded:
+    scheduled calls are never rejected.
+    """
+
+    MAX_WORKERS = 16
+
+    def __init__(self, name="scheduler", max_workers=None):
+        """
+        Constructor
+
+        Args:
+            name (string): scheduler name, used to name threads
+            max_workers (int): maximum number of workers (default MAX_WORKERS)
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.name = name
+        self.max_workers = max_workers or self.MAX_WORKERS
+
+        self.__lock = Lock()
+        self.__wakeup = Condition(self.__lock)
+        self.__heap = []
+        self.__sequence = itertools.count()
+        self.__dispatcher = None
+        self.__stopped = False
+        self.__executor = TaskExecutor(name, self.max_workers, max_queue=0)
+
+    def schedule(self, delay, callback, name=None):
+        """
+        Schedule call
+
+        Args:
+            delay (float): delay before running callback (in seconds). Call is run asap if delay is 0 or negative
+            callback (function): function to call (without parameter)
+            name (string): call name
+
+        Returns:
+            ScheduledCall: scheduled call handle
+        """
+        call = ScheduledCall(
+            self,
+            perf_counter() + max(delay or 0.0, 0.0),
+            next(self.__sequence),
+            callback,
+            name or getattr(callback, "__name__", "unnamed"),
+        )
+
+        with self.__lock:
+            if self.__stopped:
+                self.logger.debug('Call "%s" is not scheduled because scheduler is stopped', call.name)
+                call.cancelled = True
+                return call
+
+            heapq.heappush(self.__heap, call)
+            if self.__dispatcher is None:
+                self.__dispatcher = Thread(target=self.__dispatch, name=f"{self.name}.dispatcher", daemon=True)
+                self.__dispatcher.start()
+            elif self.__heap[0] is call:
+                # new nearest deadline, dispatcher must wait less
+                self.__wakeup.notify()
+
+        return call
+
+    def cancel(self, call):
+        """
+        Cancel scheduled call
+
+        Args:
+            call (ScheduledCall): call to cancel
+        """
+        with self.__lock:
+            call.cancelled = True
+            if self.__heap and self.__heap[0] is call:
+                # drop cancelled calls now so dispatcher does not wake up for nothing
+                while self.__heap and self.__heap[0].cancelled:
+                    heapq.heappop(self.__heap)
+                self.__wakeup.notify()
+
+    def stop(self):
+        """
+        Stop scheduler. Pending calls are cancelled, running calls are not interrupted
+        """
+        with self.__lock:
+            self.__stopped = True
+            for call in self.__heap:
+                call.cancelled = True
+            self.__heap.clear()
+            self.__wakeup.notify_all()
+        self.__executor.stop()
+
+    def get_pending_count(self):
+        """
+        Return number of calls waiting for their deadline or for a worker
+
+        Returns:
+            int: number of pending calls
+        """
+        with self.__lock:
+            pending = len([call for call in self.__heap if not call.cancelled])
+        return pending + self.__executor.get_queue_depth()
+
+    def get_workers_count(self):
+        """
+        Return number of running workers
+
+        Returns:
+            int: number of workers
+        """
+        return self.__executor.get_workers_count()
+
+    def get_stats(self):
+        """
+        Return scheduler statistics
+
+        Returns:
+            dict: statistics::
+
+                {
+                    scheduled (int): number of calls waiting for their deadline
+                    executor (dict): executor statistics (see TaskExecutor.get_stats)
+                }
+
+        """
+        with self.__lock:
+            scheduled = len([call for call in self.__heap if not call.cancelled])
+        return {
+            "scheduled": scheduled,
+            "executor": self.__executor.get_stats(),
+        }
+
+    def __dispatch(self):
+        """
+        Dispatcher thread: wait for nearest deadline and hand expired calls to workers
+        """
+        with self.__lock:
+            while not self.__stopped:
+                if not self.__heap:
+                    self.__wakeup.wait()
+                    continue
+
+                call = self.__heap[0]
+                if call.cancelled:
+                    heapq.heappop(self.__heap)
+                    continue
+
+                timeout = call.deadline - perf_counter()
+                if timeout > 0:
+                    self.__wakeup.wait(timeout)
+                    continue
+
+                heapq.heappop(self.__heap)
+                self.__executor.execute(call)
+
+            self.__dispatcher = None
+
+
+_scheduler = None
+_scheduler_lock = Lock()
+
+
+def get_scheduler():
+    """
+    Return scheduler shared by all tasks
+
+    Returns:
+        TaskScheduler: shared scheduler instance
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = TaskScheduler("tasks")
+        return _scheduler
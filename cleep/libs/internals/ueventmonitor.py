@@ -0,0 +1,355 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import errno
+import time
+import socket
+import struct
+import logging
+from threading import Thread
+from cleep.libs.internals.commandcache import get_command_cache
+
+__all__ = ["UeventMonitor"]
+
+
+class UeventMonitor:
+    """
+    Hardware changes monitor listening to kernel uevents (usb drives, sound cards, network adapters...).
+
+    Events are received from udev netlink group (once udev processed them, so udev database and
+    /dev links are up to date) or from kernel group if udev is not running. For each event:
+
+     - command results cached for event subsystem are invalidated immediately
+     - core.hardware.added/removed/changed bus event is sent once device is quiet for DEBOUNCE_DELAY
+       seconds, successive events of the same device being merged
+
+    Events can also be replayed from a file containing "udevadm monitor --property" output, to test
+    apps without hardware.
+    """
+
+    UDEV_CONTROL = "/run/udev/control"
+    NETLINK_KOBJECT_UEVENT = 15
+    GROUP_KERNEL = 1
+    GROUP_UDEV = 2
+    UDEV_PREFIX = b"libudev\0"
+    UDEV_MAGIC = 0xFEEDCAFE
+    RECV_SIZE = 65536
+    RCVBUF_SIZE = 1024 * 1024
+
+    DEBOUNCE_DELAY = 1.0
+    POLL_DELAY = 1.0
+
+    ACTIONS = {
+        "add": "added",
+        "remove": "removed",
+        "change": "changed",
+        "move": "changed",
+        "online": "changed",
+        "offline": "changed",
+    }
+    # subsystems of published events
+    SUBSYSTEMS = ("block", "net", "sound", "usb", "tty", "input")
+    # command caches invalidated by subsystem
+    CACHES = {
+        "block": ("lsblk", "blkid", "udevadm"),
+        "net": ("ifconfig", "iw", "iwconfig", "iwgetid", "iwlist"),
+        "ieee80211": ("iw", "iwconfig", "iwgetid", "iwlist"),
+        "sound": ("alsa",),
+        "module": ("lsmod",),
+    }
+
+    def __init__(self, bootstrap, debug_enabled, replay_file=None):
+        """
+        Constructor
+
+        Args:
+            bootstrap (dict): bootstrap context
+            debug_enabled (bool): debug enabled flag
+            replay_file (string): replay events from specified file instead of listening to kernel
+        """
+        # logger
+        self.logger = logging.getLogger(self.__class__.__name__)
+        if debug_enabled:  # pragma: no cover
+            self.logger.setLevel(logging.DEBUG)
+
+        # members
+        self.events_broker = bootstrap["events_broker"]
+        self.cache = get_command_cache()
+        self.replay_file = replay_file
+        self.__socket = None
+        self.__thread = None
+        self.__running = False
+        self.__events = {}
+        # pending events by devpath, in arrival order::
+        #   {
+        #       devpath (string): {
+        #           action (string): added, removed or changed
+        #           properties (dict): last event properties
+        #           timestamp (float): last event time
+        #       },
+        #       ...
+        #   }
+        self.__pending = {}
+
+    def start(self):
+        """
+        Start monitoring
+
+        Returns:
+            bool: True if monitor is started, False if uevents cannot be received
+        """
+        if self.__thread:
+            return True
+
+        self.__events = {
+            "added": self.events_broker.get_event_instance("core.hardware.added"),
+            "removed": self.events_broker.get_event_instance("core.hardware.removed"),
+            "changed": self.events_broker.get_event_instance("core.hardware.changed"),
+        }
+        if self.replay_file is None:
+            try:
+                self.__socket = self.__open_socket()
+            except OSError as error:
+                self.logger.warning("Unable to monitor hardware changes: %s", error)
+                return False
+
+        self.__running = True
+        self.__thread = Thread(target=self.__run, name="ueventmonitor", daemon=True)
+        self.__thread.start()
+        return True
+
+    def stop(self):
+        """
+        Stop monitoring. Pending events are sent
+        """
+        self.__running = False
+        thread, self.__thread = self.__thread, None
+        if thread:
+            thread.join()
+
+    def __open_socket(self):
+        """
+        Open uevent netlink socket
+
+        Returns:
+            socket: netlink socket bound to udev group (or kernel group if udev is not running)
+
+        Raises:
+            OSError: if socket cannot be opened
+        """
+        group = self.GROUP_UDEV if os.path.exists(self.UDEV_CONTROL) else self.GROUP_KERNEL
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, self.NETLINK_KOBJECT_UEVENT)
+        try:
+            try:
+                # events bursts (usb hub plugged...) must not overflow socket
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.RCVBUF_SIZE)
+            except OSError:  # pragma: no cover
+                pass
+            sock.bind((0, group))
+        except OSError:
+            sock.close()
+            raise
+
+        self.logger.debug("Listening to %s uevents", "udev" if group == self.GROUP_UDEV else "kernel")
+        return sock
+
+    def __run(self):
+        """
+        Monitor thread
+        """
+        try:
+            if self.replay_file is None:
+                self.__read_socket()
+            else:
+                self.__replay()
+        except Exception:
+            self.logger.exception("Hardware changes monitor stopped")
+        finally:
+            if self.__socket:
+                self.__socket.close()
+                self.__socket = None
+            self.__flush(force=True)
+
+    def __read_socket(self):
+        """
+        Read uevents from netlink socket until monitor is stopped
+        """
+        while self.__running:
+            self.__socket.settimeout(self.__get_wait_timeout())
+            try:
+                data = self.__socket.recv(self.RECV_SIZE)
+                properties = self.__parse_message(data)
+                if properties:
+                    self.__handle_uevent(properties)
+            except socket.timeout:
+                pass
+            except OSError as error:
+                if error.errno != errno.ENOBUFS:
+                    raise
+                # some events were lost: drop everything that may be outdated
+                self.logger.warning("Hardware events lost, all command caches are invalidated")
+                self.cache.invalidate()
+
+            self.__flush()
+
+    def __replay(self):
+        """
+        Replay uevents from replay file
+        """
+        self.logger.info('Replaying hardware events from "%s"', self.replay_file)
+        with open(self.replay_file, encoding="utf-8", errors="replace") as fd:
+            for properties in self.__parse_replay(fd.read()):
+                if not self.__running:
+                    break
+                self.__handle_uevent(properties)
+
+    def __get_wait_timeout(self):
+        """
+        Return how long to wait for next uevent before flushing pending events
+
+        Returns:
+            float: timeout (seconds)
+        """
+        if not self.__pending:
+            return self.POLL_DELAY
+        oldest = min(entry["timestamp"] for entry in self.__pending.values())
+        return min(self.POLL_DELAY, max(0.0, oldest + self.DEBOUNCE_DELAY - time.monotonic()))
+
+    def __parse_message(self, data):
+        """
+        Parse uevent netlink message
+
+        Args:
+            data (bytes): udev message (libudev header followed by properties) or kernel message
+                          ("action@devpath" followed by properties)
+
+        Returns:
+            dict: uevent properties or None if message is invalid
+        """
+        if data.startswith(self.UDEV_PREFIX):
+            if len(data) < 24 or struct.unpack_from("!I", data, 8)[0] != self.UDEV_MAGIC:
+                return None
+            _, properties_off, properties_len = struct.unpack_from("=III", data, 12)
+            fields = data[properties_off : properties_off + properties_len].split(b"\0")
+        else:
+            fields = data.split(b"\0")
+            if not fields or b"@" not in fields[0]:
+                return None
+            fields = fields[1:]
+
+        properties = {}
+        for field in fields:
+            key, separator, value = field.decode("utf-8", errors="replace").partition("=")
+            if separator:
+                properties[key] = value
+        return properties
+
+    def __parse_replay(self, content):
+        """
+        Parse "udevadm monitor --property" output: one block of KEY=VALUE lines per event
+
+        Returns:
+            list: list of uevent properties (dict)
+        """
+        events = []
+        for block in re.split(r"\n\s*\n", content):
+            properties = {}
+            for line in block.splitlines():
+                matches = re.match(r"^([A-Z0-9_]+)=(.*)$", line.strip())
+                if matches:
+                    properties[matches.group(1)] = matches.group(2)
+            if properties:
+                events.append(properties)
+        return events
+
+    def __handle_uevent(self, properties):
+        """
+        Handle uevent: invalidate caches and queue bus event
+
+        Args:
+            properties (dict): uevent properties
+        """
+        action = properties.get("ACTION")
+        subsystem = properties.get("SUBSYSTEM")
+        devpath = properties.get("DEVPATH")
+        if not action or not subsystem or not devpath:
+            return
+        self.logger.trace("Uevent %s %s (%s)", action, devpath, subsystem)
+
+        caches = self.CACHES.get(subsystem)
+        if caches:
+            self.cache.invalidate(*caches)
+
+        event = self.ACTIONS.get(action)
+        if event is None or not self.__is_published(properties):
+            return
+
+        pending = self.__pending.get(devpath)
+        if pending and pending["action"] == "added" and event == "removed":
+            # device plugged and unplugged in debounce period
+            del self.__pending[devpath]
+            return
+        if pending and pending["action"] == "added":
+            # device is still new
+            event = "added"
+        self.__pending[devpath] = {
+            "action": event,
+            "properties": properties,
+            "timestamp": time.monotonic(),
+        }
+
+    def __is_published(self, properties):
+        """
+        Return True if bus event is published for uevent. Only main devices are published: usb
+        devices (not their interfaces) and sound cards (not their pcm and control devices)
+
+        Returns:
+            bool: True if event is published
+        """
+        subsystem = properties["SUBSYSTEM"]
+        if subsystem not in self.SUBSYSTEMS:
+            return False
+        if subsystem == "usb":
+            return properties.get("DEVTYPE") == "usb_device"
+        if subsystem == "sound":
+            return re.match(r"^card\d+$", os.path.basename(properties["DEVPATH"])) is not None
+        return True
+
+    def __flush(self, force=False):
+        """
+        Send bus events of devices that are quiet for DEBOUNCE_DELAY
+
+        Args:
+            force (bool): send all pending events
+        """
+        now = time.monotonic()
+        ready = [
+            devpath
+            for devpath, entry in self.__pending.items()
+            if force or now - entry["timestamp"] >= self.DEBOUNCE_DELAY
+        ]
+        for devpath in ready:
+            entry = self.__pending.pop(devpath)
+            self.__send_event(entry["action"], entry["properties"])
+
+    def __send_event(self, action, properties):
+        """
+        Send core.hardware.<action> bus event
+        """
+        devname = properties.get("DEVNAME")
+        if devname and not devname.startswith("/"):
+            devname = "/dev/%s" % devname
+        params = {
+            "subsystem": properties["SUBSYSTEM"],
+            "devtype": properties.get("DEVTYPE"),
+            "devname": devname,
+            "devpath": properties["DEVPATH"],
+            "properties": properties,
+        }
+        self.logger.debug("Hardware %s: %s", action, params)
+        try:
+            self.__events[action].send(params=params)
+        except Exception:
+            self.logger.exception('Unable to send hardware event "%s"', action)
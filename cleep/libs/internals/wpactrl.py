@@ -0,0 +1,311 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import errno
+import logging
+import socket
+from collections import deque
+from threading import Thread, Lock, Event
+
+__all__ = ["WpaCtrl"]
+
+
+class WpaCtrl:
+    """
+    Persistent client of wpa_supplicant control interface (unix datagram socket of an interface).
+
+    Requests are sent on a single connection and their replies are received in order by a reader
+    thread, so several requests can be sent without waiting for previous replies (pipelining). Client
+    is attached to wpa_supplicant to receive its unsolicited events (CTRL-EVENT-SCAN-RESULTS,
+    CTRL-EVENT-CONNECTED...) that are sent to event callback.
+
+    Note:
+        Protocol description https://w1.fi/wpa_supplicant/devel/ctrl_iface_page.html
+    """
+
+    CTRL_DIR = "/var/run/wpa_supplicant"
+    TIMEOUT = 2.0
+    RECV_SIZE = 65536
+    POLL_DELAY = 1.0
+
+    EVENT_SCAN_RESULTS = "CTRL-EVENT-SCAN-RESULTS"
+    EVENT_CONNECTED = "CTRL-EVENT-CONNECTED"
+    EVENT_DISCONNECTED = "CTRL-EVENT-DISCONNECTED"
+
+    def __init__(self, interface, ctrl_dir=None, event_callback=None):
+        """
+        Constructor
+
+        Args:
+            interface (string): interface name (wlan0...)
+            ctrl_dir (string): wpa_supplicant control interface directory (default CTRL_DIR)
+            event_callback (function): function called with (interface (string), event (string),
+                                       message (string)) when wpa_supplicant sends an event. It is
+                                       called from reader thread and must not block nor send requests
+        """
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.interface = interface
+        self.path = os.path.join(ctrl_dir or self.CTRL_DIR, interface)
+        self.event_callback = event_callback
+
+        self.__lock = Lock()
+        self.__socket = None
+        self.__pending = deque()
+        self.__waiters = []
+
+    def is_connected(self):
+        """
+        Return True if client is connected to wpa_supplicant
+
+        Returns:
+            bool: True if connected
+        """
+        with self.__lock:
+            return self.__socket is not None
+
+    def connect(self):
+        """
+        Connect to wpa_supplicant control interface and attach to its events. Does nothing if
+        client is already connected
+
+        Raises:
+            OSError: if connection failed
+        """
+        with self.__lock:
+            if self.__socket is not None:
+                return
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            try:
+                # autobind to an abstract address, wpa_supplicant replies to sender address
+                sock.bind("")
+                sock.connect(self.path)
+                sock.settimeout(self.POLL_DELAY)
+            except OSError:
+                sock.close()
+                raise
+            self.__socket = sock
+
+        # start reader outside lock: thread start may switch to the new thread
+        Thread(target=self.__read, args=(sock,), name="wpactrl-%s" % self.interface, daemon=True).start()
+
+        try:
+            reply = self.request("ATTACH")
+        except OSError:
+            self.close()
+            raise
+        if reply != "OK":
+            self.close()
+            raise OSError(errno.EPROTO, "Unable to attach to wpa_supplicant: %s" % reply)
+        self.logger.debug("Connected to %s", self.path)
+
+    def close(self):
+        """
+        Close connection. Pending requests fail with ECONNRESET error
+        """
+        with self.__lock:
+            sock, self.__socket = self.__socket, None
+            pending = list(self.__pending)
+            self.__pending.clear()
+        if sock is None:
+            return
+
+        try:
+            sock.send(b"DETACH")
+        except OSError:
+            pass
+        # wake up reader that closes socket: closing it here while reader is blocked on it could make
+        # reader read from a new socket reusing the same file descriptor
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:  # pragma: no cover
+            pass
+        for request in pending:
+            request["error"] = OSError(errno.ECONNRESET, "Connection to wpa_supplicant closed")
+            request["done"].set()
+
+    def request(self, command, timeout=None):
+        """
+        Send request and wait for its reply. Client is connected if necessary
+
+        Args:
+            command (string): wpa_supplicant command (PING, STATUS, SCAN_RESULTS...)
+            timeout (float): reply timeout (default TIMEOUT)
+
+        Returns:
+            string: stripped reply
+
+        Raises:
+            OSError: if request failed or timed out (see requests)
+        """
+        return self.requests([command], timeout)[0]
+
+    def requests(self, commands, timeout=None):
+        """
+        Send requests without waiting for previous replies, then wait for all replies. Connection is
+        closed when a reply times out, so next request reconnects without stale pending requests
+
+        Args:
+            commands (list): list of wpa_supplicant commands
+            timeout (float): replies timeout (default TIMEOUT)
+
+        Returns:
+            list: stripped replies, in commands order
+
+        Raises:
+            OSError: if one request failed or timed out. Error is ENOTCONN if no request was sent
+                     (wpa_supplicant is not available), otherwise requests may have been executed
+        """
+        if not self.is_connected():
+            try:
+                self.connect()
+            except OSError as error:
+                raise OSError(errno.ENOTCONN, "Unable to connect to wpa_supplicant: %s" % error) from error
+
+        requests = []
+        for command in commands:
+            try:
+                requests.append(self.__send(command))
+            except OSError as error:
+                if requests:
+                    raise OSError(errno.ECONNRESET, "Connection to wpa_supplicant lost: %s" % error) from error
+                raise OSError(errno.ENOTCONN, "Unable to send request to wpa_supplicant: %s" % error) from error
+
+        replies = []
+        for command, request in zip(commands, requests):
+            if not request["done"].wait(timeout or self.TIMEOUT):
+                # reply will be dropped by reader when received
+                request["abandoned"] = True
+                self.close()
+                raise OSError(errno.ETIMEDOUT, 'Request "%s" timed out' % command.split(" ", 1)[0])
+            if request["error"]:
+                raise request["error"]
+            replies.append(request["reply"])
+
+        return replies
+
+    def expect_event(self, event):
+        """
+        Register waiter for specified event. Waiter must be registered before sending the request that
+        triggers the event to not miss it
+
+        Args:
+            event (string): event name (see EVENT_XXX)
+
+        Returns:
+            dict: event waiter to use with wait_event
+        """
+        waiter = {"event": event, "done": Event(), "message": None}
+        with self.__lock:
+            self.__waiters.append(waiter)
+        return waiter
+
+    def wait_event(self, waiter, timeout):
+        """
+        Wait for expected event
+
+        Args:
+            waiter (dict): waiter returned by expect_event
+            timeout (float): maximum waiting duration (seconds)
+
+        Returns:
+            string: event message or None if event was not received before timeout
+        """
+        received = waiter["done"].wait(timeout)
+        with self.__lock:
+            if waiter in self.__waiters:
+                self.__waiters.remove(waiter)
+        return waiter["message"] if received else None
+
+    def __send(self, command):
+        """
+        Send request
+
+        Returns:
+            dict: pending request
+
+        Raises:
+            OSError: if request cannot be sent
+        """
+        request = {"done": Event(), "reply": None, "error": None, "abandoned": False}
+        try:
+            with self.__lock:
+                if self.__socket is None:
+                    raise OSError(errno.ENOTCONN, "Not connected to wpa_supplicant")
+                self.__pending.append(request)
+                self.__socket.send(command.encode("utf-8"))
+        except OSError as error:
+            if error.errno != errno.ENOTCONN:
+                # wpa_supplicant is stopped, client will reconnect on next request
+                self.logger.warning("Unable to send request to %s: %s", self.path, error)
+                self.close()
+            raise
+        return request
+
+    def __read(self, sock):
+        """
+        Reader thread: read socket until it is closed
+        """
+        try:
+            self.__read_loop(sock)
+        finally:
+            sock.close()
+
+    def __read_loop(self, sock):
+        """
+        Reader loop: dispatch replies to pending requests and events to waiters and event callback
+        """
+        while True:
+            try:
+                data = sock.recv(self.RECV_SIZE)
+            except socket.timeout:
+                with self.__lock:
+                    if self.__socket is not sock:
+                        return
+                continue
+            except OSError as error:
+                data = None
+                if error.errno != errno.EBADF:
+                    self.logger.warning("Connection to %s lost: %s", self.path, error)
+
+            if not data:
+                # socket closed or wpa_supplicant stopped
+                with self.__lock:
+                    connected = self.__socket is sock
+                if connected:
+                    self.close()
+                return
+
+            message = data.decode("utf-8", errors="replace")
+            event = re.match(r"^<\d>(\S+)\s?(.*)$", message, re.DOTALL)
+            if event:
+                self.__dispatch_event(event.group(1), event.group(2).strip())
+                continue
+
+            with self.__lock:
+                request = self.__pending.popleft() if self.__pending else None
+            if request is None:
+                self.logger.debug("Unexpected reply dropped: %s", message)
+                continue
+            if not request["abandoned"]:
+                request["reply"] = message.strip()
+                request["done"].set()
+
+    def __dispatch_event(self, event, message):
+        """
+        Send event to waiters and event callback
+        """
+        self.logger.debug("Event %s received on %s: %s", event, self.interface, message)
+        with self.__lock:
+            waiters = [waiter for waiter in self.__waiters if waiter["event"] == event]
+            self.__waiters = [waiter for waiter in self.__waiters if waiter["event"] != event]
+        for waiter in waiters:
+            waiter["message"] = message
+            waiter["done"].set()
+
+        if self.event_callback:
+            try:
+                self.event_callback(self.interface, event, message)
+            except Exception:
+                self.logger.exception("Error in event callback")
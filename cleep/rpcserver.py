@@ -13,6 +13,9 @@ Rpcserver implements:
     * command requests
     * module configs requests
     * devices list requests
+    * log file reading
+    * requests profiling
+    * local unix domain socket listener
 
 """
 
@@ -23,14 +26,19 @@ import io
 import json
 import logging
 import os
+import stat
 import uuid
 import uptime
 from passlib.hash import sha256_crypt
-from gevent import pywsgi, pool, sleep
+from gevent import pywsgi, pool, sleep, socket as gsocket
 import bottle
-from cleep.exception import NoMessageAvailable
+from cleep.exception import NoMessageAvailable, RouteNotFound
 from cleep.common import MessageResponse, MessageRequest, CORE_MODULES
 from cleep.libs.configs.cleepconf import CleepConf
+from cleep.libs.internals.logreader import LogReader
+from cleep.libs.internals.requestprofiler import RequestProfiler
+from cleep.libs.internals.startupprofiler import get_startup_profiler
+from cleep.libs.internals.commandcache import get_command_cache
 
 __all__ = ["app"]
 
@@ -39,6 +47,14 @@ BASE_DIR = "/opt/cleep/"
 HTML_DIR = os.path.join(BASE_DIR, "html")
 POLL_TIMEOUT = 60
 SESSION_TIMEOUT = 900  # 15mins
+LOG_FILE = "/var/log/cleep.log"
+LOGS_TAIL_LINES = 1000
+SLOW_REQUEST_THRESHOLD = 1.0
+LONG_POLL_ROUTES = ["POST /poll", "GET /logs/read"]
+UNIX_SOCKET = "/run/cleep.sock"
+UNIX_SOCKET_MODE = 0o660
+UNIX_SOCKET_BACKLOG = 50
+UNIX_SOCKET_WORKERS = 10
 CLEEP_CACHE = None
 LOCAL_ADDRS = ["127.0.0.1", "localhost"]
 try:
@@ -59,11 +75,15 @@ logger = None
 debug_enabled = False
 app = bottle.app()
 server = None
+unix_server = None
 cleep_filesystem = None
 inventory = None
 bus = None
 crash_report = None
 cache_enabled = True
+log_reader = None
+profiler = None
+task_factory = None
 
 
 def load_auth():
@@ -132,13 +152,16 @@ def configure(rpc_config, bootstrap, inventory_, debug_enabled_):
                 ssl (bool): ssl enabled or not
                 ssl_key (str): server SSL key
                 ssl_cert (str): server SSL certificate
+                slow_threshold (float): slow request threshold in seconds (optional)
+                profile_rate (float): rate of requests profiled with cProfile (optional)
+                unix_socket (str): unix domain socket path to listen on (optional)
             }
 
         bootstrap (dict): bootstrap objects
         inventory_ (Inventory): Inventory instance
         debug_enabled_ (bool): debug status
     """
-    global cleep_filesystem, inventory, bus, logger, crash_report, debug_enabled, server
+    global cleep_filesystem, inventory, bus, logger, crash_report, debug_enabled, server, log_reader, profiler, unix_server, task_factory
 
     # configure logger
     logger = logging.getLogger("RpcServer")
@@ -155,6 +178,8 @@ def configure(rpc_config, bootstrap, inventory_, debug_enabled_):
     bus = bootstrap["internal_bus"]
     inventory = inventory_
     crash_report = bootstrap["crash_report"]
+    task_factory = bootstrap.get("task_factory")
+    log_reader = LogReader(bootstrap.get("log_file") or LOG_FILE)
 
     # load auth
     load_auth()
@@ -166,9 +191,79 @@ def configure(rpc_config, bootstrap, inventory_, debug_enabled_):
     port = rpc_config.get("port", 80)
     logger.info("Running RPC server %s://%s:%s", protocol, host, port)
     logger.debug("rpc_config=%s ssl_options=%s", rpc_config, ssl_options)
+    profiler = RequestProfiler(
+        app,
+        rpc_config.get("slow_threshold", SLOW_REQUEST_THRESHOLD),
+        rpc_config.get("profile_rate", 0.0),
+        LONG_POLL_ROUTES,
+    )
     workers = pool.Pool(20)
     server = pywsgi.WSGIServer(
-        (host, port), app, log=logger_requests, error_log=logger, spawn=workers, **ssl_options
+        (host, port), profiler, log=logger_requests, error_log=logger, spawn=workers, **ssl_options
+    )
+
+    # create local server
+    unix_server = None
+    if rpc_config.get("unix_socket"):
+        try:
+            unix_server = create_unix_server(rpc_config["unix_socket"], logger_requests)
+            logger.info("Running RPC server on unix socket %s", rpc_config["unix_socket"])
+        except Exception:
+            logger.exception('Unable to listen on unix socket "%s":', rpc_config["unix_socket"])
+
+
+def is_unix_socket(path):
+    """
+    Check if specified path is an existing unix socket
+
+    Args:
+        path (str): path to check
+
+    Returns:
+        bool: True if path is a unix socket
+    """
+    try:
+        return stat.S_ISSOCK(os.stat(path).st_mode)
+    except OSError:
+        return False
+
+
+def create_unix_server(socket_path, logger_requests):
+    """
+    Create server listening on unix domain socket. It serves same routes than main server without
+    network stack overhead and is only reachable by local processes.
+
+    Server has its own workers pool so stopping it does not kill main server requests.
+
+    Args:
+        socket_path (str): unix socket path
+        logger_requests (Logger): requests logger
+
+    Returns:
+        WSGIServer: server instance
+
+    Raises:
+        Exception: if socket path exists and is not a socket
+    """
+    if is_unix_socket(socket_path):
+        # remove stale socket
+        os.remove(socket_path)
+    elif os.path.lexists(socket_path):
+        raise Exception(f'Path "{socket_path}" already exists and is not a socket')
+
+    listener = gsocket.socket(gsocket.AF_UNIX, gsocket.SOCK_STREAM)
+    listener.bind(socket_path)
+    os.chmod(socket_path, UNIX_SOCKET_MODE)
+    listener.listen(UNIX_SOCKET_BACKLOG)
+
+    # unix socket clients are local clients
+    return pywsgi.WSGIServer(
+        listener,
+        profiler,
+        log=logger_requests,
+        error_log=logger,
+        spawn=pool.Pool(UNIX_SOCKET_WORKERS),
+        environ={"REMOTE_ADDR": "localhost"},
     )
 
 
@@ -215,6 +310,8 @@ def start():
     """
     try:
         logger.debug("Starting RPC server")
+        if unix_server:
+            unix_server.start()
         server.serve_forever()
 
     except KeyboardInterrupt:
@@ -232,6 +329,7 @@ def start():
         if server:
             server.close()
             server.stop()
+        stop_unix_server()
 
 def stop():
     """
@@ -239,6 +337,22 @@ def stop():
     """
     server.close()
     server.stop()
+    stop_unix_server()
+
+def stop_unix_server():
+    """
+    Stop unix socket server and remove socket file
+    """
+    if not unix_server:
+        return
+
+    unix_server.close()
+    unix_server.stop()
+    try:
+        if isinstance(unix_server.address, str) and is_unix_socket(unix_server.address):
+            os.remove(unix_server.address)
+    except Exception:  # pragma: no cover
+        logger.exception("Unable to remove unix socket:")
 
 def check_auth(account, password):
     """
@@ -651,6 +765,8 @@ def exec_command():
             else handle_post_command()
         )
         resp = send_command(command, to, params, timeout)
+        # record command once its recipient is resolved
+        bottle.request.environ[RequestProfiler.ENVIRON_COMMAND] = (to, command)
 
     except Exception as error:
         logger.exception(
@@ -663,6 +779,7 @@ def exec_command():
         )
         resp = MessageResponse(error=True, message=str(error))
 
+    bottle.request.environ[RequestProfiler.ENVIRON_ERROR] = resp.error
     return resp.to_dict()
 
 
@@ -869,6 +986,108 @@ def get_config():
     return resp.to_dict()
 
 
+@app.route("/profiling", method="GET")
+@authenticate()
+def get_profiling():
+    """
+    Return requests profiling statistics
+
+    Returns:
+        MessageResponse: requests statistics (see RequestProfiler.get_stats)
+    """
+    resp = MessageResponse()
+    if not profiler:
+        resp.error = True
+        resp.message = "Profiling is not available"
+    else:
+        resp.data = profiler.get_stats()
+
+    return resp.to_dict()
+
+
+@app.route("/profiling", method="POST")
+@authenticate()
+def set_profiling():
+    """
+    Configure requests profiling
+
+    Args:
+        slow_threshold (float): slow request threshold in seconds
+        profile_rate (float): rate of requests profiled with cProfile (0.0 to disable)
+        reset (bool): clear recorded statistics
+
+    Returns:
+        MessageResponse: requests statistics (see RequestProfiler.get_stats)
+    """
+    params = dict(bottle.request.json or {})
+    logger.debug("Profiling params: %s", params)
+
+    resp = MessageResponse()
+    try:
+        if not profiler:
+            raise Exception("Profiling is not available")
+        profiler.configure(params.get("slow_threshold"), params.get("profile_rate"))
+        if params.get("reset"):
+            profiler.reset()
+        resp.data = profiler.get_stats()
+    except Exception as error:
+        logger.exception("Unable to configure profiling:")
+        resp.error = True
+        resp.message = str(error)
+
+    return resp.to_dict()
+
+
+@app.route("/profiling/startup", method="GET")
+@authenticate()
+def get_startup_profiling():
+    """
+    Return last boot profile (Cleep started with --profile-startup)
+
+    Returns:
+        MessageResponse: boot profile (see StartupProfiler.get_report)
+    """
+    resp = MessageResponse()
+    report = get_startup_profiler().get_last_report(cleep_filesystem)
+    if report is None:
+        resp.error = True
+        resp.message = "No startup profile available"
+    else:
+        resp.data = report
+
+    return resp.to_dict()
+
+
+@app.route("/tasks", method="GET")
+@authenticate()
+def get_tasks():
+    """
+    Return tasks statistics
+
+    Returns:
+        MessageResponse: tasks statistics::
+
+            {
+                tasks (list): list of task statistics (see TaskFactory.get_tasks)
+                scheduler (dict): periodic tasks scheduler statistics (see TaskScheduler.get_stats)
+                executor (dict): one-shot tasks executor statistics (see TaskExecutor.get_stats)
+            }
+
+    """
+    resp = MessageResponse()
+    try:
+        if not task_factory:
+            raise Exception("Tasks statistics are not available")
+        resp.data = task_factory.get_stats()
+        resp.data["tasks"] = task_factory.get_tasks()
+    except Exception as error:
+        logger.exception("Unable to get tasks statistics:")
+        resp.error = True
+        resp.message = str(error)
+
+    return resp.to_dict()
+
+
 @app.route("/registerpoll", method="POST")
 def registerpoll():
     """
@@ -965,7 +1184,11 @@ def rpc_wrapper(route):
     Custom rpc route used to implement wrappers (ie REST=>RPC)
     This route is intended to be used with external services like alexa
     """
-    return inventory.rpc_wrapper(route, bottle.request)
+    try:
+        return inventory.rpc_wrapper(route, bottle.request)
+    except RouteNotFound as error:
+        logger.debug("Rpc wrapper: %s", error)
+        return bottle.HTTPError(404, str(error))
 
 
 @app.route("/<path:path>", method="GET")
@@ -998,7 +1221,12 @@ def index():
 @authenticate()
 def logs(): # pragma: no cover
     """
-    Serve log file
+    Serve last lines of log file
+
+    Args:
+        tail (int): number of lines to display (default LOGS_TAIL_LINES)
+        level (str): minimum level of displayed records
+        logger (str): display only records of specified logger
     """
     script = """<script src="https://cdn.jsdelivr.net/gh/google/code-prettify@master/loader/run_prettify.js"></script>
     <script type="text/javascript">
@@ -1010,8 +1238,16 @@ def logs(): # pragma: no cover
     </script>"""
     content = '<pre class="prettyprint" style="white-space: pre-wrap; white-space: -moz-pre-wrap; white-space: -pre-wrap; white-space: -o-pre-wrap; word-wrap: break-word;">%s</pre>'
 
-    lines = cleep_filesystem.read_data("/var/log/cleep.log")
-    lines = "" if not lines else lines
+    query = dict(bottle.request.query or {})
+    try:
+        lines = log_reader.tail(
+            query.get("tail", LOGS_TAIL_LINES),
+            level=query.get("level"),
+            logger_name=query.get("logger"),
+        )["lines"]
+    except Exception as error:
+        logger.exception("Unable to read log file:")
+        lines = [str(error)]
 
     return (
         "<html>\n<head>\n"
@@ -1022,6 +1258,60 @@ def logs(): # pragma: no cover
     )
 
 
+@app.route("/logs/read", method="GET")
+@authenticate()
+def read_logs():
+    """
+    Read log file lines using bounded memory
+
+    Parameters must be specified in uri: http://mydomain.com/logs/read?tail=100&level=warning
+
+    Args:
+        tail (int): return last lines of log file. Ignored if offset is specified
+        offset (int): return lines from specified byte offset (offset returned by previous call)
+        follow (bool): if offset is specified, wait until new lines are available (long poll). Each follower
+            holds a server worker up to POLL_TIMEOUT, so number of concurrent followers is limited
+        level (str): minimum level of returned records
+        logger (str): return only records of specified logger
+        maxbytes (int): maximum number of bytes to read from offset
+
+    Returns:
+        MessageResponse: read result::
+
+            {
+                lines (list): list of lines
+                offset (int): offset to use to read next lines
+                size (int): current log file size
+            }
+
+    """
+    query = dict(bottle.request.query or {})
+    logger.trace("Read logs params: %s", query)
+    filters = {
+        "level": query.get("level"),
+        "logger_name": query.get("logger"),
+    }
+
+    resp = MessageResponse()
+    try:
+        if query.get("offset") is None:
+            resp.data = log_reader.tail(query.get("tail", LOGS_TAIL_LINES), **filters)
+        elif query.get("follow") in ("1", "true", "True"):
+            resp.data = log_reader.follow(
+                query.get("offset"), POLL_TIMEOUT, max_bytes=query.get("maxbytes"), **filters
+            )
+        else:
+            resp.data = log_reader.read(
+                query.get("offset"), max_bytes=query.get("maxbytes"), **filters
+            )
+    except Exception as error:
+        logger.exception("Unable to read log file:")
+        resp.error = True
+        resp.message = str(error)
+
+    return resp.to_dict()
+
+
 @app.route("/health", method="GET")
 def health():  # pragma: no cover
     """
@@ -1034,6 +1324,8 @@ def health():  # pragma: no cover
             details (dict): health status per app (True if started)
             core_ok (bool): True if all core apps are healthy
             apps_ok (bool): True if all user apps are healthy
+            tasks (dict): tasks summary (see TaskRegistry.get_summary) or None if not available
+            command_cache (dict): command results cache statistics (see CommandCache.get_stats)
         }
 
     """
@@ -1053,6 +1345,8 @@ def health():  # pragma: no cover
         "started": apps_health,
         "core_ok": core_ok,
         "apps_ok": apps_ok,
+        "tasks": task_factory.get_tasks_summary() if task_factory else None,
+        "command_cache": get_command_cache().get_stats(),
     }
     bottle.response.content_type = "application/json"
     bottle.response.status = status_code
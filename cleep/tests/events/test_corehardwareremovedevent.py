@@ -0,0 +1,31 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.dirname(__file__)).replace('tests/', ''))
+from corehardwareremovedevent import CoreHardwareRemovedEvent
+import logging
+import unittest
+from unittest.mock import Mock
+from cleep.libs.tests.common import get_log_level
+
+LOG_LEVEL = get_log_level()
+
+class CoreHardwareRemovedEventTests(unittest.TestCase):
+
+    def setUp(self):
+        logging.basicConfig(level=LOG_LEVEL, format=u'%(asctime)s %(name)s:%(lineno)d %(levelname)s : %(message)s')
+        params = { 
+            'internal_bus': Mock(),
+            'formatters_broker': Mock(),
+            'get_external_bus_name': None,
+        }   
+        self.event = CoreHardwareRemovedEvent(params)
+
+    def test_event_params(self):
+        self.assertEqual(self.event.EVENT_PARAMS, ['subsystem', 'devtype', 'devname', 'devpath', 'properties'])
+
+if __name__ == '__main__':
+    # coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread test_corehardwareremovedevent.py; coverage report -m -i
+    unittest.main()
@@ -5,10 +5,13 @@ import os
 import sys
 sys.path.append(os.path.abspath(os.path.dirname(__file__)).replace('tests/', ''))
 from alsa import Alsa
+from cleep.libs.internals.commandcache import get_command_cache
 from cleep.exception import MissingParameter, InvalidParameter, CommandError
 from cleep.libs.tests.lib import TestLib
 import unittest
 import logging
+import shutil
+import tempfile
 from pprint import pformat
 from unittest.mock import patch, Mock
 from cleep.libs.tests.common import get_log_level
@@ -74,15 +77,37 @@ numid=2,iface=MIXER,name='PCM Playback Switch'
 numid=1,iface=MIXER,name='PCM Playback Volume'
 numid=5,iface=PCM,name='IEC958 Playback Con Mask'
 numid=4,iface=PCM,name='IEC958 Playback Default'"""
+    SAMPLE_PROC_CARDS = """ 0 [ALSA           ]: bcm2835_alsa - bcm2835 ALSA
+                      bcm2835 ALSA
+ 1 [UACDemoV10     ]: USB-Audio - UACDemoV1.0
+                      Jieli Technology UACDemoV1.0 at usb-3f980000.usb-1.4, full speed
+"""
+    SAMPLE_PROC_PCM = """00-00: bcm2835 ALSA : bcm2835 ALSA : playback 7
+00-01: bcm2835 IEC958/HDMI : bcm2835 IEC958/HDMI1 : playback 1
+01-00: USB Audio : USB Audio : playback 1 : capture 1
+"""
 
     def setUp(self):
         TestLib()
         logging.basicConfig(level=LOG_LEVEL, format='%(asctime)s %(name)s %(levelname)s : %(message)s')
         self.fs = Mock()
-        self.a = Alsa(self.fs)
+        self.a = Alsa(self.fs, use_procfs=False)
+        get_command_cache().invalidate('alsa')
+        self.proc_path = None
 
     def tearDown(self):
-        pass
+        if self.proc_path:
+            shutil.rmtree(self.proc_path)
+
+    def make_proc(self):
+        self.proc_path = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.proc_path, 'asound'))
+        with open(os.path.join(self.proc_path, 'asound', 'cards'), 'w') as fd:
+            fd.write(self.SAMPLE_PROC_CARDS)
+        with open(os.path.join(self.proc_path, 'asound', 'pcm'), 'w') as fd:
+            fd.write(self.SAMPLE_PROC_PCM)
+        self.a.use_procfs = True
+        self.a.asound.proc_path = self.proc_path
 
     def make_command_result(self, return_code=0, error=False, killed=False, stdout='', stderr=''):
         return {
@@ -146,6 +171,71 @@ numid=4,iface=PCM,name='IEC958 Playback Default'"""
         self.assertEqual(1, len(devs))
         self.assertEqual(devs[0]['devices'][0]['name'], 'ATI IXP AC97')
 
+    def test_get_playback_devices_from_procfs(self):
+        self.make_proc()
+        self.a.command = Mock()
+
+        devs = self.a.get_playback_devices()
+        logging.debug(pformat(devs))
+
+        self.a.command.assert_not_called()
+        self.assertEqual(devs[0]['name'], 'ALSA')
+        self.assertEqual(devs[0]['desc'], 'bcm2835 ALSA')
+        self.assertEqual(devs[0]['devices'][1], {
+            'deviceid': 1,
+            'cardid': 0,
+            'name': 'bcm2835 IEC958/HDMI',
+            'desc': 'bcm2835 IEC958/HDMI1',
+        })
+        self.assertEqual(devs[1]['name'], 'UACDemoV10')
+        self.assertEqual(devs[1]['desc'], 'UACDemoV1.0')
+
+    def test_get_capture_devices_from_procfs(self):
+        self.make_proc()
+        self.a.command = Mock()
+
+        devs = self.a.get_capture_devices()
+
+        self.a.command.assert_not_called()
+        self.assertEqual(list(devs.keys()), [1])
+        self.assertEqual(devs[1]['devices'][0]['name'], 'USB Audio')
+
+    def test_get_playback_devices_procfs_not_available(self):
+        self.make_proc()
+        os.remove(os.path.join(self.proc_path, 'asound', 'cards'))
+        self.a.command = Mock(return_value=self.make_command_result(stdout=self.SAMPLE_PLAYBACK_DEVICES))
+
+        devs = self.a.get_playback_devices()
+
+        self.a.command.assert_called_with('/usr/bin/aplay --list-devices', 2.0)
+        self.assertEqual(len(devs[0]['devices']), 3)
+
+    def test_get_controls_cached_until_change(self):
+        self.a.asound = Mock()
+        self.a.asound.has_changed.return_value = False
+        self.a.command = Mock(return_value=self.make_command_result(stdout=self.SAMPLE_CONTROLS))
+
+        self.assertEqual(len(self.a.get_controls()), 5)
+        self.assertEqual(len(self.a.get_controls()), 5)
+        self.assertEqual(self.a.command.call_count, 1)
+
+        self.a.asound.has_changed.return_value = True
+        self.assertEqual(len(self.a.get_controls()), 5)
+        self.assertEqual(self.a.command.call_count, 2)
+
+    def test_set_volume_invalidates_cached_volume(self):
+        self.a.asound = Mock()
+        self.a.asound.has_changed.return_value = False
+        self.a.command = Mock(return_value=self.make_command_result(stdout=self.SAMPLE_GET_VOLUME))
+        self.assertEqual(self.a.get_volume('PCM', self.PLAYBACK_PATTERN), 77)
+        self.assertEqual(self.a.get_volume('PCM', self.PLAYBACK_PATTERN), 77)
+        self.assertEqual(self.a.command.call_count, 1)
+
+        self.a.command = Mock(return_value=self.make_command_result(stdout=self.SAMPLE_SET_VOLUME))
+        self.assertEqual(self.a.set_volume('PCM', self.PLAYBACK_PATTERN, 25), 25)
+        self.assertEqual(self.a.get_volume('PCM', self.PLAYBACK_PATTERN), 25)
+        self.assertEqual(self.a.command.call_count, 2)
+
     def test_get_volume(self):
         self.a.command = Mock(return_value=self.make_command_result(stdout=self.SAMPLE_GET_VOLUME))
         volume = self.a.get_volume('PCM', self.PLAYBACK_PATTERN)
@@ -9,6 +9,7 @@ from blkid import Blkid
 from cleep.libs.internals.cleepfilesystem import CleepFilesystem
 from cleep.exception import MissingParameter, InvalidParameter, CommandError
 from cleep.libs.tests.lib import TestLib
+from cleep.libs.internals.commandcache import get_command_cache
 import unittest
 import logging
 from pprint import pformat
@@ -25,10 +26,11 @@ CONTENT = [
 class BlkidTests(unittest.TestCase):
     def setUp(self):
         TestLib()
+        get_command_cache().invalidate()
         logging.basicConfig(
             level=LOG_LEVEL, format=u"%(asctime)s %(name)s %(levelname)s : %(message)s"
         )
-        self.b = Blkid()
+        self.b = Blkid(use_sysfs=False)
         self.b.command = Mock(return_value={"killed": False, "error": False, "stdout": CONTENT})
 
     def tearDown(self):
@@ -43,6 +45,62 @@ class BlkidTests(unittest.TestCase):
                 device.find("/dev") != -1, "Device should contains /dev/xxx"
             )
 
+    def test_cache_shared_between_instances(self):
+        self.b.get_devices()
+        other = Blkid(use_sysfs=False)
+        other.command = Mock()
+
+        devices = other.get_devices()
+
+        self.assertEqual(len(devices), 2)
+        other.command.assert_not_called()
+        self.b.command.assert_called_once()
+
+    def test_cache_not_shared_between_backends(self):
+        self.b.get_devices()
+        other = Blkid()
+        other.blockdevices = Mock()
+        other.blockdevices.get_filesystems.return_value = {
+            "/dev/sda1": {"device": "/dev/sda1", "uuid": "1234", "type": "vfat", "partuuid": "abcd-01"},
+        }
+
+        devices = other.get_devices()
+
+        self.assertEqual(list(devices.keys()), ["/dev/sda1"])
+
+    def test_get_devices_from_sysfs(self):
+        self.b = Blkid()
+        self.b.command = Mock()
+        self.b.blockdevices = Mock()
+        self.b.blockdevices.get_filesystems.return_value = {
+            "/dev/sda1": {"device": "/dev/sda1", "uuid": "1234", "type": "vfat", "partuuid": "abcd-01"},
+        }
+
+        devices = self.b.get_devices()
+
+        self.assertEqual(list(devices.keys()), ["/dev/sda1"])
+        self.b.command.assert_not_called()
+
+    def test_get_devices_sysfs_not_available(self):
+        self.b.use_sysfs = True
+        self.b.blockdevices = Mock()
+        self.b.blockdevices.is_udev_available.return_value = False
+
+        devices = self.b.get_devices()
+
+        self.assertEqual(len(devices), 2)
+        self.b.blockdevices.get_filesystems.assert_not_called()
+
+    def test_get_devices_sysfs_failed(self):
+        self.b.use_sysfs = True
+        self.b.blockdevices = Mock()
+        self.b.blockdevices.get_filesystems.side_effect = Exception("Test exception")
+
+        devices = self.b.get_devices()
+
+        self.assertEqual(len(devices), 2)
+        self.b.command.assert_called_once()
+
     def test_get_device_by_uuid(self):
         devices = self.b.get_devices()
         logging.debug("Devices: %s" % self.b.devices)
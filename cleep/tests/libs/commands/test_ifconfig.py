@@ -6,6 +6,7 @@ import os
 sys.path.append(os.path.abspath(os.path.dirname(__file__)).replace('tests/', ''))
 from ifconfig import Ifconfig
 from cleep.libs.tests.lib import TestLib
+from cleep.libs.internals.commandcache import get_command_cache
 import unittest
 import logging
 from cleep.libs.tests.common import get_log_level
@@ -17,6 +18,7 @@ class IfconfigTests(unittest.TestCase):
 
     def setUp(self):
         TestLib()
+        get_command_cache().invalidate()
         logging.basicConfig(level=LOG_LEVEL, format=u'%(asctime)s %(name)s %(levelname)s : %(message)s')
         self.i = Ifconfig()
 
@@ -38,7 +38,7 @@ valid_lft forever preferred_lft forever"""
     def setUp(self):
         TestLib()
         logging.basicConfig(level=LOG_LEVEL, format=u'%(asctime)s %(name)s %(levelname)s : %(message)s')
-        self.i = Ip()
+        self.i = Ip(use_netlink=False)
 
     def tearDown(self):
         pass
@@ -82,6 +82,66 @@ valid_lft forever preferred_lft forever"""
             },
         })
 
+    @patch('ip.netifaces')
+    def test_get_status_from_netifaces(self, netifaces_mock):
+        self.i = Ip()
+        self.i.command = Mock()
+        netifaces_mock.AF_LINK = 17
+        netifaces_mock.AF_INET = 2
+        netifaces_mock.AF_INET6 = 10
+        netifaces_mock.interfaces.return_value = ['lo', 'wlan0', 'eth0']
+        netifaces_mock.ifaddresses.side_effect = lambda interface: {
+            'wlan0': {
+                17: [{'addr': 'b8:27:eb:27:cb:ea'}],
+                2: [{'addr': '192.168.1.245', 'mask': '255.255.255.0'}, {'addr': '192.168.1.246', 'mask': '255.255.0.0'}],
+                10: [
+                    {'addr': '2a01:cb00::1', 'mask': 'ffff:ffff:ffff:ffff::/64'},
+                    {'addr': 'fe80::fba7:532b:6249:b63a%wlan0', 'mask': 'ffff:ffff:ffff:ffff::'},
+                ],
+            },
+            'eth0': {
+                17: [{'addr': 'b8:27:eb:72:9e:bf'}],
+            },
+        }[interface]
+
+        status = self.i.get_status()
+        logging.debug('Status: %s' % status)
+
+        self.assertDictEqual(status, {
+            'wlan0': {
+                'interface': 'wlan0',
+                'ipv4': '192.168.1.245',
+                'netmask': '255.255.255.0',
+                'ipv6': 'fe80::fba7:532b:6249:b63a',
+                'prefixlen': 64,
+                'mac': 'b8:27:eb:27:cb:ea',
+            },
+            'eth0': {
+                'interface': 'eth0',
+                'ipv4': None,
+                'netmask': None,
+                'ipv6': None,
+                'prefixlen': None,
+                'mac': 'b8:27:eb:72:9e:bf',
+            },
+        })
+        self.i.command.assert_not_called()
+
+    @patch('ip.netifaces')
+    def test_get_status_netifaces_failed(self, netifaces_mock):
+        self.i = Ip()
+        netifaces_mock.interfaces.side_effect = Exception('Test exception')
+        self.i.command = Mock(return_value={
+            'returncode': 0,
+            'stdout': self.SAMPLE_IP_A.split('\n'),
+            'stderr': [],
+            'killed': False
+        })
+
+        status = self.i.get_status()
+
+        self.assertEqual(sorted(status.keys()), ['enxb827eb729ebf', 'wlan0'])
+
     def test_restart_interface(self):
         self.i.command = Mock(return_value={
             'returncode': 0,
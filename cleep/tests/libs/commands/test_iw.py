@@ -7,6 +7,7 @@ import os
 sys.path.append(os.path.abspath(os.path.dirname(__file__)).replace("tests/", ""))
 from iw import Iw
 from cleep.libs.tests.lib import TestLib
+from cleep.libs.internals.commandcache import get_command_cache
 import unittest
 import logging
 from cleep.libs.tests.common import get_log_level
@@ -33,10 +34,11 @@ OUTPUT = [
 class IwTests(unittest.TestCase):
     def setUp(self):
         TestLib()
+        get_command_cache().invalidate()
         logging.basicConfig(
             level=LOG_LEVEL, format=u"%(asctime)s %(name)s %(levelname)s : %(message)s"
         )
-        self.i = Iw()
+        self.i = Iw(use_netlink=False)
 
     def tearDown(self):
         pass
@@ -55,6 +57,34 @@ class IwTests(unittest.TestCase):
             self.assertTrue("interface" in values)
             self.assertTrue("network" in values)
 
+    def test_get_adapters_from_nl80211(self):
+        self.i = Iw()
+        self.i.command = Mock()
+        self.i.nl80211 = Mock()
+        self.i.nl80211.get_interfaces.return_value = {
+            'wlan0': {'interface': 'wlan0', 'wiphy': 0, 'type': 2, 'network': 'mywifinetwork'},
+            'wlan1': {'interface': 'wlan1', 'wiphy': 1, 'type': 2, 'network': None},
+        }
+
+        adapters = self.i.get_adapters()
+
+        self.assertDictEqual(adapters, {
+            "wlan0": {"interface": "wlan0", "network": "mywifinetwork"},
+            "wlan1": {"interface": "wlan1", "network": None},
+        })
+        self.i.command.assert_not_called()
+
+    def test_get_adapters_nl80211_failed(self):
+        self.i = Iw()
+        self.i.command = Mock(return_value={"stdout": OUTPUT, "returncode": 0})
+        self.i.nl80211 = Mock()
+        self.i.nl80211.get_interfaces.side_effect = OSError("Test exception")
+
+        adapters = self.i.get_adapters()
+
+        self.assertEqual(list(adapters.keys()), ["wlan0"])
+        self.i.command.assert_called_once()
+
 
 if __name__ == "__main__":
     # coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread test_iw.py; coverage report -m -i
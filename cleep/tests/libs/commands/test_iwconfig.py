@@ -6,6 +6,7 @@ import os
 sys.path.append(os.path.abspath(os.path.dirname(__file__)).replace('tests/', ''))
 from iwconfig import Iwconfig
 from cleep.libs.tests.lib import TestLib
+from cleep.libs.internals.commandcache import get_command_cache
 import unittest
 import logging
 from unittest.mock import Mock
@@ -37,8 +38,9 @@ class IwconfigTests(unittest.TestCase):
 
     def setUp(self):
         TestLib()
+        get_command_cache().invalidate()
         logging.basicConfig(level=LOG_LEVEL, format=u'%(asctime)s %(name)s:%(lineno)d %(levelname)s : %(message)s')
-        self.i = Iwconfig()
+        self.i = Iwconfig(use_netlink=False)
 
     def tearDown(self):
         pass
@@ -60,6 +62,39 @@ class IwconfigTests(unittest.TestCase):
         if len(interfaces)>0:
             interface = interfaces[list(interfaces.keys())[0]]
             self.assertTrue('network' in list(interface.keys()))
+    def test_get_interfaces_from_nl80211(self):
+        self.i = Iwconfig()
+        self.i.command = Mock()
+        self.i.nl80211 = Mock()
+        self.i.nl80211.get_interfaces.return_value = {
+            'wlan0': {'interface': 'wlan0', 'wiphy': 0, 'type': 2, 'network': 'mywifinetwork'},
+            'wlan1': {'interface': 'wlan1', 'wiphy': 1, 'type': 2, 'network': None},
+        }
+
+        interfaces = self.i.get_interfaces()
+
+        self.assertDictEqual(interfaces, {
+            'wlan0': {'network': 'mywifinetwork'},
+            'wlan1': {'network': None},
+        })
+        self.i.command.assert_not_called()
+
+    def test_get_interfaces_nl80211_failed(self):
+        self.i = Iwconfig()
+        self.i.command = Mock(return_value={
+            'returncode': 0,
+            'error': False,
+            'killed': False,
+            'stdout': FAKE_OUPUT.split('\n'),
+            'stderr': None,
+        })
+        self.i.nl80211 = Mock()
+        self.i.nl80211.get_interfaces.side_effect = OSError('Test exception')
+
+        interfaces = self.i.get_interfaces()
+
+        self.assertGreaterEqual(len(interfaces), 1)
+        self.i.command.assert_called_once()
 
 if __name__ == '__main__':
     # coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread test_iwconfig.py; coverage report -m -i
@@ -6,6 +6,7 @@ import os
 sys.path.append(os.path.abspath(os.path.dirname(__file__)).replace('tests/', ''))
 from iwgetid import Iwgetid
 from cleep.libs.tests.lib import TestLib
+from cleep.libs.internals.commandcache import get_command_cache
 import unittest
 import logging
 from unittest.mock import Mock
@@ -18,8 +19,9 @@ class IwgetidTests(unittest.TestCase):
 
     def setUp(self):
         TestLib()
+        get_command_cache().invalidate()
         logging.basicConfig(level=LOG_LEVEL, format=u'%(asctime)s %(name)s:%(lineno)d %(levelname)s : %(message)s')
-        self.i = Iwgetid()
+        self.i = Iwgetid(use_netlink=False)
 
     def tearDown(self):
         pass
@@ -57,6 +59,26 @@ class IwgetidTests(unittest.TestCase):
 
         self.assertEqual(self.i.command.call_count, 1)
 
+    def test_get_connections_cache_not_shared_between_backends(self):
+        self.i.command = Mock(return_value={
+            'returncode': 0,
+            'error': False,
+            'killed': False,
+            'stderr': [],
+            'stdout': ['wlan0     ESSID:"mywifinetwork"']
+        })
+        self.i.get_last_return_code = Mock(return_value=0)
+        self.i.get_connections()
+        other = Iwgetid()
+        other.nl80211 = Mock()
+        other.nl80211.get_interfaces.return_value = {
+            'wlan1': {'interface': 'wlan1', 'wiphy': 1, 'type': 2, 'network': 'othernetwork'},
+        }
+
+        connections = other.get_connections()
+
+        self.assertDictEqual(connections, {'wlan1': {'network': 'othernetwork'}})
+
     def test_get_connections_failed(self):
         self.i.command = Mock(return_value={
             'returncode': 1,
@@ -71,6 +93,35 @@ class IwgetidTests(unittest.TestCase):
         logging.debug(connections)
 
         self.assertEqual(len(connections), 0, 'Connections list should be empty when command fails')
+    def test_get_connections_from_nl80211(self):
+        self.i = Iwgetid()
+        self.i.command = Mock()
+        self.i.nl80211 = Mock()
+        self.i.nl80211.get_interfaces.return_value = {
+            'wlan0': {'interface': 'wlan0', 'wiphy': 0, 'type': 2, 'network': 'mywifinetwork'},
+            'wlan1': {'interface': 'wlan1', 'wiphy': 1, 'type': 2, 'network': None},
+        }
+
+        connections = self.i.get_connections()
+
+        self.assertDictEqual(connections, {'wlan0': {'network': 'mywifinetwork'}})
+        self.i.command.assert_not_called()
+
+    def test_get_connections_nl80211_failed(self):
+        self.i = Iwgetid()
+        self.i.command = Mock(return_value={
+            'returncode': 0,
+            'error': False,
+            'killed': False,
+            'stderr': [],
+            'stdout': ['wlan0     ESSID:"mywifinetwork"']
+        })
+        self.i.nl80211 = Mock()
+        self.i.nl80211.get_interfaces.side_effect = OSError('Test exception')
+
+        connections = self.i.get_connections()
+
+        self.assertDictEqual(connections, {'wlan0': {'network': 'mywifinetwork'}})
 
 if __name__ == '__main__':
     # coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread test_iwgetid.py; coverage report -m -i
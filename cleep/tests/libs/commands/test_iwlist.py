@@ -7,6 +7,7 @@ sys.path.append(os.path.abspath(os.path.dirname(__file__)).replace('tests/', '')
 from iwlist import Iwlist
 from cleep.libs.configs.wpasupplicantconf import WpaSupplicantConf
 from cleep.libs.tests.lib import TestLib
+from cleep.libs.internals.commandcache import get_command_cache
 from unittest.mock import Mock
 import unittest
 import logging
@@ -394,6 +395,7 @@ class IwlistTests(unittest.TestCase):
 
     def setUp(self):
         TestLib()
+        get_command_cache().invalidate()
         logging.basicConfig(level=LOG_LEVEL, format=u'%(asctime)s %(name)s %(levelname)s : %(message)s')
         self.i = Iwlist()
 
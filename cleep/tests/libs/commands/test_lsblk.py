@@ -6,9 +6,11 @@ import os
 sys.path.append(os.path.abspath(os.path.dirname(__file__)).replace('tests/', ''))
 from lsblk import Lsblk
 from cleep.libs.tests.lib import TestLib
+from cleep.libs.internals.commandcache import get_command_cache
 import unittest
 import logging
 import time
+from unittest.mock import Mock
 from cleep.libs.tests.common import get_log_level
 
 LOG_LEVEL = get_log_level()
@@ -18,6 +20,7 @@ class LsblkTests(unittest.TestCase):
 
     def setUp(self):
         TestLib()
+        get_command_cache().invalidate()
         logging.basicConfig(level=LOG_LEVEL, format=u'%(asctime)s %(name)s:%(lineno)d %(levelname)s : %(message)s')
         self.l = Lsblk()
 
@@ -88,6 +91,45 @@ class LsblkTests(unittest.TestCase):
         self.assertIsNotNone(self.l.get_device_infos('mmcblk0p2'))
         self.assertIsNone(self.l.get_device_infos('mmcblk0p3'))
 
+    def test_get_devices_infos_from_sysfs(self):
+        self.l.command = Mock()
+        self.l.blockdevices = Mock()
+        self.l.blockdevices.get_devices.return_value = {
+            'sda': {
+                'sda': {'name': 'sda', 'partition': False},
+                'sda1': {'name': 'sda1', 'partition': True},
+            },
+        }
+
+        self.assertEqual(list(self.l.get_drives().keys()), ['sda'])
+        self.assertEqual(list(self.l.get_partitions().keys()), ['sda1'])
+        self.l.command.assert_not_called()
+
+    def test_get_devices_infos_sysfs_failed(self):
+        self.l.command = Mock(return_value={'error': False, 'killed': False, 'stdout': [
+            'NAME    MAJ:MIN TYPE RM  SIZE RO MOUNTPOINT RA MODEL',
+            'sda       8:0   disk  1 1000  0             128 Model',
+            'sda1      8:1   part  1  500  0 /media/usb  128',
+        ]})
+        self.l.blockdevices = Mock()
+        self.l.blockdevices.get_devices.side_effect = Exception('Test exception')
+
+        infos = self.l.get_devices_infos()
+
+        self.assertEqual(list(infos['sda'].keys()), ['sda', 'sda1'])
+        self.assertEqual(infos['sda']['sda1']['mountpoint'], '/media/usb')
+        self.l.command.assert_called_once()
+
+    def test_get_devices_infos_without_sysfs(self):
+        self.l = Lsblk(use_sysfs=False)
+        self.l.command = Mock(return_value={'error': False, 'killed': False, 'stdout': []})
+        self.l.blockdevices = Mock()
+
+        self.l.get_devices_infos()
+
+        self.l.command.assert_called_once()
+        self.l.blockdevices.get_devices.assert_not_called()
+
     def test_use_cache(self):
         tick = time.time()
         self.l.get_devices_infos()
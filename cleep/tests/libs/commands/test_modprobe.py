@@ -9,7 +9,7 @@ from cleep.libs.tests.lib import TestLib
 import unittest
 import logging
 import time
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 from cleep.libs.tests.common import get_log_level
 
 LOG_LEVEL = get_log_level()
@@ -31,6 +31,15 @@ class ModprobeTests(unittest.TestCase):
         self.assertTrue(self.m.load_module('dummy'))
         self.assertTrue(self.m.command.called)
 
+    @patch('modprobe.get_command_cache')
+    def test_load_module_invalidate_lsmod_cache(self, get_command_cache_mock):
+        self.m.command = Mock()
+        self.m.get_last_return_code = Mock(return_value=0)
+
+        self.m.load_module('dummy')
+
+        get_command_cache_mock.return_value.invalidate.assert_called_with('lsmod')
+
     def test_load_module_failed(self):
         self.m.command = Mock()
         self.m.get_last_return_code = Mock(return_value=1)
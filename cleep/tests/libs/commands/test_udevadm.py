@@ -7,6 +7,7 @@ import os
 sys.path.append(os.path.abspath(os.path.dirname(__file__)).replace("tests/", ""))
 from udevadm import Udevadm
 from cleep.libs.tests.lib import TestLib
+from cleep.libs.internals.commandcache import get_command_cache
 import unittest
 import logging
 import time
@@ -172,11 +173,12 @@ UDEV_SATA = [
 class LsblkTests(unittest.TestCase):
     def setUp(self):
         TestLib()
+        get_command_cache().invalidate()
         logging.basicConfig(
             level=LOG_LEVEL,
             format=u"%(asctime)s %(name)s:%(lineno)d %(levelname)s : %(message)s",
         )
-        self.u = Udevadm()
+        self.u = Udevadm(use_sysfs=False)
 
     def tearDown(self):
         pass
@@ -253,6 +255,47 @@ class LsblkTests(unittest.TestCase):
 
         self.assertEqual(mmcblk0, self.u.TYPE_ATA)
 
+    def test_get_device_type_from_udev_database(self):
+        self.u = Udevadm()
+        self.u.command = Mock()
+        self.u.blockdevices = Mock()
+        self.u.blockdevices.get_udev_properties.return_value = dict(
+            line.split("=", 1) for line in UDEV_USB
+        )
+
+        sdd = self.u.get_device_type("sdd")
+
+        self.assertEqual(sdd, self.u.TYPE_USB)
+        self.u.blockdevices.get_udev_properties.assert_called_with("sdd")
+        self.u.command.assert_not_called()
+
+    def test_get_device_type_not_in_udev_database(self):
+        self.u = Udevadm()
+        self.u.command = Mock(return_value={
+            "killed": False,
+            "error": False,
+            "stdout": UDEV_MMC,
+        })
+        self.u.blockdevices = Mock()
+        self.u.blockdevices.get_udev_properties.return_value = None
+
+        mmcblk0 = self.u.get_device_type("mmcblk0")
+
+        self.assertEqual(mmcblk0, self.u.TYPE_MMC)
+        self.u.command.assert_called_once()
+
+    def test_get_device_type_udev_database_failed(self):
+        self.u = Udevadm()
+        self.u.command = Mock(return_value={
+            "killed": False,
+            "error": False,
+            "stdout": UDEV_SATA,
+        })
+        self.u.blockdevices = Mock()
+        self.u.blockdevices.get_udev_properties.side_effect = Exception("Test exception")
+
+        self.assertEqual(self.u.get_device_type("sda"), self.u.TYPE_ATA)
+
     def test_use_cache(self):
         tick = time.time()
         self.u.get_device_type("mmcblk0")
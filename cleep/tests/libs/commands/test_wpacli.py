@@ -6,10 +6,13 @@ import os
 
 sys.path.append(os.path.abspath(os.path.dirname(__file__)).replace("tests/", ""))
 from wpacli import Wpacli
+import errno
 from cleep.libs.tests.lib import TestLib
 import unittest
 import logging
 import os
+import shutil
+import tempfile
 from shutil import copyfile
 from cleep.libs.tests.common import get_log_level
 from unittest.mock import Mock, patch
@@ -24,6 +27,14 @@ SCAN_NETWORKS = [
     "bssid / frequency / signal level / flags / ssid",
     "b6:39:56:76:d5:58   2472    -86 [WPA2-PSK-CCMP][WPS][ESS]   MyWifi",
 ]
+CTRL_REPLIES = {
+    "LIST_NETWORKS": "network id / ssid / bssid / flags\n0\tMyWifi\tany\t[CURRENT]",
+    "SCAN": "OK",
+    "SCAN_RESULTS": "bssid / frequency / signal level / flags / ssid\nb6:39:56:76:d5:58\t2472\t-86\t[WPA2-PSK-CCMP][WPS][ESS]\tMyWifi",
+    "STATUS": "bssid=b6:39:56:76:d5:58\nssid=MyWifi\nwpa_state=COMPLETED\nip_address=192.168.1.10",
+    "ADD_NETWORK": "1",
+    "RECONFIGURE": "OK",
+}
 
 class WpacliTests(unittest.TestCase):
     def setUp(self):
@@ -31,7 +42,7 @@ class WpacliTests(unittest.TestCase):
         logging.basicConfig(
             level=LOG_LEVEL, format=u"%(asctime)s %(name)s %(levelname)s : %(message)s"
         )
-        self.w = Wpacli()
+        self.w = Wpacli(use_ctrl_interface=False)
 
     def tearDown(self):
         pass
@@ -70,6 +81,221 @@ class WpacliTests(unittest.TestCase):
             }
         })
         
+    def _mock_client(self, replies=None):
+        replies = dict(CTRL_REPLIES, **(replies or {}))
+        client = Mock()
+        client.interface = "wlan0"
+        client.request.side_effect = lambda command, timeout=None: replies[command.split(" ")[0]]
+        client.requests.side_effect = lambda commands, timeout=None: [replies.get(command.split(" ")[0], "OK") for command in commands]
+        client.wait_event.return_value = ""
+        self.w = Wpacli(event_callback=Mock())
+        self.w.command = Mock()
+        self.w._Wpacli__get_client = Mock(return_value=client)
+        return client
+
+    @patch("wpacli.sleep")
+    def test_scan_networks_ctrl_interface(self, sleep_mock):
+        client = self._mock_client()
+
+        networks = self.w.scan_networks(interface="wlan0", duration=2.0)
+
+        expected = {
+            "wlan0": {
+                "MyWifi": {
+                    "interface": "wlan0",
+                    "network": "MyWifi",
+                    "encryption": "wpa2",
+                    "signallevel": 17,
+                }
+            }
+        }
+        self.assertEqual(networks, expected)
+        self.assertEqual(self.w.get_scanned_networks(), expected)
+        client.expect_event.assert_called_with("CTRL-EVENT-SCAN-RESULTS")
+        client.wait_event.assert_called_with(client.expect_event.return_value, 2.0)
+        sleep_mock.assert_not_called()
+        self.w.command.assert_not_called()
+
+    def test_scan_networks_ctrl_interface_busy(self):
+        client = self._mock_client({"SCAN": "FAIL-BUSY"})
+
+        networks = self.w.scan_networks(interface="wlan0", duration=2.0)
+
+        self.assertEqual(list(networks["wlan0"].keys()), ["MyWifi"])
+        client.wait_event.assert_called_with(client.expect_event.return_value, 2.0)
+
+    def test_scan_networks_ctrl_interface_scan_failed(self):
+        client = self._mock_client({"SCAN": "FAIL"})
+
+        networks = self.w.scan_networks(interface="wlan0", duration=2.0)
+
+        self.assertEqual(list(networks["wlan0"].keys()), ["MyWifi"])
+        client.wait_event.assert_called_with(client.expect_event.return_value, 0)
+
+    @patch("wpacli.sleep")
+    def test_scan_networks_ctrl_interface_request_failed(self, sleep_mock):
+        client = self._mock_client()
+        client.request.side_effect = OSError("Test exception")
+        self.w.command = Mock(return_value={"returncode": 0, "error": False, "killed": False, "stdout": SCAN_NETWORKS})
+
+        networks = self.w.scan_networks(interface="wlan0", duration=2.0)
+
+        self.assertEqual(list(networks["wlan0"].keys()), ["MyWifi"])
+        sleep_mock.assert_called_with(2.0)
+
+    def test_get_configured_networks_ctrl_interface(self):
+        client = self._mock_client()
+
+        networks = self.w.get_configured_networks()
+
+        self.assertEqual(networks, {
+            "MyWifi": {"id": "0", "ssid": "MyWifi", "bssid": "any", "status": Wpacli.STATUS_CURRENT}
+        })
+        client.request.assert_called_with("LIST_NETWORKS", 2.0)
+
+    def test_add_network_ctrl_interface(self):
+        client = self._mock_client({"LIST_NETWORKS": "network id / ssid / bssid / flags"})
+
+        self.assertTrue(self.w.add_network("MyWifi", "wpa2", "password", hidden=True))
+
+        client.requests.assert_called_with([
+            'SET_NETWORK 1 ssid "MyWifi"',
+            "SET_NETWORK 1 key_mgmt WPA-PSK WPA-EAP",
+            'SET_NETWORK 1 psk "password"',
+            "SET_NETWORK 1 scan_ssid 1",
+        ], 2.0)
+
+    def test_add_network_ctrl_interface_failed(self):
+        client = self._mock_client({"LIST_NETWORKS": "network id / ssid / bssid / flags"})
+        client.requests.side_effect = lambda commands, timeout=None: ["1"] if commands == ["ADD_NETWORK"] else ["OK", "FAIL", "OK"]
+
+        self.assertFalse(self.w.add_network("MyWifi", "wpa2", "password"))
+
+    def test_add_network_ctrl_interface_timeout(self):
+        client = self._mock_client({"LIST_NETWORKS": "network id / ssid / bssid / flags"})
+        def requests(commands, timeout=None):
+            if commands == ["ADD_NETWORK"]:
+                return ["1"]
+            raise OSError(errno.ETIMEDOUT, "Test timeout")
+        client.requests.side_effect = requests
+
+        self.assertFalse(self.w.add_network("MyWifi", "wpa2", "password"))
+
+        self.w.command.assert_not_called()
+
+    def test_enable_network_ctrl_interface_not_connected(self):
+        client = self._mock_client()
+        client.requests.side_effect = OSError(errno.ENOTCONN, "Test exception")
+        self.w.command.return_value = {
+            "returncode": 0,
+            "error": False,
+            "killed": False,
+            "stdout": ["Selected interface 'wlan0'", "OK"],
+        }
+
+        self.assertTrue(self.w.enable_network("MyWifi"))
+
+        self.w.command.assert_any_call("/sbin/wpa_cli enable_network 0", 2.0)
+
+    def test_get_status_ctrl_interface_timeout(self):
+        client = self._mock_client()
+        client.request.side_effect = OSError(errno.ETIMEDOUT, "Test timeout")
+
+        status = self.w.get_status("wlan0")
+
+        self.assertEqual(status, {"network": None, "state": Wpacli.STATE_UNKNOWN, "ipaddress": None})
+        self.w.command.assert_not_called()
+
+    def test_add_network_command(self):
+        outputs = {
+            "list_networks": ["Selected interface 'wlan0'", "network id / ssid / bssid / flags"],
+            "add_network": ["Selected interface 'wlan0'", "1"],
+        }
+        self.w.command = Mock(side_effect=lambda command, timeout=2.0: {
+            "returncode": 0,
+            "error": False,
+            "killed": False,
+            "stdout": outputs.get(command.split(" ")[1], ["Selected interface 'wlan0'", "OK"]),
+        })
+
+        self.assertTrue(self.w.add_network("MyWifi", "unsecured", ""))
+
+        commands = [call[0][0] for call in self.w.command.call_args_list]
+        self.assertEqual(commands, [
+            "/sbin/wpa_cli list_networks",
+            "/sbin/wpa_cli add_network",
+            "/sbin/wpa_cli set_network 1 ssid '\"MyWifi\"'",
+            "/sbin/wpa_cli set_network 1 key_mgmt NONE",
+        ])
+
+    def test_enable_network_ctrl_interface(self):
+        client = self._mock_client()
+
+        self.assertTrue(self.w.enable_network("MyWifi"))
+
+        client.requests.assert_any_call(["ENABLE_NETWORK 0"], 2.0)
+        client.requests.assert_any_call(["SAVE_CONFIG"], 2.0)
+
+    def test_get_status_ctrl_interface(self):
+        self._mock_client()
+
+        status = self.w.get_status("wlan0")
+
+        self.assertEqual(status, {"network": "MyWifi", "state": "COMPLETED", "ipaddress": "192.168.1.10"})
+
+    @patch("wpacli.sleep")
+    def test_reconfigure_interface_ctrl_interface(self, sleep_mock):
+        client = self._mock_client()
+
+        self.assertTrue(self.w.reconfigure_interface("wlan0", pause=None))
+
+        client.request.assert_called_with("RECONFIGURE", timeout=10.0)
+        self.w.command.assert_not_called()
+
+    @patch("wpacli.get_executor")
+    def test_scan_results_event(self, get_executor_mock):
+        get_executor_mock.return_value.submit.side_effect = lambda callback, name=None: callback()
+        self._mock_client()
+
+        self.w._Wpacli__on_event("wlan0", "CTRL-EVENT-SCAN-RESULTS", "")
+
+        self.assertEqual(list(self.w.get_scanned_networks()["wlan0"].keys()), ["MyWifi"])
+        self.w.event_callback.assert_called_with("scan_results", {
+            "interface": "wlan0",
+            "networks": self.w.get_scanned_networks()["wlan0"],
+        })
+
+    @patch("wpacli.get_command_cache")
+    def test_connection_events(self, get_command_cache_mock):
+        self._mock_client()
+
+        self.w._Wpacli__on_event("wlan0", "CTRL-EVENT-CONNECTED", "- Connection to 00:11:22:33:44:55 completed [id=0 id_str=]")
+        self.w.event_callback.assert_called_with("connected", {"interface": "wlan0", "bssid": "00:11:22:33:44:55"})
+
+        self.w._Wpacli__on_event("wlan0", "CTRL-EVENT-DISCONNECTED", "bssid=00:11:22:33:44:55 reason=3 locally_generated=1")
+        self.w.event_callback.assert_called_with("disconnected", {"interface": "wlan0", "bssid": "00:11:22:33:44:55"})
+
+        get_command_cache_mock.return_value.invalidate.assert_called_with("iw", "iwconfig", "iwgetid")
+
+    def test_get_client_without_ctrl_interface(self):
+        self.w = Wpacli()
+        self.w.ctrl_dir = tempfile.mkdtemp()
+        try:
+            self.assertIsNone(self.w._Wpacli__get_client("wlan0"))
+            self.assertIsNone(self.w._Wpacli__get_client(None))
+        finally:
+            shutil.rmtree(self.w.ctrl_dir)
+
+    def test_get_default_interface(self):
+        self.w.ctrl_dir = tempfile.mkdtemp()
+        try:
+            for interface in ("p2p-dev-wlan0", "wlan1", "wlan0"):
+                open(os.path.join(self.w.ctrl_dir, interface), "w").close()
+
+            self.assertEqual(self.w._Wpacli__get_default_interface(), "wlan0")
+        finally:
+            shutil.rmtree(self.w.ctrl_dir)
+
 
 if __name__ == "__main__":
     # coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread test_wpacli.py; coverage report -m -i
@@ -17,6 +17,7 @@ from unittest.mock import Mock
 from configparser import ConfigParser
 from cleep.libs.tests.common import get_log_level
 from unittest.mock import ANY
+import time
 
 LOG_LEVEL = get_log_level()
 
@@ -59,6 +60,7 @@ class CleepConfTests(unittest.TestCase):
 
         rc = CleepConf
         rc.CONF = self.FILE_NAME
+        rc._CleepConf__cache.clear()
         self.rc = rc((self.fs))
 
     def tearDown(self):
@@ -236,6 +238,114 @@ class CleepConfTests(unittest.TestCase):
 
         self.assertTrue(result)
 
+    def test_parse_file_once(self):
+        self.fs.open = Mock(wraps=self.fs.open)
+
+        for _ in range(10):
+            self.rc.is_module_installed("mymodule")
+            self.rc.is_module_debugged("mymodule")
+            self.rc.get_rpc_config()
+            self.rc.get_auth_accounts()
+        CleepConf(self.fs).is_auth_enabled()
+
+        self.assertEqual(self.fs.open.call_count, 1)
+
+    def test_reload_after_external_change(self):
+        self.assertFalse(self.rc.is_module_installed("mymodule"))
+
+        conf = ConfigParser()
+        conf.read(self.FILE_NAME)
+        conf.set("general", "modules", str(["mymodule", "othermodule"]))
+        with open(self.FILE_NAME, "w") as fp:
+            conf.write(fp)
+
+        self.assertTrue(self.rc.is_module_installed("mymodule"))
+
+    def test_decoded_values_not_altered_by_caller(self):
+        accounts = self.rc.get_auth_accounts()
+        accounts["dummy"] = "password"
+        config = self.rc.as_dict()
+        config["general"]["modules"].append("dummy")
+
+        self.assertEqual(self.rc.get_auth_accounts(), {"test": ANY})
+        self.assertFalse(self.rc.is_module_installed("dummy"))
+
+    def test_get_rpc_config(self):
+        self.assertEqual(self.rc.get_rpc_config(), ("0.0.0.0", 80))
+
+        self.rc.set_rpc_config("127.0.0.1", 8080)
+
+        self.assertEqual(self.rc.get_rpc_config(), ("127.0.0.1", 8080))
+        self.assertEqual(CleepConf(self.fs).get_rpc_config(), ("127.0.0.1", 8080))
+
+    def test_no_write_if_nothing_changed(self):
+        self.rc.install_module("mymodule")
+        self.fs.write_data = Mock(wraps=self.fs.write_data)
+
+        self.rc.install_module("mymodule")
+        self.rc.uninstall_module("othermodule")
+        self.rc.is_module_installed("mymodule")
+
+        self.fs.write_data.assert_not_called()
+
+    def test_batch(self):
+        self.fs.write_data = Mock(wraps=self.fs.write_data)
+
+        with self.rc.batch():
+            self.rc.install_module("mymodule1")
+            self.rc.install_module("mymodule2")
+            self.rc.enable_module_debug("mymodule1")
+            self.rc.enable_trace()
+            self.assertTrue(self.rc.is_module_installed("mymodule2"))
+
+        self.assertEqual(self.fs.write_data.call_count, 1)
+        conf = ConfigParser()
+        conf.read(self.FILE_NAME)
+        self.assertEqual(conf.get("general", "modules"), str(["mymodule1", "mymodule2"]))
+        self.assertEqual(conf.get("debug", "debug_modules"), str(["mymodule1"]))
+        self.assertEqual(conf.get("debug", "trace_enabled"), "True")
+
+    def test_batch_with_exception(self):
+        with self.assertRaises(Exception):
+            with self.rc.batch():
+                self.rc.install_module("mymodule1")
+                self.rc.add_auth_account("test", "test")
+
+        conf = ConfigParser()
+        conf.read(self.FILE_NAME)
+        self.assertEqual(conf.get("general", "modules"), str(["mymodule1"]))
+
+    def test_write_failed(self):
+        self.rc.is_module_installed("mymodule")
+        self.fs.write_data = Mock(return_value=False)
+
+        self.rc.install_module("mymodule")
+
+        self.assertFalse(self.rc.is_module_installed("mymodule"))
+
+    def test_startup_config_access_benchmark(self):
+        # access pattern of startup and inventory: config is read for each module
+        modules = ["module%d" % i for i in range(50)]
+        with self.rc.batch():
+            for module in modules:
+                self.rc.install_module(module)
+        self.fs.open = Mock(wraps=self.fs.open)
+
+        start = time.perf_counter()
+        for _ in range(20):
+            self.rc.get_auth_accounts()
+            self.rc.is_auth_enabled()
+            self.rc.get_rpc_config()
+            self.rc.is_trace_enabled()
+            for module in modules:
+                self.rc.is_module_installed(module)
+                self.rc.is_module_debugged(module)
+        duration = time.perf_counter() - start
+        logging.info("%d config accesses in %.3f seconds", 20 * (4 + 2 * len(modules)), duration)
+
+        self.fs.open.assert_not_called()
+        self.assertLess(duration, 1.0)
+
 if __name__ == "__main__":
     # coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread test_cleepconf.py; coverage report -m -i
     unittest.main()
@@ -12,6 +12,9 @@ import unittest
 import logging
 from pprint import pformat
 import io
+import re
+import time
+from unittest.mock import Mock, patch
 from cleep.libs.tests.common import get_log_level
 
 LOG_LEVEL = get_log_level()
@@ -323,6 +326,122 @@ key2=value2"""
         self.assertFalse(self.c.add(u'test'), 'Should returns false if file not found')
         
 
+
+class ConfigCacheTests(unittest.TestCase):
+
+    FILE_NAME = 'unittest.conf'
+    CONTENT = u"""#this is a comment
+key1=value1
+key2=value2
+value3=key3
+"""
+
+    def setUp(self):
+        TestLib()
+        self.fs = CleepFilesystem()
+        self.fs.enable_write()
+        self.path = os.path.join(os.getcwd(), self.FILE_NAME)
+        Config._Config__cache.clear()
+
+        with io.open(self.path, 'w') as f:
+            f.write(self.CONTENT)
+        self._age_file()
+
+        self.c = Config(self.fs, self.path, '#', backup=False)
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _age_file(self):
+        # file is cached only if not recently modified
+        old = time.time() - 10
+        os.utime(self.path, (old, old))
+
+    def _write_file(self, content):
+        with io.open(self.path, 'w') as f:
+            f.write(content)
+
+    def test_read_once(self):
+        self.fs.open = Mock(wraps=self.fs.open)
+
+        for _ in range(5):
+            self.c.find('^(.*?)=(.*?)$')
+            self.c.get_content()
+        Config(self.fs, self.path, '#', backup=False).find('^(key1)=(.*?)$')
+
+        self.assertEqual(self.fs.open.call_count, 1)
+
+    def test_not_cached_if_recently_modified(self):
+        self._write_file(self.CONTENT)
+        self.fs.open = Mock(wraps=self.fs.open)
+
+        self.c.get_content()
+        self.c.get_content()
+
+        self.assertEqual(self.fs.open.call_count, 2)
+
+    def test_reload_after_external_change(self):
+        self.assertEqual(len(self.c.find('^(.*?)=(.*?)$')), 3)
+
+        self._write_file(self.CONTENT + 'key4=value4\n')
+        self._age_file()
+
+        self.assertEqual(len(self.c.find('^(.*?)=(.*?)$')), 4)
+
+    def test_edit_updates_cache(self):
+        self.c.get_content()
+        self.fs.open = Mock(wraps=self.fs.open)
+
+        self.assertTrue(self.c.replace_line('^key1=.*$', 'key1=newvalue'))
+        self.assertTrue(self.c.remove_lines(['key2=value2']))
+        self.assertTrue(self.c.add_lines(['key5=value5']))
+        content = self.c.get_content()
+
+        # only writes, no read
+        self.assertEqual([call[0][1] for call in self.fs.open.call_args_list], ['w', 'w', 'w'])
+        with io.open(self.path) as f:
+            self.assertEqual(''.join(content), f.read())
+        self.assertEqual(self.c.find('^(key1)=(.*?)$')[0][1], ['key1', 'newvalue'])
+
+    def test_write_outside_write_function_invalidates_cache(self):
+        self.c.get_content()
+
+        fdesc = self.c._open(Config.MODE_WRITE)
+        fdesc.write('key=value\n')
+        self.c._close()
+
+        self.assertEqual(self.c.get_content(), ['key=value\n'])
+
+    def test_find_many(self):
+        self.fs.open = Mock(wraps=self.fs.open)
+
+        results = self.c.find_many({
+            'keys': '^(key.*?)=(.*?)$',
+            'values': '^(value.*?)=(.*?)$',
+            'compiled': re.compile('^#(.*)$', re.MULTILINE),
+            'none': '^(dummy)$',
+        })
+
+        self.assertEqual(len(results['keys']), 2)
+        self.assertEqual(results['values'], [('value3=key3', ['value3', 'key3'])])
+        self.assertEqual(results['compiled'], [('#this is a comment', ['this is a comment'])])
+        self.assertEqual(results['none'], [])
+        self.assertEqual(self.fs.open.call_count, 1)
+
+    def test_find_many_file_not_found(self):
+        os.remove(self.path)
+
+        self.assertEqual(self.c.find_many({'keys': '^(key.*?)=(.*?)$'}), {'keys': []})
+
+    def test_pattern_cache(self):
+        with patch('config.re.compile', wraps=re.compile) as compile_mock:
+            for _ in range(5):
+                self.c.find_in_string('^(cached)=(.*?)$', 'cached=value')
+
+        self.assertLessEqual(compile_mock.call_count, 1)
+
+
 if __name__ == '__main__':
     # coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread test_config.py; coverage report -m -i
     unittest.main()
@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__)).replace("tests/", ""))
+from configtree import ConfigTree, ConfigTreeBlock, ConfigTreeLine, ConfigTreeParser, ConfigTreePattern
+from cleep.libs.tests.lib import TestLib
+import unittest
+import logging
+from cleep.libs.tests.common import get_log_level
+
+LOG_LEVEL = get_log_level()
+
+
+class SectionParser(ConfigTreeParser):
+    """
+    Parser of ini like syntax used to test generic tree
+    """
+
+    BLOCK_HEADERS = [(r"^\s*\[(section)\s+(\S+)\]\s*$", 1, 2)]
+    TOP_LEVEL_OPTIONS = [ConfigTreePattern(r"^\s*(global_\w+)\s*=\s*(.*?)\s*$")]
+    BLOCK_OPTIONS = [ConfigTreePattern(r"^\s*(\w+)\s*=\s*(.*?)\s*$")]
+
+    def format_option(self, key, value, in_block):
+        return "%s%s = %s\n" % ("    " if in_block else "", key, value)
+
+    def format_header(self, kind, name):
+        return "[%s %s]\n" % (kind, name)
+
+
+class BracesParser(SectionParser):
+    """
+    Parser of syntax with block footer used to test generic tree
+    """
+
+    BLOCK_HEADERS = [(r"^\s*(block)\s+(\S+)\s*\{\s*$", 1, 2)]
+    BLOCK_FOOTER = r"^\s*\}\s*$"
+
+    def format_header(self, kind, name):
+        return "%s %s {\n" % (kind, name)
+
+    def format_footer(self, kind):
+        return "}\n"
+
+
+SECTION_CONTENT = """# header comment
+global_debug = 1
+
+[section one]
+  key1 = value1
+  # inner comment
+  key2 = value2
+
+# trailing comment
+[section two]
+    key1 = other
+global_level = 3
+unparsed line
+"""
+
+BRACES_CONTENT = """global_debug=0
+block first {
+    key = value
+
+}
+# between blocks
+block second {
+    key = value2
+}"""
+
+
+class ConfigTreeParserTests(unittest.TestCase):
+
+    def setUp(self):
+        TestLib()
+        logging.basicConfig(
+            level=LOG_LEVEL, format=u"%(asctime)s %(name)s %(levelname)s : %(message)s"
+        )
+
+    def test_parse_lossless(self):
+        for parser, content in ((SectionParser(), SECTION_CONTENT), (BracesParser(), BRACES_CONTENT)):
+            tree = parser.parse(content)
+            self.assertEqual(tree.to_string(), content)
+            self.assertFalse(tree.is_modified())
+
+    def test_parse_lossless_crlf(self):
+        content = SECTION_CONTENT.replace("\n", "\r\n")
+        tree = SectionParser().parse(content)
+        self.assertEqual(tree.to_string(), content)
+        self.assertEqual(tree.get_block("section", "one").get("key2"), "value2")
+
+    def test_parse_empty(self):
+        tree = SectionParser().parse("")
+        self.assertEqual(tree.to_string(), "")
+        self.assertEqual(tree.get_blocks(), [])
+
+        tree = SectionParser().parse(None)
+        self.assertEqual(tree.to_string(), "")
+
+    def test_parse_blocks(self):
+        tree = SectionParser().parse(SECTION_CONTENT)
+
+        blocks = tree.get_blocks()
+        self.assertEqual([(block.kind, block.name) for block in blocks], [("section", "one"), ("section", "two")])
+        self.assertTrue(all(isinstance(block, ConfigTreeBlock) for block in blocks))
+        self.assertEqual(len(tree.get_blocks("section", "one")), 1)
+        self.assertIsNone(tree.get_block("section", "three"))
+
+    def test_parse_blank_lines_attach_to_next_block(self):
+        tree = SectionParser().parse(SECTION_CONTENT)
+
+        one = tree.get_block("section", "one")
+        self.assertEqual([line.raw for line in one.leading], ["\n"])
+        # trailing blank and comment lines are moved out of block without footer
+        self.assertEqual(one.lines[-1].raw, "  key2 = value2\n")
+        two = tree.get_block("section", "two")
+        self.assertEqual(two.leading, [])
+
+    def test_parse_top_level_option_ends_block(self):
+        tree = SectionParser().parse(SECTION_CONTENT)
+
+        self.assertEqual(tree.get("global_level"), "3")
+        self.assertEqual(tree.get_block("section", "two").get_all("key1"), ["other"])
+        self.assertEqual(tree.get_block("section", "two").get("global_level"), None)
+
+    def test_parse_footer(self):
+        tree = BracesParser().parse(BRACES_CONTENT)
+
+        first = tree.get_block("block", "first")
+        self.assertEqual(first.footer.raw, "}\n")
+        # blank line inside block with footer is kept in block
+        self.assertEqual(first.lines[-1].raw, "\n")
+        second = tree.get_block("block", "second")
+        self.assertEqual(second.footer.raw, "}")
+
+    def test_parse_unclosed_block(self):
+        content = "block first {\n    key = value\n"
+        tree = BracesParser().parse(content)
+
+        self.assertEqual(tree.to_string(), content)
+        self.assertIsNone(tree.get_block("block", "first").footer)
+
+    def test_line_is_option(self):
+        self.assertTrue(ConfigTreeLine("key=value\n", "key", "value").is_option())
+        self.assertFalse(ConfigTreeLine("# comment\n").is_option())
+
+    def test_pattern_key_prefix(self):
+        pattern = ConfigTreePattern(r"^\s*static\s+(\w+)=(.*)$", key_prefix="static ")
+        self.assertEqual(pattern.match("static ip_address=1.2.3.4"), ("static ip_address", "1.2.3.4"))
+        self.assertIsNone(pattern.match("ip_address=1.2.3.4"))
+
+    def test_format_not_implemented(self):
+        parser = ConfigTreeParser()
+        with self.assertRaises(NotImplementedError):
+            parser.format_option("key", "value", False)
+        with self.assertRaises(NotImplementedError):
+            parser.format_header("kind", "name")
+        self.assertIsNone(parser.format_footer("kind"))
+        self.assertTrue(isinstance(parser.parse(""), ConfigTree))
+
+
+class ConfigTreeTests(unittest.TestCase):
+
+    def setUp(self):
+        TestLib()
+        logging.basicConfig(
+            level=LOG_LEVEL, format=u"%(asctime)s %(name)s %(levelname)s : %(message)s"
+        )
+        self.tree = SectionParser().parse(SECTION_CONTENT)
+
+    def test_get(self):
+        self.assertEqual(self.tree.get("global_debug"), "1")
+        self.assertEqual(self.tree.get("global_dummy", "default"), "default")
+        self.assertEqual(self.tree.get_all("global_debug"), ["1"])
+
+    def test_set_existing_top_level_option(self):
+        self.tree.set("global_debug", "0")
+
+        self.assertTrue(self.tree.is_modified())
+        self.assertEqual(self.tree.get("global_debug"), "0")
+        self.assertEqual(
+            self.tree.to_string(),
+            SECTION_CONTENT.replace("global_debug = 1", "global_debug = 0"),
+        )
+
+    def test_set_new_top_level_option(self):
+        self.tree.set("global_new", "value")
+        self.assertEqual(self.tree.get("global_new"), "value")
+        self.assertTrue("global_level = 3\nglobal_new = value\n" in self.tree.to_string())
+
+        self.tree.set("global_first", "value", first=True)
+        self.assertTrue(self.tree.to_string().startswith("global_first = value\n"))
+
+    def test_remove_top_level_option(self):
+        self.assertEqual(self.tree.remove("global_level"), 1)
+        self.assertIsNone(self.tree.get("global_level"))
+        self.assertEqual(self.tree.remove("global_level"), 0)
+
+    def test_remove_top_level_option_with_value(self):
+        self.assertEqual(self.tree.remove("global_debug", "2"), 0)
+        self.assertEqual(self.tree.remove("global_debug", "1"), 1)
+
+    def test_block_set_keeps_indentation(self):
+        block = self.tree.get_block("section", "one")
+        block.set("key1", "new")
+        block.set("key3", "value3")
+
+        self.assertTrue(block.modified)
+        self.assertTrue(self.tree.is_modified())
+        content = self.tree.to_string()
+        self.assertTrue("  key1 = new\n" in content)
+        self.assertTrue("  key2 = value2\n  key3 = value3\n" in content)
+        # untouched parts are kept as is
+        self.assertTrue("  # inner comment\n" in content)
+        self.assertTrue("# trailing comment\n" in content)
+
+    def test_block_remove(self):
+        block = self.tree.get_block("section", "one")
+        self.assertEqual(block.remove("key1"), 1)
+        self.assertEqual(block.remove("key1"), 0)
+        self.assertEqual(block.get_options(), [("key2", "value2")])
+
+    def test_add_block(self):
+        block = self.tree.add_block("section", "three", [("key", "value")])
+
+        self.assertEqual(self.tree.get_block("section", "three"), block)
+        self.assertTrue(self.tree.to_string().endswith("unparsed line\n\n[section three]\n    key = value\n"))
+
+    def test_add_block_before(self):
+        before = self.tree.get_block("section", "two")
+        self.tree.add_block("section", "new", [], before=before)
+
+        self.assertEqual([block.name for block in self.tree.get_blocks("section")], ["one", "new", "two"])
+
+    def test_add_block_to_incomplete_last_line(self):
+        tree = BracesParser().parse(BRACES_CONTENT)
+        tree.add_block("block", "third", [("key", "value")])
+
+        self.assertEqual(
+            tree.to_string(),
+            BRACES_CONTENT + "\n\nblock third {\n    key = value\n}\n",
+        )
+        self.assertEqual(BracesParser().parse(tree.to_string()).get_block("block", "third").get("key"), "value")
+
+    def test_add_block_custom_header(self):
+        block = self.tree.add_block("section", "custom", [], header="[section   custom]\n")
+        self.assertEqual(block.header.raw, "[section   custom]\n")
+
+    def test_remove_block(self):
+        self.tree.remove_block(self.tree.get_block("section", "one"))
+
+        self.assertTrue(self.tree.is_modified())
+        self.assertIsNone(self.tree.get_block("section", "one"))
+        self.assertFalse("key2" in self.tree.to_string())
+        self.assertTrue("# trailing comment\n" in self.tree.to_string())
+
+
+if __name__ == "__main__":
+    # coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread test_configtree.py; coverage report -m -i
+    unittest.main()
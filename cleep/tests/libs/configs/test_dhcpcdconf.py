@@ -546,6 +546,90 @@ class dhcpcdConfTests_profileConf(unittest.TestCase):
     #    self.assertEqual(len(self.d.get_configurations()), 3)
 
 
+class dhcpcdConfTests_edit(unittest.TestCase):
+
+    FILE_NAME = "dhcpcd.conf"
+
+    def setUp(self):
+        TestLib()
+        logging.basicConfig(
+            level=LOG_LEVEL, format=u"%(asctime)s %(name)s %(levelname)s : %(message)s"
+        )
+
+        self.fs = CleepFilesystem()
+        self.fs.enable_write()
+        self.path = os.path.join(os.getcwd(), self.FILE_NAME)
+        with io.open(self.path, "w") as f:
+            f.write(PROFILE_CONF)
+
+        self.d = DhcpcdConf(self.fs, backup=False)
+        self.d.path = self.path
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _read(self):
+        with io.open(self.path, "r") as f:
+            return f.read()
+
+    def test_edit_lossless(self):
+        self.fs.write_data = Mock(wraps=self.fs.write_data)
+
+        with self.d.edit() as tree:
+            self.assertEqual(tree.to_string(), PROFILE_CONF)
+
+        self.fs.write_data.assert_not_called()
+
+    def test_edit_get_interfaces(self):
+        configurations = self.d.get_configurations()
+
+        with self.d.edit() as tree:
+            interfaces = tree.get_interfaces()
+        logging.debug("Interfaces: %s" % pformat(interfaces))
+
+        self.assertEqual(sorted(interfaces.keys()), sorted(configurations.keys()))
+        for name, interface in interfaces.items():
+            for key in ("netmask", "fallback", "ip_address", "gateway", "dns_address"):
+                self.assertEqual(interface[key], configurations[name][key], "%s of %s" % (key, name))
+
+    def test_edit_many_interfaces_writes_once(self):
+        self.fs.write_data = Mock(wraps=self.fs.write_data)
+
+        with self.d.edit() as tree:
+            self.assertTrue(tree.delete_interface("eth1"))
+            tree.add_static_interface("eth2", "10.0.0.2", "10.0.0.1", "255.255.255.0")
+            tree.add_fallback_interface("wlan0", "192.168.2.2", "192.168.2.1", "255.255.255.0", "8.8.8.8")
+
+        self.assertEqual(self.fs.write_data.call_count, 1)
+        self.assertTrue(tree.written)
+        configurations = self.d.get_configurations()
+        logging.debug("Configurations: %s" % pformat(configurations))
+        self.assertFalse("eth1" in configurations)
+        self.assertFalse("fallback_eth1" in configurations)
+        self.assertEqual(configurations["eth2"]["ip_address"], "10.0.0.2")
+        self.assertEqual(configurations["eth2"]["gateway"], "10.0.0.1")
+        self.assertEqual(configurations["eth2"]["netmask"], "255.255.255.0")
+        self.assertEqual(configurations["wlan0"]["fallback"], "fallback_wlan0")
+        # untouched parts are kept as is
+        self.assertTrue(self._read().startswith(PROFILE_CONF[:PROFILE_CONF.index("interface")]))
+
+    def test_edit_delete_unknown_interface(self):
+        with self.d.edit() as tree:
+            self.assertFalse(tree.delete_interface("eth9"))
+
+        self.assertFalse(tree.written)
+        self.assertEqual(self._read(), PROFILE_CONF)
+
+    def test_edit_add_existing_interface(self):
+        with self.assertRaises(InvalidParameter):
+            with self.d.edit() as tree:
+                tree.add_static_interface("eth2", "10.0.0.2", "10.0.0.1", "255.255.255.0")
+                tree.add_static_interface("eth2", "10.0.0.3", "10.0.0.1", "255.255.255.0")
+
+        self.assertEqual(self._read(), PROFILE_CONF)
+
+
 if __name__ == "__main__":
     # coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread test_dhcpcdconf.py; coverage report -m -i
     unittest.main()
@@ -12,6 +12,7 @@ import unittest
 import logging
 from pprint import pformat
 import io
+from unittest.mock import patch
 from cleep.libs.tests.common import get_log_level
 
 LOG_LEVEL = get_log_level()
@@ -131,6 +132,18 @@ ctl.!default {
         self.assertFalse('device' in ctl, 'Item "device" should not exist')
         self.assertEqual(ctl['card'], 5)
 
+    @patch('etcasoundconf.get_command_cache')
+    def test_save_default_file_invalidates_alsa_cache(self, get_command_cache_mock):
+        self.assertTrue(self.e.save_default_file(5))
+
+        get_command_cache_mock.return_value.invalidate.assert_called_with('alsa')
+
+    @patch('etcasoundconf.get_command_cache')
+    def test_delete_invalidates_alsa_cache(self, get_command_cache_mock):
+        self.assertTrue(self.e.delete())
+
+        get_command_cache_mock.return_value.invalidate.assert_called_with('alsa')
+
     def test_dave_default_file_invalid_parameters(self):
         with self.assertRaises(InvalidParameter) as cm:
             self.e.save_default_file(None)
@@ -9,6 +9,7 @@ from cleep.libs.internals.cleepfilesystem import CleepFilesystem
 from cleep.exception import MissingParameter, InvalidParameter, CommandError
 from cleep.libs.tests.lib import TestLib, TRACE
 import unittest
+from unittest.mock import Mock
 import logging
 from pprint import pformat, pprint
 import io
@@ -428,6 +429,100 @@ iface eth3 inet static
     
 
 
+class EtcNetworkInterfacesEditTest(unittest.TestCase):
+
+    FILE_NAME = 'interfaces.conf'
+    CONTENT = EtcNetworkInterfacesWithoutCacheTest.CONTENT
+
+    def setUp(self):
+        TestLib()
+        logging.basicConfig(level=LOG_LEVEL, format=u'%(asctime)s %(name)s:%(lineno)s %(levelname)s : %(message)s')
+
+        self.fs = CleepFilesystem()
+        self.fs.enable_write()
+        self.path = os.path.join(os.getcwd(), self.FILE_NAME)
+
+        with io.open(self.path, 'w') as f:
+            f.write(self.CONTENT)
+
+        e = EtcNetworkInterfaces
+        e.CACHE_DURATION = 0
+        e.CONF = self.FILE_NAME
+        self.e = e(self.fs, False)
+
+    def tearDown(self):
+        if os.path.exists('%s' % self.FILE_NAME):
+            os.remove('%s' % self.FILE_NAME)
+
+    def _read(self):
+        with io.open(self.path, 'r') as f:
+            return f.read()
+
+    def test_edit_without_change_does_not_write(self):
+        self.fs.write_data = Mock(wraps=self.fs.write_data)
+
+        with self.e.edit() as tree:
+            tree.get_interfaces()
+
+        self.fs.write_data.assert_not_called()
+        self.assertFalse(tree.written)
+        self.assertEqual(self._read(), self.CONTENT)
+
+    def test_edit_get_interfaces_same_as_get_configurations(self):
+        configurations = self.e.get_configurations()
+
+        with self.e.edit() as tree:
+            interfaces = tree.get_interfaces()
+
+        self.assertEqual(sorted(interfaces.keys()), sorted(configurations.keys()))
+        for name, interface in interfaces.items():
+            for key in ('mode', 'address', 'netmask', 'broadcast', 'gateway', 'dnsnameservers', 'dnsdomain', 'hotplug', 'auto', 'wpaconf'):
+                self.assertEqual(interface[key], configurations[name][key], '%s of %s' % (key, name))
+
+    def test_edit_many_interfaces_writes_once(self):
+        self.fs.write_data = Mock(wraps=self.fs.write_data)
+
+        with self.e.edit() as tree:
+            self.assertTrue(tree.delete_interface('eth3'))
+            self.assertTrue(tree.delete_interface('eth4'))
+            tree.add_dhcp_interface('eth3', EtcNetworkInterfaces.OPTION_AUTO | EtcNetworkInterfaces.OPTION_HOTPLUG)
+            tree.add_static_interface('eth5', EtcNetworkInterfaces.OPTION_HOTPLUG, '10.0.0.2', '10.0.0.1', '255.255.255.0', dns_nameservers='10.0.0.1')
+
+        self.assertEqual(self.fs.write_data.call_count, 1)
+        self.assertTrue(tree.written)
+        configurations = self.e.get_configurations()
+        logging.debug('Configurations: %s' % configurations)
+        self.assertFalse('eth4' in configurations)
+        self.assertEqual(configurations['eth3']['mode'], 'dhcp')
+        self.assertTrue(configurations['eth3']['auto'])
+        self.assertTrue(configurations['eth3']['hotplug'])
+        self.assertEqual(configurations['eth5']['mode'], 'static')
+        self.assertEqual(configurations['eth5']['address'], '10.0.0.2')
+        self.assertEqual(configurations['eth5']['gateway'], '10.0.0.1')
+        self.assertEqual(configurations['eth5']['dnsnameservers'], '10.0.0.1')
+        self.assertTrue(configurations['eth5']['hotplug'])
+        self.assertFalse(configurations['eth5']['auto'])
+        # untouched stanzas are kept as is
+        self.assertTrue('iface wlan0 inet manual\nwpa-roam /etc/wpa_supplicant/wpa_supplicant.conf\n' in self._read())
+
+    def test_edit_delete_interface_options(self):
+        with io.open(self.path, 'w') as f:
+            f.write(u'auto lo eth0\niface lo inet loopback\niface eth0 inet dhcp\n')
+
+        with self.e.edit() as tree:
+            self.assertTrue(tree.delete_interface('eth0'))
+            self.assertFalse(tree.delete_interface('eth0'))
+
+        self.assertEqual(self._read(), u'auto lo\niface lo inet loopback\n')
+
+    def test_edit_add_existing_interface(self):
+        with self.assertRaises(InvalidParameter):
+            with self.e.edit() as tree:
+                tree.add_dhcp_interface('wlan1', EtcNetworkInterfaces.OPTION_NONE)
+
+        self.assertEqual(self._read(), self.CONTENT)
+
+
 if __name__ == '__main__':
     # coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread test_etcnetworkinterfaces.py; coverage report -m -i
     unittest.main()
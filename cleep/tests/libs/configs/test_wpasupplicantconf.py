@@ -15,6 +15,8 @@ from pprint import pprint
 import io
 from unittest.mock import Mock, patch, ANY, mock_open
 import time
+import tempfile
+import shutil
 from cleep.libs.tests.common import get_log_level
 
 LOG_LEVEL = get_log_level()
@@ -1325,6 +1327,129 @@ GD      Grenada"""
         self.w._WpaSupplicantConf__update_network_disabled_flag.assert_called_with('network', True, interface=None)
 
 
+class TestsWpaSupplicantConfEdit(unittest.TestCase):
+
+    def setUp(self):
+        TestLib()
+        logging.basicConfig(level=LOG_LEVEL, format='%(asctime)s %(name)s:%(lineno)d %(levelname)s : %(message)s')
+
+        self.dir = tempfile.mkdtemp()
+        patcher = patch.object(WpaSupplicantConf, 'WPASUPPLICANT_DIR', self.dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.path = os.path.join(self.dir, 'wpa_supplicant.conf')
+        with io.open(self.path, 'w') as f:
+            f.write(TestsWpaSupplicantConf.CONTENT_WITH_COUNTRY)
+
+        self.fs = CleepFilesystem()
+        self.fs.enable_write()
+        self.w = WpaSupplicantConf(self.fs, backup=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def _read(self, path=None):
+        with io.open(path or self.path, 'r') as f:
+            return f.read()
+
+    def test_edit_lossless(self):
+        self.fs.write_data = Mock(wraps=self.fs.write_data)
+
+        with self.w.edit() as tree:
+            self.assertEqual(tree.to_string(), TestsWpaSupplicantConf.CONTENT_WITH_COUNTRY)
+            self.assertEqual(tree.get_country(), 'GB')
+
+        self.fs.write_data.assert_not_called()
+        self.assertEqual(self.w.CONF, WpaSupplicantConf.DEFAULT_CONF)
+
+    def test_edit_get_networks(self):
+        with self.w.edit() as tree:
+            networks = tree.get_networks()
+        logging.debug('Networks: %s' % networks)
+
+        self.assertEqual(sorted(networks.keys()), ['mynetwork1', 'mynetwork2', 'wepnetwork', 'wpanetwork'])
+        self.assertEqual(networks['mynetwork1']['password'], 'mypassword1')
+        self.assertEqual(networks['mynetwork2']['hidden'], True)
+        self.assertEqual(networks['wepnetwork']['encryption'], WpaSupplicantConf.ENCRYPTION_TYPE_WEP)
+        self.assertEqual(networks['wpanetwork']['disabled'], True)
+
+    def test_edit_many_changes_writes_once(self):
+        self.fs.write_data = Mock(wraps=self.fs.write_data)
+
+        with self.w.edit() as tree:
+            self.assertTrue(tree.delete_network('mynetwork1'))
+            self.assertTrue(tree.set_network_password('mynetwork2', 'newpassword'))
+            self.assertTrue(tree.set_network_disabled('wpanetwork', False))
+            tree.set_country('FR')
+
+        self.assertEqual(self.fs.write_data.call_count, 1)
+        self.assertTrue(tree.written)
+        content = self._read()
+        self.assertTrue(content.startswith('country=FR\n'))
+        self.assertFalse('mynetwork1' in content)
+        self.assertTrue('psk=newpassword' in content)
+        # comments are kept
+        self.assertTrue('#psk="helloworld"' in content)
+        with self.w.edit() as tree:
+            self.assertEqual(tree.get_networks()['wpanetwork']['disabled'], False)
+
+    def test_edit_unknown_network(self):
+        with self.w.edit() as tree:
+            self.assertFalse(tree.delete_network('dummy'))
+            self.assertFalse(tree.set_network_password('dummy', 'password'))
+            self.assertFalse(tree.set_network_disabled('dummy', True))
+
+        self.assertFalse(tree.written)
+        self.assertEqual(self._read(), TestsWpaSupplicantConf.CONTENT_WITH_COUNTRY)
+
+    def test_edit_create_interface_config(self):
+        with self.w.edit('wlan1') as tree:
+            tree.add_network('mynetwork', WpaSupplicantConf.ENCRYPTION_TYPE_UNSECURED, None)
+
+        path = os.path.join(self.dir, 'wpa_supplicant-wlan1.conf')
+        self.assertTrue(os.path.exists(path))
+        self.assertTrue('ssid="mynetwork"' in self._read(path))
+        self.assertEqual(self._read(), TestsWpaSupplicantConf.CONTENT_WITH_COUNTRY)
+
+    def test_add_networks(self):
+        self.fs.write_data = Mock(wraps=self.fs.write_data)
+
+        self.assertTrue(self.w.add_networks([
+            {'network': 'net1', 'encryption': WpaSupplicantConf.ENCRYPTION_TYPE_WPA2, 'password': 'password1'},
+            {'network': 'net2', 'encryption': WpaSupplicantConf.ENCRYPTION_TYPE_WEP, 'password': 'password2', 'hidden': True},
+            {'network': 'net3', 'encryption': WpaSupplicantConf.ENCRYPTION_TYPE_UNSECURED},
+        ], encrypt_password=False))
+
+        self.assertEqual(self.fs.write_data.call_count, 1)
+        with self.w.edit() as tree:
+            networks = tree.get_networks()
+        self.assertEqual(networks['net1']['encryption'], WpaSupplicantConf.ENCRYPTION_TYPE_WPA2)
+        self.assertEqual(networks['net2']['encryption'], WpaSupplicantConf.ENCRYPTION_TYPE_WEP)
+        self.assertEqual(networks['net2']['hidden'], True)
+        self.assertEqual(networks['net3']['encryption'], WpaSupplicantConf.ENCRYPTION_TYPE_UNSECURED)
+
+    def test_add_networks_invalid_params(self):
+        with self.assertRaises(MissingParameter):
+            self.w.add_networks([{'encryption': WpaSupplicantConf.ENCRYPTION_TYPE_WPA2, 'password': 'password'}])
+        with self.assertRaises(MissingParameter):
+            self.w.add_networks([{'network': 'net', 'password': 'password'}])
+        with self.assertRaises(InvalidParameter):
+            self.w.add_networks([{'network': 'net', 'encryption': 'dummy', 'password': 'password'}])
+        with self.assertRaises(MissingParameter):
+            self.w.add_networks([{'network': 'net', 'encryption': WpaSupplicantConf.ENCRYPTION_TYPE_WPA2}])
+
+        self.assertEqual(self._read(), TestsWpaSupplicantConf.CONTENT_WITH_COUNTRY)
+
+    def test_add_networks_existing_network(self):
+        with self.assertRaises(InvalidParameter):
+            self.w.add_networks([
+                {'network': 'net1', 'encryption': WpaSupplicantConf.ENCRYPTION_TYPE_UNSECURED},
+                {'network': 'mynetwork1', 'encryption': WpaSupplicantConf.ENCRYPTION_TYPE_UNSECURED},
+            ])
+
+        self.assertEqual(self._read(), TestsWpaSupplicantConf.CONTENT_WITH_COUNTRY)
+
+
 if __name__ == '__main__':
     # coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread test_wpasupplicantconf.py; coverage report -m -i
     unittest.main()
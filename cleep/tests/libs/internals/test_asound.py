@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from cleep.libs.tests.lib import TestLib
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.dirname(__file__)).replace('tests/', ''))
+from asound import Asound
+import unittest
+import logging
+import shutil
+import tempfile
+from unittest.mock import patch
+from cleep.libs.tests.common import get_log_level
+
+LOG_LEVEL = get_log_level()
+
+CARDS = """ 0 [ALSA           ]: bcm2835_alsa - bcm2835 ALSA
+                      bcm2835 ALSA
+ 1 [UACDemoV10     ]: USB-Audio - UACDemoV1.0
+                      Jieli Technology UACDemoV1.0 at usb-3f980000.usb-1.4, full speed
+"""
+PCM = """00-00: bcm2835 ALSA : bcm2835 ALSA : playback 7
+00-01: bcm2835 IEC958/HDMI : bcm2835 IEC958/HDMI1 : playback 1
+01-00: USB Audio : USB Audio : playback 1 : capture 1
+02-00: Unknown card : Unknown card : playback 1
+"""
+
+
+class AsoundTests(unittest.TestCase):
+
+    def setUp(self):
+        logging.basicConfig(level=LOG_LEVEL, format=u'%(asctime)s %(name)s:%(lineno)d %(levelname)s : %(message)s')
+        TestLib()
+        self.root = tempfile.mkdtemp()
+        self._write('proc/asound/cards', CARDS)
+        self._write('proc/asound/pcm', PCM)
+        os.makedirs(os.path.join(self.root, 'dev/snd'))
+        self.writers = []
+        self.a = Asound(proc_path=os.path.join(self.root, 'proc'), dev_path=os.path.join(self.root, 'dev'))
+
+    def tearDown(self):
+        self.a.close()
+        for fd in self.writers:
+            os.close(fd)
+        shutil.rmtree(self.root)
+
+    def _write(self, path, content):
+        path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as fd:
+            fd.write(content)
+
+    def _make_controls(self):
+        # fifos stand for controls devices: writing to them simulates kernel events
+        for card_id in (0, 1):
+            path = os.path.join(self.root, 'dev/snd/controlC%s' % card_id)
+            os.mkfifo(path)
+            reader = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+            self.writers.append(os.open(path, os.O_WRONLY))
+            os.close(reader)
+
+    def test_is_available(self):
+        self.assertTrue(self.a.is_available())
+
+    def test_is_available_without_procfs(self):
+        a = Asound(proc_path=os.path.join(self.root, 'dummy'))
+
+        self.assertFalse(a.is_available())
+        self.assertEqual(a.get_devices(Asound.STREAM_PLAYBACK), {})
+
+    def test_get_playback_devices(self):
+        devices = self.a.get_devices(Asound.STREAM_PLAYBACK)
+        logging.debug('Devices: %s' % devices)
+
+        self.assertEqual(devices, {
+            0: {
+                'name': 'ALSA',
+                'desc': 'bcm2835 ALSA',
+                'devices': {
+                    0: {'deviceid': 0, 'cardid': 0, 'name': 'bcm2835 ALSA', 'desc': 'bcm2835 ALSA'},
+                    1: {'deviceid': 1, 'cardid': 0, 'name': 'bcm2835 IEC958/HDMI', 'desc': 'bcm2835 IEC958/HDMI1'},
+                },
+            },
+            1: {
+                'name': 'UACDemoV10',
+                'desc': 'UACDemoV1.0',
+                'devices': {
+                    0: {'deviceid': 0, 'cardid': 1, 'name': 'USB Audio', 'desc': 'USB Audio'},
+                },
+            },
+        })
+
+    def test_get_capture_devices(self):
+        devices = self.a.get_devices(Asound.STREAM_CAPTURE)
+
+        self.assertEqual(list(devices.keys()), [1])
+        self.assertEqual(list(devices[1]['devices'].keys()), [0])
+
+    def test_get_devices_without_pcm(self):
+        os.remove(os.path.join(self.root, 'proc/asound/pcm'))
+
+        self.assertEqual(self.a.get_devices(Asound.STREAM_PLAYBACK), {})
+
+    @patch('asound.fcntl.ioctl')
+    def test_has_changed(self, ioctl_mock):
+        self._make_controls()
+
+        self.assertTrue(self.a.has_changed())
+        self.assertEqual(ioctl_mock.call_count, 2)
+        self.assertFalse(self.a.has_changed())
+
+        os.write(self.writers[1], b'\0' * 72)
+        self.assertTrue(self.a.has_changed())
+        self.assertFalse(self.a.has_changed())
+
+    @patch('asound.fcntl.ioctl')
+    def test_has_changed_cards_changed(self, ioctl_mock):
+        self._make_controls()
+        self.assertTrue(self.a.has_changed())
+        self.assertFalse(self.a.has_changed())
+
+        self._write('proc/asound/cards', CARDS.split('\n 1 ')[0] + '\n')
+
+        self.assertTrue(self.a.has_changed())
+        self.assertEqual(ioctl_mock.call_count, 3)
+        self.assertFalse(self.a.has_changed())
+
+    def test_has_changed_controls_not_watchable(self):
+        # no controls devices
+        self.assertTrue(self.a.has_changed())
+        self.assertTrue(self.a.has_changed())
+
+    @patch('asound.fcntl.ioctl')
+    def test_has_changed_subscription_failed(self, ioctl_mock):
+        ioctl_mock.side_effect = OSError('Test exception')
+        self._make_controls()
+
+        self.assertTrue(self.a.has_changed())
+        self.assertTrue(self.a.has_changed())
+
+    def test_has_changed_without_procfs(self):
+        a = Asound(proc_path=os.path.join(self.root, 'dummy'))
+
+        self.assertTrue(a.has_changed())
+        self.assertTrue(a.has_changed())
+
+
+if __name__ == '__main__':
+    # coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread test_asound.py; coverage report -m -i
+    unittest.main()
@@ -0,0 +1,255 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from cleep.libs.tests.lib import TestLib
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.dirname(__file__)).replace('tests/', ''))
+from blockdevices import BlockDevices
+import unittest
+import logging
+import shutil
+import tempfile
+from cleep.libs.tests.common import get_log_level
+
+LOG_LEVEL = get_log_level()
+
+MOUNTINFO = """22 1 179:2 / / rw,noatime shared:1 - ext4 /dev/root rw
+23 22 0:21 / /proc rw,relatime shared:2 - proc proc rw
+30 22 179:1 / /boot rw,relatime shared:3 - vfat /dev/mmcblk0p1 rw
+31 22 8:1 / /media/usb\\040key rw,relatime shared:4 - vfat /dev/sda1 rw
+32 22 179:2 / /mnt/root rw,noatime shared:5 - ext4 /dev/mmcblk0p2 rw
+"""
+UDEV_MMCBLK0 = """S:disk/by-path/platform-3f202000.mmc
+I:7279063
+E:ID_NAME=SC16G
+E:ID_PATH_TAG=platform-3f202000_mmc
+E:ID_PART_TABLE_UUID=b294e190
+G:systemd
+Q:systemd
+V:1
+"""
+UDEV_MMCBLK0P1 = """S:disk/by-uuid/EBBA-157F
+E:ID_PATH_TAG=platform-3f202000_mmc
+E:ID_FS_UUID=EBBA-157F
+E:ID_FS_TYPE=vfat
+E:ID_PART_ENTRY_UUID=b294e190-01
+"""
+UDEV_MMCBLK0P2 = """E:ID_PATH_TAG=platform-3f202000_mmc
+E:ID_FS_TYPE=ext4
+"""
+UDEV_SDA = """E:ID_BUS=usb
+E:ID_MODEL=MassStorageClass
+E:ID_PATH_TAG=pci-0000_00_14_0-usb-0_10_1_0-scsi-0_0_0_1
+"""
+UDEV_SDA1 = """E:ID_BUS=usb
+E:ID_FS_UUID=1234-ABCD
+E:ID_FS_TYPE=vfat
+E:ID_PART_ENTRY_UUID=5678-01
+E:ID_FS_LABEL=key=value
+"""
+
+
+class BlockDevicesTests(unittest.TestCase):
+
+    def setUp(self):
+        logging.basicConfig(level=LOG_LEVEL, format=u'%(asctime)s %(name)s:%(lineno)d %(levelname)s : %(message)s')
+        TestLib()
+        self.root = tempfile.mkdtemp()
+        self._make_tree()
+        self.b = BlockDevices(
+            sys_path=os.path.join(self.root, 'sys'),
+            dev_path=os.path.join(self.root, 'dev'),
+            proc_path=os.path.join(self.root, 'proc'),
+            udev_data_path=os.path.join(self.root, 'run/udev/data'),
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def _write(self, path, content):
+        path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as fd:
+            fd.write(content)
+
+    def _link(self, path, target):
+        path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.symlink(target, path)
+
+    def _add_device(self, path, name, devnum, size, attributes=None):
+        self._write('%s/dev' % path, '%s\n' % devnum)
+        self._write('%s/size' % path, '%s\n' % size)
+        self._write('%s/ro' % path, '0\n')
+        for attribute, value in (attributes or {}).items():
+            self._write('%s/%s' % (path, attribute), value)
+        self._link('sys/class/block/%s' % name, os.path.join(self.root, path))
+
+    def _add_drive(self, name, devnum, size, removable, model=None, virtual=False):
+        path = 'sys/block/%s' % name
+        attributes = {'removable': '%s\n' % removable}
+        if not virtual:
+            attributes['device/type'] = '0\n'
+        if model is not None:
+            attributes['device/model'] = '%s    \n' % model
+        self._add_device(path, name, devnum, size, attributes)
+
+    def _add_partition(self, drive, name, devnum, number, size, readonly=False):
+        path = 'sys/block/%s/%s' % (drive, name)
+        self._add_device(path, name, devnum, size, {'partition': '%s\n' % number})
+        if readonly:
+            self._write('%s/ro' % path, '1\n')
+
+    def _make_tree(self):
+        # sdcard
+        self._add_drive('mmcblk0', '179:0', 4000, 0)
+        self._add_partition('mmcblk0', 'mmcblk0p2', '179:2', 2, 3000)
+        self._add_partition('mmcblk0', 'mmcblk0p1', '179:1', 1, 1000)
+        # usb key
+        self._add_drive('sda', '8:0', 2000, 1, model='Cruzer Blade')
+        self._add_partition('sda', 'sda1', '8:1', 1, 500, readonly=True)
+        # virtual and optical devices
+        self._add_drive('loop0', '7:0', 100, 0, virtual=True)
+        self._add_drive('sr0', '11:0', 100, 1, model='DVD')
+
+        self._write('proc/self/mountinfo', MOUNTINFO)
+        self._write('run/udev/data/b179:0', UDEV_MMCBLK0)
+        self._write('run/udev/data/b179:1', UDEV_MMCBLK0P1)
+        self._write('run/udev/data/b179:2', UDEV_MMCBLK0P2)
+        self._write('run/udev/data/b8:0', UDEV_SDA)
+        self._write('run/udev/data/b8:1', UDEV_SDA1)
+        self._write('run/udev/data/c189:1', 'E:ID_BUS=usb\n')
+        self._link('dev/disk/by-uuid/b3ce35cd-ade9-4755-a4bb-1571e37fc1b9', '../../mmcblk0p2')
+        self._link('dev/disk/by-partuuid/b294e190-02', '../../mmcblk0p2')
+
+    def test_is_available(self):
+        self.assertTrue(self.b.is_available())
+        self.assertTrue(self.b.is_udev_available())
+
+    def test_is_available_without_sysfs(self):
+        b = BlockDevices(sys_path=os.path.join(self.root, 'dummy'), udev_data_path=os.path.join(self.root, 'dummy'))
+
+        self.assertFalse(b.is_available())
+        self.assertFalse(b.is_udev_available())
+
+    def test_get_devices(self):
+        devices = self.b.get_devices()
+        logging.debug('Devices: %s' % devices)
+
+        self.assertEqual(list(devices.keys()), ['mmcblk0', 'sda'])
+        self.assertEqual(list(devices['mmcblk0'].keys()), ['mmcblk0', 'mmcblk0p1', 'mmcblk0p2'])
+        self.assertEqual(list(devices['sda'].keys()), ['sda', 'sda1'])
+        self.assertEqual(devices['mmcblk0']['mmcblk0'], {
+            'name': 'mmcblk0',
+            'major': '179',
+            'minor': '0',
+            'size': 4000 * 512,
+            'totalsize': 4000 * 512,
+            'percent': 100,
+            'readonly': False,
+            'mountpoint': '',
+            'partition': False,
+            'removable': False,
+            'drivemodel': '',
+        })
+        self.assertEqual(devices['mmcblk0']['mmcblk0p2'], {
+            'name': 'mmcblk0p2',
+            'major': '179',
+            'minor': '2',
+            'size': 3000 * 512,
+            'totalsize': 4000 * 512,
+            'percent': 75,
+            'readonly': False,
+            'mountpoint': '/',
+            'partition': True,
+            'removable': False,
+            'drivemodel': None,
+        })
+
+    def test_get_devices_drive_infos(self):
+        devices = self.b.get_devices()
+
+        self.assertEqual(devices['sda']['sda']['drivemodel'], 'Cruzer Blade')
+        self.assertTrue(devices['sda']['sda']['removable'])
+        self.assertTrue(devices['sda']['sda1']['removable'])
+        self.assertTrue(devices['sda']['sda1']['readonly'])
+        self.assertFalse(devices['sda']['sda']['readonly'])
+        self.assertEqual(devices['sda']['sda1']['percent'], 25)
+
+    def test_get_devices_mountpoints(self):
+        devices = self.b.get_devices()
+
+        self.assertEqual(devices['mmcblk0']['mmcblk0p1']['mountpoint'], '/boot')
+        self.assertEqual(devices['mmcblk0']['mmcblk0p2']['mountpoint'], '/')
+        self.assertEqual(devices['sda']['sda1']['mountpoint'], '/media/usb key')
+
+    def test_get_devices_without_mountinfo(self):
+        os.remove(os.path.join(self.root, 'proc/self/mountinfo'))
+
+        devices = self.b.get_devices()
+
+        self.assertEqual(devices['mmcblk0']['mmcblk0p2']['mountpoint'], '')
+
+    def test_get_filesystems(self):
+        filesystems = self.b.get_filesystems()
+        logging.debug('Filesystems: %s' % filesystems)
+
+        self.assertEqual(filesystems, {
+            os.path.join(self.root, 'dev/mmcblk0p1'): {
+                'device': os.path.join(self.root, 'dev/mmcblk0p1'),
+                'uuid': 'EBBA-157F',
+                'type': 'vfat',
+                'partuuid': 'b294e190-01',
+            },
+            os.path.join(self.root, 'dev/mmcblk0p2'): {
+                'device': os.path.join(self.root, 'dev/mmcblk0p2'),
+                'uuid': 'b3ce35cd-ade9-4755-a4bb-1571e37fc1b9',
+                'type': 'ext4',
+                'partuuid': 'b294e190-02',
+            },
+            os.path.join(self.root, 'dev/sda1'): {
+                'device': os.path.join(self.root, 'dev/sda1'),
+                'uuid': '1234-ABCD',
+                'type': 'vfat',
+                'partuuid': '5678-01',
+            },
+        })
+
+    def test_get_filesystems_default_dev_path(self):
+        b = BlockDevices(sys_path=os.path.join(self.root, 'sys'), udev_data_path=os.path.join(self.root, 'run/udev/data'))
+
+        filesystems = b.get_filesystems()
+
+        self.assertEqual(sorted(filesystems.keys()), ['/dev/mmcblk0p1', '/dev/sda1'])
+
+    def test_get_udev_properties(self):
+        properties = self.b.get_udev_properties('sda1')
+
+        self.assertEqual(properties, {
+            'ID_BUS': 'usb',
+            'ID_FS_UUID': '1234-ABCD',
+            'ID_FS_TYPE': 'vfat',
+            'ID_PART_ENTRY_UUID': '5678-01',
+            'ID_FS_LABEL': 'key=value',
+        })
+
+    def test_get_udev_properties_device_path(self):
+        properties = self.b.get_udev_properties('/dev/mmcblk0')
+
+        self.assertEqual(list(properties.items()), [
+            ('ID_NAME', 'SC16G'),
+            ('ID_PATH_TAG', 'platform-3f202000_mmc'),
+            ('ID_PART_TABLE_UUID', 'b294e190'),
+        ])
+
+    def test_get_udev_properties_unknown_device(self):
+        self.assertIsNone(self.b.get_udev_properties('sdz'))
+
+    def test_get_udev_properties_device_not_in_database(self):
+        self.assertIsNone(self.b.get_udev_properties('loop0'))
+
+
+if __name__ == '__main__':
+    # coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread test_blockdevices.py; coverage report -m -i
+    unittest.main()
@@ -9,7 +9,7 @@ from cleep.libs.tests.lib import TestLib
 from cleep.exception import InvalidParameter
 import unittest
 import logging
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 import time
 import io
 import json
@@ -196,6 +196,87 @@ class CleepFilesystemTests(unittest.TestCase):
             time.sleep(0.25)
         self.assertGreaterEqual(counter, 7) # it should be 8 (2.0/0.25=8)
 
+    def test_enable_write_during_debounce_does_not_remount(self):
+        self.c.enable_write()
+        self.c.disable_write()
+        self.c.enable_write()
+        self.c.disable_write()
+        time.sleep(self.c.DEBOUNCE_DURATION+0.5)
+
+        self.assertEqual(self.c.rw.enable_write_on_root.call_count, 1)
+        self.assertEqual(self.c.rw.disable_write_on_root.call_count, 1)
+        stats = self.c.get_stats()
+        self.assertEqual(stats['remounts'], {'root': 1, 'boot': 0})
+        self.assertGreaterEqual(stats['rw_duration']['root'], self.c.DEBOUNCE_DURATION)
+        self.assertEqual(stats['rw_duration']['boot'], 0.0)
+
+    def test_enable_write_failed_does_not_count_remount(self):
+        self.c.rw.enable_write_on_root.return_value = False
+
+        self.c.enable_write()
+
+        stats = self.c.get_stats()
+        self.assertEqual(stats['remounts'], {'root': 0, 'boot': 0})
+        self.assertEqual(stats['rw_duration']['root'], 0.0)
+        self.c.disable_write()
+
+    def test_transaction(self):
+        self.c.is_readonly_fs = True
+
+        with patch('cleepfilesystem.os.sync') as sync_mock:
+            with self.c.transaction() as fs:
+                self.assertIs(fs, self.c)
+                for index in range(3):
+                    self.assertTrue(self.c.write_data(self.FILE, u'data%s' % index))
+                    self.c.rw.disable_write_on_root.assert_not_called()
+                self.assertFalse(sync_mock.called)
+            sync_mock.assert_called_once()
+
+        self.assertEqual(self.c.rw.enable_write_on_root.call_count, 1)
+        self.assertEqual(self.c._get_counters(), {'root': 0, 'boot': 0})
+        time.sleep(self.c.DEBOUNCE_DURATION+0.5)
+        self.assertEqual(self.c.rw.disable_write_on_root.call_count, 1)
+        stats = self.c.get_stats()
+        logging.debug('Stats: %s', stats)
+        self.assertEqual(stats['remounts']['root'], 1)
+        self.assertEqual(stats['transactions'], 1)
+        self.assertGreater(stats['rw_duration']['root'], 0.0)
+
+    def test_transaction_nested(self):
+        self.c.is_readonly_fs = True
+
+        with patch('cleepfilesystem.os.sync'):
+            with self.c.transaction(root=True, boot=True):
+                with self.c.transaction(root=True, boot=False):
+                    self.assertEqual(self.c._get_counters(), {'root': 2, 'boot': 1})
+                self.assertEqual(self.c._get_counters(), {'root': 1, 'boot': 1})
+
+        self.assertEqual(self.c._get_counters(), {'root': 0, 'boot': 0})
+        self.assertEqual(self.c.rw.enable_write_on_root.call_count, 1)
+        self.assertEqual(self.c.rw.enable_write_on_boot.call_count, 1)
+        self.assertEqual(self.c.get_stats()['transactions'], 2)
+
+    def test_transaction_exception(self):
+        self.c.is_readonly_fs = True
+
+        with patch('cleepfilesystem.os.sync') as sync_mock:
+            with self.assertRaises(Exception):
+                with self.c.transaction():
+                    raise Exception('Test exception')
+            sync_mock.assert_called_once()
+
+        self.assertEqual(self.c._get_counters(), {'root': 0, 'boot': 0})
+
+    def test_transaction_not_readonly_fs(self):
+        self.c.is_readonly_fs = False
+
+        with patch('cleepfilesystem.os.sync') as sync_mock:
+            with self.c.transaction():
+                self.assertTrue(self.c.write_data(self.FILE, u'data'))
+            sync_mock.assert_called_once()
+
+        self.assertFalse(self.c.rw.enable_write_on_root.called)
+
     def test_crash_report(self):
         self.assertIsNone(self.c.crash_report)
         self.c.set_crash_report(Mock())
@@ -280,6 +361,34 @@ class CleepFilesystemTests(unittest.TestCase):
         #self.assertTrue(self.c.rw.disable_write_on_root.called)
         self.assertTrue(self.c.crash_report.report_exception.called)
 
+    def test_write_data_atomic(self):
+        self.c.is_readonly_fs = True
+        self.c.DEBOUNCE_DURATION = 0.1
+        with io.open(self.FILE, 'w') as fd:
+            fd.write(u'old content')
+
+        self.assertTrue(self.c.write_data(self.FILE, u'atomic test', atomic=True))
+
+        with io.open(self.FILE, 'r') as fd:
+            self.assertEqual('atomic test', fd.read())
+        self.assertFalse(os.path.exists(self.FILE + '.tmp'))
+        self.assertTrue(self.c.rw.enable_write_on_root.called)
+        time.sleep(self.c.DEBOUNCE_DURATION+0.5)
+        self.assertTrue(self.c.rw.disable_write_on_root.called)
+
+    def test_write_data_atomic_exception(self):
+        self.c.set_crash_report(Mock())
+        with io.open(self.FILE, 'w') as fd:
+            fd.write(u'old content')
+
+        with patch('cleepfilesystem.os.replace', side_effect=Exception('Test exception')):
+            self.assertFalse(self.c.write_data(self.FILE, u'atomic test', atomic=True))
+
+        with io.open(self.FILE, 'r') as fd:
+            self.assertEqual('old content', fd.read())
+        self.assertFalse(os.path.exists(self.FILE + '.tmp'))
+        self.assertTrue(self.c.crash_report.report_exception.called)
+
     def test_read_data(self):
         with io.open(self.FILE, 'w') as fd:
             fd.write(u'read_data test')
@@ -322,6 +431,12 @@ class CleepFilesystemTests(unittest.TestCase):
         with io.open(self.FILE, 'r') as fd:
             self.assertEqual('{\n    "test": "write_json"\n}', fd.read().strip())
 
+    def test_write_json_atomic(self):
+        self.assertTrue(self.c.write_json(self.FILE, {'test':'write_json'}, atomic=True))
+
+        with io.open(self.FILE, 'r') as fd:
+            self.assertEqual('{\n    "test": "write_json"\n}', fd.read().strip())
+
     def test_rename(self):
         with io.open(self.FILE, 'w') as fd:
             fd.write(u'test')
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from cleep.libs.tests.lib import TestLib
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.dirname(__file__)).replace('tests/', ''))
+from commandcache import CommandCache, get_command_cache
+import unittest
+import logging
+import time
+from unittest.mock import Mock
+from threading import Thread, Event
+from cleep.libs.tests.common import get_log_level
+
+LOG_LEVEL = get_log_level()
+
+
+class CommandCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        logging.basicConfig(level=LOG_LEVEL, format=u'%(asctime)s %(name)s:%(lineno)d %(levelname)s : %(message)s')
+        TestLib()
+        self.c = CommandCache()
+
+    def test_get(self):
+        loader = Mock(return_value='result')
+
+        self.assertEqual(self.c.get(('cmd',), 1.0, loader), 'result')
+        self.assertEqual(self.c.get(('cmd',), 1.0, loader), 'result')
+
+        self.assertEqual(loader.call_count, 1)
+
+    def test_get_returns_copy(self):
+        loader = Mock(return_value={'sda': {'partitions': ['sda1']}})
+
+        result = self.c.get(('cmd',), 1.0, loader)
+        result['sda']['partitions'].append('sda2')
+        result['sdb'] = {}
+        cached = self.c.get(('cmd',), 1.0, loader)
+        cached['sda']['partitions'].clear()
+
+        self.assertEqual(self.c.get(('cmd',), 1.0, loader), {'sda': {'partitions': ['sda1']}})
+        self.assertEqual(loader.call_count, 1)
+
+    def test_get_expired(self):
+        loader = Mock(side_effect=['result1', 'result2'])
+
+        self.assertEqual(self.c.get(('cmd',), 0.1, loader), 'result1')
+        time.sleep(0.15)
+        self.assertEqual(self.c.get(('cmd',), 0.1, loader), 'result2')
+
+        self.assertEqual(loader.call_count, 2)
+
+    def test_get_different_keys(self):
+        loader1 = Mock(return_value='result1')
+        loader2 = Mock(return_value='result2')
+
+        self.assertEqual(self.c.get(('cmd', 'arg1'), 1.0, loader1), 'result1')
+        self.assertEqual(self.c.get(('cmd', 'arg2'), 1.0, loader2), 'result2')
+
+        loader1.assert_called_once()
+        loader2.assert_called_once()
+
+    def test_get_single_flight(self):
+        release = Event()
+        loader = Mock(side_effect=lambda: release.wait(2.0) and 'result')
+        results = []
+        threads = [Thread(target=lambda: results.append(self.c.get(('cmd',), 1.0, loader))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(loader.call_count, 1)
+        self.assertEqual(results, ['result'] * 5)
+        stats = self.c.get_stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['waits'], 4)
+
+    def test_get_loader_exception(self):
+        release = Event()
+        def loader():
+            release.wait(2.0)
+            raise Exception('Test')
+        errors = []
+        def get():
+            try:
+                self.c.get(('cmd',), 1.0, loader)
+            except Exception as error:
+                errors.append(str(error))
+        threads = [Thread(target=get) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, ['Test', 'Test'])
+        self.assertEqual(self.c.get_stats()['entries'], 0)
+        self.assertEqual(self.c.get_stats()['commands']['cmd']['errors'], 1)
+        self.assertEqual(self.c.get(('cmd',), 1.0, Mock(return_value='result')), 'result')
+
+    def test_invalidate(self):
+        loader1 = Mock(side_effect=['result1', 'result2'])
+        loader2 = Mock(return_value='result')
+        self.c.get(('cmd1', 'arg'), 1.0, loader1)
+        self.c.get(('cmd2',), 1.0, loader2)
+
+        self.c.invalidate('cmd1')
+
+        self.assertEqual(self.c.get(('cmd1', 'arg'), 1.0, loader1), 'result2')
+        self.assertEqual(self.c.get(('cmd2',), 1.0, loader2), 'result')
+        loader2.assert_called_once()
+
+    def test_invalidate_all(self):
+        loader1 = Mock(return_value='result1')
+        loader2 = Mock(return_value='result2')
+        self.c.get(('cmd1',), 1.0, loader1)
+        self.c.get(('cmd2',), 1.0, loader2)
+
+        self.c.invalidate()
+
+        self.assertEqual(self.c.get_stats()['entries'], 0)
+        self.c.get(('cmd1',), 1.0, loader1)
+        self.c.get(('cmd2',), 1.0, loader2)
+        self.assertEqual(loader1.call_count, 2)
+        self.assertEqual(loader2.call_count, 2)
+
+    def test_invalidate_while_loading(self):
+        release = Event()
+        loader = Mock(side_effect=lambda: release.wait(2.0) and 'stale')
+        results = []
+        thread = Thread(target=lambda: results.append(self.c.get(('cmd',), 1.0, loader)))
+        thread.start()
+        time.sleep(0.1)
+
+        self.c.invalidate('cmd')
+        release.set()
+        thread.join()
+
+        self.assertEqual(results, ['stale'])
+        self.assertEqual(self.c.get(('cmd',), 1.0, Mock(return_value='fresh')), 'fresh')
+
+    def test_get_stats(self):
+        loader = Mock(return_value='result')
+        self.c.get(('cmd1',), 1.0, loader)
+        self.c.get(('cmd1',), 1.0, loader)
+        self.c.get(('cmd1',), 1.0, loader)
+        self.c.get(('cmd2',), 1.0, loader)
+        self.c.invalidate('cmd2')
+
+        stats = self.c.get_stats()
+        logging.debug('Stats: %s' % stats)
+
+        self.assertEqual(stats['entries'], 1)
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 2)
+        self.assertEqual(stats['waits'], 0)
+        self.assertEqual(stats['commands']['cmd1'], {'hits': 2, 'misses': 1, 'waits': 0, 'errors': 0, 'invalidations': 0})
+        self.assertEqual(stats['commands']['cmd2']['invalidations'], 1)
+
+    def test_get_command_cache(self):
+        cache = get_command_cache()
+
+        self.assertTrue(isinstance(cache, CommandCache))
+        self.assertIs(get_command_cache(), cache)
+
+
+if __name__ == '__main__':
+    # coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread test_commandcache.py; coverage report -m -i
+    unittest.main()
@@ -9,7 +9,8 @@ from cleep.libs.tests.lib import TestLib
 import unittest
 import logging
 import time
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
+from threading import Thread, BoundedSemaphore
 from cleep.libs.tests.common import get_log_level
 
 LOG_LEVEL = get_log_level()
@@ -43,6 +44,11 @@ class ConsoleTests(unittest.TestCase):
         self.return_code = return_code
         self.killed = killed
 
+    def _wait_for_end(self, timeout):
+        end = time.time() + timeout
+        while self.killed is None and time.time() < end:
+            time.sleep(0.01)
+
     def _result_callback(self, result):
         logging.debug('Result: %s' % result)
         self.counter_stdout = len(result['stdout'])
@@ -93,6 +99,42 @@ class ConsoleTests(unittest.TestCase):
         self.assertEqual(self.counter_stdout, 1)
         self.assertEqual(self.counter_stderr, 1)
 
+    def test_endless_console_callbacks_latency(self):
+        calls = []
+        e = EndlessConsole(
+            'echo tick; sleep 0.5; 1>&2 echo tock',
+            lambda stdout, stderr: calls.append((stdout, stderr, time.perf_counter())),
+            lambda return_code, killed: calls.append((return_code, killed, time.perf_counter())) or self._end_callback(return_code, killed),
+        )
+        start = time.perf_counter()
+        e.start()
+        self._wait_for_end(2.0)
+
+        self.assertEqual([call[:2] for call in calls], [('tick', None), (None, 'tock'), (0, False)])
+        self.assertLess(calls[0][2] - start, 0.3)
+        self.assertLess(calls[2][2] - start, 0.8)
+
+    def test_endless_console_chatty_process(self):
+        lines = []
+        e = EndlessConsole('seq 1 20000', lambda stdout, stderr: lines.append(stdout), self._end_callback)
+        e.start()
+        self._wait_for_end(10.0)
+
+        self.assertEqual(self.return_code, 0)
+        self.assertEqual(len(lines), 20000)
+        self.assertEqual(lines[-1], '20000')
+
+    def test_endless_console_kill_immediately(self):
+        e = EndlessConsole('sleep 3', None, self._end_callback)
+        start = time.time()
+        e.start()
+        e.kill()
+        self._wait_for_end(2.0)
+
+        self.assertLess(time.time() - start, 1.0)
+        self.assertTrue(self.killed)
+        self.assertIsNone(self.return_code)
+
     def test_console(self):
         c = Console()
         res = c.command('echo tick; 1>&2 echo tock')
@@ -132,6 +174,82 @@ class ConsoleTests(unittest.TestCase):
         self.assertLessEqual(start - time.time(), 1.25)
         self.assertTrue(res['killed'])
 
+    def test_console_returns_when_command_ends(self):
+        c = Console()
+        start = time.perf_counter()
+        res = c.command('echo tick')
+        duration = time.perf_counter() - start
+        logging.debug('Duration: %s' % duration)
+        self.assertEqual(res['returncode'], 0)
+        self.assertLess(duration, 0.1)
+
+    def test_console_large_output(self):
+        c = Console()
+        res = c.command('seq 1 100000; seq 1 1000 1>&2', 10.0)
+        self.assertFalse(res['killed'])
+        self.assertEqual(len(res['stdout']), 100000)
+        self.assertEqual(res['stdout'][-1], '100000')
+        self.assertEqual(len(res['stderr']), 1000)
+        self.assertTrue(res['error'])
+
+    def test_console_output_without_eol(self):
+        c = Console()
+        res = c.command('printf "tick\\n\\ntock"')
+        self.assertEqual(res['stdout'], ['tick', '', 'tock'])
+
+    def test_console_background_child_keeps_outputs_opened(self):
+        c = Console()
+        start = time.time()
+        res = c.command('echo tick; sleep 3 &', 2.0)
+        self.assertLess(time.time() - start, 1.0)
+        self.assertFalse(res['killed'])
+        self.assertEqual(res['stdout'], ['tick'])
+
+    def test_console_line_callback(self):
+        c = Console()
+        lines = []
+        def line_callback(stdout, stderr):
+            lines.append((stdout, stderr, time.perf_counter()))
+
+        start = time.perf_counter()
+        res = c.command('echo tick; sleep 0.5; 1>&2 echo tock', line_callback=line_callback)
+
+        self.assertEqual([(l[0], l[1]) for l in lines], [('tick', None), (None, 'tock')])
+        self.assertLess(lines[0][2] - start, 0.4)
+        self.assertEqual(res['stdout'], ['tick'])
+        self.assertEqual(res['stderr'], ['tock'])
+
+    def test_console_line_callback_exception(self):
+        c = Console()
+        res = c.command('echo tick', line_callback=Mock(side_effect=Exception('Test')))
+        self.assertEqual(res['stdout'], ['tick'])
+
+    def test_console_max_processes(self):
+        c = Console()
+        with patch.object(Console, '_Console__processes', BoundedSemaphore(1)):
+            results = []
+            threads = [Thread(target=lambda: results.append(c.command('sleep 0.3', 2.0))) for _ in range(2)]
+            start = time.time()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertGreaterEqual(time.time() - start, 0.6)
+            self.assertEqual([r['returncode'] for r in results], [0, 0])
+
+    def test_console_max_processes_timeout(self):
+        c = Console()
+        semaphore = BoundedSemaphore(1)
+        semaphore.acquire()
+        with patch.object(Console, '_Console__processes', semaphore):
+            start = time.time()
+            res = c.command('echo tick', 0.2)
+
+        self.assertLess(time.time() - start, 0.5)
+        self.assertTrue(res['killed'])
+        self.assertIsNone(res['returncode'])
+
     def test_console_delayed_command(self):
         c = Console()
         logging.debug('Start delayed command')
@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from cleep.libs.tests.lib import TestLib
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.dirname(__file__)).replace('tests/', ''))
+from consolereactor import ConsoleReactor, ProcessWatch, get_reactor
+import unittest
+import logging
+import subprocess
+import time
+from unittest.mock import patch
+from threading import enumerate as enumerate_threads
+from cleep.libs.tests.common import get_log_level
+
+LOG_LEVEL = get_log_level()
+
+
+class ConsoleReactorTests(unittest.TestCase):
+
+    def setUp(self):
+        logging.basicConfig(level=LOG_LEVEL, format=u'%(asctime)s %(name)s:%(lineno)d %(levelname)s : %(message)s')
+        TestLib()
+        self.name = 'reactor-%s' % self._testMethodName
+        self.r = ConsoleReactor(self.name, max_lines=10)
+        self.procs = []
+
+    def tearDown(self):
+        for proc in self.procs:
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+            proc.stdout.close()
+            proc.stderr.close()
+
+    def _launch(self, command):
+        proc = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self.procs.append(proc)
+        return proc
+
+    def _get_lines(self, watch):
+        lines = []
+        while True:
+            line = watch.get()
+            if line is None:
+                return lines
+            lines.append(line)
+
+    def _wait_for(self, condition, timeout=2.0):
+        end = time.time() + timeout
+        while not condition() and time.time() < end:
+            time.sleep(0.01)
+        return condition()
+
+    def test_watch(self):
+        watch = self.r.watch(self._launch('echo tick; 1>&2 echo tock; exit 3'))
+
+        lines = self._get_lines(watch)
+
+        self.assertTrue(isinstance(watch, ProcessWatch))
+        self.assertCountEqual(lines, [('tick', None), (None, 'tock')])
+        self.assertEqual(watch.returncode, 3)
+        self.assertTrue(watch.is_ended())
+        self.assertFalse(watch.cancelled)
+
+    def test_watch_line_latency(self):
+        watch = self.r.watch(self._launch('echo tick; sleep 1'))
+
+        start = time.perf_counter()
+        line = watch.get()
+
+        self.assertEqual(line, ('tick', None))
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+    def test_watch_exit_latency(self):
+        watch = self.r.watch(self._launch('sleep 0.2'))
+
+        start = time.perf_counter()
+        self.assertIsNone(watch.get())
+
+        self.assertLess(time.perf_counter() - start, 0.4)
+        self.assertEqual(watch.returncode, 0)
+
+    @patch('consolereactor.os.pidfd_open', side_effect=OSError('Not supported'))
+    def test_watch_without_pidfd(self, pidfd_open_mock):
+        self.r.POLL_DELAY = 0.05
+        watch = self.r.watch(self._launch('echo tick; sleep 0.2; exit 2'))
+
+        lines = self._get_lines(watch)
+
+        self.assertEqual(lines, [('tick', None)])
+        self.assertEqual(watch.returncode, 2)
+        self.assertTrue(pidfd_open_mock.called)
+
+    def test_watch_regular_file_outputs(self):
+        with open('/etc/hostname', 'rb') as stdout, open('/dev/null', 'rb') as stderr:
+            proc = subprocess.Popen('sleep 0.1', shell=True)
+            proc.stdout = stdout
+            proc.stderr = stderr
+            self.r.POLL_DELAY = 0.05
+            watch = self.r.watch(proc)
+
+            lines = self._get_lines(watch)
+            proc.stdout = proc.stderr = None
+
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(watch.returncode, 0)
+
+    def test_watch_output_without_eol(self):
+        watch = self.r.watch(self._launch('printf "tick\\n\\ntock"'))
+
+        self.assertEqual(self._get_lines(watch), [('tick', None), ('', None), ('tock', None)])
+
+    def test_watch_background_child_keeps_outputs_opened(self):
+        watch = self.r.watch(self._launch('echo tick; sleep 3 &'))
+
+        start = time.time()
+        lines = self._get_lines(watch)
+
+        self.assertLess(time.time() - start, 1.0)
+        self.assertEqual(lines, [('tick', None)])
+        self.assertEqual(watch.returncode, 0)
+
+    def test_watch_multiple_processes(self):
+        watches = [self.r.watch(self._launch('echo tick%d; sleep 0.2' % i)) for i in range(5)]
+
+        self.assertEqual(len([t for t in enumerate_threads() if t.name == self.name]), 1)
+        lines = [self._get_lines(watch) for watch in watches]
+
+        self.assertEqual(lines, [[('tick%d' % i, None)] for i in range(5)])
+
+    def test_watch_bounded_buffer(self):
+        watch = self.r.watch(self._launch('seq 1 100000'))
+        time.sleep(0.5)
+
+        # reactor paused reading, process is blocked on full pipe
+        self.assertIsNone(watch.proc.poll())
+        self.assertFalse(watch.is_ended())
+
+        lines = self._get_lines(watch)
+        self.assertEqual(len(lines), 100000)
+        self.assertEqual(lines[-1], ('100000', None))
+        self.assertEqual(watch.returncode, 0)
+
+    def test_watch_long_line_is_split(self):
+        self.r.MAX_LINE_SIZE = 1000
+        watch = self.r.watch(self._launch('head -c 2500 /dev/zero | tr "\\0" "a"'))
+
+        lines = self._get_lines(watch)
+
+        self.assertEqual([len(line[0]) for line in lines], [1000, 1000, 500])
+
+    def test_cancel(self):
+        watch = self.r.watch(self._launch('echo tick; sleep 3'))
+        self.assertEqual(watch.get(), ('tick', None))
+
+        start = time.time()
+        watch.cancel()
+
+        self.assertIsNone(watch.get())
+        self.assertLess(time.time() - start, 0.5)
+        self.assertTrue(watch.cancelled)
+        self.assertIsNone(watch.returncode)
+        self.assertIsNone(watch.proc.poll())
+
+    def test_cancel_ended_watch(self):
+        watch = self.r.watch(self._launch('true'))
+        self._get_lines(watch)
+
+        watch.cancel()
+
+        self.assertFalse(watch.cancelled)
+        self.assertEqual(watch.returncode, 0)
+
+    def test_reactor_thread_stops_when_idle(self):
+        watch = self.r.watch(self._launch('true'))
+        self._get_lines(watch)
+
+        self.assertTrue(self._wait_for(lambda: not [t for t in enumerate_threads() if t.name == self.name]))
+        self.assertEqual(self.r.get_watches_count(), 0)
+
+        watch = self.r.watch(self._launch('echo tick'))
+        self.assertEqual(self._get_lines(watch), [('tick', None)])
+
+    def test_get_watches_count(self):
+        watch1 = self.r.watch(self._launch('sleep 0.2'))
+        watch2 = self.r.watch(self._launch('sleep 0.2'))
+
+        self.assertEqual(self.r.get_watches_count(), 2)
+        self._get_lines(watch1)
+        self._get_lines(watch2)
+        self.assertEqual(self.r.get_watches_count(), 0)
+
+    def test_get_reactor(self):
+        reactor = get_reactor()
+
+        self.assertTrue(isinstance(reactor, ConsoleReactor))
+        self.assertIs(get_reactor(), reactor)
+
+
+if __name__ == '__main__':
+    # coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread test_consolereactor.py; coverage report -m -i
+    unittest.main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from cleep.libs.tests.lib import TestLib
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.dirname(__file__)).replace("tests/", ""))
+from deviceregistry import DeviceRegistry
+import unittest
+import logging
+from cleep.libs.tests.common import get_log_level
+
+LOG_LEVEL = get_log_level()
+
+DEVICE1 = {"uuid": "uuid1", "name": "device1", "type": "sensor", "gpios": ["GPIO1"]}
+DEVICE2 = {"uuid": "uuid2", "name": "device2", "type": "sensor", "gpios": ["GPIO2"]}
+DEVICE3 = {"uuid": "uuid3", "name": "device3", "type": "actuator"}
+
+
+class DeviceRegistryTests(unittest.TestCase):
+    def setUp(self):
+        TestLib()
+        logging.basicConfig(
+            level=LOG_LEVEL,
+            format=u"%(asctime)s %(name)s:%(lineno)d %(levelname)s : %(message)s",
+        )
+        self.r = DeviceRegistry(["name", "type", "gpios"])
+        self.devices = {"uuid1": DEVICE1, "uuid2": DEVICE2, "uuid3": DEVICE3}
+        self.r.load(self.devices, self.devices)
+
+    def test_load(self):
+        self.assertIs(self.r.source, self.devices)
+        self.assertEqual(self.r.count(), 3)
+        self.assertEqual(self.r.get_indexes(), ["name", "type", "gpios"])
+
+    def test_get(self):
+        self.assertIs(self.r.get("uuid2"), DEVICE2)
+        self.assertIsNone(self.r.get("dummy"))
+
+    def test_search_indexed_field(self):
+        self.assertEqual(self.r.search("type", "sensor"), [DEVICE1, DEVICE2])
+        self.assertEqual(self.r.search("name", "device3"), [DEVICE3])
+        self.assertEqual(self.r.search("name", "dummy"), [])
+
+    def test_search_not_indexed_field(self):
+        self.assertEqual(self.r.search("uuid", "uuid1"), [DEVICE1])
+        self.assertEqual(self.r.search("dummy", "value"), [])
+
+    def test_search_unhashable_value(self):
+        self.assertEqual(self.r.search("gpios", ["GPIO2"]), [DEVICE2])
+
+    def test_set_updates_indexes(self):
+        device = dict(DEVICE1, name="renamed", type="actuator")
+
+        self.r.set(device)
+
+        self.assertIs(self.r.get("uuid1"), device)
+        self.assertEqual(self.r.search("name", "device1"), [])
+        self.assertEqual(self.r.search("name", "renamed"), [device])
+        self.assertEqual(self.r.search("type", "sensor"), [DEVICE2])
+        self.assertEqual(self.r.search("type", "actuator"), [DEVICE3, device])
+
+    def test_set_new_device(self):
+        device = {"uuid": "uuid4", "name": "device4"}
+
+        self.r.set(device)
+
+        self.assertEqual(self.r.count(), 4)
+        self.assertEqual(self.r.search("name", "device4"), [device])
+
+    def test_delete(self):
+        self.assertIs(self.r.delete("uuid1"), DEVICE1)
+
+        self.assertIsNone(self.r.get("uuid1"))
+        self.assertEqual(self.r.search("type", "sensor"), [DEVICE2])
+        self.assertEqual(self.r.search("name", "device1"), [])
+        self.assertIsNone(self.r.delete("uuid1"))
+
+    def test_load_replaces_devices(self):
+        self.r.load({"uuid3": DEVICE3})
+
+        self.assertEqual(self.r.count(), 1)
+        self.assertEqual(self.r.search("type", "sensor"), [])
+        self.assertIsNone(self.r.source)
+
+
+if __name__ == "__main__":
+    # coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread test_deviceregistry.py; coverage report -m -i
+    unittest.main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from cleep.libs.tests.lib import TestLib
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.dirname(__file__)).replace("tests/", ""))
+from frozendict import FrozenDict, FrozenList, freeze
+import unittest
+import logging
+import copy
+import json
+from cleep.libs.tests.common import get_log_level
+
+LOG_LEVEL = get_log_level()
+
+
+class FrozenDictTests(unittest.TestCase):
+    def setUp(self):
+        TestLib()
+        logging.basicConfig(
+            level=LOG_LEVEL,
+            format=u"%(asctime)s %(name)s:%(lineno)d %(levelname)s : %(message)s",
+        )
+
+    def test_freeze(self):
+        frozen = freeze({"a": {"b": [1, {"c": 2}]}, "d": (1, [2])})
+
+        self.assertIsInstance(frozen, FrozenDict)
+        self.assertIsInstance(frozen["a"], FrozenDict)
+        self.assertIsInstance(frozen["a"]["b"], FrozenList)
+        self.assertIsInstance(frozen["a"]["b"][1], FrozenDict)
+        self.assertIsInstance(frozen["d"], tuple)
+        self.assertIsInstance(frozen["d"][1], FrozenList)
+        self.assertEqual(frozen, {"a": {"b": [1, {"c": 2}]}, "d": (1, [2])})
+
+    def test_freeze_reuses_frozen_values(self):
+        frozen = freeze({"a": {"b": 1}})
+
+        new_frozen = freeze({**frozen, "c": 2})
+
+        self.assertIs(new_frozen["a"], frozen["a"])
+        self.assertIs(freeze(frozen), frozen)
+
+    def test_dict_read_only(self):
+        frozen = freeze({"a": 1})
+
+        for mutate in (
+            lambda: frozen.__setitem__("a", 2),
+            lambda: frozen.__delitem__("a"),
+            lambda: frozen.update({"b": 2}),
+            lambda: frozen.pop("a"),
+            lambda: frozen.popitem(),
+            lambda: frozen.setdefault("b", 2),
+            lambda: frozen.clear(),
+        ):
+            with self.assertRaises(TypeError) as cm:
+                mutate()
+            self.assertEqual(str(cm.exception), "Config snapshot is read-only, use a copy to modify it")
+        self.assertEqual(frozen, {"a": 1})
+
+    def test_list_read_only(self):
+        frozen = freeze([1, 2])
+
+        for mutate in (
+            lambda: frozen.append(3),
+            lambda: frozen.extend([3]),
+            lambda: frozen.insert(0, 3),
+            lambda: frozen.__setitem__(0, 3),
+            lambda: frozen.remove(1),
+            lambda: frozen.sort(),
+        ):
+            with self.assertRaises(TypeError):
+                mutate()
+        self.assertEqual(frozen, [1, 2])
+
+    def test_copy_returns_mutable_values(self):
+        frozen = freeze({"a": {"b": [1]}})
+
+        copied = copy.deepcopy(frozen)
+        copied["a"]["b"].append(2)
+        shallow = copy.copy(frozen)
+        shallow["c"] = 3
+
+        self.assertIs(type(copied), dict)
+        self.assertIs(type(copied["a"]["b"]), list)
+        self.assertEqual(copied, {"a": {"b": [1, 2]}})
+        self.assertIs(type(frozen.copy()), dict)
+        self.assertEqual(frozen, {"a": {"b": [1]}})
+
+    def test_json_serializable(self):
+        frozen = freeze({"b": [1, {"c": None}], "a": "value"})
+
+        self.assertEqual(json.dumps(frozen, sort_keys=True), '{"a": "value", "b": [1, {"c": null}]}')
+
+
+if __name__ == "__main__":
+    # coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread test_frozendict.py; coverage report -m -i
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from cleep.libs.tests.lib import TestLib
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.dirname(__file__)).replace("tests/", ""))
+from localrpcclient import LocalRpcClient
+import unittest
+import logging
+import json
+import tempfile
+from gevent import pywsgi, socket
+from cleep.libs.tests.common import get_log_level
+
+LOG_LEVEL = get_log_level()
+
+
+def dummy_app(environ, start_response):
+    if environ["PATH_INFO"] == "/invalid":
+        start_response("500 Internal Server Error", [("Content-Type", "text/html")])
+        return [b"<html></html>"]
+
+    body = environ["wsgi.input"].read().decode("utf-8")
+    content = json.dumps({
+        "method": environ["REQUEST_METHOD"],
+        "path": environ["PATH_INFO"],
+        "query": environ.get("QUERY_STRING"),
+        "body": json.loads(body) if body else None,
+    })
+    start_response("200 OK", [("Content-Type", "application/json")])
+    return [content.encode("utf-8")]
+
+
+class LocalRpcClientTests(unittest.TestCase):
+    def setUp(self):
+        TestLib()
+        logging.basicConfig(
+            level=LOG_LEVEL,
+            format=u"%(asctime)s %(name)s:%(lineno)d %(levelname)s : %(message)s",
+        )
+        self.tmp_dir = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.tmp_dir, "cleep.sock")
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(self.socket_path)
+        listener.listen(5)
+        self.server = pywsgi.WSGIServer(listener, dummy_app, log=None)
+        self.server.start()
+        self.c = LocalRpcClient(self.socket_path, timeout=5.0)
+
+    def tearDown(self):
+        self.server.stop()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        os.rmdir(self.tmp_dir)
+
+    def test_get(self):
+        resp = self.c.get("/doc/system")
+        logging.debug("Resp: %s", resp)
+
+        self.assertEqual(resp, {"method": "GET", "path": "/doc/system", "query": "", "body": None})
+
+    def test_get_with_params(self):
+        resp = self.c.get("/doc/check/system", {"details": "1"})
+
+        self.assertEqual(resp["path"], "/doc/check/system")
+        self.assertEqual(resp["query"], "details=1")
+
+    def test_post(self):
+        resp = self.c.post("/modules", {"installable": True})
+
+        self.assertEqual(resp["method"], "POST")
+        self.assertEqual(resp["body"], {"installable": True})
+
+    def test_command(self):
+        resp = self.c.command("get_config", "system", {"key": "value"}, timeout=3.0)
+
+        self.assertEqual(resp["path"], "/command")
+        self.assertEqual(resp["body"], {
+            "command": "get_config",
+            "to": "system",
+            "params": {"key": "value"},
+            "timeout": 3.0,
+        })
+
+    def test_invalid_response(self):
+        with self.assertRaises(Exception) as cm:
+            self.c.get("/invalid")
+        self.assertEqual(str(cm.exception), "Invalid response from RPC server (status 500)")
+
+    def test_socket_not_found(self):
+        c = LocalRpcClient(os.path.join(self.tmp_dir, "dummy.sock"))
+
+        with self.assertRaises(FileNotFoundError):
+            c.get("/doc/system")
+
+
+if __name__ == "__main__":
+    # coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread test_localrpcclient.py; coverage report -m -i
+    unittest.main()
@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from cleep.libs.tests.lib import TestLib
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.dirname(__file__)).replace("tests/", ""))
+from logreader import LogReader
+import unittest
+import logging
+import tempfile
+import time
+from cleep.libs.tests.common import get_log_level
+
+LOG_LEVEL = get_log_level()
+
+LOG_CONTENT = """2024-01-01 10:00:00,001 Cleep       [cleep:1] INFO  : line1
+2024-01-01 10:00:00,002 RpcServer   [rpcserver.py:2] DEBUG : line2
+2024-01-01 10:00:00,003 Inventory   [inventory.py:3] ERROR : line3
+Traceback (most recent call last):
+  File "inventory.py", line 3
+Exception: error
+2024-01-01 10:00:00,004 RpcServer   [rpcserver.py:4] WARNING : line4
+2024-01-01 10:00:00,005 AVeryLongLoggerName[cleep:5] INFO  : line5
+"""
+
+
+class LogReaderTests(unittest.TestCase):
+    def setUp(self):
+        TestLib()
+        logging.basicConfig(
+            level=LOG_LEVEL,
+            format=u"%(asctime)s %(name)s:%(lineno)d %(levelname)s : %(message)s",
+        )
+        fd, self.log_file = tempfile.mkstemp()
+        os.close(fd)
+        self._write(LOG_CONTENT, "w")
+        self.r = LogReader(self.log_file)
+
+    def tearDown(self):
+        if os.path.exists(self.log_file):
+            os.remove(self.log_file)
+
+    def _write(self, content, mode="a"):
+        with open(self.log_file, mode) as fd:
+            fd.write(content)
+
+    def test_tail(self):
+        result = self.r.tail(2)
+        logging.debug("Result: %s", result)
+
+        self.assertEqual(len(result["lines"]), 2)
+        self.assertTrue(result["lines"][0].endswith("line4\n"))
+        self.assertTrue(result["lines"][1].endswith("line5\n"))
+        self.assertEqual(result["offset"], os.path.getsize(self.log_file))
+        self.assertEqual(result["size"], os.path.getsize(self.log_file))
+
+    def test_tail_all_lines(self):
+        result = self.r.tail(100)
+
+        self.assertEqual("".join(result["lines"]), LOG_CONTENT)
+
+    def test_tail_small_blocks(self):
+        self.r.BLOCK_SIZE = 16
+
+        result = self.r.tail(100)
+
+        self.assertEqual("".join(result["lines"]), LOG_CONTENT)
+
+    def test_tail_long_line_truncated(self):
+        self.r.BLOCK_SIZE = 16
+        self.r.MAX_LINE_SIZE = 64
+        long_line = "2024-01-01 10:00:00,006 Inventory   [inventory.py:6] ERROR : " + "x" * 1000 + "\n"
+        self._write(long_line)
+        self._write("2024-01-01 10:00:00,007 Inventory   [inventory.py:7] INFO  : line7\n")
+
+        result = self.r.tail(3, level="ERROR")
+
+        self.assertEqual(result["lines"][-1], long_line[:63] + "\n")
+
+    def test_tail_filter_level(self):
+        result = self.r.tail(100, level="warning")
+        logging.debug("Result: %s", result)
+
+        self.assertEqual(len(result["lines"]), 5)
+        self.assertTrue(result["lines"][0].endswith("line3\n"))
+        self.assertEqual(result["lines"][3], "Exception: error\n")
+        self.assertTrue(result["lines"][4].endswith("line4\n"))
+
+    def test_tail_filter_level_truncated_traceback(self):
+        result = self.r.tail(2, level="error")
+        logging.debug("Result: %s", result)
+
+        self.assertEqual(len(result["lines"]), 2)
+        self.assertTrue(result["lines"][0].endswith("line3\n"))
+        self.assertEqual(result["lines"][1], "Traceback (most recent call last):\n")
+
+    def test_tail_filter_level_header_only(self):
+        result = self.r.tail(1, level="error")
+
+        self.assertEqual(len(result["lines"]), 1)
+        self.assertTrue(result["lines"][0].endswith("line3\n"))
+
+    def test_tail_filter_logger(self):
+        result = self.r.tail(100, logger_name="RpcServer")
+
+        self.assertEqual(len(result["lines"]), 2)
+        self.assertTrue(result["lines"][0].endswith("line2\n"))
+        self.assertTrue(result["lines"][1].endswith("line4\n"))
+
+    def test_tail_filter_long_logger_name(self):
+        result = self.r.tail(100, logger_name="AVeryLongLoggerName")
+
+        self.assertEqual(len(result["lines"]), 1)
+
+    def test_tail_invalid_params(self):
+        with self.assertRaises(ValueError) as cm:
+            self.r.tail(10, level="dummy")
+        self.assertEqual(str(cm.exception), 'Invalid log level "dummy"')
+
+        with self.assertRaises(ValueError) as cm:
+            self.r.tail(-1)
+        self.assertEqual(str(cm.exception), 'Parameter "count" must be positive')
+
+        with self.assertRaises(ValueError) as cm:
+            self.r.tail("abc")
+        self.assertEqual(str(cm.exception), 'Parameter "count" must be an integer')
+
+    def test_tail_max_lines(self):
+        self.r.MAX_TAIL_LINES = 3
+
+        result = self.r.tail(100)
+
+        self.assertEqual(len(result["lines"]), 3)
+
+    def test_tail_missing_file(self):
+        os.remove(self.log_file)
+
+        result = self.r.tail(10)
+
+        self.assertEqual(result, {"lines": [], "offset": 0, "size": 0})
+
+    def test_read(self):
+        offset = self.r.tail(0)["offset"]
+        self._write("2024-01-01 10:00:00,006 Cleep       [cleep:6] INFO  : line6\nincomplete")
+
+        result = self.r.read(offset)
+        logging.debug("Result: %s", result)
+
+        self.assertEqual(len(result["lines"]), 1)
+        self.assertTrue(result["lines"][0].endswith("line6\n"))
+        self.assertEqual(result["offset"], os.path.getsize(self.log_file) - len("incomplete"))
+
+    def test_read_max_bytes(self):
+        result = self.r.read(0, max_bytes=100)
+
+        self.assertEqual(len(result["lines"]), 1)
+        self.assertTrue(result["lines"][0].endswith("line1\n"))
+        self.assertEqual(result["offset"], len(result["lines"][0]))
+
+    def test_read_filter_level(self):
+        result = self.r.read(0, level="ERROR")
+
+        self.assertEqual(len(result["lines"]), 4)
+        self.assertTrue(result["lines"][0].endswith("line3\n"))
+
+    def test_read_rotated_file(self):
+        self._write("2024-01-01 10:00:00,006 Cleep       [cleep:6] INFO  : line6\n", "w")
+
+        result = self.r.read(10000)
+
+        self.assertEqual(len(result["lines"]), 1)
+        self.assertEqual(result["offset"], os.path.getsize(self.log_file))
+
+    def test_read_invalid_offset(self):
+        with self.assertRaises(ValueError) as cm:
+            self.r.read(-1)
+        self.assertEqual(str(cm.exception), 'Parameter "offset" must be positive')
+
+        with self.assertRaises(ValueError) as cm:
+            self.r.read("abc")
+        self.assertEqual(str(cm.exception), 'Parameter "offset" must be an integer')
+
+        with self.assertRaises(ValueError) as cm:
+            self.r.read(0, max_bytes="abc")
+        self.assertEqual(str(cm.exception), 'Parameter "max_bytes" must be an integer')
+
+    def test_follow(self):
+        self.r.FOLLOW_POLL_DURATION = 0.05
+        offset = os.path.getsize(self.log_file)
+        self._write("2024-01-01 10:00:00,006 Cleep       [cleep:6] INFO  : line6\n")
+
+        result = self.r.follow(offset, timeout=1.0)
+
+        self.assertEqual(len(result["lines"]), 1)
+        self.assertTrue(result["lines"][0].endswith("line6\n"))
+
+    def test_follow_invalid_params(self):
+        with self.assertRaises(ValueError) as cm:
+            self.r.follow(-1)
+        self.assertEqual(str(cm.exception), 'Parameter "offset" must be positive')
+
+        with self.assertRaises(ValueError) as cm:
+            self.r.follow("abc")
+        self.assertEqual(str(cm.exception), 'Parameter "offset" must be an integer')
+
+        with self.assertRaises(ValueError) as cm:
+            self.r.follow(0, max_bytes=-10)
+        self.assertEqual(str(cm.exception), 'Parameter "max_bytes" must be positive')
+
+    def test_follow_too_many_followers(self):
+        self.r.MAX_FOLLOWERS = 0
+
+        with self.assertRaises(Exception) as cm:
+            self.r.follow(0, timeout=0.1)
+        self.assertEqual(str(cm.exception), "Too many log followers, retry later")
+
+    def test_follow_releases_follower(self):
+        self.r.FOLLOW_POLL_DURATION = 0.05
+        self.r.MAX_FOLLOWERS = 1
+        offset = os.path.getsize(self.log_file)
+
+        self.r.follow(offset, timeout=0.1)
+        result = self.r.follow(offset, timeout=0.1)
+
+        self.assertEqual(result["lines"], [])
+
+    def test_follow_timeout(self):
+        self.r.FOLLOW_POLL_DURATION = 0.05
+        offset = os.path.getsize(self.log_file)
+
+        start = time.time()
+        result = self.r.follow(offset, timeout=0.2)
+
+        self.assertGreaterEqual(time.time() - start, 0.2)
+        self.assertEqual(result, {"lines": [], "offset": offset, "size": offset})
+
+
+if __name__ == "__main__":
+    # coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread test_logreader.py; coverage report -m -i
+    unittest.main()
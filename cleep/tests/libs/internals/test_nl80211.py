@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from cleep.libs.tests.lib import TestLib
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.dirname(__file__)).replace('tests/', ''))
+from nl80211 import Nl80211
+import unittest
+import logging
+import errno
+import struct
+from unittest.mock import patch
+from cleep.libs.tests.common import get_log_level
+
+LOG_LEVEL = get_log_level()
+
+FAMILY_ID = 0x1c
+
+
+def attribute(attr_type, value):
+    length = 4 + len(value)
+    return struct.pack('=HH', length, attr_type) + value + b'\0' * (((length + 3) & ~3) - length)
+
+
+def message(msg_type, seq, payload, flags=0):
+    return struct.pack('=IHHII', 16 + len(payload), msg_type, flags, seq, 0) + payload
+
+
+def genl(cmd, *attributes):
+    return struct.pack('=BBH', cmd, 1, 0) + b''.join(attributes)
+
+
+def error(seq, code):
+    return message(Nl80211.NLMSG_ERROR, seq, struct.pack('=i', code) + b'\0' * 16)
+
+
+def interface(name, wiphy, ssid=None):
+    attributes = [
+        attribute(Nl80211.NL80211_ATTR_WIPHY, struct.pack('=I', wiphy)),
+        attribute(Nl80211.NL80211_ATTR_IFNAME, name.encode() + b'\0'),
+        attribute(Nl80211.NL80211_ATTR_IFTYPE, struct.pack('=I', 2)),
+    ]
+    if ssid is not None:
+        attributes.append(attribute(Nl80211.NL80211_ATTR_SSID, ssid))
+    return genl(Nl80211.NL80211_CMD_GET_INTERFACE, *attributes)
+
+
+class FakeSocket:
+    """
+    Fake netlink socket replying to requests with registered handlers
+    """
+
+    def __init__(self, family_reply, interfaces_reply):
+        self.family_reply = family_reply
+        self.interfaces_reply = interfaces_reply
+        self.replies = []
+        self.requests = []
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.closed = True
+
+    def settimeout(self, timeout):
+        pass
+
+    def bind(self, address):
+        pass
+
+    def send(self, data):
+        _, msg_type, flags, seq, _ = struct.unpack_from('=IHHII', data)
+        self.requests.append((msg_type, flags, data[16:]))
+        reply = self.family_reply if msg_type == Nl80211.GENL_ID_CTRL else self.interfaces_reply
+        self.replies.extend(reply(seq))
+        return len(data)
+
+    def recv(self, size):
+        return self.replies.pop(0)
+
+
+def family_found(seq):
+    return [
+        message(Nl80211.GENL_ID_CTRL, seq, genl(1,
+            attribute(Nl80211.CTRL_ATTR_FAMILY_ID, struct.pack('=H', FAMILY_ID)),
+            attribute(Nl80211.CTRL_ATTR_FAMILY_NAME, b'nl80211\0'),
+        )),
+    ]
+
+
+class Nl80211Tests(unittest.TestCase):
+
+    def setUp(self):
+        logging.basicConfig(level=LOG_LEVEL, format=u'%(asctime)s %(name)s:%(lineno)d %(levelname)s : %(message)s')
+        TestLib()
+        self.n = Nl80211()
+
+    def _get_interfaces(self, family_reply, interfaces_reply=None):
+        sock = FakeSocket(family_reply, interfaces_reply)
+        with patch('nl80211.socket.socket', return_value=sock):
+            interfaces = self.n.get_interfaces()
+        self.assertTrue(sock.closed)
+        return interfaces, sock
+
+    def test_get_interfaces(self):
+        def interfaces_reply(seq):
+            # replies are split over 2 datagrams, and a stale reply is ignored
+            return [
+                message(FAMILY_ID, seq - 1, interface('wlan9', 9)) + message(FAMILY_ID, seq, interface('wlan0', 0, b'my network')),
+                message(FAMILY_ID, seq, interface('wlan1', 1)) + message(Nl80211.NLMSG_DONE, seq, struct.pack('=i', 0)),
+            ]
+
+        interfaces, sock = self._get_interfaces(family_found, interfaces_reply)
+        logging.debug('Interfaces: %s' % interfaces)
+
+        self.assertDictEqual(interfaces, {
+            'wlan0': {'interface': 'wlan0', 'wiphy': 0, 'type': 2, 'network': 'my network'},
+            'wlan1': {'interface': 'wlan1', 'wiphy': 1, 'type': 2, 'network': None},
+        })
+        self.assertEqual(sock.requests[0][0], Nl80211.GENL_ID_CTRL)
+        self.assertIn(b'nl80211\0', sock.requests[0][2])
+        self.assertEqual(sock.requests[1][0], FAMILY_ID)
+        self.assertEqual(sock.requests[1][1], Nl80211.NLM_F_REQUEST | Nl80211.NLM_F_DUMP)
+
+    def test_get_interfaces_invalid_ssid(self):
+        def interfaces_reply(seq):
+            return [
+                message(FAMILY_ID, seq, interface('wlan0', 0, b'caf\xe9')) + message(Nl80211.NLMSG_DONE, seq, b''),
+            ]
+
+        interfaces, _ = self._get_interfaces(family_found, interfaces_reply)
+
+        self.assertEqual(interfaces['wlan0']['network'], 'caf�')
+
+    def test_get_interfaces_without_nl80211(self):
+        interfaces, sock = self._get_interfaces(lambda seq: [error(seq, -errno.ENOENT)])
+
+        self.assertEqual(interfaces, {})
+        self.assertEqual(len(sock.requests), 1)
+
+    def test_get_interfaces_family_error(self):
+        with self.assertRaises(OSError) as cm:
+            self._get_interfaces(lambda seq: [error(seq, -errno.EPERM)])
+        self.assertEqual(cm.exception.errno, errno.EPERM)
+
+    def test_get_interfaces_dump_error(self):
+        with self.assertRaises(OSError) as cm:
+            self._get_interfaces(family_found, lambda seq: [error(seq, -errno.ENODEV)])
+        self.assertEqual(cm.exception.errno, errno.ENODEV)
+
+    def test_get_interfaces_invalid_message(self):
+        with self.assertRaises(OSError) as cm:
+            self._get_interfaces(family_found, lambda seq: [struct.pack('=IHHII', 4, FAMILY_ID, 0, seq, 0)])
+        self.assertEqual(cm.exception.errno, errno.EBADMSG)
+
+    def test_get_interfaces_real_socket(self):
+        # must not fail even if there is no wireless interface on test host
+        interfaces = self.n.get_interfaces()
+
+        self.assertTrue(isinstance(interfaces, dict))
+
+
+if __name__ == '__main__':
+    # coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread test_nl80211.py; coverage report -m -i
+    unittest.main()
@@ -11,46 +11,68 @@ import unittest
 import logging
 from unittest.mock import Mock, patch
 import tempfile
+import shutil
+import ctypes
+import errno
 from cleep.libs.tests.common import get_log_level
 
 LOG_LEVEL = get_log_level()
 
 
-PopenMock = Mock()
-PopenMock.return_value.stdout = tempfile.NamedTemporaryFile(delete=True)
+MOUNTINFO = """22 27 0:21 / /proc rw,nosuid,nodev,noexec,relatime shared:12 - proc proc rw
+27 1 179:2 / / %(root)s,noatime shared:1 - ext4 /dev/root %(root)s
+30 27 179:1 / /boot %(boot)s,relatime shared:15 - vfat /dev/mmcblk0p1 %(boot)s,fmask=0022
+"""
 
-@patch('readwrite.Popen', new=PopenMock)
 class ReadWriteTests(unittest.TestCase):
 
     def setUp(self):
         TestLib()
         logging.basicConfig(level=LOG_LEVEL, format=u'%(asctime)s %(name)s:%(lineno)d %(levelname)s : %(message)s')
         self.crash_report = Mock()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.mountinfo_path = os.path.join(self.tmp_dir, 'mountinfo')
+        self.fd_dir = os.path.join(self.tmp_dir, 'fd')
+        self.fdinfo_dir = os.path.join(self.tmp_dir, 'fdinfo')
+        os.mkdir(self.fd_dir)
+        os.mkdir(self.fdinfo_dir)
 
     def tearDown(self):
-        pass
-
-    def _get_console_command_return_value(self, error=False, killed=False, returncode=0, stdout=[], stderr=[]):
-        return {
-            'error': error,
-            'killed': killed,
-            'returncode': returncode,
-            'stdout': stdout,
-            'stderr': stderr,
-        }
-
-    def _init_context(self, console_mock, command_return_value=None, command_side_effect=None, on_cleep=True):
-        if command_side_effect:
-            console_mock.return_value.command = Mock(side_effect=command_side_effect)
-        else:
-            console_mock.return_value.command = Mock(return_value=command_return_value)
+        shutil.rmtree(self.tmp_dir)
+
+    def _write_mountinfo(self, root='rw', boot='rw'):
+        with open(self.mountinfo_path, 'w') as fd:
+            fd.write(MOUNTINFO % {'root': root, 'boot': boot})
+
+    def _get_mount_mock(self, partitions_after=None, error=None):
+        def mount(source, target, fstype, flags, data):
+            if error:
+                ctypes.set_errno(error)
+                return -1
+            if partitions_after:
+                self._write_mountinfo(**partitions_after)
+            return 0
+        return Mock(side_effect=mount)
+
+    def _init_context(self, console_mock=None, mount_mock=None, root='rw', boot='rw', on_cleep=True):
+        self._write_mountinfo(root=root, boot=boot)
         self.r = ReadWrite()
+        self.r.MOUNTINFO_PATH = self.mountinfo_path
+        self.r.FD_DIR = self.fd_dir
+        self.r.FDINFO_DIR = self.fdinfo_dir
+        self.r.libc = Mock()
+        self.r.libc.mount = mount_mock or self._get_mount_mock()
         if not on_cleep:
             self.r.CLEEP_DIR = '/dummy'
         else:
             self.r.CLEEP_DIR = '/tmp' # set a file/dir that exists
         self.r.set_crash_report(self.crash_report)
 
+    def _add_opened_file(self, fd, path, flags):
+        os.symlink(path, os.path.join(self.fd_dir, fd))
+        with open(os.path.join(self.fdinfo_dir, fd), 'w') as fdinfo:
+            fdinfo.write('pos:\t0\nflags:\t%s\nmnt_id:\t27\n' % flags)
+
     def test_crash_report(self):
         self.r = ReadWrite()
         self.r.set_crash_report(self.crash_report)
@@ -63,10 +85,8 @@ class ReadWriteTests(unittest.TestCase):
         self.assertTrue(self.r.is_path_on_root('/home/pi/dummy'))
         self.assertFalse(self.r.is_path_on_root('/boot/dummy'))
 
-    @patch('readwrite.Console')
-    def test_get_status_all_not_readonly(self, console_mock):
-        console_return_value = self._get_console_command_return_value(stdout=['rw'])
-        self._init_context(console_mock, console_return_value)
+    def test_get_status_all_not_readonly(self):
+        self._init_context(root='rw', boot='rw')
         status = self.r.get_status()
         logging.debug('Status=%s' % status)
 
@@ -75,98 +95,177 @@ class ReadWriteTests(unittest.TestCase):
         self.assertEqual(status['root'], self.r.STATUS_WRITE)
         self.assertEqual(status['boot'], self.r.STATUS_WRITE)
 
-    @patch('readwrite.Console')
-    def test_get_status_all_readonly(self, console_mock):
-        console_return_value = self._get_console_command_return_value(stdout=['ro'])
-        self._init_context(console_mock, console_return_value)
+    def test_get_status_all_readonly(self):
+        self._init_context(root='ro', boot='ro')
         status = self.r.get_status()
         logging.debug('Status=%s' % status)
 
         self.assertEqual(status['root'], self.r.STATUS_READ)
         self.assertEqual(status['boot'], self.r.STATUS_READ)
 
-    @patch('readwrite.Console')
-    def test_get_status_all_unknown(self, console_mock):
-        console_return_value = self._get_console_command_return_value(stdout=['dummy'])
-        self._init_context(console_mock, console_return_value)
+    def test_get_status_all_unknown(self):
+        self._init_context(root='dummy', boot='dummy')
         status = self.r.get_status()
         logging.debug('Status=%s' % status)
 
         self.assertEqual(status['root'], self.r.STATUS_UNKNOWN)
         self.assertEqual(status['boot'], self.r.STATUS_UNKNOWN)
 
-    @patch('readwrite.Console')
-    def test_get_status_different(self, console_mock):
-        command_side_effect = [
-            self._get_console_command_return_value(stdout=['rw']),
-            self._get_console_command_return_value(stdout=['ro']),
-        ]
-        self._init_context(console_mock, command_side_effect=command_side_effect)
+    def test_get_status_different(self):
+        self._init_context(root='ro', boot='rw')
         status = self.r.get_status()
         logging.debug('Status=%s' % status)
 
         self.assertEqual(status['root'], self.r.STATUS_READ)
         self.assertEqual(status['boot'], self.r.STATUS_WRITE)
 
+    def test_get_status_superblock_readonly(self):
+        self._init_context()
+        with open(self.mountinfo_path, 'w') as fd:
+            fd.write('27 1 179:2 / / rw,noatime shared:1 - ext4 /dev/root ro\n')
+            fd.write('30 27 179:1 / /boot rw,relatime - vfat /dev/mmcblk0p1 rw\n')
+        status = self.r.get_status()
+
+        self.assertEqual(status['root'], self.r.STATUS_READ)
+        self.assertEqual(status['boot'], self.r.STATUS_WRITE)
+
+    def test_get_status_overmount(self):
+        self._init_context()
+        with open(self.mountinfo_path, 'w') as fd:
+            fd.write('27 1 179:2 / / ro,noatime shared:1 - ext4 /dev/root ro\n')
+            fd.write('30 27 179:1 / /boot ro,relatime - vfat /dev/mmcblk0p1 ro\n')
+            fd.write('31 30 179:1 / /boot rw,relatime - vfat /dev/mmcblk0p1 rw\n')
+        status = self.r.get_status()
+
+        self.assertEqual(status['root'], self.r.STATUS_READ)
+        self.assertEqual(status['boot'], self.r.STATUS_WRITE)
+
+    def test_get_status_partition_not_mounted(self):
+        self._init_context()
+        with open(self.mountinfo_path, 'w') as fd:
+            fd.write('27 1 179:2 / / rw,noatime shared:1 - ext4 /dev/root rw\n')
+            fd.write('invalid line\n')
+        status = self.r.get_status()
+
+        self.assertEqual(status['root'], self.r.STATUS_WRITE)
+        self.assertEqual(status['boot'], self.r.STATUS_UNKNOWN)
+
+    def test_get_status_mountinfo_not_readable(self):
+        self._init_context()
+        self.r.MOUNTINFO_PATH = '/dummy/mountinfo'
+        status = self.r.get_status()
+
+        self.assertEqual(status['root'], self.r.STATUS_UNKNOWN)
+        self.assertEqual(status['boot'], self.r.STATUS_UNKNOWN)
+
+    def test_get_status_cached(self):
+        self._init_context(root='rw', boot='rw')
+        self.r.get_status()
+        self._write_mountinfo(root='ro', boot='ro')
+
+        status = self.r.get_status()
+        self.assertEqual(status['root'], self.r.STATUS_WRITE)
+
+        self.r.MOUNTINFO_CACHE_TTL = 0
+        status = self.r.get_status()
+        self.assertEqual(status['root'], self.r.STATUS_READ)
+
+    def test_get_status_cache_invalidated_on_remount(self):
+        self._init_context(root='ro', boot='ro', mount_mock=self._get_mount_mock({'root': 'rw', 'boot': 'ro'}))
+        self.assertEqual(self.r.get_status()['root'], self.r.STATUS_READ)
+
+        self.assertTrue(self.r.enable_write_on_root())
+        self.assertEqual(self.r.get_status()['root'], self.r.STATUS_WRITE)
+
+    def test_get_status_does_not_spawn_process(self):
+        self._init_context()
+        self.r.console = Mock()
+
+        self.r.get_status()
+
+        self.assertFalse(self.r.console.command.called)
+
+    def test_remount_keeps_mount_flags(self):
+        self._init_context(root='ro', boot='ro', mount_mock=self._get_mount_mock({'root': 'rw', 'boot': 'rw'}))
+
+        self.r.enable_write_on_root()
+        self.r.enable_write_on_boot()
+
+        self.r.libc.mount.assert_any_call(None, b'/', None, ReadWrite.MS_REMOUNT | 1024, None)
+        self.r.libc.mount.assert_any_call(None, b'/boot', None, ReadWrite.MS_REMOUNT | 2097152, None)
+
+    def test_remount_readonly_flag(self):
+        self._init_context(root='rw', boot='rw', mount_mock=self._get_mount_mock({'root': 'ro', 'boot': 'rw'}))
+
+        self.assertTrue(self.r.disable_write_on_root(ReadWriteContext()))
+
+        self.r.libc.mount.assert_called_with(None, b'/', None, ReadWrite.MS_REMOUNT | ReadWrite.MS_RDONLY | 1024, None)
+
     @patch('readwrite.Console')
-    def test_enable_write_on_boot(self, console_mock):
-        command_side_effect = [
-            self._get_console_command_return_value(),
-            self._get_console_command_return_value(stdout=['rw']),
-        ]
-        self._init_context(console_mock, command_side_effect=command_side_effect)
+    def test_remount_without_libc(self, console_mock):
+        console_mock.return_value.command.return_value = {
+            'error': False, 'killed': False, 'returncode': 0, 'stdout': [], 'stderr': [],
+        }
+        self._init_context(console_mock, root='ro')
+        self.r.libc = None
+        def command(*args, **kwargs):
+            self._write_mountinfo(root='rw')
+            return console_mock.return_value.command.return_value
+        console_mock.return_value.command.side_effect = command
+
+        self.assertTrue(self.r.enable_write_on_root())
+
+        console_mock.return_value.command.assert_called_with('/bin/mount -o remount,rw /', timeout=10.0)
+
+    def test_enable_write_on_boot(self):
+        self._init_context(boot='ro', mount_mock=self._get_mount_mock({'boot': 'rw'}))
 
         self.assertTrue(self.r.enable_write_on_boot())
 
-    @patch('readwrite.Console')
-    def test_enable_write_on_boot_failed(self, console_mock):
-        command_side_effect = [
-            self._get_console_command_return_value(),
-            self._get_console_command_return_value(stdout=['ro']),
-        ]
-        self._init_context(console_mock, command_side_effect=command_side_effect)
+    def test_enable_write_on_boot_failed(self):
+        self._init_context(boot='ro', mount_mock=self._get_mount_mock({'boot': 'ro'}))
 
         self.assertFalse(self.r.enable_write_on_boot())
 
-    @patch('readwrite.Console')
-    def test_enable_write_on_boot_error(self, console_mock):
-        command_side_effect = [
-            self._get_console_command_return_value(error=True),
-            self._get_console_command_return_value(),
-        ]
-        self._init_context(console_mock, command_side_effect=command_side_effect)
+    def test_enable_write_on_boot_error(self):
+        self._init_context(boot='ro', mount_mock=self._get_mount_mock(error=errno.EPERM))
 
         self.assertFalse(self.r.enable_write_on_boot())
 
-    @patch('readwrite.Console')
-    def test_disable_write_on_boot(self, console_mock):
-        command_side_effect = [
-            self._get_console_command_return_value(),
-            self._get_console_command_return_value(stdout=['ro']),
-        ]
-        self._init_context(console_mock, command_side_effect=command_side_effect)
+        self.crash_report.manual_report.assert_called_with(
+            'Error when turning on writing mode',
+            {
+                'result': {
+                    'error': True,
+                    'killed': False,
+                    'returncode': errno.EPERM,
+                    'stdout': [],
+                    'stderr': [os.strerror(errno.EPERM)],
+                },
+                'partition': '/boot',
+                'traceback': AnyArg(),
+                'files': [],
+            }
+        )
+
+    def test_disable_write_on_boot(self):
+        self._init_context(boot='rw', mount_mock=self._get_mount_mock({'boot': 'ro'}))
 
         context = ReadWriteContext()
         self.assertTrue(self.r.disable_write_on_boot(context))
 
-    @patch('readwrite.Console')
-    def test_disable_write_on_boot_failed(self, console_mock):
-        command_side_effect = [
-            self._get_console_command_return_value(),
-            self._get_console_command_return_value(stdout=['rw']),
-        ]
-        self._init_context(console_mock, command_side_effect=command_side_effect)
+    def test_disable_write_on_boot_failed(self):
+        self._init_context(boot='rw', mount_mock=self._get_mount_mock({'boot': 'rw'}))
 
         context = ReadWriteContext()
         self.assertFalse(self.r.disable_write_on_boot(context))
 
-    @patch('readwrite.Console')
-    def test_disable_write_on_boot_error(self, console_mock):
-        command_side_effect = [
-            self._get_console_command_return_value(error=True),
-            self._get_console_command_return_value(),
-        ]
-        self._init_context(console_mock, command_side_effect=command_side_effect)
+    def test_disable_write_on_boot_error(self):
+        self._init_context(boot='rw', mount_mock=self._get_mount_mock(error=errno.EPERM))
+        self._add_opened_file('3', '/boot/config.txt', '0100001')
+        self._add_opened_file('4', '/etc/hosts', '0100000')
+        self._add_opened_file('5', 'pipe:[1234]', '01')
+        self._add_opened_file('6', '/root/data.json', '0100002')
 
         context = ReadWriteContext()
         self.assertFalse(self.r.disable_write_on_boot(context))
@@ -178,108 +277,78 @@ class ReadWriteTests(unittest.TestCase):
                 'partition': '/boot',
                 'traceback': AnyArg(),
                 'context': AnyArg(),
-                'files': [],
+                'files': ['3 /boot/config.txt', '6 /root/data.json'],
             }
         )
 
-    @patch('readwrite.Console')
-    def test_disable_write_no_crash_report(self, console_mock):
-        command_side_effect = [
-            self._get_console_command_return_value(error=True, stderr=['busy']),
-            self._get_console_command_return_value(),
-        ]
-        self._init_context(console_mock, command_side_effect=command_side_effect)
+    def test_disable_write_no_crash_report(self):
+        self._init_context(boot='rw', mount_mock=self._get_mount_mock(error=errno.EBUSY))
 
         context = ReadWriteContext()
         self.assertFalse(self.r.disable_write_on_boot(context))
 
-        self.assertFalse(self.crash_report.called)
+        self.assertFalse(self.crash_report.manual_report.called)
 
-    @patch('readwrite.Console')
-    def test_enable_write_on_root(self, console_mock):
-        command_side_effect = [
-            self._get_console_command_return_value(),
-            self._get_console_command_return_value(stdout=['rw']),
-        ]
-        self._init_context(console_mock, command_side_effect=command_side_effect)
+    def test_enable_write_on_root(self):
+        self._init_context(root='ro', mount_mock=self._get_mount_mock({'root': 'rw'}))
 
         self.assertTrue(self.r.enable_write_on_root())
 
-    @patch('readwrite.Console')
-    def test_enable_write_on_root_failed(self, console_mock):
-        command_side_effect = [
-            self._get_console_command_return_value(),
-            self._get_console_command_return_value(stdout=['ro']),
-        ]
-        self._init_context(console_mock, command_side_effect=command_side_effect)
+    def test_enable_write_on_root_failed(self):
+        self._init_context(root='ro', mount_mock=self._get_mount_mock({'root': 'ro'}))
 
         self.assertFalse(self.r.enable_write_on_root())
 
-    @patch('readwrite.Console')
-    def test_enable_write_on_root_error(self, console_mock):
-        command_side_effect = [
-            self._get_console_command_return_value(error=True),
-            self._get_console_command_return_value(),
-        ]
-        self._init_context(console_mock, command_side_effect=command_side_effect)
+    def test_enable_write_on_root_error(self):
+        self._init_context(root='ro', mount_mock=self._get_mount_mock(error=errno.EPERM))
 
         self.assertFalse(self.r.enable_write_on_root())
 
-    @patch('readwrite.Console')
-    def test_disable_write_on_root(self, console_mock):
-        command_side_effect = [
-            self._get_console_command_return_value(),
-            self._get_console_command_return_value(stdout=['ro']),
-        ]
-        self._init_context(console_mock, command_side_effect=command_side_effect)
+    def test_disable_write_on_root(self):
+        self._init_context(root='rw', mount_mock=self._get_mount_mock({'root': 'ro'}))
 
         context = ReadWriteContext()
         self.assertTrue(self.r.disable_write_on_root(context))
 
-    @patch('readwrite.Console')
-    def test_disable_write_on_root_failed(self, console_mock):
-        command_side_effect = [
-            self._get_console_command_return_value(),
-            self._get_console_command_return_value(stdout=['rw']),
-        ]
-        self._init_context(console_mock, command_side_effect=command_side_effect)
+    def test_disable_write_on_root_failed(self):
+        self._init_context(root='rw', mount_mock=self._get_mount_mock({'root': 'rw'}))
 
         context = ReadWriteContext()
         self.assertFalse(self.r.disable_write_on_root(context))
 
-    @patch('readwrite.Console')
-    def test_disable_write_on_root_error(self, console_mock):
-        command_side_effect = [
-            self._get_console_command_return_value(error=True),
-            self._get_console_command_return_value(),
-        ]
-        self._init_context(console_mock, command_side_effect=command_side_effect)
+    def test_disable_write_on_root_error(self):
+        self._init_context(root='rw', mount_mock=self._get_mount_mock(error=errno.EPERM))
 
         context = ReadWriteContext()
         self.assertFalse(self.r.disable_write_on_root(context))
 
-    @patch('readwrite.Console')
-    def test_enable_write_on_root_on_non_cleep(self, console_mock):
-        self._init_context(console_mock, on_cleep=False)
+    def test_opened_files_dir_not_readable(self):
+        self._init_context(boot='rw', mount_mock=self._get_mount_mock(error=errno.EPERM))
+        self.r.FD_DIR = '/dummy/fd'
+
+        self.assertFalse(self.r.disable_write_on_boot(ReadWriteContext()))
+
+        self.assertEqual(self.crash_report.manual_report.call_args[0][1]['files'], [])
+
+    def test_enable_write_on_root_on_non_cleep(self):
+        self._init_context(on_cleep=False)
 
         self.assertFalse(self.r.enable_write_on_root())
+        self.assertFalse(self.r.libc.mount.called)
 
-    @patch('readwrite.Console')
-    def test_enable_write_on_boot_on_non_cleep(self, console_mock):
-        self._init_context(console_mock, on_cleep=False)
+    def test_enable_write_on_boot_on_non_cleep(self):
+        self._init_context(on_cleep=False)
 
         self.assertFalse(self.r.enable_write_on_boot())
 
-    @patch('readwrite.Console')
-    def test_disable_write_on_root_on_non_cleep(self, console_mock):
-        self._init_context(console_mock, on_cleep=False)
+    def test_disable_write_on_root_on_non_cleep(self):
+        self._init_context(on_cleep=False)
 
         context = ReadWriteContext()
         self.assertFalse(self.r.disable_write_on_root(context))
 
-    @patch('readwrite.Console')
-    def test_disable_write_on_boot_on_non_cleep(self, console_mock):
-        self._init_context(console_mock, on_cleep=False)
+    def test_disable_write_on_boot_on_non_cleep(self):
+        self._init_context(on_cleep=False)
 
         context = ReadWriteContext()
         self.assertFalse(self.r.disable_write_on_boot(context))
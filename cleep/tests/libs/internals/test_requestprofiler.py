@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from cleep.libs.tests.lib import TestLib
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.dirname(__file__)).replace("tests/", ""))
+from requestprofiler import RequestProfiler
+import unittest
+import logging
+import time
+from unittest.mock import Mock, patch
+from cleep.libs.tests.common import get_log_level
+
+LOG_LEVEL = get_log_level()
+
+
+class DummyRoute:
+    def __init__(self, rule):
+        self.rule = rule
+
+
+def dummy_app(status="200 OK", body=b"hello", duration=0.0, command=None, error=False, exception=None, rule="/command"):
+    def app(environ, start_response):
+        environ["bottle.route"] = DummyRoute(rule)
+        if exception:
+            raise exception
+        if duration:
+            time.sleep(duration)
+        if command:
+            environ[RequestProfiler.ENVIRON_COMMAND] = command
+        environ[RequestProfiler.ENVIRON_ERROR] = error
+        start_response(status, [])
+        return [body]
+    return app
+
+
+class RequestProfilerTests(unittest.TestCase):
+    def setUp(self):
+        TestLib()
+        logging.basicConfig(
+            level=LOG_LEVEL,
+            format=u"%(asctime)s %(name)s:%(lineno)d %(levelname)s : %(message)s",
+        )
+
+    def _request(self, profiler, method="POST", path="/command"):
+        start_response = Mock()
+        body = profiler({"REQUEST_METHOD": method, "PATH_INFO": path}, start_response)
+        content = b"".join(body)
+        body.close()
+        return content, start_response
+
+    def test_request(self):
+        p = RequestProfiler(dummy_app(command=("system", "get_config")))
+
+        content, start_response = self._request(p)
+        stats = p.get_stats()
+        logging.debug("Stats: %s", stats)
+
+        self.assertEqual(content, b"hello")
+        start_response.assert_called_with("200 OK", [], None)
+        self.assertEqual(list(stats["routes"].keys()), ["POST /command"])
+        self.assertEqual(list(stats["commands"].keys()), ["system.get_config"])
+        route = stats["routes"]["POST /command"]
+        self.assertEqual(route["count"], 1)
+        self.assertEqual(route["errors"], 0)
+        self.assertEqual(route["error_rate"], 0.0)
+        self.assertEqual(route["size_avg"], 5)
+        self.assertEqual(route["size_max"], 5)
+        self.assertEqual(route["histogram"]["<=5ms"], 1)
+        self.assertEqual(sum(route["histogram"].values()), 1)
+        self.assertEqual(stats["slow_requests"], [])
+
+    def test_request_without_route(self):
+        def app(environ, start_response):
+            start_response("404 Not Found", [])
+            return [b""]
+        p = RequestProfiler(app)
+
+        self._request(p, method="GET", path="/dummy")
+        self._request(p, method="GET", path="/dummy2")
+        stats = p.get_stats()
+
+        self.assertEqual(list(stats["routes"].keys()), ["GET <unmatched>"])
+        self.assertEqual(stats["routes"]["GET <unmatched>"]["count"], 2)
+        self.assertEqual(stats["routes"]["GET <unmatched>"]["errors"], 0)
+        self.assertEqual(stats["commands"], {})
+
+    def test_request_max_commands(self):
+        p = RequestProfiler(dummy_app(command=("system", "get_config")))
+        p.MAX_COMMANDS = 2
+        self._request(p)
+        p.app = dummy_app(command=("system", "get_devices"))
+        self._request(p)
+        p.app = dummy_app(command=("dummy", "command1"))
+        self._request(p)
+        p.app = dummy_app(command=("dummy", "command2"))
+        self._request(p)
+        p.app = dummy_app(command=("system", "get_config"))
+        self._request(p)
+
+        stats = p.get_stats()
+
+        self.assertEqual(sorted(stats["commands"].keys()), ["<other>", "system.get_config", "system.get_devices"])
+        self.assertEqual(stats["commands"]["<other>"]["count"], 2)
+        self.assertEqual(stats["commands"]["system.get_config"]["count"], 2)
+
+    def test_request_errors(self):
+        p = RequestProfiler(dummy_app(command=("system", "get_config"), error=True))
+        self._request(p)
+        p.app = dummy_app(status="500 Internal Server Error")
+        self._request(p)
+        p.app = dummy_app()
+        self._request(p)
+        p.app = dummy_app()
+        self._request(p)
+
+        stats = p.get_stats()
+
+        self.assertEqual(stats["routes"]["POST /command"]["count"], 4)
+        self.assertEqual(stats["routes"]["POST /command"]["errors"], 2)
+        self.assertEqual(stats["routes"]["POST /command"]["error_rate"], 0.5)
+        self.assertEqual(stats["commands"]["system.get_config"]["error_rate"], 1.0)
+
+    def test_request_exception(self):
+        p = RequestProfiler(dummy_app(exception=Exception("Test exception")))
+
+        with self.assertRaises(Exception):
+            self._request(p)
+
+        stats = p.get_stats()
+        self.assertEqual(stats["routes"]["POST /command"]["errors"], 1)
+
+    def test_slow_request(self):
+        p = RequestProfiler(dummy_app(duration=0.1, command=("system", "get_config")), slow_threshold=0.05)
+
+        self._request(p)
+        stats = p.get_stats()
+        logging.debug("Stats: %s", stats)
+
+        self.assertEqual(len(stats["slow_requests"]), 1)
+        slow = stats["slow_requests"][0]
+        self.assertEqual(slow["route"], "POST /command")
+        self.assertEqual(slow["command"], "system.get_config")
+        self.assertEqual(slow["status"], 200)
+        self.assertEqual(slow["size"], 5)
+        self.assertGreaterEqual(slow["duration"], 0.1)
+        self.assertIsNone(slow["profile"])
+        self.assertEqual(stats["routes"]["POST /command"]["histogram"]["<=250ms"], 1)
+
+    def test_slow_request_profiled(self):
+        p = RequestProfiler(dummy_app(duration=0.1), slow_threshold=0.05, profile_rate=1.0)
+
+        self._request(p)
+        stats = p.get_stats()
+
+        self.assertEqual(len(stats["slow_requests"]), 1)
+        self.assertIn("function calls", stats["slow_requests"][0]["profile"])
+
+    def test_slow_request_profile_stops_when_app_returns(self):
+        p = RequestProfiler(dummy_app(), slow_threshold=0.05, profile_rate=1.0)
+
+        start_response = Mock()
+        body = p({"REQUEST_METHOD": "POST", "PATH_INFO": "/command"}, start_response)
+        # sending response is not profiled
+        time.sleep(0.1)
+        body.close()
+        stats = p.get_stats()
+
+        self.assertEqual(len(stats["slow_requests"]), 1)
+        self.assertNotIn("sleep", stats["slow_requests"][0]["profile"])
+
+    def test_long_poll_request_excluded(self):
+        p = RequestProfiler(
+            dummy_app(duration=0.1, rule="/poll"),
+            slow_threshold=0.05,
+            profile_rate=1.0,
+            excluded_routes=["POST /poll"],
+        )
+
+        with patch("requestprofiler.cProfile.Profile") as profile_mock:
+            self._request(p, path="/poll")
+        stats = p.get_stats()
+
+        self.assertEqual(stats["slow_requests"], [])
+        self.assertEqual(stats["routes"]["POST /poll"]["count"], 1)
+        self.assertEqual(stats["excluded_routes"], ["POST /poll"])
+        profile_mock.assert_not_called()
+
+    def test_configure(self):
+        p = RequestProfiler(dummy_app())
+
+        p.configure(slow_threshold=2.5, profile_rate=0.1)
+
+        stats = p.get_stats()
+        self.assertEqual(stats["slow_threshold"], 2.5)
+        self.assertEqual(stats["profile_rate"], 0.1)
+
+    def test_configure_invalid_params(self):
+        p = RequestProfiler(dummy_app())
+
+        with self.assertRaises(ValueError) as cm:
+            p.configure(slow_threshold=-1)
+        self.assertEqual(str(cm.exception), 'Parameter "slow_threshold" must be positive')
+
+        with self.assertRaises(ValueError) as cm:
+            p.configure(profile_rate=2)
+        self.assertEqual(str(cm.exception), 'Parameter "profile_rate" must be between 0.0 and 1.0')
+
+    def test_reset(self):
+        p = RequestProfiler(dummy_app(command=("system", "get_config")), slow_threshold=0.0)
+        self._request(p)
+
+        p.reset()
+
+        stats = p.get_stats()
+        self.assertEqual(stats["routes"], {})
+        self.assertEqual(stats["commands"], {})
+        self.assertEqual(stats["slow_requests"], [])
+
+
+if __name__ == "__main__":
+    # coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread test_requestprofiler.py; coverage report -m -i
+    unittest.main()
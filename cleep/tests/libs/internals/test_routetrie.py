@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from cleep.libs.tests.lib import TestLib
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.dirname(__file__)).replace("tests/", ""))
+from routetrie import RouteTrie
+import unittest
+import logging
+from cleep.libs.tests.common import get_log_level
+
+LOG_LEVEL = get_log_level()
+
+
+class RouteTrieTests(unittest.TestCase):
+    def setUp(self):
+        TestLib()
+        logging.basicConfig(
+            level=LOG_LEVEL,
+            format=u"%(asctime)s %(name)s:%(lineno)d %(levelname)s : %(message)s",
+        )
+        self.t = RouteTrie()
+
+    def test_match(self):
+        self.t.add("alexa", "app1")
+        self.t.add("webhook/ifttt", "app2")
+
+        self.assertEqual(self.t.match("alexa"), ["app1"])
+        self.assertEqual(self.t.match("alexa/intent"), ["app1"])
+        self.assertEqual(self.t.match("/alexa/intent/"), ["app1"])
+        self.assertEqual(self.t.match("webhook/ifttt/trigger"), ["app2"])
+        self.assertEqual(self.t.match("alexabot"), [])
+        self.assertEqual(self.t.match("webhook"), [])
+        self.assertEqual(self.t.match(""), [])
+
+    def test_match_longest_prefix(self):
+        self.t.add("", "app0")
+        self.t.add("webhook", "app1")
+        self.t.add("webhook/ifttt", "app2")
+
+        self.assertEqual(self.t.match("webhook/ifttt/trigger"), ["app2"])
+        self.assertEqual(self.t.match("webhook/other"), ["app1"])
+        self.assertEqual(self.t.match("other"), ["app0"])
+        self.assertEqual(self.t.match(None), ["app0"])
+
+    def test_add_same_value_twice(self):
+        self.t.add("", "app1")
+        self.t.add("", "app2")
+        self.t.add("", "app1")
+
+        self.assertEqual(self.t.match("route"), ["app1", "app2"])
+
+    def test_remove(self):
+        self.t.add("alexa", "app1")
+        self.t.add("webhook", "app1")
+        self.t.add("webhook", "app2")
+
+        self.t.remove("app1")
+
+        self.assertEqual(self.t.match("alexa"), [])
+        self.assertEqual(self.t.match("webhook"), ["app2"])
+
+
+if __name__ == "__main__":
+    # coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread test_routetrie.py; coverage report -m -i
+    unittest.main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from cleep.libs.tests.lib import TestLib
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.dirname(__file__)).replace('tests/', ''))
+from startupprofiler import StartupProfiler, get_startup_profiler
+import unittest
+import logging
+import importlib
+import shutil
+import tempfile
+import time
+from threading import Thread
+from unittest.mock import Mock
+from cleep.libs.tests.common import get_log_level
+
+LOG_LEVEL = get_log_level()
+
+
+class StartupProfilerTests(unittest.TestCase):
+
+    def setUp(self):
+        logging.basicConfig(level=LOG_LEVEL, format=u'%(asctime)s %(name)s:%(lineno)d %(levelname)s : %(message)s')
+        TestLib()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.find_and_load = importlib._bootstrap._find_and_load
+        self.p = StartupProfiler()
+
+    def tearDown(self):
+        self.p.stop(timeout=0.0)
+        importlib._bootstrap._find_and_load = self.find_and_load
+        sys.path = [path for path in sys.path if path != self.tmp_dir]
+        for module_name in ['slowmodule', 'slowmodule_dep']:
+            sys.modules.pop(module_name, None)
+        shutil.rmtree(self.tmp_dir)
+
+    def _write_module(self, module_name, content):
+        with open(os.path.join(self.tmp_dir, '%s.py' % module_name), 'w') as fd:
+            fd.write(content)
+        if self.tmp_dir not in sys.path:
+            sys.path.insert(0, self.tmp_dir)
+        importlib.invalidate_caches()
+
+    def _get_phase(self, report, path):
+        return next(phase for phase in report['phases'] if phase['path'] == path)
+
+    def test_disabled(self):
+        function = Mock()
+
+        with self.p.phase('config'):
+            pass
+
+        self.assertFalse(self.p.is_enabled())
+        self.assertIs(self.p.wrap(function, 'apps', 'app', 'start'), function)
+        self.assertIsNone(self.p.stop())
+        self.assertIsNone(self.p.get_report())
+        self.assertIs(importlib._bootstrap._find_and_load, self.find_and_load)
+
+    def test_phases(self):
+        self.p.start()
+        self.p.start()
+        with self.p.phase('config'):
+            time.sleep(0.05)
+        with self.p.phase('bootstrap'):
+            with self.p.phase('bootstrap', 'events_broker'):
+                time.sleep(0.02)
+            with self.p.phase('bootstrap', 'events_broker'):
+                pass
+
+        report = self.p.stop()
+        logging.debug('Report: %s', report)
+
+        self.assertFalse(self.p.is_enabled())
+        self.assertIs(self.p.get_report(), report)
+        self.assertEqual([phase['path'] for phase in report['phases']], ['config', 'bootstrap', 'bootstrap/events_broker'])
+        config = self._get_phase(report, 'config')
+        self.assertGreaterEqual(config['wall'], 0.05)
+        self.assertEqual(config['count'], 1)
+        self.assertFalse(config['failed'])
+        events_broker = self._get_phase(report, 'bootstrap/events_broker')
+        self.assertEqual(events_broker['count'], 2)
+        self.assertGreaterEqual(self._get_phase(report, 'bootstrap')['wall'], events_broker['wall'])
+        self.assertGreaterEqual(report['duration'], 0.07)
+        self.assertEqual(report['apps'], {})
+
+    def test_phase_failed(self):
+        self.p.start()
+
+        with self.assertRaises(Exception):
+            with self.p.phase('config'):
+                raise Exception('Test exception')
+        report = self.p.stop()
+
+        self.assertTrue(self._get_phase(report, 'config')['failed'])
+
+    def test_imports(self):
+        self._write_module('slowmodule_dep', 'import time\ntime.sleep(0.05)\n')
+        self._write_module('slowmodule', 'import slowmodule_dep\nimport time\ntime.sleep(0.05)\n')
+        self.p.start()
+
+        with self.p.phase('apps', 'slow', 'import'):
+            importlib.import_module('slowmodule')
+        with self.p.phase('apps', 'slow', 'init'):
+            import slowmodule
+            time.sleep(0.02)
+        report = self.p.stop()
+        logging.debug('Report: %s', report)
+
+        self.assertIs(importlib._bootstrap._find_and_load, self.find_and_load)
+        app = report['apps']['slow']
+        self.assertGreaterEqual(app['import']['imports'], 0.1)
+        # nested import is not counted twice
+        self.assertLessEqual(app['import']['imports'], app['import']['wall'])
+        # already imported module
+        self.assertLess(app['init']['imports'], 0.01)
+        self.assertGreaterEqual(report['imports'], 0.1)
+
+    def test_wrap(self):
+        self.p.start()
+        function = self.p.wrap(lambda value: value * 2, 'apps', 'app', 'start')
+        reports = []
+        thread = Thread(target=lambda: reports.append(self.p.stop(timeout=2.0)))
+        thread.start()
+        time.sleep(0.1)
+
+        self.assertTrue(self.p.is_enabled())
+        self.assertEqual(function(2), 4)
+        thread.join()
+
+        self.assertEqual(reports[0]['apps']['app']['start']['wall'], self._get_phase(reports[0], 'apps/app/start')['wall'])
+
+    def test_wrap_timeout(self):
+        self.p.start()
+        function = self.p.wrap(Mock(), 'apps', 'app', 'start')
+
+        report = self.p.stop(timeout=0.1)
+        function()
+
+        self.assertEqual(report['phases'], [])
+
+    def test_folded(self):
+        self.p.start()
+        with self.p.phase('apps'):
+            time.sleep(0.02)
+            with self.p.phase('apps', 'app', 'init'):
+                time.sleep(0.02)
+        report = self.p.stop()
+        logging.debug('Folded: %s', report['folded'])
+
+        stacks = dict(line.rsplit(' ', 1) for line in report['folded'])
+        self.assertEqual(sorted(stacks.keys()), ['cleep', 'cleep;apps', 'cleep;apps;app;init'])
+        self.assertGreaterEqual(int(stacks['cleep;apps']), 20000)
+        self.assertGreaterEqual(int(stacks['cleep;apps;app;init']), 20000)
+        total = sum(int(value) for value in stacks.values())
+        self.assertAlmostEqual(total, report['duration'] * 1000000, delta=10)
+
+    def test_save(self):
+        cleep_filesystem = Mock()
+        cleep_filesystem.write_json.return_value = True
+        cleep_filesystem.write_data.return_value = True
+        self.p.REPORT_PATH = os.path.join(self.tmp_dir, 'profile', 'startup_profile.json')
+        self.p.FOLDED_PATH = os.path.join(self.tmp_dir, 'profile', 'startup_profile.folded')
+        self.p.start()
+        with self.p.phase('config'):
+            time.sleep(0.01)
+        report = self.p.stop()
+
+        self.assertTrue(self.p.save(cleep_filesystem))
+
+        cleep_filesystem.mkdirs.assert_called_with(os.path.join(self.tmp_dir, 'profile'))
+        cleep_filesystem.write_json.assert_called_with(self.p.REPORT_PATH, report)
+        cleep_filesystem.write_data.assert_called_with(self.p.FOLDED_PATH, '\n'.join(report['folded']) + '\n')
+
+    def test_save_no_report(self):
+        cleep_filesystem = Mock()
+
+        self.assertFalse(self.p.save(cleep_filesystem))
+
+        cleep_filesystem.write_json.assert_not_called()
+
+    def test_get_last_report(self):
+        cleep_filesystem = Mock()
+        self.p.start()
+        report = self.p.stop()
+
+        self.assertIs(self.p.get_last_report(cleep_filesystem), report)
+        cleep_filesystem.read_json.assert_not_called()
+
+    def test_get_last_report_saved(self):
+        cleep_filesystem = Mock()
+        cleep_filesystem.read_json.return_value = {'duration': 12.3}
+        self.p.REPORT_PATH = os.path.join(self.tmp_dir, 'startup_profile.json')
+        with open(self.p.REPORT_PATH, 'w') as fd:
+            fd.write('{}')
+
+        self.assertEqual(self.p.get_last_report(cleep_filesystem), {'duration': 12.3})
+        cleep_filesystem.read_json.assert_called_with(self.p.REPORT_PATH)
+
+    def test_get_last_report_none(self):
+        self.p.REPORT_PATH = os.path.join(self.tmp_dir, 'startup_profile.json')
+
+        self.assertIsNone(self.p.get_last_report(Mock()))
+
+    def test_get_startup_profiler(self):
+        self.assertIs(get_startup_profiler(), get_startup_profiler())
+
+
+if __name__ == '__main__':
+    # coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread test_startupprofiler.py; coverage report -m -i
+    unittest.main()
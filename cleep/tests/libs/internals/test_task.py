@@ -5,12 +5,14 @@ from cleep.libs.tests.lib import TestLib
 import os
 import sys
 sys.path.append(os.path.abspath(os.path.dirname(__file__)).replace('tests/', ''))
-from task import Task, CountTask
+from task import Task, CountTask, CancelableTimer
+from cleep.libs.internals.taskscheduler import TaskScheduler
 import unittest
 import logging
-from unittest.mock import Mock
+from unittest.mock import Mock, ANY, patch
 import time
 from cleep.libs.tests.common import get_log_level
+import threading
 from threading import Event
 
 LOG_LEVEL = get_log_level()
@@ -171,6 +173,268 @@ class TaskTests(unittest.TestCase):
         self.assertEqual(task.call_count, 4)
 
 
+    def test_task_uses_given_scheduler(self):
+        task = Mock()
+        scheduler = Mock()
+        self.app_stop_event = Event()
+        self.t = Task(interval=0.5, task=task, logger=logging.getLogger('TestTask'), app_stop_event=self.app_stop_event, scheduler=scheduler)
+
+        self.t.start()
+
+        scheduler.schedule.assert_called_with(0.5, ANY, self.t._task_name)
+        self.assertTrue(self.t.is_running())
+        self.t.stop()
+        scheduler.schedule.return_value.cancel.assert_called()
+        self.assertFalse(self.t.is_running())
+
+    def test_task_does_not_create_thread_per_run(self):
+        task = Mock()
+        self._init_context(task=task, interval=0.05, count=10)
+
+        self.t.start()
+        self.t.wait()
+        threads_count = threading.active_count()
+        self._init_context(task=task, interval=0.05, count=10)
+        self.t.start()
+        self.t.wait()
+
+        self.assertEqual(task.call_count, 20)
+        self.assertLessEqual(threading.active_count(), threads_count)
+
+    def test_task_keeps_period(self):
+        calls = []
+        task = Mock(side_effect=lambda: calls.append(time.perf_counter()))
+        self._init_context(task=task, interval=0.1, count=5)
+
+        start = time.perf_counter()
+        self.t.start()
+        self.t.wait()
+
+        # deadlines do not drift
+        self.assertEqual(len(calls), 5)
+        self.assertGreaterEqual(calls[-1] - start, 0.5)
+        self.assertLess(calls[-1] - start, 0.6)
+
+    def test_stop_task_while_running(self):
+        def delay():
+            time.sleep(0.3)
+        task = Mock(side_effect=delay)
+        mock_endcb = Mock()
+        self._init_context(interval=0.1, task=task, end_callback=mock_endcb)
+
+        self.t.start()
+        time.sleep(0.2)
+        self.assertTrue(self.t.is_running())
+        self.t.stop()
+        time.sleep(0.5)
+
+        self.assertFalse(self.t.is_running())
+        self.assertEqual(task.call_count, 1)
+        self.assertTrue(mock_endcb.called)
+
+    def test_restart_task_while_running(self):
+        def delay():
+            time.sleep(0.2)
+        task = Mock(side_effect=delay)
+        self._init_context(interval=0.1, task=task)
+
+        self.t.start()
+        time.sleep(0.15)
+        self.t.start()
+        time.sleep(0.5)
+        self.t.stop()
+        time.sleep(0.3)
+
+        # task is not scheduled twice
+        self.assertLessEqual(task.call_count, 3)
+        self.assertFalse(self.t.is_running())
+
+    def test_task_not_rescheduled_when_cleep_stops(self):
+        task = Mock()
+        self._init_context(interval=0.1, task=task)
+
+        self.t.start()
+        self.t.wait()
+        self.app_stop_event.set()
+        time.sleep(0.3)
+
+        self.assertEqual(task.call_count, 2)
+        self.assertFalse(self.t.is_running())
+
+    def test_oneshot_task_uses_executor(self):
+        task = Mock()
+        scheduler = Mock()
+        executor = Mock()
+        self.app_stop_event = Event()
+        self.t = Task(interval=None, task=task, logger=logging.getLogger('TestTask'), app_stop_event=self.app_stop_event, scheduler=scheduler, executor=executor)
+
+        self.t.start()
+
+        executor.submit.assert_called_with(ANY, self.t._task_name)
+        scheduler.schedule.assert_not_called()
+        self.assertTrue(self.t.is_running())
+
+    def test_oneshot_task_rejected(self):
+        task = Mock()
+        executor = Mock()
+        executor.submit.return_value = None
+        logger = Mock()
+        self.app_stop_event = Event()
+        end_callback = Mock()
+        self.t = Task(interval=None, task=task, logger=logger, app_stop_event=self.app_stop_event, executor=executor, end_callback=end_callback)
+
+        self.t.start()
+
+        logger.error.assert_called()
+        self.assertFalse(self.t.is_running())
+        end_callback.assert_called_once()
+        task.assert_not_called()
+        stats = self.t.get_stats()
+        self.assertEqual(stats['state'], Task.STATE_STOPPED)
+        self.assertEqual(stats['failures'], 1)
+        self.t.wait()
+
+    def test_get_stats(self):
+        task = Mock()
+        self._init_context(task=task, interval=0.1, count=3)
+        self.assertEqual(self.t.get_state(), Task.STATE_CREATED)
+
+        self.t.start()
+        self.assertEqual(self.t.get_state(), Task.STATE_SCHEDULED)
+        self.t.wait()
+
+        stats = self.t.get_stats()
+        logging.debug('Stats: %s' % stats)
+        self.assertEqual(stats['name'], self.t.get_name())
+        self.assertEqual(stats['state'], Task.STATE_ENDED)
+        self.assertEqual(stats['interval'], 0.1)
+        self.assertEqual(stats['runs'], 3)
+        self.assertEqual(stats['remaining_runs'], 0)
+        self.assertEqual(stats['failures'], 0)
+        self.assertIsNotNone(stats['last_run'])
+        self.assertLessEqual(stats['duration']['average'], stats['duration']['max'])
+        self.assertEqual(stats['late_ticks'], 0)
+        self.assertEqual(stats['missed_ticks'], 0)
+        self.assertEqual(stats['overruns'], 0)
+
+    def test_get_stats_running(self):
+        started = Event()
+        release = Event()
+        def run():
+            started.set()
+            release.wait(1.0)
+        self._init_context(task=Mock(side_effect=run), interval=None)
+
+        self.t.start()
+        self.assertTrue(started.wait(1.0))
+
+        self.assertEqual(self.t.get_state(), Task.STATE_RUNNING)
+        release.set()
+        self.t.wait()
+        self.assertEqual(self.t.get_state(), Task.STATE_ENDED)
+
+    def test_get_stats_stopped(self):
+        self._init_context(task=Mock(), interval=10)
+
+        self.t.start()
+        self.t.stop()
+
+        self.assertEqual(self.t.get_stats()['state'], Task.STATE_STOPPED)
+
+    def test_get_stats_failures(self):
+        self._init_context(task=Mock(side_effect=Exception('Test')), interval=None)
+
+        self.t.start()
+        self.t.wait()
+
+        self.assertEqual(self.t.get_stats()['failures'], 1)
+
+    def test_get_stats_overrun_skips_missed_ticks(self):
+        durations = [0.35, 0.0, 0.0]
+        task = Mock(side_effect=lambda: time.sleep(durations.pop(0)))
+        self._init_context(task=task, interval=0.1, count=3)
+
+        start = time.perf_counter()
+        self.t.start()
+        self.t.wait()
+        elapsed = time.perf_counter() - start
+
+        stats = self.t.get_stats()
+        logging.debug('Stats: %s' % stats)
+        self.assertEqual(task.call_count, 3)
+        self.assertEqual(stats['overruns'], 1)
+        self.assertEqual(stats['missed_ticks'], 2)
+        self.assertGreaterEqual(stats['duration']['max'], 0.35)
+        # missed ticks are skipped: last run is aligned on next tick instead of being run in burst
+        self.assertGreaterEqual(elapsed, 0.48)
+
+    def test_get_stats_late_ticks(self):
+        release = Event()
+        scheduler = TaskScheduler('test', max_workers=1)
+        blocker = scheduler.schedule(0, lambda: release.wait(2.0))
+        self.app_stop_event = Event()
+        self.t = CountTask(interval=0.1, task=Mock(), count=1, logger=logging.getLogger('TestTask'), app_stop_event=self.app_stop_event, scheduler=scheduler)
+
+        with patch.object(Task, 'LATE_THRESHOLD', 0.2):
+            self.t.start()
+            time.sleep(0.5)
+            release.set()
+            self.t.wait()
+        scheduler.stop()
+
+        self.assertEqual(self.t.get_stats()['late_ticks'], 1)
+
+    def test_thread_like_aliases(self):
+        self._init_context(task=Mock(), interval=10)
+
+        self.t.start()
+        self.assertTrue(self.t.is_alive())
+        self.t.cancel()
+
+        self.assertFalse(self.t.is_alive())
+        self.assertEqual(self.t.get_state(), Task.STATE_STOPPED)
+
+    def test_wait_not_started_task(self):
+        self._init_context(task=Mock())
+
+        self.t.wait()
+
+        self.assertFalse(self.t.is_running())
+
+class CancelableTimerTests(unittest.TestCase):
+
+    def setUp(self):
+        logging.basicConfig(level=LOG_LEVEL, format=u'%(asctime)s %(name)s:%(lineno)d %(levelname)s : %(message)s')
+        TestLib()
+
+    def test_run(self):
+        task = Mock()
+        timer = CancelableTimer(0.1, task, ['arg'], {'key': 'value'})
+        self.assertEqual(timer.get_stats()['state'], Task.STATE_CREATED)
+
+        timer.start()
+        self.assertEqual(timer.get_stats()['state'], Task.STATE_SCHEDULED)
+        timer.join()
+
+        task.assert_called_with('arg', key='value')
+        stats = timer.get_stats()
+        self.assertEqual(stats['state'], Task.STATE_ENDED)
+        self.assertEqual(stats['runs'], 1)
+        self.assertEqual(stats['interval'], 0.1)
+
+    def test_cancel(self):
+        task = Mock()
+        timer = CancelableTimer(5, task)
+
+        start = time.perf_counter()
+        timer.start()
+        timer.cancel()
+        timer.join()
+
+        self.assertLess(time.perf_counter() - start, 1.0)
+        task.assert_not_called()
+        self.assertEqual(timer.get_stats()['state'], Task.STATE_STOPPED)
+
 
 if __name__ == '__main__':
     # coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread test_task.py; coverage report -m -i
@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from cleep.libs.tests.lib import TestLib
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.dirname(__file__)).replace('tests/', ''))
+from taskexecutor import TaskExecutor, ScheduledCall, get_executor, get_long_running_executor
+import unittest
+import logging
+from unittest.mock import Mock, patch
+import time
+from cleep.libs.tests.common import get_log_level
+from threading import Event
+
+LOG_LEVEL = get_log_level()
+
+
+class TaskExecutorTests(unittest.TestCase):
+
+    def setUp(self):
+        logging.basicConfig(level=LOG_LEVEL, format=u'%(asctime)s %(name)s:%(lineno)d %(levelname)s : %(message)s')
+        TestLib()
+        self.e = TaskExecutor('test', max_workers=2, max_queue=2)
+        self.release = Event()
+
+    def tearDown(self):
+        self.release.set()
+        self.e.stop()
+
+    def _wait_for(self, condition, timeout=2.0):
+        end = time.time() + timeout
+        while not condition() and time.time() < end:
+            time.sleep(0.01)
+        return condition()
+
+    def _block_workers(self):
+        self.e.submit(lambda: self.release.wait(2.0))
+        self.e.submit(lambda: self.release.wait(2.0))
+        self.assertTrue(self._wait_for(lambda: self.e.get_queue_depth() == 0))
+
+    def test_submit(self):
+        done = Event()
+
+        call = self.e.submit(done.set, 'mycall')
+
+        self.assertTrue(isinstance(call, ScheduledCall))
+        self.assertEqual(call.name, 'mycall')
+        self.assertTrue(done.wait(1.0))
+        self.assertTrue(self._wait_for(lambda: self.e.get_stats()['completed'] == 1))
+
+    def test_submit_default_name(self):
+        def my_function():
+            pass
+
+        call = self.e.submit(my_function)
+
+        self.assertEqual(call.name, 'my_function')
+
+    def test_submit_dispatch_immediately(self):
+        done = Event()
+
+        start = time.perf_counter()
+        self.e.submit(done.set)
+
+        self.assertTrue(done.wait(1.0))
+        self.assertLess(time.perf_counter() - start, 0.1)
+
+    def test_submit_worker_thread_name(self):
+        names = []
+        done = Event()
+        def run():
+            import threading
+            names.append(threading.current_thread().name)
+            done.set()
+
+        self.e.submit(run)
+
+        self.assertTrue(done.wait(1.0))
+        self.assertEqual(names, ['test.worker'])
+
+    def test_submit_queued_when_workers_busy(self):
+        done = Event()
+        self._block_workers()
+
+        call = self.e.submit(done.set)
+
+        self.assertIsNotNone(call)
+        self.assertEqual(self.e.get_workers_count(), 2)
+        self.assertEqual(self.e.get_queue_depth(), 1)
+        self.assertFalse(done.wait(0.1))
+        self.release.set()
+        self.assertTrue(done.wait(1.0))
+
+    def test_submit_rejected_when_queue_full(self):
+        self._block_workers()
+        self.assertIsNotNone(self.e.submit(Mock()))
+        self.assertIsNotNone(self.e.submit(Mock()))
+
+        callback = Mock()
+        call = self.e.submit(callback)
+
+        self.assertIsNone(call)
+        self.assertEqual(self.e.get_stats()['rejected'], 1)
+        self.release.set()
+        time.sleep(0.1)
+        callback.assert_not_called()
+
+    def test_submit_unbounded_queue(self):
+        self.e = TaskExecutor('test', max_workers=1, max_queue=0)
+        self.e.submit(lambda: self.release.wait(2.0))
+
+        calls = [self.e.submit(Mock()) for _ in range(200)]
+
+        self.assertTrue(all(calls))
+        self.assertEqual(self.e.get_stats()['rejected'], 0)
+
+    def test_submit_after_stop(self):
+        callback = Mock()
+        self.e.stop()
+
+        self.assertIsNone(self.e.submit(callback))
+        time.sleep(0.1)
+        callback.assert_not_called()
+
+    def test_execute(self):
+        done = Event()
+        call = ScheduledCall(Mock(), time.perf_counter(), 0, done.set, 'mycall')
+
+        self.assertTrue(self.e.execute(call))
+
+        self.assertTrue(done.wait(1.0))
+
+    def test_cancel_queued_call(self):
+        callback = Mock()
+        self._block_workers()
+        call = self.e.submit(callback)
+
+        call.cancel()
+
+        self.assertTrue(call.cancelled)
+        self.assertEqual(self.e.get_queue_depth(), 0)
+        self.release.set()
+        time.sleep(0.1)
+        callback.assert_not_called()
+
+    def test_cancel_call_owned_by_other_instance(self):
+        callback = Mock()
+        self._block_workers()
+        call = ScheduledCall(Mock(), time.perf_counter(), 0, callback, 'mycall')
+        self.e.execute(call)
+
+        call.cancelled = True
+        self.release.set()
+        time.sleep(0.1)
+
+        callback.assert_not_called()
+
+    def test_call_exception(self):
+        done = Event()
+        self.e.submit(Mock(side_effect=Exception('Test')))
+        self.e.submit(done.set)
+
+        self.assertTrue(done.wait(1.0))
+        self.assertTrue(self._wait_for(lambda: self.e.get_stats()['failed'] == 1))
+
+    @patch('taskexecutor.TaskExecutor.WORKER_IDLE_TIMEOUT', 0.1)
+    def test_worker_stops_when_idle(self):
+        done = Event()
+        self.e.submit(done.set)
+        self.assertTrue(done.wait(1.0))
+        self.assertEqual(self.e.get_workers_count(), 1)
+
+        self.assertTrue(self._wait_for(lambda: self.e.get_workers_count() == 0))
+
+    def test_get_stats(self):
+        self._block_workers()
+        self.e.submit(Mock())
+        self.e.submit(Mock())
+        self.e.submit(Mock())
+
+        stats = self.e.get_stats()
+        logging.debug('Stats: %s' % stats)
+        self.assertEqual(stats['name'], 'test')
+        self.assertEqual(stats['workers'], 2)
+        self.assertEqual(stats['max_workers'], 2)
+        self.assertEqual(stats['queue_depth'], 2)
+        self.assertEqual(stats['max_queue'], 2)
+        self.assertEqual(stats['submitted'], 4)
+        self.assertEqual(stats['rejected'], 1)
+        self.assertEqual(stats['completed'], 0)
+
+        time.sleep(0.1)
+        self.release.set()
+        self.assertTrue(self._wait_for(lambda: self.e.get_stats()['completed'] == 4))
+        stats = self.e.get_stats()
+        self.assertGreaterEqual(stats['latency']['max'], 0.1)
+        self.assertGreater(stats['latency']['average'], 0.0)
+        self.assertLessEqual(stats['latency']['average'], stats['latency']['max'])
+        self.assertEqual(stats['idle_workers'], 2)
+
+    def test_get_executor(self):
+        executor = get_executor()
+
+        self.assertTrue(isinstance(executor, TaskExecutor))
+        self.assertIs(get_executor(), executor)
+
+    def test_get_long_running_executor(self):
+        executor = get_long_running_executor()
+
+        self.assertIs(get_long_running_executor(), executor)
+        self.assertIsNot(executor, get_executor())
+        self.assertEqual(executor.max_queue, 0)
+
+
+if __name__ == '__main__':
+    # coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread test_taskexecutor.py; coverage report -m -i
+    unittest.main()
@@ -10,6 +10,7 @@ import unittest
 import logging
 from unittest.mock import Mock, patch
 import time
+import gc
 from cleep.libs.tests.common import get_log_level
 from threading import Event
 
@@ -37,7 +38,16 @@ class TaskFactoryTests(unittest.TestCase):
         result = self.lib.create_task(1.0, task_fn)
 
         self.assertEqual(result, mock_task.return_value)
-        mock_task.assert_called_with(1.0, task_fn, self.lib.logger, self.stop_event, None, None, None)
+        mock_task.assert_called_with(1.0, task_fn, self.lib.logger, self.stop_event, None, None, None, executor=None)
+
+    @patch('taskfactory.Task')
+    def test_create_task_long_running(self, mock_task):
+        task_fn = Mock()
+        self.init_context()
+
+        self.lib.create_task(None, task_fn, long_running=True)
+
+        mock_task.assert_called_with(None, task_fn, self.lib.logger, self.stop_event, None, None, None, executor=self.lib.long_running_executor)
 
     @patch('taskfactory.Task')
     def test_create_task_with_args(self, mock_task):
@@ -47,7 +57,7 @@ class TaskFactoryTests(unittest.TestCase):
 
         self.lib.create_task(1.0, task_fn, task_args=args)
 
-        mock_task.assert_called_with(1.0, task_fn, self.lib.logger, self.stop_event, args, None, None)
+        mock_task.assert_called_with(1.0, task_fn, self.lib.logger, self.stop_event, args, None, None, executor=None)
 
     @patch('taskfactory.Task')
     def test_create_task_with_kwargs(self, mock_task):
@@ -57,7 +67,7 @@ class TaskFactoryTests(unittest.TestCase):
 
         self.lib.create_task(1.0, task_fn, task_kwargs=kwargs)
 
-        mock_task.assert_called_with(1.0, task_fn, self.lib.logger, self.stop_event, None, kwargs, None)
+        mock_task.assert_called_with(1.0, task_fn, self.lib.logger, self.stop_event, None, kwargs, None, executor=None)
 
     @patch('taskfactory.Task')
     def test_create_task_with_end_callback(self, mock_task):
@@ -67,7 +77,7 @@ class TaskFactoryTests(unittest.TestCase):
 
         self.lib.create_task(1.0, task_fn, end_callback=end_callback)
 
-        mock_task.assert_called_with(1.0, task_fn, self.lib.logger, self.stop_event, None, None, end_callback)
+        mock_task.assert_called_with(1.0, task_fn, self.lib.logger, self.stop_event, None, None, end_callback, executor=None)
 
     @patch('taskfactory.CountTask')
     def test_create_count_task_without_args(self, mock_counttask):
@@ -190,7 +200,62 @@ class TaskFactoryTests(unittest.TestCase):
         result = self.lib.create_task(1.0, task_fn)
 
         self.assertEqual(result, mock_task.return_value)
-        mock_task.assert_called_with(1.0, task_fn, self.logger, self.stop_event, None, None, None)
+        mock_task.assert_called_with(1.0, task_fn, self.logger, self.stop_event, None, None, None, executor=None)
+
+
+    def test_tasks_registered_with_owner(self):
+        self.init_context()
+        self._get_module_name = Mock(return_value='mymodule')
+
+        task = self.lib.create_task(None, Mock())
+        timer = self.lib.create_timer(10, Mock())
+
+        self.assertCountEqual(self.lib.tasks, [task, timer])
+        stats = self.lib.get_tasks()
+        logging.debug('Tasks: %s' % stats)
+        self.assertEqual([s['owner'] for s in stats], ['mymodule', 'mymodule'])
+
+    def test_tasks_owner_is_class_name(self):
+        self.init_context()
+
+        task = self.lib.create_count_task(1.0, Mock(), 2)
+
+        self.assertEqual(self.lib.get_tasks()[0]['owner'], 'TaskFactoryTests')
+
+    def test_tasks_are_not_leaked(self):
+        self.init_context()
+
+        for _ in range(10):
+            self.lib.create_task(None, Mock())
+        gc.collect()
+
+        self.assertEqual(self.lib.tasks, [])
+        self.assertEqual(self.lib.get_tasks_summary()['total'], 0)
+
+    def test_get_tasks_summary(self):
+        self.init_context()
+        self.stop_event.is_set.return_value = False
+        task = self.lib.create_task(10, Mock())
+        task.start()
+
+        summary = self.lib.get_tasks_summary()
+        task.stop()
+
+        self.assertEqual(summary['total'], 1)
+        self.assertEqual(summary['states'], {'scheduled': 1})
+
+    def test_get_stats(self):
+        self.init_context()
+
+        stats = self.lib.get_stats()
+        logging.debug('Stats: %s' % stats)
+
+        self.assertCountEqual(list(stats.keys()), ['scheduler', 'executor', 'long_running_executor'])
+        self.assertTrue('queue_depth' in stats['executor'])
+        self.assertTrue('rejected' in stats['executor'])
+        self.assertTrue('latency' in stats['executor'])
+        self.assertTrue('scheduled' in stats['scheduler'])
+        self.assertTrue('queue_depth' in stats['scheduler']['executor'])
 
 
 if __name__ == '__main__':
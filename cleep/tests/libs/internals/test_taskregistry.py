@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from cleep.libs.tests.lib import TestLib
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.dirname(__file__)).replace('tests/', ''))
+from taskregistry import TaskRegistry
+import unittest
+import logging
+import gc
+from unittest.mock import Mock
+from cleep.libs.tests.common import get_log_level
+
+LOG_LEVEL = get_log_level()
+
+
+class TaskRegistryTests(unittest.TestCase):
+
+    def setUp(self):
+        logging.basicConfig(level=LOG_LEVEL, format=u'%(asctime)s %(name)s:%(lineno)d %(levelname)s : %(message)s')
+        TestLib()
+        self.r = TaskRegistry()
+
+    def _get_task(self, name='task', state='scheduled', interval=1.0, last_duration=0.1, failures=0):
+        task = Mock()
+        task.get_stats.return_value = {
+            'name': name,
+            'state': state,
+            'interval': interval,
+            'failures': failures,
+            'duration': {
+                'last': last_duration,
+                'average': last_duration,
+                'max': last_duration,
+            },
+        }
+        return task
+
+    def test_register(self):
+        task1 = self._get_task()
+        task2 = self._get_task()
+
+        self.r.register(task1, 'module1')
+        self.r.register(task2)
+
+        self.assertEqual(len(self.r), 2)
+        self.assertCountEqual(self.r.get_tasks(), [task1, task2])
+
+    def test_register_twice(self):
+        task = self._get_task()
+
+        self.r.register(task, 'module1')
+        self.r.register(task, 'module2')
+
+        self.assertEqual(len(self.r), 1)
+        self.assertEqual(self.r.get_stats()[0]['owner'], 'module2')
+
+    def test_unregister(self):
+        task = self._get_task()
+        self.r.register(task)
+
+        self.r.unregister(task)
+        self.r.unregister(task)
+
+        self.assertEqual(len(self.r), 0)
+
+    def test_unreferenced_task_is_removed(self):
+        task = self._get_task()
+        self.r.register(task)
+        self.assertEqual(len(self.r), 1)
+
+        del task
+        gc.collect()
+
+        self.assertEqual(len(self.r), 0)
+        self.assertEqual(self.r.get_tasks(), [])
+
+    def test_get_stats(self):
+        task1 = self._get_task('task1')
+        task2 = self._get_task('task2')
+        self.r.register(task1, 'module1')
+        self.r.register(task2)
+
+        stats = self.r.get_stats()
+        logging.debug('Stats: %s' % stats)
+
+        self.assertCountEqual([(s['name'], s['owner']) for s in stats], [('task1', 'module1'), ('task2', None)])
+
+    def test_get_stats_exception(self):
+        task1 = self._get_task('task1')
+        task2 = self._get_task('task2')
+        task2.get_stats.side_effect = Exception('Test')
+        self.r.register(task1)
+        self.r.register(task2)
+
+        stats = self.r.get_stats()
+
+        self.assertEqual([s['name'] for s in stats], ['task1'])
+
+    def test_get_summary(self):
+        tasks = [
+            self._get_task('task1', state='scheduled'),
+            self._get_task('task2', state='running', interval=1.0, last_duration=2.0),
+            self._get_task('task3', state='ended', interval=1.0, last_duration=2.0, failures=1),
+            self._get_task('task4', state='ended', interval=0.0, last_duration=2.0),
+            self._get_task('task5', state='scheduled', interval=1.0, last_duration=1.5, failures=2),
+        ]
+        for task in tasks:
+            self.r.register(task)
+
+        summary = self.r.get_summary()
+        logging.debug('Summary: %s' % summary)
+
+        self.assertEqual(summary['total'], 5)
+        self.assertEqual(summary['states'], {'scheduled': 2, 'running': 1, 'ended': 2})
+        self.assertCountEqual(summary['overrunning'], ['task2', 'task5'])
+        self.assertCountEqual(summary['failing'], ['task3', 'task5'])
+
+    def test_get_summary_timer(self):
+        timer = Mock()
+        timer.get_stats.return_value = {'name': 'timer', 'state': 'scheduled', 'interval': 10.0, 'runs': 0}
+        self.r.register(timer)
+
+        summary = self.r.get_summary()
+
+        self.assertEqual(summary['total'], 1)
+        self.assertEqual(summary['overrunning'], [])
+        self.assertEqual(summary['failing'], [])
+
+
+if __name__ == '__main__':
+    # coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread test_taskregistry.py; coverage report -m -i
+    unittest.main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from cleep.libs.tests.lib import TestLib
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.dirname(__file__)).replace('tests/', ''))
+from taskscheduler import TaskScheduler, ScheduledCall, get_scheduler
+import unittest
+import logging
+from unittest.mock import Mock, patch
+import time
+from cleep.libs.tests.common import get_log_level
+from threading import Event, Lock
+
+LOG_LEVEL = get_log_level()
+
+
+class TaskSchedulerTests(unittest.TestCase):
+
+    def setUp(self):
+        logging.basicConfig(level=LOG_LEVEL, format=u'%(asctime)s %(name)s:%(lineno)d %(levelname)s : %(message)s')
+        TestLib()
+        self.s = TaskScheduler('test', max_workers=2)
+
+    def tearDown(self):
+        self.s.stop()
+
+    def _wait_for(self, condition, timeout=2.0):
+        end = time.time() + timeout
+        while not condition() and time.time() < end:
+            time.sleep(0.01)
+        return condition()
+
+    def test_schedule(self):
+        done = Event()
+        call = self.s.schedule(0.1, done.set, 'mycall')
+
+        self.assertTrue(isinstance(call, ScheduledCall))
+        self.assertEqual(call.name, 'mycall')
+        self.assertEqual(self.s.get_pending_count(), 1)
+        self.assertTrue(done.wait(1.0))
+        self.assertTrue(self._wait_for(lambda: self.s.get_pending_count() == 0))
+
+    def test_schedule_default_name(self):
+        def my_function():
+            pass
+
+        call = self.s.schedule(10, my_function)
+
+        self.assertEqual(call.name, 'my_function')
+
+    def test_schedule_order(self):
+        calls = []
+        lock = Lock()
+        done = Event()
+        def append(value):
+            with lock:
+                calls.append(value)
+                if len(calls) == 3:
+                    done.set()
+
+        self.s.schedule(0.3, lambda: append(3))
+        self.s.schedule(0.1, lambda: append(1))
+        self.s.schedule(0.2, lambda: append(2))
+
+        self.assertTrue(done.wait(2.0))
+        self.assertEqual(calls, [1, 2, 3])
+
+    def test_schedule_deadline_accuracy(self):
+        ran_at = []
+        done = Event()
+        def run():
+            ran_at.append(time.perf_counter())
+            done.set()
+
+        start = time.perf_counter()
+        self.s.schedule(0.25, run)
+
+        self.assertTrue(done.wait(1.0))
+        self.assertGreaterEqual(ran_at[0] - start, 0.25)
+        self.assertLess(ran_at[0] - start, 0.35)
+
+    def test_schedule_nearest_deadline_wakes_dispatcher(self):
+        done = Event()
+        self.s.schedule(10, Mock())
+        time.sleep(0.05)
+
+        start = time.perf_counter()
+        self.s.schedule(0.05, done.set)
+
+        self.assertTrue(done.wait(1.0))
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+    def test_schedule_negative_delay(self):
+        done = Event()
+
+        self.s.schedule(-1, done.set)
+
+        self.assertTrue(done.wait(1.0))
+
+    def test_cancel(self):
+        callback = Mock()
+        call = self.s.schedule(0.1, callback)
+
+        call.cancel()
+        time.sleep(0.3)
+
+        self.assertTrue(call.cancelled)
+        callback.assert_not_called()
+        self.assertEqual(self.s.get_pending_count(), 0)
+
+    def test_cancel_not_first_call(self):
+        callback1 = Mock()
+        callback2 = Mock()
+        self.s.schedule(0.1, callback1)
+        call = self.s.schedule(0.2, callback2)
+
+        call.cancel()
+
+        self.assertEqual(self.s.get_pending_count(), 1)
+        self.assertTrue(self._wait_for(lambda: callback1.called))
+        time.sleep(0.2)
+        callback2.assert_not_called()
+
+    def test_slow_call_does_not_delay_others(self):
+        release = Event()
+        done = Event()
+        self.s.schedule(0, lambda: release.wait(2.0))
+        time.sleep(0.05)
+
+        start = time.perf_counter()
+        self.s.schedule(0.05, done.set)
+
+        self.assertTrue(done.wait(1.0))
+        self.assertLess(time.perf_counter() - start, 0.5)
+        release.set()
+
+    def test_max_workers(self):
+        release = Event()
+        done = Event()
+        self.s.schedule(0, lambda: release.wait(2.0))
+        self.s.schedule(0, lambda: release.wait(2.0))
+        self.s.schedule(0, done.set)
+
+        time.sleep(0.2)
+        self.assertEqual(self.s.get_workers_count(), 2)
+        self.assertFalse(done.is_set())
+        self.assertEqual(self.s.get_pending_count(), 1)
+
+        release.set()
+        self.assertTrue(done.wait(1.0))
+
+    def test_worker_is_reused(self):
+        done = Event()
+        self.s.schedule(0, Mock())
+        self.assertTrue(self._wait_for(lambda: self.s.get_pending_count() == 0))
+        time.sleep(0.05)
+
+        self.s.schedule(0, done.set)
+
+        self.assertTrue(done.wait(1.0))
+        self.assertEqual(self.s.get_workers_count(), 1)
+
+    @patch('cleep.libs.internals.taskexecutor.TaskExecutor.WORKER_IDLE_TIMEOUT', 0.1)
+    def test_worker_stops_when_idle(self):
+        done = Event()
+        self.s.schedule(0, done.set)
+        self.assertTrue(done.wait(1.0))
+        self.assertEqual(self.s.get_workers_count(), 1)
+
+        self.assertTrue(self._wait_for(lambda: self.s.get_workers_count() == 0))
+
+    def test_call_exception(self):
+        done = Event()
+        self.s.schedule(0, Mock(side_effect=Exception('Test')))
+        self.s.schedule(0.05, done.set)
+
+        self.assertTrue(done.wait(1.0))
+
+    def test_stop(self):
+        callback = Mock()
+        call = self.s.schedule(0.1, callback)
+
+        self.s.stop()
+        time.sleep(0.2)
+
+        self.assertTrue(call.cancelled)
+        callback.assert_not_called()
+        self.assertEqual(self.s.get_pending_count(), 0)
+
+    def test_schedule_after_stop(self):
+        callback = Mock()
+        self.s.stop()
+
+        call = self.s.schedule(0, callback)
+        time.sleep(0.1)
+
+        self.assertTrue(call.cancelled)
+        callback.assert_not_called()
+
+    def test_get_stats(self):
+        release = Event()
+        self.s.schedule(0, lambda: release.wait(2.0))
+        self.s.schedule(0, lambda: release.wait(2.0))
+        self.s.schedule(0, Mock())
+        self.s.schedule(10, Mock())
+        self.s.schedule(10, Mock()).cancel()
+        time.sleep(0.2)
+
+        stats = self.s.get_stats()
+        logging.debug('Stats: %s' % stats)
+        release.set()
+
+        self.assertEqual(stats['scheduled'], 1)
+        self.assertEqual(stats['executor']['name'], 'test')
+        self.assertEqual(stats['executor']['queue_depth'], 1)
+        self.assertEqual(stats['executor']['max_queue'], 0)
+        self.assertEqual(self.s.get_pending_count(), 2)
+
+    def test_get_scheduler(self):
+        scheduler = get_scheduler()
+
+        self.assertTrue(isinstance(scheduler, TaskScheduler))
+        self.assertIs(get_scheduler(), scheduler)
+
+
+if __name__ == '__main__':
+    # coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread test_taskscheduler.py; coverage report -m -i
+    unittest.main()
@@ -0,0 +1,288 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from cleep.libs.tests.lib import TestLib
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.dirname(__file__)).replace('tests/', ''))
+from ueventmonitor import UeventMonitor
+import unittest
+import logging
+import errno
+import socket
+import struct
+import tempfile
+import time
+from unittest.mock import Mock, patch
+from cleep.libs.tests.common import get_log_level
+
+LOG_LEVEL = get_log_level()
+
+REPLAY = """monitor will print the received events for:
+UDEV - the event which udev sends out after rule processing
+
+UDEV  [1234.567890] add      /devices/platform/soc/usb1/1-1 (usb)
+ACTION=add
+DEVPATH=/devices/platform/soc/usb1/1-1
+SUBSYSTEM=usb
+DEVNAME=/dev/bus/usb/001/004
+DEVTYPE=usb_device
+SEQNUM=2001
+
+UDEV  [1234.567891] add      /devices/platform/soc/usb1/1-1/1-1:1.0 (usb)
+ACTION=add
+DEVPATH=/devices/platform/soc/usb1/1-1/1-1:1.0
+SUBSYSTEM=usb
+DEVTYPE=usb_interface
+SEQNUM=2002
+
+UDEV  [1234.567892] add      /devices/platform/soc/usb1/1-1/1-1:1.0/host0/target0:0:0/0:0:0:0/block/sda (block)
+ACTION=add
+DEVPATH=/devices/platform/soc/usb1/1-1/1-1:1.0/host0/target0:0:0/0:0:0:0/block/sda
+SUBSYSTEM=block
+DEVNAME=/dev/sda
+DEVTYPE=disk
+ID_MODEL=Cruzer_Blade
+SEQNUM=2003
+
+UDEV  [1234.567893] change   /devices/platform/soc/usb1/1-1/1-1:1.0/host0/target0:0:0/0:0:0:0/block/sda (block)
+ACTION=change
+DEVPATH=/devices/platform/soc/usb1/1-1/1-1:1.0/host0/target0:0:0/0:0:0:0/block/sda
+SUBSYSTEM=block
+DEVNAME=/dev/sda
+DEVTYPE=disk
+ID_MODEL=Cruzer_Blade
+ID_FS_TYPE=vfat
+SEQNUM=2004
+
+UDEV  [1240.000000] remove   /devices/platform/soc/sound/card1 (sound)
+ACTION=remove
+DEVPATH=/devices/platform/soc/sound/card1
+SUBSYSTEM=sound
+SEQNUM=2005
+"""
+
+
+class FakeSocket:
+    """
+    Fake netlink socket returning queued messages
+    """
+
+    def __init__(self, messages):
+        self.messages = list(messages)
+        self.bound = None
+        self.closed = False
+
+    def setsockopt(self, *args):
+        pass
+
+    def bind(self, address):
+        self.bound = address
+
+    def settimeout(self, timeout):
+        pass
+
+    def recv(self, size):
+        if not self.messages:
+            time.sleep(0.01)
+            raise socket.timeout()
+        message = self.messages.pop(0)
+        if isinstance(message, Exception):
+            raise message
+        return message
+
+    def close(self):
+        self.closed = True
+
+
+def udev_message(properties):
+    payload = b''.join(('%s=%s' % (key, value)).encode() + b'\0' for key, value in properties.items())
+    header = b'libudev\0' + struct.pack('!I', UeventMonitor.UDEV_MAGIC) + struct.pack('=IIIIIII', 40, 40, len(payload), 0, 0, 0, 0)
+    return header + payload
+
+
+def kernel_message(properties):
+    payload = b''.join(('%s=%s' % (key, value)).encode() + b'\0' for key, value in properties.items())
+    return ('%s@%s' % (properties['ACTION'], properties['DEVPATH'])).encode() + b'\0' + payload
+
+
+class UeventMonitorTests(unittest.TestCase):
+
+    def setUp(self):
+        logging.basicConfig(level=LOG_LEVEL, format=u'%(asctime)s %(name)s:%(lineno)d %(levelname)s : %(message)s')
+        TestLib()
+        self.events = {
+            'core.hardware.added': Mock(),
+            'core.hardware.removed': Mock(),
+            'core.hardware.changed': Mock(),
+        }
+        self.events_broker = Mock()
+        self.events_broker.get_event_instance.side_effect = lambda name: self.events[name]
+        self.replay_file = None
+        self.m = self._make_monitor()
+
+    def tearDown(self):
+        self.m.stop()
+        if self.replay_file:
+            os.remove(self.replay_file)
+
+    def _make_monitor(self, replay_file=None):
+        monitor = UeventMonitor({'events_broker': self.events_broker}, False, replay_file)
+        monitor.cache = Mock()
+        return monitor
+
+    def _replay(self, content):
+        fd, self.replay_file = tempfile.mkstemp()
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+        self.m = self._make_monitor(self.replay_file)
+        self.assertTrue(self.m.start())
+        self.m.stop()
+
+    def _sent(self, name):
+        return [call[1]['params'] for call in self.events[name].send.call_args_list]
+
+    def test_replay(self):
+        self._replay(REPLAY)
+
+        added = self._sent('core.hardware.added')
+        self.assertEqual([params['devname'] for params in added], ['/dev/bus/usb/001/004', '/dev/sda'])
+        # change merged into add, with last properties
+        self.assertEqual(added[1]['subsystem'], 'block')
+        self.assertEqual(added[1]['devtype'], 'disk')
+        self.assertEqual(added[1]['properties']['ID_FS_TYPE'], 'vfat')
+        # usb interface is not published
+        self.assertEqual(self._sent('core.hardware.changed'), [])
+        self.assertEqual(self._sent('core.hardware.removed'), [{
+            'subsystem': 'sound',
+            'devtype': None,
+            'devname': None,
+            'devpath': '/devices/platform/soc/sound/card1',
+            'properties': {
+                'ACTION': 'remove',
+                'DEVPATH': '/devices/platform/soc/sound/card1',
+                'SUBSYSTEM': 'sound',
+                'SEQNUM': '2005',
+            },
+        }])
+
+    def test_replay_invalidates_caches(self):
+        self._replay(REPLAY)
+
+        self.m.cache.invalidate.assert_any_call('lsblk', 'blkid', 'udevadm')
+        self.m.cache.invalidate.assert_any_call('alsa')
+        self.assertEqual(self.m.cache.invalidate.call_count, 3)
+
+    def test_replay_added_then_removed(self):
+        self._replay(
+            'ACTION=add\nDEVPATH=/devices/virtual/net/wlan1\nSUBSYSTEM=net\nINTERFACE=wlan1\n\n'
+            'ACTION=remove\nDEVPATH=/devices/virtual/net/wlan1\nSUBSYSTEM=net\nINTERFACE=wlan1\n'
+        )
+
+        self.assertEqual(self._sent('core.hardware.added'), [])
+        self.assertEqual(self._sent('core.hardware.removed'), [])
+        self.m.cache.invalidate.assert_called_with('ifconfig', 'iw', 'iwconfig', 'iwgetid', 'iwlist')
+
+    def test_replay_sound_pcm_not_published(self):
+        self._replay('ACTION=add\nDEVPATH=/devices/platform/soc/sound/card1/pcmC1D0p\nSUBSYSTEM=sound\nDEVNAME=snd/pcmC1D0p\n')
+
+        self.assertEqual(self._sent('core.hardware.added'), [])
+        self.m.cache.invalidate.assert_called_with('alsa')
+
+    def test_replay_unknown_action(self):
+        self._replay('ACTION=bind\nDEVPATH=/devices/platform/soc/usb1/1-1\nSUBSYSTEM=usb\nDEVTYPE=usb_device\n')
+
+        for event in self.events.values():
+            event.send.assert_not_called()
+
+    def test_send_event_failed(self):
+        self.events['core.hardware.added'].send.side_effect = Exception('Test exception')
+
+        self._replay(REPLAY)
+
+        self.assertEqual(self.events['core.hardware.added'].send.call_count, 2)
+        self.events['core.hardware.removed'].send.assert_called()
+
+    def test_debounce(self):
+        self.m._UeventMonitor__events = {name.split('.')[-1]: event for name, event in self.events.items()}
+        self.m._UeventMonitor__handle_uevent({'ACTION': 'change', 'DEVPATH': '/devices/sda', 'SUBSYSTEM': 'block', 'DEVNAME': 'sda'})
+
+        self.m._UeventMonitor__flush()
+        self.events['core.hardware.changed'].send.assert_not_called()
+        self.assertLessEqual(self.m._UeventMonitor__get_wait_timeout(), UeventMonitor.DEBOUNCE_DELAY)
+
+        self.m.DEBOUNCE_DELAY = 0.0
+        self.m._UeventMonitor__flush()
+        self.assertEqual(self._sent('core.hardware.changed')[0]['devname'], '/dev/sda')
+        self.assertEqual(self.m._UeventMonitor__get_wait_timeout(), UeventMonitor.POLL_DELAY)
+
+    def test_parse_udev_message(self):
+        properties = {'ACTION': 'add', 'DEVPATH': '/devices/sda', 'SUBSYSTEM': 'block', 'ID_FS_LABEL': 'a=b'}
+
+        self.assertEqual(self.m._UeventMonitor__parse_message(udev_message(properties)), properties)
+
+    def test_parse_kernel_message(self):
+        properties = {'ACTION': 'remove', 'DEVPATH': '/devices/sda', 'SUBSYSTEM': 'block', 'SEQNUM': '12'}
+
+        self.assertEqual(self.m._UeventMonitor__parse_message(kernel_message(properties)), properties)
+
+    def test_parse_invalid_message(self):
+        self.assertIsNone(self.m._UeventMonitor__parse_message(b'libudev\0' + b'\0' * 32))
+        self.assertIsNone(self.m._UeventMonitor__parse_message(b'invalid\0ACTION=add\0'))
+
+    @patch('ueventmonitor.os.path.exists', Mock(return_value=True))
+    def test_monitor_socket(self):
+        sock = FakeSocket([
+            udev_message({'ACTION': 'add', 'DEVPATH': '/devices/sda', 'SUBSYSTEM': 'block', 'DEVNAME': '/dev/sda'}),
+            b'invalid',
+            OSError(errno.ENOBUFS, 'No buffer space available'),
+        ])
+        with patch('ueventmonitor.socket.socket', return_value=sock):
+            self.assertTrue(self.m.start())
+            self.assertTrue(self.m.start())
+            end = time.time() + 2.0
+            while sock.messages and time.time() < end:
+                time.sleep(0.01)
+            self.m.stop()
+
+        self.assertEqual(sock.bound, (0, UeventMonitor.GROUP_UDEV))
+        self.assertTrue(sock.closed)
+        self.assertEqual(self._sent('core.hardware.added')[0]['devname'], '/dev/sda')
+        self.m.cache.invalidate.assert_any_call('lsblk', 'blkid', 'udevadm')
+        self.m.cache.invalidate.assert_any_call()
+
+    @patch('ueventmonitor.os.path.exists', Mock(return_value=False))
+    def test_monitor_socket_kernel_group(self):
+        sock = FakeSocket([])
+        with patch('ueventmonitor.socket.socket', return_value=sock):
+            self.assertTrue(self.m.start())
+            self.m.stop()
+
+        self.assertEqual(sock.bound, (0, UeventMonitor.GROUP_KERNEL))
+
+    def test_monitor_socket_error(self):
+        sock = FakeSocket([OSError(errno.EBADF, 'Bad file descriptor')])
+        with patch('ueventmonitor.socket.socket', return_value=sock):
+            self.assertTrue(self.m.start())
+            end = time.time() + 2.0
+            while not sock.closed and time.time() < end:
+                time.sleep(0.01)
+
+        self.assertTrue(sock.closed)
+
+    def test_start_failed(self):
+        with patch('ueventmonitor.socket.socket', side_effect=OSError(errno.EPERM, 'Operation not permitted')):
+            self.assertFalse(self.m.start())
+
+    def test_start_bind_failed(self):
+        sock = FakeSocket([])
+        sock.bind = Mock(side_effect=OSError(errno.EPERM, 'Operation not permitted'))
+        with patch('ueventmonitor.socket.socket', return_value=sock):
+            self.assertFalse(self.m.start())
+
+        self.assertTrue(sock.closed)
+
+
+if __name__ == '__main__':
+    # coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread test_ueventmonitor.py; coverage report -m -i
+    unittest.main()
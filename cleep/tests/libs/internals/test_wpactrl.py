@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from cleep.libs.tests.lib import TestLib
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.dirname(__file__)).replace('tests/', ''))
+from wpactrl import WpaCtrl
+import unittest
+import logging
+import errno
+import shutil
+import socket
+import tempfile
+import time
+from threading import Thread, Event
+from unittest.mock import Mock
+from cleep.libs.tests.common import get_log_level
+
+LOG_LEVEL = get_log_level()
+
+
+class FakeWpaSupplicant:
+    """
+    Fake wpa_supplicant control interface replying to requests with specified replies
+    """
+
+    def __init__(self, path, replies):
+        self.path = path
+        self.replies = replies
+        self.requests = []
+        self.clients = []
+        self.delay = 0.0
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sock.bind(path)
+        self.sock.settimeout(0.1)
+        self.running = True
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while self.running:
+            try:
+                data, address = self.sock.recvfrom(4096)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            request = data.decode()
+            self.requests.append(request)
+            if request == 'ATTACH':
+                self.clients.append(address)
+            command = request.split(' ')[0]
+            reply = self.replies.get(command, 'OK')
+            if reply is None:
+                # no reply
+                continue
+            if self.delay:
+                time.sleep(self.delay)
+            self.send(reply, address)
+
+    def send(self, message, address):
+        try:
+            self.sock.sendto(message.encode(), address)
+        except OSError:
+            # client closed
+            pass
+
+    def send_event(self, event):
+        for address in self.clients:
+            self.send(event, address)
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+        self.sock.close()
+        os.remove(self.path)
+
+
+class WpaCtrlTests(unittest.TestCase):
+
+    def setUp(self):
+        logging.basicConfig(level=LOG_LEVEL, format=u'%(asctime)s %(name)s:%(lineno)d %(levelname)s : %(message)s')
+        TestLib()
+        self.ctrl_dir = tempfile.mkdtemp()
+        self.server = FakeWpaSupplicant(os.path.join(self.ctrl_dir, 'wlan0'), {
+            'PING': 'PONG',
+            'STATUS': 'wpa_state=COMPLETED\nssid=MyWifi\n',
+            'ADD_NETWORK': '1\n',
+        })
+        self.event_callback = Mock()
+        self.c = WpaCtrl('wlan0', ctrl_dir=self.ctrl_dir, event_callback=self.event_callback)
+
+    def tearDown(self):
+        self.c.close()
+        if self.server.running:
+            self.server.stop()
+        shutil.rmtree(self.ctrl_dir)
+
+    def _wait_for(self, condition, timeout=2.0):
+        end = time.time() + timeout
+        while not condition() and time.time() < end:
+            time.sleep(0.01)
+        return condition()
+
+    def test_connect(self):
+        self.c.connect()
+
+        self.assertTrue(self.c.is_connected())
+        self.assertEqual(self.server.requests, ['ATTACH'])
+
+    def test_connect_twice(self):
+        self.c.connect()
+        self.c.connect()
+
+        self.assertEqual(self.server.requests, ['ATTACH'])
+
+    def test_connect_no_socket(self):
+        c = WpaCtrl('wlan1', ctrl_dir=self.ctrl_dir)
+
+        with self.assertRaises(OSError):
+            c.connect()
+        self.assertFalse(c.is_connected())
+
+    def test_connect_attach_failed(self):
+        self.server.replies['ATTACH'] = 'FAIL'
+
+        with self.assertRaises(OSError) as cm:
+            self.c.connect()
+        self.assertEqual(cm.exception.errno, errno.EPROTO)
+        self.assertFalse(self.c.is_connected())
+
+    def test_request(self):
+        self.assertEqual(self.c.request('PING'), 'PONG')
+        self.assertEqual(self.c.request('STATUS'), 'wpa_state=COMPLETED\nssid=MyWifi')
+
+        self.assertEqual(self.server.requests, ['ATTACH', 'PING', 'STATUS'])
+
+    def test_requests_pipelined(self):
+        replies = self.c.requests(['ADD_NETWORK', 'SET_NETWORK 1 ssid "MyWifi"', 'PING'])
+
+        self.assertEqual(replies, ['1', 'OK', 'PONG'])
+        self.assertEqual(self.server.requests[1:], ['ADD_NETWORK', 'SET_NETWORK 1 ssid "MyWifi"', 'PING'])
+
+    def test_request_timeout(self):
+        self.server.replies['SCAN'] = None
+        self.c.connect()
+
+        with self.assertRaises(OSError) as cm:
+            self.c.request('SCAN', timeout=0.2)
+        self.assertEqual(cm.exception.errno, errno.ETIMEDOUT)
+        self.assertFalse(self.c.is_connected())
+
+        # next request reconnects
+        self.assertEqual(self.c.request('PING'), 'PONG')
+        self.assertEqual(self.server.requests[-2:], ['ATTACH', 'PING'])
+
+    def test_request_timeout_late_reply_is_dropped(self):
+        self.server.delay = 0.3
+        self.c.connect()
+
+        with self.assertRaises(OSError):
+            self.c.request('STATUS', timeout=0.1)
+        self.server.delay = 0.0
+
+        # late STATUS reply must not be returned as PING reply
+        self.assertEqual(self.c.request('PING'), 'PONG')
+
+    def test_request_wpa_supplicant_stopped(self):
+        self.c.connect()
+        self.server.stop()
+
+        with self.assertRaises(OSError):
+            self.c.request('PING', timeout=0.5)
+        self.assertTrue(self._wait_for(lambda: not self.c.is_connected()))
+
+    def test_request_reconnect(self):
+        self.c.connect()
+        self.c.close()
+
+        self.assertEqual(self.c.request('PING'), 'PONG')
+        self.assertEqual(self.server.requests, ['ATTACH', 'DETACH', 'ATTACH', 'PING'])
+
+    def test_close_pending_request(self):
+        self.server.replies['SCAN'] = None
+        self.c.connect()
+        errors = []
+        def request():
+            try:
+                self.c.request('SCAN', timeout=2.0)
+            except OSError as error:
+                errors.append(error.errno)
+        thread = Thread(target=request)
+        thread.start()
+        time.sleep(0.1)
+
+        self.c.close()
+        thread.join()
+
+        self.assertEqual(errors, [errno.ECONNRESET])
+
+    def test_request_not_connected(self):
+        c = WpaCtrl('wlan1', ctrl_dir=self.ctrl_dir)
+
+        with self.assertRaises(OSError) as cm:
+            c.request('PING')
+        self.assertEqual(cm.exception.errno, errno.ENOTCONN)
+
+    def test_event(self):
+        self.c.connect()
+
+        self.server.send_event('<3>CTRL-EVENT-CONNECTED - Connection to 00:11:22:33:44:55 completed [id=0 id_str=]')
+
+        self.assertTrue(self._wait_for(lambda: self.event_callback.called))
+        self.event_callback.assert_called_with(
+            'wlan0', 'CTRL-EVENT-CONNECTED', '- Connection to 00:11:22:33:44:55 completed [id=0 id_str=]'
+        )
+
+    def test_event_callback_exception(self):
+        self.event_callback.side_effect = Exception('Test exception')
+        self.c.connect()
+
+        self.server.send_event('<3>CTRL-EVENT-SCAN-RESULTS ')
+
+        self.assertTrue(self._wait_for(lambda: self.event_callback.called))
+        self.assertEqual(self.c.request('PING'), 'PONG')
+
+    def test_wait_event(self):
+        self.c.connect()
+        waiter = self.c.expect_event(WpaCtrl.EVENT_SCAN_RESULTS)
+        self.server.send_event('<3>CTRL-EVENT-SCAN-STARTED ')
+        self.server.send_event('<3>CTRL-EVENT-SCAN-RESULTS ')
+
+        start = time.time()
+        message = self.c.wait_event(waiter, 2.0)
+
+        self.assertEqual(message, '')
+        self.assertLess(time.time() - start, 1.0)
+
+    def test_wait_event_timeout(self):
+        self.c.connect()
+        waiter = self.c.expect_event(WpaCtrl.EVENT_SCAN_RESULTS)
+
+        self.assertIsNone(self.c.wait_event(waiter, 0.1))
+
+        # waiter is unregistered
+        self.server.send_event('<3>CTRL-EVENT-SCAN-RESULTS ')
+        self.assertTrue(self._wait_for(lambda: self.event_callback.called))
+        self.assertIsNone(waiter['message'])
+
+
+if __name__ == '__main__':
+    # coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread test_wpactrl.py; coverage report -m -i
+    unittest.main()
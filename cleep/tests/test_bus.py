@@ -9,6 +9,7 @@ from bus import MessageBus, BusClient, deque, inspect
 from cleep.common import MessageRequest, MessageResponse
 from cleep.exception import NoResponse, InvalidParameter, InvalidModule, NoMessageAvailable, BusError, CommandInfo, CommandError, InvalidMessage, NotReady
 from cleep.libs.internals.taskfactory import TaskFactory
+from cleep.libs.internals.startupprofiler import StartupProfiler
 import unittest
 import logging
 from unittest.mock import Mock, patch
@@ -1066,6 +1067,20 @@ class BusClientTests(unittest.TestCase):
         self.assertFalse(self.crash_report.report_exception.called)
 
 
+    def test_startup_profiled(self):
+        profiler = StartupProfiler()
+        profiler.start()
+        with patch('bus.get_startup_profiler', return_value=profiler):
+            self._init_context()
+            self.p1._wait_is_started()
+            self.p2._wait_is_started()
+
+        report = profiler.stop(timeout=2.0)
+        logging.debug('Report: %s' % report)
+
+        self.assertEqual(sorted(report['apps'].keys()), ['testprocess1', 'testprocess2'])
+        self.assertEqual(sorted(report['apps']['testprocess1'].keys()), ['configure', 'start'])
+
 
 if __name__ == '__main__':
     # coverage run --omit="*/lib/python*/*","*test_*.py" --concurrency=thread test_bus.py; coverage report -m -i
@@ -49,6 +49,9 @@ class DummyCleep(Cleep):
     def my_command(self, param):
         pass
 
+class DummyWriteBehindCleep(DummyCleep):
+    CONFIG_WRITE_BEHIND_DELAY = 0.2
+
 class DummyDriver(Driver):
     def __init__(self, dtype, dname):
         Driver.__init__(self, dtype, dname)
@@ -257,6 +260,118 @@ class TestsCleep(unittest.TestCase):
             })
         self.assertEqual(str(cm.exception), 'Module DummyCleep has no configuration file configured')
 
+    def test_update_config_atomic_write(self):
+        self._init_context(default_config=self.DEFAULT_CONFIG, current_config=self.DEFAULT_CONFIG)
+
+        self.assertTrue(self.r._update_config({'newfield': 'newvalue'}))
+
+        self.cleep_filesystem.write_json.assert_called_with('test.conf', ANY, atomic=True)
+        metrics = self.r._get_config_metrics()
+        self.assertEqual(metrics['updates'], 1)
+        self.assertEqual(metrics['writes'], 1)
+        self.assertEqual(metrics['failures'], 0)
+        self.assertFalse(metrics['pending'])
+
+    def test_update_config_write_failed(self):
+        self._init_context(default_config=self.DEFAULT_CONFIG, current_config=self.DEFAULT_CONFIG)
+        self.cleep_filesystem.write_json.return_value = False
+
+        self.assertFalse(self.r._update_config({'newfield': 'newvalue'}))
+
+        self.assertEqual(self.r._get_config(), self.DEFAULT_CONFIG)
+        self.assertEqual(self.r._get_config_metrics()['failures'], 1)
+
+    def test_update_config_write_behind(self):
+        self._init_context(default_config=self.DEFAULT_CONFIG, current_config=self.DEFAULT_CONFIG, create_cleep=False)
+        self.r = DummyWriteBehindCleep(self.bootstrap, default_config=copy.deepcopy(self.DEFAULT_CONFIG))
+        self.cleep_filesystem.write_json.reset_mock()
+
+        for index in range(10):
+            self.assertTrue(self.r._update_config({'counter': index}))
+
+        # updates are visible immediately but not written yet
+        self.assertEqual(self.r._get_config_field('counter'), 9)
+        self.assertFalse(self.cleep_filesystem.write_json.called)
+        self.assertTrue(self.r._get_config_metrics()['pending'])
+
+        time.sleep(0.5)
+        self.assertEqual(self.cleep_filesystem.write_json.call_count, 1)
+        self.assertEqual(self.cleep_filesystem.write_json.call_args[0][1]['counter'], 9)
+        metrics = self.r._get_config_metrics()
+        logging.debug('Metrics: %s', metrics)
+        self.assertEqual(metrics['updates'], 10)
+        self.assertEqual(metrics['coalesced'], 9)
+        self.assertEqual(metrics['writes'], 1)
+        self.assertFalse(metrics['pending'])
+
+    def test_update_config_write_behind_flushed_on_stop(self):
+        self._init_context(default_config=self.DEFAULT_CONFIG, current_config=self.DEFAULT_CONFIG, create_cleep=False)
+        self.r = DummyWriteBehindCleep(self.bootstrap, default_config=copy.deepcopy(self.DEFAULT_CONFIG))
+        self.cleep_filesystem.write_json.reset_mock()
+
+        self.r._update_config({'counter': 1})
+        self.r.stop()
+
+        self.assertEqual(self.cleep_filesystem.write_json.call_count, 1)
+        self.assertFalse(self.r._get_config_metrics()['pending'])
+
+        # updates after stop are written synchronously
+        self.r._update_config({'counter': 2})
+        self.assertEqual(self.cleep_filesystem.write_json.call_count, 2)
+
+    def test_update_config_write_behind_failed_flush(self):
+        self._init_context(default_config=self.DEFAULT_CONFIG, current_config=self.DEFAULT_CONFIG, create_cleep=False)
+        self.r = DummyWriteBehindCleep(self.bootstrap, default_config=copy.deepcopy(self.DEFAULT_CONFIG))
+        self.cleep_filesystem.write_json.side_effect = [False, True]
+
+        self.r._update_config({'counter': 1})
+        self.assertFalse(self.r._flush_config())
+        self.assertTrue(self.r._get_config_metrics()['pending'])
+
+        time.sleep(0.5)
+        self.assertEqual(self.cleep_filesystem.write_json.call_count, 2)
+        metrics = self.r._get_config_metrics()
+        self.assertEqual(metrics['failures'], 1)
+        self.assertFalse(metrics['pending'])
+
+    def test_get_config_snapshot(self):
+        self._init_context(default_config=self.DEFAULT_CONFIG, current_config=self.DEFAULT_CONFIG)
+
+        snapshot = self.r._get_config_snapshot()
+
+        self.assertEqual(snapshot, self.DEFAULT_CONFIG)
+        self.assertIs(snapshot, self.r._get_config_snapshot())
+        with self.assertRaises(TypeError):
+            snapshot['key'] = 'newvalue'
+        with self.assertRaises(TypeError):
+            snapshot['dict']['dict1'] = 'newvalue'
+
+    def test_get_config_snapshot_without_config_file(self):
+        self._init_context(with_config=False)
+
+        self.assertEqual(self.r._get_config_snapshot(), {})
+
+    def test_update_config_publishes_new_snapshot(self):
+        self._init_context(default_config=self.DEFAULT_CONFIG, current_config=self.DEFAULT_CONFIG)
+        snapshot = self.r._get_config_snapshot()
+
+        self.assertTrue(self.r._update_config({'key': 'newvalue'}))
+
+        new_snapshot = self.r._get_config_snapshot()
+        self.assertEqual(snapshot['key'], 'value1')
+        self.assertEqual(new_snapshot['key'], 'newvalue')
+        self.assertIs(new_snapshot['dict'], snapshot['dict'])
+
+    def test_get_config_returns_modifiable_copy(self):
+        self._init_context(default_config=self.DEFAULT_CONFIG, current_config=self.DEFAULT_CONFIG)
+
+        config = self.r._get_config()
+        config['dict']['dict1'] = 'newvalue'
+        field = self.r._get_config_field('list')
+        field.append('list3')
+
+        self.assertEqual(self.r._get_config(), self.DEFAULT_CONFIG)
+
     def test_get_config_field(self):
         self._init_context(default_config=self.DEFAULT_CONFIG, current_config=self.DEFAULT_CONFIG)
 
@@ -548,6 +663,9 @@ class DummyCleepModule(CleepModule):
     def my_command(self, param):
         pass
 
+class DummyIndexedCleepModule(DummyCleepModule):
+    DEVICE_INDEXES = ['name', 'common']
+
 class TestsCleepModule(unittest.TestCase):
 
     DEFAULT_CONFIG = {
@@ -878,6 +996,61 @@ class TestsCleepModule(unittest.TestCase):
         self.assertTrue(device1['uuid'] in uuids)
         self.assertTrue(device2['uuid'] in uuids)
 
+    def test_search_device_indexed(self):
+        self._init_context()
+        self.r = DummyIndexedCleepModule(self.bootstrap)
+        device1 = self.r._add_device(copy.deepcopy(self.DEVICE1))
+        device2 = self.r._add_device(copy.deepcopy(self.DEVICE2))
+
+        self.assertEqual(self.r._search_device('name', 'dummydevice2'), device2)
+        self.assertEqual(len(self.r._search_devices('common', 'common')), 2)
+
+        self.assertTrue(self.r._update_device(device1['uuid'], {'name': 'newname'}))
+        self.assertIsNone(self.r._search_device('name', 'dummydevice1'))
+        self.assertEqual(self.r._search_device('name', 'newname')['uuid'], device1['uuid'])
+
+        self.assertTrue(self.r._delete_device(device2['uuid']))
+        self.assertIsNone(self.r._search_device('name', 'dummydevice2'))
+        self.assertEqual(len(self.r._search_devices('common', 'common')), 1)
+
+    def test_search_device_after_direct_config_update(self):
+        self._init_context()
+        self.r = DummyIndexedCleepModule(self.bootstrap)
+        device1 = self.r._add_device(copy.deepcopy(self.DEVICE1))
+        self.assertIsNotNone(self.r._search_device('name', 'dummydevice1'))
+
+        devices = self.r._get_config_field('devices')
+        devices[device1['uuid']]['name'] = 'newname'
+        self.r._set_config_field('devices', devices)
+
+        self.assertIsNone(self.r._search_device('name', 'dummydevice1'))
+        self.assertEqual(self.r._search_device('name', 'newname')['uuid'], device1['uuid'])
+
+    def test_update_device_only_changes_updated_device(self):
+        self._init_context()
+        device1 = self.r._add_device(copy.deepcopy(self.DEVICE1))
+        device2 = self.r._add_device(copy.deepcopy(self.DEVICE2))
+        devices = self.r._get_module_devices_snapshot()
+
+        self.assertTrue(self.r._update_device(device1['uuid'], {'value': 666}))
+
+        new_devices = self.r._get_module_devices_snapshot()
+        self.assertIsNot(new_devices, devices)
+        self.assertIs(new_devices[device2['uuid']], devices[device2['uuid']])
+        self.assertEqual(new_devices[device1['uuid']]['value'], 666)
+        self.assertEqual(devices[device1['uuid']]['value'], 123456)
+
+    def test_update_device_save_config_failed(self):
+        self._init_context()
+        self.r = DummyIndexedCleepModule(self.bootstrap)
+        device1 = self.r._add_device(copy.deepcopy(self.DEVICE1))
+        self.cleep_filesystem.write_json.return_value = False
+
+        self.assertFalse(self.r._update_device(device1['uuid'], {'name': 'newname'}))
+
+        self.assertEqual(self.r._search_device('name', 'dummydevice1')['uuid'], device1['uuid'])
+        self.assertIsNone(self.r._search_device('name', 'newname'))
+
     def test_search_devices_while_no_device(self):
         self._init_context()
 
@@ -890,6 +1063,75 @@ class TestsCleepModule(unittest.TestCase):
         logging.debug('Config: %s' % config)
         self.assertEqual(config, self.DEFAULT_CONFIG)
 
+    def test_get_module_devices_snapshot_is_not_copied(self):
+        self._init_context()
+        device1 = self.r._add_device(copy.deepcopy(self.DEVICE1))
+
+        devices = self.r._get_module_devices_snapshot()
+
+        self.assertIs(devices, self.r._get_module_devices_snapshot())
+        self.assertEqual(devices, {device1['uuid']: device1})
+        with self.assertRaises(TypeError):
+            devices[device1['uuid']]['name'] = 'newname'
+        # public accessor and helpers return modifiable copies
+        self.r.get_module_devices()[device1['uuid']]['name'] = 'newname'
+        self.r._get_device(device1['uuid'])['name'] = 'newname'
+        self.r._search_device('name', 'dummydevice1')['name'] = 'newname'
+        self.r._get_devices()[device1['uuid']]['name'] = 'newname'
+        self.assertEqual(self.r._get_device(device1['uuid'])['name'], 'dummydevice1')
+
+    def test_get_module_devices_snapshot_overwritten(self):
+        self._init_context()
+        self.r._add_device(copy.deepcopy(self.DEVICE1))
+        self.r.get_module_devices = Mock(return_value={'dummy': {}})
+
+        self.assertEqual(self.r._get_module_devices_snapshot(), {'dummy': {}})
+
+    def test_get_module_config_is_modifiable(self):
+        self._init_context(default_config=self.DEFAULT_CONFIG, current_config=self.DEFAULT_CONFIG)
+
+        config = self.r.get_module_config()
+        config['nested'] = {}
+        for value in config.values():
+            if isinstance(value, dict):
+                value['dummy'] = 'dummy'
+
+        self.assertEqual(self.r.get_module_config(), self.DEFAULT_CONFIG)
+
+    def test_get_module_devices_benchmark(self):
+        devices = {}
+        for index in range(1000):
+            device_uuid = str(index)
+            devices[device_uuid] = {
+                'uuid': device_uuid,
+                'name': 'device%s' % index,
+                'type': 'sensor',
+                'gpios': [{'gpio': 'GPIO%s' % (index % 40), 'pin': index % 40}],
+                'lastupdate': 1700000000 + index,
+            }
+        config = {'devices': devices}
+        self._init_context(default_config=config, current_config=config)
+        loops = 20
+
+        start = time.perf_counter()
+        for _ in range(loops):
+            self.r.get_module_devices()
+        deepcopy_duration = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(loops):
+            self.r._get_module_devices_snapshot()
+            self.r._get_device('999')
+            self.r._get_device_count()
+        snapshot_duration = time.perf_counter() - start
+        logging.debug(
+            'Benchmark 1000 devices (%s loops): deepcopy=%.6fs snapshot=%.6fs',
+            loops, deepcopy_duration, snapshot_duration,
+        )
+
+        self.assertEqual(len(self.r.get_module_devices()), 1000)
+        self.assertLess(snapshot_duration, deepcopy_duration / 10)
+
     def test_get_module_commands(self):
         self._init_context()
 
@@ -1072,6 +1314,23 @@ class TestsCleepRpcWrapper(unittest.TestCase):
         self.assertEqual(len(commands), 1)
         self.assertTrue('my_command' in commands)
 
+    def test_get_rpc_wrapper_routes(self):
+        self._init_context()
+        self.r.RPC_WRAPPER_ROUTES = ['alexa', 'webhook/ifttt']
+
+        self.assertEqual(self.r._get_rpc_wrapper_routes(), ['alexa', 'webhook/ifttt'])
+
+    def test_get_rpc_wrapper_routes_no_route_declared(self):
+        self._init_context()
+
+        self.assertEqual(self.r._get_rpc_wrapper_routes(), [''])
+
+    def test_get_rpc_wrapper_routes_invalid_routes(self):
+        self._init_context()
+        self.r.RPC_WRAPPER_ROUTES = 'alexa'
+
+        self.assertEqual(self.r._get_rpc_wrapper_routes(), [''])
+
 
 
 
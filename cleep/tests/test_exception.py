@@ -5,7 +5,7 @@ import os
 import sys
 sys.path.append(os.path.abspath(os.path.dirname(__file__)).replace('tests', ''))
 print(os.path.abspath(os.path.dirname(__file__)).replace('tests/', ''))
-from exception import CommandError, CommandInfo, NoResponse, NoMessageAvailable, ResourceNotAvailable, InvalidParameter, MissingParameter, InvalidMessage, InvalidModule, Unauthorized, BusError, NotReady
+from exception import CommandError, CommandInfo, NoResponse, NoMessageAvailable, ResourceNotAvailable, InvalidParameter, MissingParameter, InvalidMessage, InvalidModule, RouteNotFound, Unauthorized, BusError, NotReady
 from cleep.libs.tests.lib import TestLib
 import unittest
 import logging
@@ -68,6 +68,11 @@ class ExceptionTests(unittest.TestCase):
         self.assertNotEqual(e.message, 0)
         self.assertEqual('%s' % e, 'Invalid application "dummy" (not loaded or unknown)')
 
+    def test_routenotfound(self):
+        e = RouteNotFound('dummy/route')
+        self.assertNotEqual(e.message, 0)
+        self.assertEqual('%s' % e, 'No application handles route "dummy/route"')
+
     def test_unauthorized(self):
         e = Unauthorized('message')
         self.assertNotEqual(e.message, 0)
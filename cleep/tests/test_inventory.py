@@ -6,8 +6,9 @@ import os
 import sys
 sys.path.append(os.path.abspath(os.path.dirname(__file__)).replace('tests', ''))
 from inventory import Inventory
-from cleep.exception import InvalidParameter
+from cleep.exception import InvalidParameter, RouteNotFound
 from cleep.libs.internals.taskfactory import TaskFactory
+from cleep.libs.internals.startupprofiler import StartupProfiler
 import unittest
 import logging
 from unittest.mock import Mock, patch
@@ -35,6 +36,7 @@ class %(module_name)s(%(inherit)s):
     MODULE_COUNTRY = None
 
     RENDERER_PROFILES = []
+    RPC_WRAPPER_ROUTES = %(rpc_routes)s
 
     MODULE_CONFIG_FILE = '%(module_name)s.json'
     DEFAULT_CONFIG = {
@@ -68,6 +70,7 @@ class %(module_name)s(%(inherit)s):
         if self.exception:
             raise Exception('Test exception')
         self.logger.info('--> Request wrapped for route "'+route+'" and request "'+str(request)+'"')
+        return '%(module_name)s:' + route
 
     def get_module_devices(self):
         if self.exception:
@@ -101,26 +104,27 @@ class %(module_name)s(%(inherit)s):
             mod1_deps=[], mod2_deps=[], mod3_deps=[],
             mod1_exception=False, mod2_exception=False, mod3_exception=False,
             mod1_inherit='CleepModule', mod2_inherit='CleepModule', mod3_inherit='CleepModule',
-            mod1_startup_error='', core_join_event=None):
+            mod1_startup_error='', mod2_startup_error='', mod3_startup_error='', core_join_event=None,
+            mod1_rpc_routes=[], mod2_rpc_routes=[], loading_workers=None):
         os.mkdir('modules')
         with io.open(os.path.join('modules', '__init__.py'), 'w') as fd:
             fd.write('')
         # module1
         os.mkdir(os.path.join('modules', 'module1'))
         with io.open(os.path.join('modules', 'module1', 'module1.py'), 'w') as fd:
-            fd.write(self.MODULE % {'module_name': 'Module1', 'module_deps': mod1_deps, 'exception':mod1_exception, 'inherit':mod1_inherit, 'startup_error':mod1_startup_error})
+            fd.write(self.MODULE % {'module_name': 'Module1', 'module_deps': mod1_deps, 'exception':mod1_exception, 'inherit':mod1_inherit, 'startup_error':mod1_startup_error, 'rpc_routes':mod1_rpc_routes})
         with io.open(os.path.join('modules', 'module1', '__init__.py'), 'w') as fd:
             fd.write('')
         # module2
         os.mkdir(os.path.join('modules', 'module2'))
         with io.open(os.path.join('modules', 'module2', 'module2.py'), 'w') as fd:
-            fd.write(self.MODULE % {'module_name': 'Module2', 'module_deps': mod2_deps, 'exception':mod2_exception, 'inherit':mod2_inherit, 'startup_error':''})
+            fd.write(self.MODULE % {'module_name': 'Module2', 'module_deps': mod2_deps, 'exception':mod2_exception, 'inherit':mod2_inherit, 'startup_error':mod2_startup_error, 'rpc_routes':mod2_rpc_routes})
         with io.open(os.path.join('modules', 'module2', '__init__.py'), 'w') as fd:
             fd.write('')
         # module3
         os.mkdir(os.path.join('modules', 'module3'))
         with io.open(os.path.join('modules', 'module3', 'module3.py'), 'w') as fd:
-            fd.write(self.MODULE % {'module_name': 'Module3', 'module_deps': mod3_deps, 'exception':mod3_exception, 'inherit':mod3_inherit, 'startup_error':''})
+            fd.write(self.MODULE % {'module_name': 'Module3', 'module_deps': mod3_deps, 'exception':mod3_exception, 'inherit':mod3_inherit, 'startup_error':mod3_startup_error, 'rpc_routes':[]})
         with io.open(os.path.join('modules', 'module3', '__init__.py'), 'w') as fd:
             fd.write('')
 
@@ -167,7 +171,7 @@ class %(module_name)s(%(inherit)s):
             'trace_enabled': False,
             'debug_modules': debug_modules,
         }
-        self.i = Inventory(self.bootstrap, self.rpcserver, debug_enabled, configured_modules, debug_config=debug_config)
+        self.i = Inventory(self.bootstrap, self.rpcserver, debug_enabled, configured_modules, debug_config=debug_config, loading_workers=loading_workers)
         Inventory.PYTHON_CLEEP_IMPORT_PATH = 'modules.'
         Inventory.PYTHON_CLEEP_MODULES_PATH = 'tests/modules'
         Inventory.MODULES_SYNC_TIMEOUT = 2.0
@@ -562,6 +566,154 @@ class %(module_name)s(%(inherit)s):
         self.assertFalse(self.i.is_module_loaded('module3'))
         self.assertTrue(self.crash_report.report_exception.called)
 
+    @patch('inventory.AppsSources')
+    @patch('inventory.CORE_MODULES', [])
+    def test_load_modules_sequentially(self, appssources_mock):
+        appssources_mock.return_value.get_market.return_value = {
+            'list': {'module1':{}, 'module2':{}, 'module3':{}}
+        }
+        appssources_mock.return_value.exists.return_value = True
+        self._init_context(configured_modules=['module1', 'module3'], mod1_deps=['module2'], loading_workers=1)
+
+        self.i._load_modules()
+
+        self.assertTrue(self.i.is_module_loaded('module1'))
+        self.assertTrue(self.i.is_module_loaded('module2'))
+        self.assertTrue(self.i.is_module_loaded('module3'))
+        self.assertTrue(self.i.modules['module2']['library'])
+
+    @patch('inventory.AppsSources')
+    @patch('inventory.CORE_MODULES', [])
+    def test_load_modules_dependency_instanciated_first(self, appssources_mock):
+        appssources_mock.return_value.get_market.return_value = {
+            'list': {'module1':{}, 'module2':{}, 'module3':{}}
+        }
+        appssources_mock.return_value.exists.return_value = True
+        self._init_context(
+            configured_modules=['module1', 'module3'],
+            mod1_deps=['module2'],
+            mod1_startup_error='import time; self.started = time.perf_counter()',
+            mod2_startup_error='import time; time.sleep(0.2); self.started = time.perf_counter()',
+        )
+
+        self.i._load_modules()
+
+        self.assertTrue(self.i.is_module_loaded('module1'))
+        modules_instances = self.i._Inventory__modules_instances
+        self.assertGreater(modules_instances['module1'].started, modules_instances['module2'].started)
+
+    @patch('inventory.AppsSources')
+    @patch('inventory.CORE_MODULES', [])
+    def test_load_modules_dependency_failed(self, appssources_mock):
+        appssources_mock.return_value.get_market.return_value = {
+            'list': {'module1':{}, 'module2':{}, 'module3':{}}
+        }
+        appssources_mock.return_value.exists.return_value = True
+        self._init_context(
+            configured_modules=['module1', 'module3'],
+            mod1_deps=['module2'],
+            mod2_startup_error='raise Exception("Startup exception")',
+        )
+
+        self.i._load_modules()
+
+        self.assertFalse(self.i.is_module_loaded('module1'))
+        self.assertFalse(self.i.is_module_loaded('module2'))
+        self.assertTrue(self.i.is_module_loaded('module3'))
+        self.assertTrue(self.i.modules['module1']['installed'])
+        self.assertDictEqual(self.i._Inventory__modules_in_error, {
+            'module1': 'Application dependency "module2" failed to load',
+            'module2': 'Startup exception',
+        })
+
+    @patch('inventory.AppsSources')
+    @patch('inventory.CORE_MODULES', [])
+    def test_load_modules_instanciation_timeout(self, appssources_mock):
+        appssources_mock.return_value.get_market.return_value = {
+            'list': {'module1':{}, 'module2':{}, 'module3':{}}
+        }
+        appssources_mock.return_value.exists.return_value = True
+        self._init_context(
+            configured_modules=['module1', 'module3'],
+            mod1_deps=['module2'],
+            mod2_startup_error='import time; time.sleep(1.0)',
+        )
+        Inventory.MODULES_SYNC_TIMEOUT = 0.3
+
+        self.i._load_modules()
+
+        self.assertFalse(self.i.is_module_loaded('module1'))
+        self.assertFalse(self.i.is_module_loaded('module2'))
+        self.assertTrue(self.i.is_module_loaded('module3'))
+        self.assertEqual(self.i._Inventory__modules_in_error['module2'], 'Application instanciation timed out')
+
+    @patch('inventory.AppsSources')
+    @patch('inventory.CORE_MODULES', [])
+    def test_load_modules_get_bootstrap_failed(self, appssources_mock):
+        appssources_mock.return_value.get_market.return_value = {
+            'list': {'module1':{}, 'module2':{}, 'module3':{}}
+        }
+        appssources_mock.return_value.exists.return_value = True
+        self._init_context(configured_modules=['module1', 'module3'], mod1_deps=['module2'])
+        self.i._Inventory__get_bootstrap = Mock(side_effect=Exception('Bootstrap exception'))
+
+        self.i._load_modules()
+
+        self.assertDictEqual(self.i._Inventory__modules_in_error, {
+            'module1': 'Application dependency "module2" failed to load',
+            'module2': 'Bootstrap exception',
+            'module3': 'Bootstrap exception',
+        })
+
+    @patch('inventory.AppsSources')
+    @patch('inventory.CORE_MODULES', [])
+    def test_load_modules_concurrently_benchmark(self, appssources_mock):
+        appssources_mock.return_value.get_market.return_value = {
+            'list': {'module1':{}, 'module2':{}, 'module3':{}}
+        }
+        appssources_mock.return_value.exists.return_value = True
+        startup = 'import time; time.sleep(0.3)'
+        durations = {}
+        for workers in (1, 4):
+            self._init_context(
+                configured_modules=['module1', 'module2', 'module3'],
+                mod1_startup_error=startup,
+                mod2_startup_error=startup,
+                mod3_startup_error=startup,
+                loading_workers=workers,
+            )
+            start = time.perf_counter()
+            self.i._load_modules()
+            durations[workers] = time.perf_counter() - start
+            self.assertTrue(all(self.i.is_module_loaded(module) for module in ['module1', 'module2', 'module3']))
+            self.tearDown()
+            self.i = None
+
+        logging.info('Modules loading: sequential=%.3fs concurrent=%.3fs' % (durations[1], durations[4]))
+        self.assertGreaterEqual(durations[1], 0.9)
+        self.assertLess(durations[4], durations[1] - 0.4)
+
+    @patch('inventory.AppsSources')
+    @patch('inventory.CORE_MODULES', [])
+    def test_load_modules_startup_profiled(self, appssources_mock):
+        appssources_mock.return_value.get_market.return_value = {
+            'list': {'module1':{}, 'module2':{}, 'module3':{}}
+        }
+        appssources_mock.return_value.exists.return_value = True
+        self._init_context(configured_modules=['module1'], mod1_deps=['module2'])
+        profiler = StartupProfiler()
+        profiler.start()
+
+        with patch('inventory.get_startup_profiler', return_value=profiler):
+            self.i._load_modules()
+        report = profiler.stop(timeout=0.0)
+        logging.debug('Report: %s' % report)
+
+        self.assertEqual(report['phases'][0]['path'], 'market')
+        self.assertEqual(sorted(report['apps'].keys()), ['module1', 'module2'])
+        self.assertEqual(sorted(report['apps']['module1'].keys()), ['import', 'init'])
+        self.assertGreater(report['apps']['module1']['import']['imports'], 0.0)
+
     @patch('inventory.AppsSources')
     @patch('inventory.CORE_MODULES', [])
     def test_reload_modules(self, appssources_mock):
@@ -1221,8 +1373,8 @@ class %(module_name)s(%(inherit)s):
         self.i._load_modules()
         logging.debug('Modules: %s' % self.i.modules)
 
-        self.i.rpc_wrapper('a_route', {})
-        # can't perform some check call was a success. We add info log message on stdout
+        resp = self.i.rpc_wrapper('a_route', {})
+        self.assertEqual(resp, 'Module1:a_route')
 
     @patch('inventory.AppsSources')
     @patch('inventory.CORE_MODULES', [])
@@ -1236,10 +1388,62 @@ class %(module_name)s(%(inherit)s):
         self.i._load_modules()
         logging.debug('Modules: %s' % self.i.modules)
 
-        self.i.rpc_wrapper('a_route', {})
-        # can't perform some check call was a success. We add info log message on stdout
-        # but in this test case, exception mustn't fail rpc_wrapper call
-        
+        # exception mustn't fail rpc_wrapper call
+        resp = self.i.rpc_wrapper('a_route', {})
+        self.assertIsNone(resp)
+
+    @patch('inventory.AppsSources')
+    @patch('inventory.CORE_MODULES', [])
+    def test_rpc_wrapper_declared_routes(self, appssources_mock):
+        appssources_mock.return_value.get_market.return_value = {
+            'list': {'module1':{}, 'module2':{}}
+        }
+        appssources_mock.return_value.exists.return_value = True
+        self._init_context(
+            configured_modules=['module1', 'module2'],
+            mod1_inherit='CleepRpcWrapper',
+            mod1_rpc_routes=['alexa'],
+            mod2_inherit='CleepRpcWrapper',
+            mod2_rpc_routes=['webhook/ifttt'],
+        )
+
+        self.i._load_modules()
+
+        self.assertEqual(self.i.rpc_wrapper('alexa/intent', {}), 'Module1:alexa/intent')
+        self.assertEqual(self.i.rpc_wrapper('webhook/ifttt', {}), 'Module2:webhook/ifttt')
+        with self.assertRaises(RouteNotFound) as cm:
+            self.i.rpc_wrapper('webhook/other', {})
+        self.assertEqual(str(cm.exception), 'No application handles route "webhook/other"')
+
+    @patch('inventory.AppsSources')
+    @patch('inventory.CORE_MODULES', [])
+    def test_rpc_wrapper_unloaded_module(self, appssources_mock):
+        appssources_mock.return_value.get_market.return_value = {
+            'list': {'module1':{}, 'module2':{}}
+        }
+        appssources_mock.return_value.exists.return_value = True
+        self._init_context(configured_modules=['module1'], mod1_inherit='CleepRpcWrapper', mod1_rpc_routes=['alexa'])
+        self.i._load_modules()
+
+        self.i.unload_modules()
+
+        with self.assertRaises(RouteNotFound):
+            self.i.rpc_wrapper('alexa/intent', {})
+
+    @patch('inventory.AppsSources')
+    @patch('inventory.CORE_MODULES', [])
+    def test_rpc_wrapper_no_wrapper(self, appssources_mock):
+        appssources_mock.return_value.get_market.return_value = {
+            'list': {'module1':{}, 'module2':{}}
+        }
+        appssources_mock.return_value.exists.return_value = True
+        self._init_context(configured_modules=['module1', 'module2'])
+
+        self.i._load_modules()
+
+        with self.assertRaises(RouteNotFound):
+            self.i.rpc_wrapper('a_route', {})
+
     def test_get_drivers(self):
         self._init_context()
 
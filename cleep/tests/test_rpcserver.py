@@ -8,7 +8,8 @@ sys.path.append(os.path.abspath(os.path.dirname(__file__)).replace('tests', ''))
 import rpcserver
 from cleep.libs.drivers.driver import Driver
 from cleep.common import MessageRequest, MessageResponse
-from cleep.exception import NoMessageAvailable
+from cleep.exception import NoMessageAvailable, RouteNotFound, InvalidModule
+from cleep.libs.internals.localrpcclient import LocalRpcClient
 import unittest
 import logging
 from boddle import boddle
@@ -16,6 +17,9 @@ from bottle import HTTPError, HTTPResponse
 from unittest.mock import Mock, patch, mock_open, ANY
 import json
 import time
+import tempfile
+import shutil
+import socket
 from collections import OrderedDict
 from cleep.libs.tests.common import get_log_level
 
@@ -373,6 +377,99 @@ class RpcServerTests(unittest.TestCase):
 
         mock_wsgi.assert_called_with(('1.2.3.4', 123), ANY, error_log=ANY, log=ANY, spawn=ANY)
 
+    def test_configure_with_unix_socket(self):
+        self._init_context(exec_configure=False)
+        tmp_dir = tempfile.mkdtemp()
+        socket_path = os.path.join(tmp_dir, 'cleep.sock')
+        rpc_config = {
+            'host': '127.0.0.1',
+            'port': 0,
+            'unix_socket': socket_path,
+        }
+
+        try:
+            rpcserver.configure(rpc_config, self.bootstrap, self.inventory, False)
+            self.assertIsNotNone(rpcserver.unix_server)
+            self.assertTrue(os.path.exists(socket_path))
+
+            rpcserver.unix_server.start()
+            resp = LocalRpcClient(socket_path, timeout=5.0).post('/devices')
+            self.assertEqual(resp['data'], self.DEVICES)
+
+            rpcserver.stop()
+            self.assertFalse(os.path.exists(socket_path))
+        finally:
+            rpcserver.unix_server = None
+            shutil.rmtree(tmp_dir)
+
+    def test_configure_with_stale_unix_socket(self):
+        self._init_context(exec_configure=False)
+        tmp_dir = tempfile.mkdtemp()
+        socket_path = os.path.join(tmp_dir, 'cleep.sock')
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(socket_path)
+        stale.close()
+        rpc_config = {
+            'host': '127.0.0.1',
+            'port': 0,
+            'unix_socket': socket_path,
+        }
+
+        try:
+            rpcserver.configure(rpc_config, self.bootstrap, self.inventory, False)
+
+            self.assertIsNotNone(rpcserver.unix_server)
+            self.assertIsNot(rpcserver.unix_server.pool, rpcserver.server.pool)
+            rpcserver.stop_unix_server()
+        finally:
+            rpcserver.unix_server = None
+            shutil.rmtree(tmp_dir)
+
+    def test_configure_with_unix_socket_path_not_a_socket(self):
+        self._init_context(exec_configure=False)
+        tmp_dir = tempfile.mkdtemp()
+        socket_path = os.path.join(tmp_dir, 'cleep.sock')
+        with open(socket_path, 'w') as fd:
+            fd.write('data')
+        rpc_config = {
+            'host': '127.0.0.1',
+            'port': 0,
+            'unix_socket': socket_path,
+        }
+
+        try:
+            rpcserver.configure(rpc_config, self.bootstrap, self.inventory, False)
+
+            self.assertIsNone(rpcserver.unix_server)
+            with open(socket_path) as fd:
+                self.assertEqual(fd.read(), 'data')
+        finally:
+            rpcserver.unix_server = None
+            shutil.rmtree(tmp_dir)
+
+    def test_configure_with_invalid_unix_socket(self):
+        self._init_context(exec_configure=False)
+        rpc_config = {
+            'unix_socket': '/dummy/cleep.sock',
+        }
+
+        rpcserver.configure(rpc_config, self.bootstrap, self.inventory, False)
+
+        self.assertIsNone(rpcserver.unix_server)
+
+    def test_start_with_unix_server(self):
+        self._init_context()
+
+        with patch('rpcserver.server') as mock_server:
+            with patch('rpcserver.unix_server') as mock_unix_server:
+                mock_unix_server.address = '/dummy/cleep.sock'
+                rpcserver.start()
+
+                mock_unix_server.start.assert_called()
+                self.assertTrue(mock_server.serve_forever.called)
+                mock_unix_server.close.assert_called()
+                mock_unix_server.stop.assert_called()
+
     @patch("rpcserver.logging")
     def test_configure_debug_enabled(self, logging_mock):
         logger_mock = Mock()
@@ -931,6 +1028,121 @@ class RpcServerTests(unittest.TestCase):
             rpcserver.get_config()
             self.assertEqual(self.inventory.get_modules.call_count, 1)
 
+    def test_command_post_sets_profiling_environ(self):
+        self._init_context(push_return_value=MessageResponse(error=True))
+
+        with boddle(method='POST', json={'command': 'cmd', 'to': 'module'}):
+            rpcserver.exec_command()
+            environ = rpcserver.bottle.request.environ
+            self.assertEqual(environ[rpcserver.RequestProfiler.ENVIRON_COMMAND], ('module', 'cmd'))
+            self.assertTrue(environ[rpcserver.RequestProfiler.ENVIRON_ERROR])
+
+    def test_command_unknown_recipient_not_profiled(self):
+        self._init_context(push_side_effect=InvalidModule('dummy'))
+
+        with boddle(method='POST', json={'command': 'cmd', 'to': 'dummy'}):
+            rpcserver.exec_command()
+            environ = rpcserver.bottle.request.environ
+            self.assertNotIn(rpcserver.RequestProfiler.ENVIRON_COMMAND, environ)
+            self.assertTrue(environ[rpcserver.RequestProfiler.ENVIRON_ERROR])
+
+    @patch('rpcserver.pywsgi.WSGIServer')
+    def test_configure_profiler(self, mock_wsgi):
+        self._init_context(exec_configure=False)
+        rpc_config = {
+            'slow_threshold': 2.0,
+            'profile_rate': 0.5,
+        }
+
+        rpcserver.configure(rpc_config, self.bootstrap, self.inventory, False)
+
+        mock_wsgi.assert_called_with(('0.0.0.0', 80), rpcserver.profiler, error_log=ANY, log=ANY, spawn=ANY)
+        self.assertEqual(rpcserver.profiler.app, rpcserver.app)
+        self.assertEqual(rpcserver.profiler.slow_threshold, 2.0)
+        self.assertEqual(rpcserver.profiler.profile_rate, 0.5)
+
+    def test_get_profiling(self):
+        self._init_context()
+
+        with boddle():
+            resp = rpcserver.get_profiling()
+            logging.debug('Resp: %s' % resp)
+
+        self.assertFalse(resp['error'])
+        self.assertEqual(resp['data']['routes'], {})
+        self.assertEqual(resp['data']['slow_threshold'], rpcserver.SLOW_REQUEST_THRESHOLD)
+
+    def test_set_profiling(self):
+        self._init_context()
+
+        with boddle(json={'slow_threshold': 0.5, 'profile_rate': 0.1, 'reset': True}):
+            resp = rpcserver.set_profiling()
+            logging.debug('Resp: %s' % resp)
+
+        self.assertFalse(resp['error'])
+        self.assertEqual(resp['data']['slow_threshold'], 0.5)
+        self.assertEqual(resp['data']['profile_rate'], 0.1)
+
+    def test_set_profiling_invalid_params(self):
+        self._init_context()
+
+        with boddle(json={'profile_rate': 5}):
+            resp = rpcserver.set_profiling()
+
+        self.assertTrue(resp['error'])
+        self.assertEqual(resp['message'], 'Parameter "profile_rate" must be between 0.0 and 1.0')
+
+    @patch('rpcserver.get_startup_profiler')
+    def test_get_startup_profiling(self, get_startup_profiler_mock):
+        get_startup_profiler_mock.return_value.get_last_report.return_value = {'duration': 12.3}
+        self._init_context()
+
+        with boddle():
+            resp = rpcserver.get_startup_profiling()
+            logging.debug('Resp: %s' % resp)
+
+        self.assertFalse(resp['error'])
+        self.assertEqual(resp['data'], {'duration': 12.3})
+
+    @patch('rpcserver.get_startup_profiler')
+    def test_get_startup_profiling_no_profile(self, get_startup_profiler_mock):
+        get_startup_profiler_mock.return_value.get_last_report.return_value = None
+        self._init_context()
+
+        with boddle():
+            resp = rpcserver.get_startup_profiling()
+
+        self.assertTrue(resp['error'])
+        self.assertEqual(resp['message'], 'No startup profile available')
+
+    def test_get_tasks(self):
+        self._init_context(exec_configure=False)
+        task_factory = Mock()
+        task_factory.get_stats.return_value = {'scheduler': {'scheduled': 1}, 'executor': {'queue_depth': 0}}
+        task_factory.get_tasks.return_value = [{'name': 'task.Module.run', 'owner': 'module'}]
+        self.bootstrap['task_factory'] = task_factory
+        rpcserver.configure({}, self.bootstrap, self.inventory, False)
+
+        with boddle():
+            resp = rpcserver.get_tasks()
+            logging.debug('Resp: %s' % resp)
+
+        self.assertFalse(resp['error'])
+        self.assertEqual(resp['data'], {
+            'scheduler': {'scheduled': 1},
+            'executor': {'queue_depth': 0},
+            'tasks': [{'name': 'task.Module.run', 'owner': 'module'}],
+        })
+
+    def test_get_tasks_not_available(self):
+        self._init_context()
+
+        with boddle():
+            resp = rpcserver.get_tasks()
+
+        self.assertTrue(resp['error'])
+        self.assertEqual(resp['message'], 'Tasks statistics are not available')
+
     def test_registerpoll(self):
         self._init_context()
 
@@ -1009,6 +1221,16 @@ class RpcServerTests(unittest.TestCase):
             rpcserver.rpc_wrapper('')
             self.assertTrue(self.inventory.rpc_wrapper.called)
 
+    def test_rpc_wrapper_route_not_found(self):
+        self._init_context()
+        self.inventory.rpc_wrapper.side_effect = RouteNotFound('dummy')
+
+        with boddle():
+            resp = rpcserver.rpc_wrapper('dummy')
+
+        self.assertTrue(isinstance(resp, HTTPError))
+        self.assertEqual(resp.status, '404 Not Found')
+
     def test_default(self):
         self._init_context()
 
@@ -1029,17 +1251,71 @@ class RpcServerTests(unittest.TestCase):
             logging.debug('%s' % i.status)
             self.assertEqual(i.status, '200 OK')
 
-    def test_logs(self):
+    @patch('rpcserver.LogReader')
+    def test_logs(self, log_reader_mock):
+        log_reader_mock.return_value.tail.return_value = {'lines': ['cleep log ', 'file content'], 'offset': 22, 'size': 22}
         self._init_context()
-        message = 'cleep log file content'
-        self.cleep_filesystem.read_data.return_value = message
 
         with boddle():
             resp = rpcserver.logs()
             logging.debug('Resp: %s' % resp)
-            self.assertTrue(message in resp)
+            self.assertTrue('cleep log file content' in resp)
+
+        log_reader_mock.assert_called_with('/var/log/cleep.log')
+        log_reader_mock.return_value.tail.assert_called_with(rpcserver.LOGS_TAIL_LINES, level=None, logger_name=None)
+        self.assertFalse(self.cleep_filesystem.read_data.called)
+
+    @patch('rpcserver.LogReader')
+    def test_read_logs_tail(self, log_reader_mock):
+        result = {'lines': ['line'], 'offset': 5, 'size': 5}
+        log_reader_mock.return_value.tail.return_value = result
+        self._init_context()
+
+        with boddle(query={'tail': '10', 'level': 'warning', 'logger': 'RpcServer'}):
+            resp = rpcserver.read_logs()
+            logging.debug('Resp: %s' % resp)
+
+        self.assertFalse(resp['error'])
+        self.assertEqual(resp['data'], result)
+        log_reader_mock.return_value.tail.assert_called_with('10', level='warning', logger_name='RpcServer')
+
+    @patch('rpcserver.LogReader')
+    def test_read_logs_offset(self, log_reader_mock):
+        result = {'lines': ['line'], 'offset': 10, 'size': 10}
+        log_reader_mock.return_value.read.return_value = result
+        self._init_context()
+
+        with boddle(query={'offset': '5', 'maxbytes': '100'}):
+            resp = rpcserver.read_logs()
+
+        self.assertFalse(resp['error'])
+        self.assertEqual(resp['data'], result)
+        log_reader_mock.return_value.read.assert_called_with('5', max_bytes='100', level=None, logger_name=None)
+        self.assertFalse(log_reader_mock.return_value.follow.called)
+
+    @patch('rpcserver.LogReader')
+    def test_read_logs_follow(self, log_reader_mock):
+        result = {'lines': ['line'], 'offset': 10, 'size': 10}
+        log_reader_mock.return_value.follow.return_value = result
+        self._init_context()
+
+        with boddle(query={'offset': '5', 'follow': 'true'}):
+            resp = rpcserver.read_logs()
+
+        self.assertFalse(resp['error'])
+        self.assertEqual(resp['data'], result)
+        log_reader_mock.return_value.follow.assert_called_with('5', rpcserver.POLL_TIMEOUT, max_bytes=None, level=None, logger_name=None)
+
+    @patch('rpcserver.LogReader')
+    def test_read_logs_exception(self, log_reader_mock):
+        log_reader_mock.return_value.tail.side_effect = ValueError('Invalid log level "dummy"')
+        self._init_context()
+
+        with boddle(query={'level': 'dummy'}):
+            resp = rpcserver.read_logs()
 
-        self.cleep_filesystem.read_data.assert_called_with('/var/log/cleep.log')
+        self.assertTrue(resp['error'])
+        self.assertEqual(resp['message'], 'Invalid log level "dummy"')
 
     def test_authenticate(self):
         self._init_context()